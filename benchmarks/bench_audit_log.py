@@ -0,0 +1,113 @@
+# benchmarks/bench_audit_log.py
+# Audit log benchmark: what auditing adds to an advice request. Compares a synchronous single-row INSERT
+# per decision against the write-behind AuditLog (services/audit_service.py). Each variant reports the
+# per-call latency on the request thread, the time until the writer has persisted everything, and the
+# rows actually stored. The database runs are on a throwaway SQLite file; the Parquet runs use a temp dir.
+# The last variant has a tiny queue and no backpressure wait, so entries spill to synchronous writes;
+# none may be lost.
+#
+#   python benchmarks/bench_audit_log.py --entries 20000
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+PROFILE_DATA_FILE = os.path.join(PROJECT_ROOT, 'data', 'user_profile_data_india.csv')
+PROFILE_COLUMNS = ['AgeRange', 'IncomeRange', 'SavingsLevel', 'DebtLevel', 'HasDependents', 'PrimaryGoal',
+                   'TimeHorizonYears', 'SelfReportedTolerance', 'InvestmentKnowledge', 'LiquidityNeeds']
+
+
+def sample_decisions(n_profiles, seed=45):
+    """(user_id, profile, advice) from real generate_advice runs."""
+    import pandas as pd
+    from services import advice_service, db_service
+    profiles = pd.read_csv(PROFILE_DATA_FILE)[PROFILE_COLUMNS].sample(n=n_profiles, random_state=seed)
+    decisions = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        db_service.init_db()
+        for i, row in enumerate(profiles.to_dict(orient="records")):
+            profile = {**row, 'TimeHorizonYears': int(row['TimeHorizonYears'])}
+            user_id = db_service.create_user(f"audit_bench_{i}_{time.time_ns()}", "not-a-real-hash")
+            db_service.save_or_update_profile(user_id, profile)
+            decisions.append((user_id, profile, advice_service.generate_advice(user_id)))
+    return decisions
+
+
+def audit_rows():
+    from sqlalchemy import func, select
+    from db_models import AdviceAudit, get_engine
+    with get_engine().connect() as connection: return connection.execute(select(func.count()).select_from(AdviceAudit.__table__)).scalar()
+
+
+def timed_calls(fn, entries):
+    import numpy as np
+    latencies = np.empty(len(entries))
+    for i, entry in enumerate(entries):
+        start = time.perf_counter(); fn(entry); latencies[i] = time.perf_counter() - start
+    return latencies * 1e6
+
+
+def report(name, latencies_us, persisted_s, stored, expected, extra=""):
+    import numpy as np
+    p50, p99 = np.percentile(latencies_us, [50, 99])
+    print(f"{name:<34} p50 {p50:>9.1f} us  p99 {p99:>9.1f} us  max {latencies_us.max():>9.0f} us  "
+          f"persisted after {persisted_s:6.2f} s  stored {stored}/{expected}{extra}")
+
+
+def run_write_behind(audit_service, sink_factory, entries, **options):
+    log = audit_service.AuditLog(sink_factory, **options)
+    start = time.perf_counter()
+    latencies = timed_calls(log.record, entries)
+    log.flush(); log.close()
+    return log, latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronous vs write-behind advice audit logging.")
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--sync-entries", type=int, default=500, help="Entries for the synchronous INSERT baseline.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_audit_")
+    os.environ["DATABASE_URL_STREAMLIT"] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ["WARM_CACHE"] = "off" # Every run starts cold and leaves no cache snapshot behind
+    os.environ["AUDIT_SINK"] = "off" # generate_advice must not audit the sample runs; the benchmark builds its own logs
+    sys.path.insert(0, APP_DIR)
+    with contextlib.redirect_stdout(io.StringIO()): # Model loading logs
+        from services import audit_service, advice_service
+    decisions = sample_decisions(20)
+    model_version = advice_service.get_model_version()
+    entries = [(time.time(), *decisions[i % len(decisions)], model_version) for i in range(args.entries)]
+    print(f"\n--- Audit Log Benchmark ({args.entries:,} decisions) ---")
+
+    with contextlib.redirect_stdout(io.StringIO()): audit_service.DatabaseSink().write([audit_service.to_row(entries[0])]) # Migrate + warm
+    before = audit_rows()
+    sync_entries = entries[:args.sync_entries]
+    start = time.perf_counter()
+    latencies = timed_calls(lambda entry: audit_service.DatabaseSink().write([audit_service.to_row(entry)]), sync_entries)
+    report("sync INSERT per request", latencies, time.perf_counter() - start, audit_rows() - before, len(sync_entries))
+
+    before = audit_rows()
+    log, latencies, persisted_s = run_write_behind(audit_service, audit_service.DatabaseSink, entries)
+    report("write-behind, SQLite executemany", latencies, persisted_s, audit_rows() - before, len(entries), f"  ({log.stats['batches']} batches)")
+
+    import pyarrow.parquet as pq
+    sink = audit_service.ParquetSink(os.path.join(work_dir, "parquet"))
+    log, latencies, persisted_s = run_write_behind(audit_service, lambda: sink, entries)
+    stored = sum(pq.ParquetFile(path).metadata.num_rows for path in sink.paths)
+    row_groups = sum(pq.ParquetFile(path).metadata.num_row_groups for path in sink.paths)
+    report("write-behind, Parquet row groups", latencies, persisted_s, stored, len(entries), f"  ({row_groups} row groups)")
+
+    before = audit_rows()
+    log, latencies, persisted_s = run_write_behind(audit_service, audit_service.DatabaseSink, entries, maxsize=64, backpressure_s=0.0)
+    report("backpressure (queue 64, no wait)", latencies, persisted_s, audit_rows() - before, len(entries),
+           f"  ({log.stats['sync_writes']} synchronous, {log.stats['failed']} lost)")
+
+
+if __name__ == "__main__":
+    main()
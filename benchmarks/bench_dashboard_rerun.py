@@ -0,0 +1,88 @@
+# benchmarks/bench_dashboard_rerun.py
+# Measures what a calculator slider move costs on the Dashboard page: rerun latency, Python heap
+# growth across reruns (tracemalloc) and profile queries per rerun. Runs the page headless with
+# streamlit.testing's AppTest against a throwaway SQLite DB. AppTest always reruns the whole script,
+# so the numbers are an upper bound for a slider inside one of the page's fragments.
+#
+#   python benchmarks/bench_dashboard_rerun.py --reruns 40
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+PAGES_DIR = os.path.join(APP_DIR, 'pages')
+
+SAMPLE_PROFILE = {'AgeRange': '25-34', 'IncomeRange': '₹5-12 LPA', 'SavingsLevel': 'Medium', 'DebtLevel': 'Low',
+                  'HasDependents': 'No', 'PrimaryGoal': 'Wealth', 'TimeHorizonYears': 13, 'SelfReportedTolerance': 'High',
+                  'InvestmentKnowledge': 'Intermediate', 'LiquidityNeeds': 'Low'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard rerun latency and memory benchmark.")
+    parser.add_argument("--reruns", type=int, default=40)
+    parser.add_argument("--no-advice", action="store_true", help="Skip generating advice before timing the calculator reruns.")
+    args = parser.parse_args()
+
+    # The DB URL is read at import time, so point it at a throwaway SQLite file first.
+    os.environ["DATABASE_URL_STREAMLIT"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='dash_bench_'), 'bench.db')}"
+    os.environ["WARM_CACHE"] = "off" # Every run starts cold and leaves no cache snapshot behind
+    sys.path.insert(0, APP_DIR)
+    import numpy as np
+    from streamlit.testing.v1 import AppTest
+    from services import db_service
+
+    db_service.init_db()
+    user_id = db_service.create_user("bench_user", "not-a-real-hash")
+    db_service.save_or_update_profile(user_id, dict(SAMPLE_PROFILE))
+
+    # Count profile queries issued by the page.
+    profile_queries = {"count": 0}
+    for name in ("is_profile_complete", "get_profile"):
+        original = getattr(db_service, name)
+        def counted(*a, _original=original, **kw):
+            profile_queries["count"] += 1
+            return _original(*a, **kw)
+        setattr(db_service, name, counted)
+
+    page = next(f for f in os.listdir(PAGES_DIR) if f.startswith("3_"))
+    at = AppTest.from_file(os.path.join(PAGES_DIR, page), default_timeout=120)
+    at.session_state.logged_in = True; at.session_state.user_id = user_id; at.session_state.username = "bench_user"
+    at.run()
+    if not args.no_advice:
+        next(b for b in at.button if "Advice" in b.label).click().run()
+    if at.exception: raise SystemExit(f"Page raised: {at.exception}")
+
+    def move_slider(i):
+        at.slider(key="sip_r_slider").set_value(8.0 + (i % 20) * 0.5).run()
+
+    # Warm-up rerun so first-use caches are filled before measuring.
+    move_slider(-1)
+    queries_start = profile_queries["count"]
+    latencies = []
+    for i in range(args.reruns):
+        start = time.perf_counter()
+        move_slider(i)
+        latencies.append(time.perf_counter() - start)
+    queries = profile_queries["count"] - queries_start
+
+    # Heap growth is measured in a second pass: tracemalloc slows every allocation and would skew the timings.
+    tracemalloc.start()
+    heap_start = tracemalloc.get_traced_memory()[0]
+    for i in range(args.reruns): move_slider(i)
+    heap_growth = tracemalloc.get_traced_memory()[0] - heap_start
+    tracemalloc.stop()
+
+    latencies = np.array(latencies) * 1000
+    print("\n--- Dashboard Rerun Benchmark ---")
+    print(f"Reruns: {args.reruns} (SIP return slider)")
+    print(f"Rerun latency ms: mean={latencies.mean():.1f} p50={np.percentile(latencies, 50):.1f} p95={np.percentile(latencies, 95):.1f}")
+    print(f"Heap growth: {heap_growth / 1024:.0f} KiB total, {heap_growth / 1024 / args.reruns:.1f} KiB per rerun")
+    print(f"Profile queries per rerun: {queries / args.reruns:.1f}")
+
+
+if __name__ == "__main__":
+    main()
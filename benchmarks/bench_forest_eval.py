@@ -0,0 +1,64 @@
+# benchmarks/bench_forest_eval.py
+# Latency of the risk RandomForest: sklearn predict_proba vs the array-backed forest_eval kernel, at
+# several batch sizes. Every timed result is also checked for exact equality with sklearn.
+#
+#   python benchmarks/bench_forest_eval.py --batch-sizes 1 100 100000
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+MODEL_DIR = os.path.join(PROJECT_ROOT, 'models')
+PROFILE_DATA_FILE = os.path.join(PROJECT_ROOT, 'data', 'user_profile_data_india.csv')
+RISK_FEATURE_ORDER = ['AgeRange', 'IncomeRange', 'SavingsLevel', 'DebtLevel', 'HasDependents', 'PrimaryGoal', 'TimeHorizonYears', 'SelfReportedTolerance']
+
+
+def best_time(fn, repeats):
+    """Best wall time of `repeats` calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter(); fn(); best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Risk forest evaluator latency benchmark.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 100_000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    sys.path.insert(0, APP_DIR)
+    import joblib
+    import numpy as np
+    import pandas as pd
+    from ai_integration import forest_eval
+
+    model = joblib.load(os.path.join(MODEL_DIR, 'risk_profile_rf_model.joblib'))
+    preprocessor = joblib.load(os.path.join(MODEL_DIR, 'user_data_preprocessor.joblib'))
+    encoded = preprocessor.transform(pd.read_csv(PROFILE_DATA_FILE)[RISK_FEATURE_ORDER])
+    if hasattr(encoded, "toarray"): encoded = encoded.toarray()
+
+    start = time.perf_counter()
+    forest = forest_eval.flatten_forest(model)
+    flatten_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    forest_eval.predict_proba(forest, encoded[:1]); forest_eval.predict_proba(forest, encoded[np.arange(forest_eval.PARALLEL_MIN_ROWS) % len(encoded)])
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    rng = np.random.default_rng(args.seed)
+    print("\n--- Risk Forest Evaluator Benchmark ---")
+    print(f"Forest: {len(forest.roots)} trees, {len(forest.feature)} nodes; flatten {flatten_ms:.0f} ms, kernel load/compile {compile_ms:.0f} ms")
+    print(f"{'batch':>8} {'sklearn ms':>11} {'forest_eval ms':>15} {'speedup':>8}  exact")
+    for batch_size in args.batch_sizes:
+        X = encoded[rng.integers(0, len(encoded), size=batch_size)]
+        repeats = 50 if batch_size <= 1000 else 3
+        expected, actual = model.predict_proba(X), forest_eval.predict_proba(forest, X)
+        sklearn_s = best_time(lambda: model.predict_proba(X), repeats)
+        forest_s = best_time(lambda: forest_eval.predict_proba(forest, X), repeats)
+        print(f"{batch_size:>8} {sklearn_s * 1000:>11.3f} {forest_s * 1000:>15.3f} {sklearn_s / forest_s:>7.1f}x  {np.array_equal(expected, actual)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_fund_catalog.py
+# Fund ranking latency over a synthetic catalog: index-backed filtering, batched suitability scoring over
+# distinct investment types and heap top-k, against a scan + per-scheme predict_proba + full sort baseline.
+#
+#   python benchmarks/bench_fund_catalog.py --schemes 10000 50000
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+PROFILE = {'InvestmentKnowledge': 'Intermediate', 'LiquidityNeeds': 'Low', 'TimeHorizonYears': 13}
+QUERY = {'categories': ['IndexFund', 'LargeCapMF', 'MidSmallCapMF'], 'max_volatility': 'High', 'min_return': 'Medium'}
+
+
+def best_time(fn, repeats):
+    """Best wall time of `repeats` calls, in seconds, and the last result."""
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter(); result = fn(); best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fund catalog filtering and top-k ranking benchmark.")
+    parser.add_argument("--schemes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--risk-profile", default="Aggressive")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, APP_DIR)
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, 'ml_scripts', 'data_generation'))
+    import numpy as np
+    import pandas as pd
+    from ai_integration import catalog, prediction
+    from generate_fund_catalog import generate_catalog
+
+    def baseline(fund_catalog):
+        # Boolean scan of every scheme, one model row per scheme, full sort.
+        columns = fund_catalog.columns
+        mask = (np.isin(columns['InvestmentType'], QUERY['categories'])
+                & (fund_catalog.volatility_band <= catalog.BANDS.index(QUERY['max_volatility']))
+                & (fund_catalog.return_band >= catalog.BANDS.index(QUERY['min_return'])))
+        row_ids = np.flatnonzero(mask)
+        types = columns['InvestmentType'][row_ids]
+        rows = pd.DataFrame({'RiskProfile': args.risk_profile, **PROFILE, 'InvestmentType': types,
+                             'InvestmentVolRange': [prediction.AVAILABLE_INVESTMENTS[t]['Volatility'] for t in types],
+                             'InvestmentRetRange': [prediction.AVAILABLE_INVESTMENTS[t]['Return'] for t in types]}, columns=prediction.INV_FEATURE_ORDER)
+        scores = prediction.predict_suitability_proba(rows)
+        order = np.lexsort((columns['ExpenseRatio'][row_ids], -columns['Return5Y'][row_ids], -scores))
+        return [int(row_ids[i]) for i in order if scores[i] >= catalog.SUITABILITY_THRESHOLD][:args.k]
+
+    def indexed(fund_catalog):
+        row_ids = catalog.filter_schemes(fund_catalog, **QUERY)
+        return [row for row, _ in catalog.top_k(fund_catalog, row_ids, catalog.score_schemes(fund_catalog, row_ids, PROFILE, args.risk_profile), args.k)]
+
+    print("\n--- Fund Catalog Ranking Benchmark ---")
+    print(f"Query: {QUERY}, risk profile {args.risk_profile}, top {args.k}")
+    print(f"{'schemes':>8} {'build ms':>9} {'candidates':>11} {'baseline ms':>12} {'indexed ms':>11} {'speedup':>8}  same top-k")
+    for n_schemes in args.schemes:
+        catalog_df = generate_catalog(n_schemes)
+        build_s, fund_catalog = best_time(lambda: catalog.build_catalog(catalog_df), 1)
+        candidates = len(catalog.filter_schemes(fund_catalog, **QUERY))
+        baseline_s, expected = best_time(lambda: baseline(fund_catalog), args.repeats)
+        indexed_s, actual = best_time(lambda: indexed(fund_catalog), args.repeats)
+        print(f"{n_schemes:>8} {build_s * 1000:>9.1f} {candidates:>11} {baseline_s * 1000:>12.1f} {indexed_s * 1000:>11.1f} {baseline_s / indexed_s:>7.1f}x  {expected == actual}")
+
+
+if __name__ == "__main__":
+    main()
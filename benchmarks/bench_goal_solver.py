@@ -0,0 +1,91 @@
+# benchmarks/bench_goal_solver.py
+# Goal solver benchmark on random goals: required SIP and time-to-goal for the whole batch
+# (ai_integration/goal_solver.py) against per-goal Python loops on a sample, checking that the required
+# SIPs reproduce the goals through the calculators' projection (project_value_curves) and that the
+# months to goal agree with a month-by-month simulation.
+#
+#   python benchmarks/bench_goal_solver.py --goals 1000000 --sample 2000
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+
+
+def loop_months_to_goal(goal, sip, rate, step_up, initial, max_months):
+    """Month-by-month simulation with the calculators' conventions (end-of-month instalments, yearly step-up)."""
+    value = initial
+    for month in range(max_months + 1):
+        if value >= goal: return month
+        value = value * (1 + rate / 12) + sip * (1 + step_up) ** (month // 12)
+    return float('nan')
+
+
+def loop_required_sip(goal, rate, years, step_up, initial, projection):
+    """Bisection on the scalar calculator: the baseline the closed form replaces."""
+    low, high = 0.0, goal
+    for _ in range(60):
+        mid = (low + high) / 2
+        value = projection.project_value_curves(mid, rate, years, projection.CONTRIBUTION_STEP_UP_SIP, 12, step_up)[-1]
+        value += initial * (1 + rate / 12) ** (12 * years)
+        low, high = (mid, high) if value < goal else (low, mid)
+    return high
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch goal solver vs per-goal loops.")
+    parser.add_argument("--goals", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=2000, help="Goals run through the loop baselines.")
+    args = parser.parse_args()
+
+    sys.path.insert(0, APP_DIR)
+    import numpy as np
+    import pandas as pd
+    from ai_integration import goal_solver, projection
+
+    rng = np.random.default_rng(38)
+    n = args.goals
+    goals = pd.DataFrame({
+        "GoalAmount": np.round(10 ** rng.uniform(5, 8, n), -3), "Years": rng.integers(1, 41, n),
+        "AnnualReturn": rng.uniform(0, 18, n).round(1), "StepUp": rng.choice([0, 5, 10, 15], n),
+        "CurrentSavings": np.where(rng.random(n) < 0.5, 0, np.round(10 ** rng.uniform(4, 7, n), -3)),
+        "MonthlySIP": np.round(10 ** rng.uniform(3, 5, n), -2),
+    })
+
+    start = time.perf_counter()
+    solved = goal_solver.solve_goals(goals)
+    batch_s = time.perf_counter() - start
+    start = time.perf_counter()
+    goal_solver.solve_goals(goals.drop(columns="MonthlySIP"))
+    required_s = time.perf_counter() - start
+
+    rows = solved.sample(min(args.sample, n), random_state=0)
+    rates, step_ups = rows["AnnualReturn"].to_numpy() / 100, rows["StepUp"].to_numpy() / 100
+    start = time.perf_counter()
+    loop_sip = [loop_required_sip(r.GoalAmount, rate, r.Years, s, r.CurrentSavings, projection) for r, rate, s in zip(rows.itertuples(), rates, step_ups)]
+    loop_sip_s = (time.perf_counter() - start) / len(rows)
+    start = time.perf_counter()
+    loop_months = [loop_months_to_goal(r.GoalAmount, r.MonthlySIP, rate, s, r.CurrentSavings, goal_solver.MAX_YEARS * 12) for r, rate, s in zip(rows.itertuples(), rates, step_ups)]
+    loop_months_s = (time.perf_counter() - start) / len(rows)
+
+    # Consistency with the calculators: the required SIP projected forward lands on the goal.
+    reproduced = (projection.project_value_curves(rows["RequiredMonthlySIP"].to_numpy(), rates, rows["Years"].to_numpy(), projection.CONTRIBUTION_STEP_UP_SIP, 12, step_ups)
+                  [np.arange(len(rows)), rows["Years"].to_numpy()] + rows["CurrentSavings"].to_numpy() * (1 + rates / 12) ** (12 * rows["Years"].to_numpy()))
+    needs_sip = rows["RequiredMonthlySIP"].to_numpy() > 0
+    goal_error = np.max(np.abs(reproduced - rows["GoalAmount"].to_numpy())[needs_sip] / rows["GoalAmount"].to_numpy()[needs_sip])
+    sip_diff = np.max(np.abs(rows["RequiredMonthlySIP"].to_numpy() - loop_sip) / np.maximum(1, np.asarray(loop_sip)))
+    months = rows["MonthsToGoal"].to_numpy()
+    months_match = np.mean((months == loop_months) | (np.isnan(months) & np.isnan(loop_months)))
+
+    print("\n--- Goal Solver Benchmark ---")
+    print(f"{n:,} goals; {int(solved['MonthsToGoal'].isna().sum()):,} not reachable within {goal_solver.MAX_YEARS} years")
+    print(f"Batch: required SIP {required_s * 1000:.0f} ms; required SIP + time to goal {batch_s * 1000:.0f} ms ({batch_s / n * 1e6:.2f} us/goal)")
+    print(f"Loop baselines: required SIP {loop_sip_s * 1e6:.0f} us/goal, time to goal {loop_months_s * 1e6:.0f} us/goal "
+          f"-> ~{(loop_sip_s + loop_months_s) * n:.0f} s for the batch ({(loop_sip_s + loop_months_s) * n / batch_s:.0f}x)")
+    print(f"Required SIP reproduces the goal to {goal_error:.1e} (relative); vs loop {sip_diff:.1e}; months to goal match loop on {months_match:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_home_first_paint.py
+# Time-to-first-paint of Home.py and the SQL it issues per rerun. The database is bootstrapped in a
+# separate process first, so the measured process sees an existing deployment, as a new app worker would.
+#
+#   python benchmarks/bench_home_first_paint.py --reruns 50
+#   DATABASE_URL_STREAMLIT=postgresql://... python benchmarks/bench_home_first_paint.py
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Home page first paint and per-rerun SQL benchmark.")
+    parser.add_argument("--reruns", type=int, default=50)
+    args = parser.parse_args()
+
+    if "DATABASE_URL_STREAMLIT" not in os.environ:
+        os.environ["DATABASE_URL_STREAMLIT"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='home_bench_'), 'bench.db')}"
+    os.environ["WARM_CACHE"] = "off" # Every run starts cold and leaves no cache snapshot behind
+    subprocess.run([sys.executable, "-c", "from services import db_service; db_service.init_db()"],
+                   cwd=APP_DIR, check=True, capture_output=True)
+
+    sys.path.insert(0, APP_DIR)
+    os.chdir(APP_DIR)
+    import numpy as np
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from streamlit.testing.v1 import AppTest
+
+    # Listening on the Engine class also catches an engine created lazily during the first run.
+    statements = {"count": 0}
+    def count_statement(*_): statements["count"] += 1
+    event.listen(Engine, "before_cursor_execute", count_statement)
+
+    at = AppTest.from_file(os.path.join(APP_DIR, "Home.py"), default_timeout=60)
+    start = time.perf_counter()
+    at.run()
+    first_paint = time.perf_counter() - start
+    if at.exception: raise SystemExit(f"Home.py raised: {at.exception}")
+    first_paint_statements, statements["count"] = statements["count"], 0
+
+    latencies = []
+    for _ in range(args.reruns):
+        start = time.perf_counter()
+        at.run()
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+
+    print("\n--- Home First Paint Benchmark ---")
+    print(f"First paint (cold process, existing schema): {first_paint * 1000:.0f} ms, {first_paint_statements} SQL statements")
+    print(f"Rerun latency ms over {args.reruns} reruns: mean={latencies.mean():.1f} p50={np.percentile(latencies, 50):.1f} p95={np.percentile(latencies, 95):.1f}")
+    print(f"SQL statements per rerun: {statements['count'] / args.reruns:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# benchmarks/bench_inference.py
+# Inference hot-path benchmark suite: risk prediction + SHAP text, investment recommendations, the SHAP
+# formatter, growth projection and generate_advice (on a throwaway SQLite database), over profiles from
+# data/user_profile_data_india.csv. Measures cold latency (first call in a fresh process, after import),
+# warm p50/p95 latency, tracemalloc peak per call (median over TRACE_CALLS calls), batch throughput of the batched scoring functions and
+# the process peak RSS. Results are compared against benchmarks/baselines/inference.json; a metric worse
+# than its baseline by more than the threshold for its kind fails the run (exit status 1).
+#
+#   python benchmarks/bench_inference.py                  # measure and compare
+#   python benchmarks/bench_inference.py --save-baseline  # measure and store as the new baseline
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+PROFILE_DATA_FILE = os.path.join(PROJECT_ROOT, 'data', 'user_profile_data_india.csv')
+BASELINE_FILE = os.path.join(PROJECT_ROOT, 'benchmarks', 'baselines', 'inference.json')
+# Allowed relative regression per metric kind (by name suffix); cold starts and RSS are the noisiest.
+DEFAULT_THRESHOLDS = {"cold_ms": 0.75, "_ms": 0.5, "_per_s": 0.35, "_kib": 0.25, "_mib": 0.25}
+TRACE_CALLS = 15 # Per-call tracemalloc peaks per case; the median ignores calls that overlap a background thread's allocations
+BACKGROUND_THREADS = ("memory-budget", "market-estimates") # Started by the model loader; joined before measuring
+NOISE_FLOOR_MS = {"cold_ms": 5.0, "_ms": 0.1} # Latency changes smaller than this are noise, whatever the relative change
+PROFILE_COLUMNS = ['AgeRange', 'IncomeRange', 'SavingsLevel', 'DebtLevel', 'HasDependents', 'PrimaryGoal',
+                   'TimeHorizonYears', 'SelfReportedTolerance', 'InvestmentKnowledge', 'LiquidityNeeds']
+
+
+def load_profiles(n, seed):
+    import pandas as pd
+    profiles = pd.read_csv(PROFILE_DATA_FILE)[PROFILE_COLUMNS].sample(n=n, random_state=seed)
+    return [{**row, 'TimeHorizonYears': int(row['TimeHorizonYears'])} for row in profiles.to_dict(orient="records")]
+
+
+def best_time(fn, repeats=3):
+    """Best wall time of `repeats` calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter(); fn(); best = min(best, time.perf_counter() - start)
+    return best
+
+
+def use_throwaway_db():
+    """Points the app at a fresh SQLite file (the DB URL is read at import time)."""
+    os.environ["DATABASE_URL_STREAMLIT"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_inference_'), 'bench.db')}"
+    os.environ["WARM_CACHE"] = "off" # Every run starts cold and leaves no cache snapshot behind
+
+
+def make_cases(prediction, advice_service, db_service, profiles):
+    """name -> function(i) running the i-th call of that case (profiles are cycled)."""
+    user_ids = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        db_service.init_db()
+        for i, profile in enumerate(profiles):
+            user_id = db_service.create_user(f"bench_{i}_{time.time_ns()}", "not-a-real-hash")
+            db_service.save_or_update_profile(user_id, profile)
+            user_ids.append(user_id)
+        risk_labels = [prediction.get_risk_profile_and_explanation(p, explain=False)["prediction"] for p in profiles]
+        # SHAP values for the formatter case, computed once so only the formatting is timed.
+        explainer, feature_names = prediction.AI_COMPONENTS["risk_explainer"], prediction.AI_COMPONENTS["risk_feature_names"]
+        classes = list(prediction.AI_COMPONENTS["risk_model"].classes_)
+        processed = [prediction.AI_COMPONENTS["risk_preprocessor"].transform(prediction.pd.DataFrame([p], columns=prediction.RISK_FEATURE_ORDER)) for p in profiles]
+        shap_instances = [explainer.shap_values(x)[0, :, classes.index(label)] for x, label in zip(processed, risk_labels)]
+    n = len(profiles)
+    return {
+        "risk_profile": lambda i: prediction.get_risk_profile_and_explanation(profiles[i % n]),
+        "investment_recommendations": lambda i: prediction.get_investment_recommendations_and_explanation(profiles[i % n], risk_labels[i % n]),
+        "format_shap": lambda i: prediction.format_shap_explanation_user_focused(shap_instances[i % n], feature_names, profiles[i % n], risk_labels[i % n]),
+        "project_growth": lambda i: prediction.project_investment_growth(100000 + i, 0.08 + (i % 7) / 100, 10, 'monthly'),
+        "generate_advice": lambda i: advice_service.generate_advice(user_ids[i % n]),
+    }
+
+
+def import_app():
+    with contextlib.redirect_stdout(io.StringIO()): # Model loading logs
+        start = time.perf_counter()
+        from ai_integration import prediction
+        import_ms = (time.perf_counter() - start) * 1000
+        from services import advice_service, db_service
+    return prediction, advice_service, db_service, import_ms
+
+
+def measure_cold(args):
+    """Run in a fresh process: import time and the first call of every case."""
+    use_throwaway_db()
+    sys.path.insert(0, APP_DIR)
+    prediction, advice_service, db_service, import_ms = import_app()
+    cases = make_cases(prediction, advice_service, db_service, load_profiles(args.profiles, args.seed))
+    metrics = {"import.prediction_cold_ms": import_ms}
+    for name, case in cases.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter(); case(0); metrics[f"{name}.cold_ms"] = (time.perf_counter() - start) * 1000
+    return metrics
+
+
+def peak_kib(case, calls):
+    """Median over calls of one call's tracemalloc peak above the memory traced when it started, in KiB."""
+    import numpy as np
+    peaks = []
+    tracemalloc.start()
+    for i in range(calls):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        case(i)
+        peaks.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+    tracemalloc.stop()
+    return float(np.median(peaks))
+
+
+def measure_warm(args):
+    import threading
+    import numpy as np
+    use_throwaway_db()
+    sys.path.insert(0, APP_DIR)
+    prediction, advice_service, db_service, _ = import_app()
+    for thread in threading.enumerate():
+        if thread.name in BACKGROUND_THREADS: thread.join(timeout=120)
+    profiles = load_profiles(args.profiles, args.seed)
+    cases = make_cases(prediction, advice_service, db_service, profiles)
+    metrics = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, case in cases.items():
+            for i in range(3): case(i) # Warm-up
+            latencies = []
+            for i in range(args.repeats):
+                start = time.perf_counter(); case(i); latencies.append((time.perf_counter() - start) * 1000)
+            metrics[f"{name}.warm_p50_ms"], metrics[f"{name}.warm_p95_ms"] = np.percentile(latencies, [50, 95]).tolist()
+            metrics[f"{name}.peak_kib"] = peak_kib(case, TRACE_CALLS)
+
+        import pandas as pd
+        batch = pd.read_csv(PROFILE_DATA_FILE)[PROFILE_COLUMNS]
+        labels = prediction.predict_risk_profiles_batch(batch)
+        metrics["batch.risk_profiles_per_s"] = len(batch) / best_time(lambda: prediction.predict_risk_profiles_batch(batch))
+        metrics["batch.suitability_profiles_per_s"] = len(batch) / best_time(lambda: prediction.predict_investment_suitability_batch(batch, labels))
+    metrics["process.max_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # KiB on Linux
+    return metrics
+
+
+def threshold_for(metric, thresholds):
+    """Value for the longest matching name suffix."""
+    return next(thresholds[suffix] for suffix in sorted(thresholds, key=len, reverse=True) if metric.endswith(suffix))
+
+
+def compare(metrics, baseline):
+    """List of (metric, baseline, current, change) for metrics worse than baseline beyond their threshold."""
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}
+    regressions = []
+    for metric, current in metrics.items():
+        base = baseline["metrics"].get(metric)
+        if not base: continue
+        change = (base - current) / base if metric.endswith("_per_s") else (current - base) / base # Positive = worse
+        if metric.endswith("_ms") and abs(current - base) < threshold_for(metric, NOISE_FLOOR_MS): continue
+        if change > threshold_for(metric, thresholds): regressions.append((metric, base, current, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference hot-path benchmarks with baseline regression checks.")
+    parser.add_argument("--profiles", type=int, default=20, help="Distinct profiles the cases cycle through.")
+    parser.add_argument("--repeats", type=int, default=50, help="Warm calls per case.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--cold", action="store_true", help=argparse.SUPPRESS) # Child process mode
+    args = parser.parse_args()
+
+    if args.cold:
+        print(json.dumps(measure_cold(args)))
+        return
+    child = subprocess.run([sys.executable, __file__, "--cold", "--profiles", str(args.profiles), "--seed", str(args.seed)],
+                           capture_output=True, text=True, check=True)
+    metrics = {**json.loads(child.stdout.strip().splitlines()[-1]), **measure_warm(args)}
+
+    print("\n--- Inference Benchmarks ---")
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f: baseline = json.load(f)
+    for metric, value in metrics.items():
+        base = baseline["metrics"].get(metric) if baseline else None
+        print(f"{metric:<42} {value:>12.2f}" + (f"   baseline {base:>12.2f}" if base else ""))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        thresholds = baseline.get("thresholds", DEFAULT_THRESHOLDS) if baseline else DEFAULT_THRESHOLDS
+        with open(args.baseline, "w") as f:
+            json.dump({"metrics": {k: round(v, 3) for k, v in metrics.items()}, "thresholds": thresholds,
+                       "profiles": args.profiles, "repeats": args.repeats}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {os.path.relpath(args.baseline, PROJECT_ROOT)}.")
+        return
+    if not baseline:
+        print("No baseline yet; run with --save-baseline to create one.")
+        return
+    regressions = compare(metrics, baseline)
+    for metric, base, current, change in regressions:
+        print(f"REGRESSION {metric}: {base:.2f} -> {current:.2f} ({change:+.0%} worse)")
+    if regressions: sys.exit(1)
+    print("No regressions beyond thresholds.")
+
+
+if __name__ == "__main__":
+    main()
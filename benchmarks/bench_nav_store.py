@@ -0,0 +1,64 @@
+# benchmarks/bench_nav_store.py
+# NAV store benchmark on a synthetic universe: daily append cost (only the tail chunk is written), range
+# reads, and the vectorized rolling estimates against the equivalent pandas rolling computations.
+#
+#   python benchmarks/bench_nav_store.py --schemes 10000 --years 5
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+
+
+def timed(fn):
+    start = time.perf_counter(); result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NAV store append/read/estimate benchmark.")
+    parser.add_argument("--schemes", type=int, default=10_000)
+    parser.add_argument("--years", type=float, default=5.0)
+    parser.add_argument("--window", type=int, default=252)
+    args = parser.parse_args()
+
+    sys.path.insert(0, APP_DIR)
+    import numpy as np
+    import pandas as pd
+    from ai_integration import nav_store
+
+    rng = np.random.default_rng(7)
+    n_days = int(args.years * nav_store.TRADING_DAYS_PER_YEAR)
+    dates = np.busday_offset(np.datetime64('2015-01-01', 'D'), np.arange(n_days + 1), roll='forward').astype('datetime64[D]')
+    navs = 10 * np.exp(np.cumsum(rng.normal(0.0004, 0.01, size=(n_days + 1, args.schemes)), axis=0))
+    root = os.path.join(tempfile.mkdtemp(prefix='nav_bench_'), 'store')
+    store = nav_store.NavStore.create(root, [str(i) for i in range(args.schemes)], ['IndexFund'] * args.schemes)
+
+    bulk_ms, _ = timed(lambda: store.append(dates[:-1], navs[:-1]))
+    append_ms, _ = timed(lambda: store.append(dates[-1:], navs[-1:]))
+    read_all_ms, (_, history) = timed(lambda: store.read())
+    read_one_ms, _ = timed(lambda: store.read(start=dates[-252], scheme_codes=['42']))
+    assert np.array_equal(history, navs)
+
+    cagr_ms, cagr = timed(lambda: nav_store.rolling_cagr(history, args.window))
+    vol_ms, vol = timed(lambda: nav_store.rolling_volatility(history, args.window))
+    dd_ms, dd = timed(lambda: nav_store.max_drawdown(history))
+    frame = pd.DataFrame(history)
+    pd_cagr_ms, pd_cagr = timed(lambda: (frame / frame.shift(args.window)) ** (nav_store.TRADING_DAYS_PER_YEAR / args.window) - 1)
+    pd_vol_ms, pd_vol = timed(lambda: np.log(frame).diff().rolling(args.window).std() * np.sqrt(nav_store.TRADING_DAYS_PER_YEAR))
+    pd_dd_ms, pd_dd = timed(lambda: (frame / frame.cummax() - 1).min())
+
+    print("\n--- NAV Store Benchmark ---")
+    print(f"{args.schemes} schemes x {n_days + 1} days ({history.nbytes / 2**20:.0f} MiB)")
+    print(f"Bulk load {bulk_ms:.0f} ms; append 1 day {append_ms:.1f} ms; read all {read_all_ms:.0f} ms; read 1 scheme x 1y {read_one_ms:.1f} ms")
+    print(f"{'estimate':>14} {'pandas ms':>10} {'nav_store ms':>13}  max abs diff")
+    print(f"{'rolling CAGR':>14} {pd_cagr_ms:>10.0f} {cagr_ms:>13.0f}  {np.nanmax(np.abs(cagr - pd_cagr.to_numpy())):.1e}")
+    print(f"{'rolling vol':>14} {pd_vol_ms:>10.0f} {vol_ms:>13.0f}  {np.nanmax(np.abs(vol - pd_vol.to_numpy())):.1e}")
+    print(f"{'max drawdown':>14} {pd_dd_ms:>10.0f} {dd_ms:>13.0f}  {np.max(np.abs(dd - pd_dd.to_numpy())):.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_rl_env.py
+# FinancialPlannerEnv throughput: steps per second with random actions (drawn up front, so only reset()
+# and step() are timed) for the current environment and, for comparison, the version of
+# ml_scripts/training/rl_environment.py at a baseline git revision (default: BASELINE_REV, the last one
+# before the environment was vectorized; later fixes to the file must not move it). Environment output goes to /dev/null, so the baseline's per-step prints cost only formatting.
+#
+#   python benchmarks/bench_rl_env.py --steps 20000
+#   python benchmarks/bench_rl_env.py --baseline-rev <commit>
+import argparse
+import contextlib
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ENV_PATH = 'ml_scripts/training/rl_environment.py'
+PROFILE = {"InitialSavings": 5000, "InitialInvestments": 10000, "MonthlyIncomeEstimate": 60000}
+GOAL, EPISODE_STEPS = 1000000, 240
+BASELINE_REV = "a974f41" # Parent of 3959120, which vectorized the environment
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def throughput(env, n_steps, seed=0):
+    """Steps per second over n_steps, resetting whenever an episode ends."""
+    env.action_space.seed(seed)
+    actions = [env.action_space.sample() for _ in range(n_steps)]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        env.reset(seed=seed)
+        for action in actions:
+            _, _, terminated, truncated, _ = env.step(action)
+            if terminated or truncated: env.reset()
+        elapsed = time.perf_counter() - start
+    return n_steps / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FinancialPlannerEnv steps/second, current vs a baseline revision.")
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--baseline-rev", default=None, help=f"Git revision of the baseline environment (default: {BASELINE_REV}, before it was vectorized).")
+    args = parser.parse_args()
+
+    sys.path.insert(0, PROJECT_ROOT)
+    from ml_scripts.training import rl_environment
+    options, correlation = rl_environment.market_investment_options()
+    current = rl_environment.FinancialPlannerEnv(PROFILE, GOAL, EPISODE_STEPS, options, correlation)
+    current_sps = throughput(current, args.steps)
+
+    rev = args.baseline_rev or BASELINE_REV
+    source = subprocess.run(["git", "show", f"{rev}:{ENV_PATH}"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True).stdout
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "baseline_rl_environment.py")
+        with open(path, "w") as f: f.write(source)
+        baseline_module = load_module("baseline_rl_environment", path)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        baseline = baseline_module.FinancialPlannerEnv(PROFILE, GOAL, EPISODE_STEPS, options)
+    baseline_sps = throughput(baseline, args.steps)
+
+    print("\n--- RL Environment Benchmark ---")
+    print(f"{args.steps:,} random-action steps, {EPISODE_STEPS}-step episodes")
+    print(f"Baseline ({rev}, action space {baseline.action_space.shape}): {baseline_sps:,.0f} steps/s")
+    print(f"Current ({len(options)} correlated assets, action space {current.action_space.shape}): {current_sps:,.0f} steps/s ({current_sps / baseline_sps:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
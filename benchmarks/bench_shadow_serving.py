@@ -0,0 +1,167 @@
+# benchmarks/bench_shadow_serving.py
+# Shadow serving benchmark: does scoring a candidate model on live traffic cost the primary path anything?
+# Candidate risk and investment models are trained quickly with different hyperparameters on the project
+# data, so the two sides really disagree. Then paced clients call advice_service.generate_advice for
+# profiles stored in a throwaway SQLite file. Requests arrive as Poisson processes at --load of one core.
+# The variants are interleaved round by round:
+# - production only;
+# - shadow: the candidate is scored off the request path by model_serving's worker pool;
+# - inline: the candidate is scored on the request thread, the cost shadow serving avoids;
+# - A/B: --ab-percent of users are served by the candidate.
+# A last run offers --high-load of one core to the shadow variant, to check that shadow scoring keeps
+# sampling busy periods.
+# The run fails (exit status 1) in two cases:
+# - shadow raises the primary p95 by more than P95_TOLERANCE;
+# - the high-load run drops more than MAX_DROPPED_SHARE of its shadow jobs.
+#
+#   python benchmarks/bench_shadow_serving.py --requests 400 --rounds 3
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+PROFILE_DATA_FILE = os.path.join(PROJECT_ROOT, 'data', 'user_profile_data_india.csv')
+INVESTMENT_DATA_FILE = os.path.join(PROJECT_ROOT, 'data', 'investment_suitability_data_india.csv')
+PROFILE_COLUMNS = ['AgeRange', 'IncomeRange', 'SavingsLevel', 'DebtLevel', 'HasDependents', 'PrimaryGoal',
+                   'TimeHorizonYears', 'SelfReportedTolerance', 'InvestmentKnowledge', 'LiquidityNeeds']
+P95_TOLERANCE = 0.10 # Relative p95 increase allowed for shadow over production only...
+P95_SLACK_MS = 0.5   # ...plus this much, for timer noise on sub-10 ms requests
+MAX_DROPPED_SHARE = 0.5 # Shadow jobs dropped (full backlog) under --high-load
+
+
+def train_candidates(prediction, work_dir):
+    """Candidate models with production's preprocessors but different hyperparameters. Returns their paths."""
+    import joblib, pandas as pd, xgboost as xgb
+    from sklearn.ensemble import RandomForestClassifier
+    profiles = pd.read_csv(PROFILE_DATA_FILE)
+    risk = RandomForestClassifier(n_estimators=40, max_depth=6, random_state=7, n_jobs=1)
+    risk.fit(prediction.AI_COMPONENTS["risk_preprocessor"].transform(profiles[prediction.RISK_FEATURE_ORDER]), profiles["RiskProfile"])
+    investments = pd.read_csv(INVESTMENT_DATA_FILE)
+    inv = xgb.XGBClassifier(objective='binary:logistic', eval_metric='logloss', n_estimators=20, max_depth=2, random_state=7)
+    inv.fit(prediction.AI_COMPONENTS["inv_preprocessor"].transform(investments[prediction.INV_FEATURE_ORDER]), investments["Suitability"].map({'Suitable': 1, 'Not Suitable': 0}))
+    paths = {"risk_model": os.path.join(work_dir, "candidate_risk.joblib"), "inv_model": os.path.join(work_dir, "candidate_inv.joblib")}
+    joblib.dump(risk, paths["risk_model"]); joblib.dump(inv, paths["inv_model"])
+    return paths
+
+
+def create_users(n_users, seed):
+    import pandas as pd
+    from services import db_service
+    profiles = pd.read_csv(PROFILE_DATA_FILE)[PROFILE_COLUMNS].sample(n=n_users, random_state=seed)
+    user_ids = []
+    for i, row in enumerate(profiles.to_dict(orient="records")):
+        user_id = db_service.create_user(f"shadow_bench_{i}_{time.time_ns()}", "not-a-real-hash")
+        db_service.save_or_update_profile(user_id, {**row, 'TimeHorizonYears': int(row['TimeHorizonYears'])}) # Also stores encoded features
+        user_ids.append(user_id)
+    return user_ids
+
+
+def run_clients(advice_service, user_ids, n_requests, clients, rate_per_client, seed):
+    """Latencies (ms) of n_requests generate_advice calls from paced clients (open loop, Poisson arrivals)."""
+    import numpy as np
+    latencies, lock = [], threading.Lock()
+    def client(k):
+        rng = np.random.default_rng(seed + k)
+        schedule = np.cumsum(rng.exponential(1 / rate_per_client, n_requests // clients))
+        users = rng.choice(user_ids, len(schedule))
+        start = time.perf_counter()
+        for due, user_id in zip(schedule, users):
+            delay = start + due - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+            t = time.perf_counter(); advice = advice_service.generate_advice(int(user_id)); elapsed = (time.perf_counter() - t) * 1e3
+            if advice.get("service_tier") != advice_service.TIER_FULL: raise RuntimeError(f"Degraded answer: {advice}")
+            with lock: latencies.append(elapsed)
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(clients)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Primary-path latency with and without shadow scoring of a candidate model.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=400, help="Requests per variant per round.")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--load", type=float, default=0.5, help="Offered load as a fraction of one core's production-only capacity.")
+    parser.add_argument("--ab-percent", type=float, default=50.0)
+    parser.add_argument("--high-load", type=float, default=0.9, help="Offered load for the shadow dropped-share run.")
+    parser.add_argument("--high-load-requests", type=int, default=2000, help="Requests in the high-load run; several times the shadow backlog.")
+    parser.add_argument("--seed", type=int, default=47)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_shadow_")
+    os.environ["DATABASE_URL_STREAMLIT"] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ["WARM_CACHE"] = "off" # Every run starts cold and leaves no cache snapshot behind
+    os.environ["AUDIT_SINK"] = "off"
+    os.environ["MONITORING_DIR"] = os.path.join(work_dir, "monitoring")
+    sys.path.insert(0, APP_DIR)
+    import numpy as np
+    with contextlib.redirect_stdout(io.StringIO()): # Model loading and per-request logs
+        from services import advice_service, db_service
+        from ai_integration import model_serving, prediction
+        db_service.init_db()
+        candidate = model_serving.load_candidate(**train_candidates(prediction, work_dir))
+        user_ids = create_users(args.users, args.seed)
+    variants = {"production only": dict(candidate=None), "shadow": dict(candidate=candidate),
+                "inline (on request path)": dict(candidate=candidate, shadow_workers=0),
+                f"A/B {args.ab_percent:.0f}% + shadow": dict(candidate=candidate, mode=model_serving.MODE_AB, traffic_percent=args.ab_percent)}
+
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w') # generate_advice prints per request; threads make redirect_stdout unreliable
+    try:
+        model_serving.configure(None)
+        warmup = run_clients(advice_service, user_ids, 100, 1, 1e6, args.seed) # Back to back: service time
+        rate_per_client = args.load / (np.median(warmup) / 1e3) / args.clients
+        latencies, reports = {name: [] for name in variants}, {}
+        for round_no in range(args.rounds):
+            for k, (name, options) in enumerate(variants.items()):
+                model_serving.configure(**options)
+                latencies[name].append(run_clients(advice_service, user_ids, args.requests, args.clients, rate_per_client, args.seed + 100 * round_no + k))
+                model_serving.drain(timeout=30.0)
+                reports[name] = model_serving.get_report()
+        model_serving.configure(candidate)
+        high_load = run_clients(advice_service, user_ids, args.high_load_requests, args.clients, rate_per_client * args.high_load / args.load, args.seed + 999)
+        model_serving.drain(timeout=30.0)
+        high_load_config = model_serving.get_report()["config"]
+    finally:
+        sys.stdout.close(); sys.stdout = real_stdout
+
+    print(f"\n--- Shadow Serving Benchmark ({args.clients} clients, {args.load:.0%} load, "
+          f"{args.rounds} x {args.requests} requests per variant, production service time {np.median(warmup):.2f} ms) ---")
+    p95 = {}
+    for name, runs in latencies.items():
+        values = np.concatenate(runs)
+        p50, p95[name], p99 = np.percentile(values, [50, 95, 99])
+        config = reports[name]["config"]
+        shadow = (f"  shadow: {config['shadow_queued']} scored ({config['shadow_scored_while_busy']} during requests), {config['shadow_dropped']} dropped, p95 {config['shadow_ms_p95']:.2f} ms to score"
+                  if config["shadow_queued"] else "")
+        print(f"{name:<26} p50 {p50:7.2f} ms  p95 {p95[name]:7.2f} ms  p99 {p99:7.2f} ms{shadow}")
+
+    report = reports["shadow"]
+    print("\nDisagreement (last shadow round):")
+    print(report["summary"].to_string(index=False))
+    if not report["risk_confusion"].empty: print(f"\nRisk labels, production (rows) x candidate (columns):\n{report['risk_confusion'].to_string()}")
+    if not report["instruments"].empty: print(f"\nSuitability flips:\n{report['instruments'].head(8).to_string(index=False)}")
+    ab = reports[f"A/B {args.ab_percent:.0f}% + shadow"]["arms"]
+    print(f"\nA/B arms:\n{ab.to_string(index=False, float_format=lambda x: f'{x:.2f}')}")
+
+    limit = p95["production only"] * (1 + P95_TOLERANCE) + P95_SLACK_MS
+    ok = p95["shadow"] <= limit
+    print(f"\nShadow p95 {p95['shadow']:.2f} ms vs production-only p95 {p95['production only']:.2f} ms (limit {limit:.2f} ms): {'OK' if ok else 'FAILED'}")
+    offered = high_load_config["shadow_queued"] + high_load_config["shadow_dropped"]
+    dropped_share = high_load_config["shadow_dropped"] / max(offered, 1)
+    dropped_ok = offered > 0 and dropped_share <= MAX_DROPPED_SHARE
+    print(f"High load ({args.high_load:.0%} of one core): primary p95 {np.percentile(high_load, 95):.2f} ms, {high_load_config['shadow_queued']} shadow jobs scored ({high_load_config['shadow_scored_while_busy']} during requests), "
+          f"{high_load_config['shadow_dropped']} dropped ({dropped_share:.0%}, limit {MAX_DROPPED_SHARE:.0%}): {'OK' if dropped_ok else 'FAILED'}")
+    return 0 if ok and dropped_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# benchmarks/bench_stress_test.py
+# Stress-test benchmark on synthetic users: run_stress_test (services/stress_service.py) over N profiles
+# drawn from the models' input vocabularies, against the per-user path (risk prediction, suitability,
+# allocation through prediction.py one user at a time, then the scenario shocks) on a sample, checking
+# that both give the same losses.
+#
+#   python benchmarks/bench_stress_test.py --users 2000000 --sample 50
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+TIME_HORIZON_OPTIONS = (3, 7, 13, 18, 25) # Buckets the Profile form stores
+
+
+def synthetic_profiles(prediction, fields, n, seed=40):
+    """n profiles with every field drawn uniformly from the fitted encoders' categories."""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    options = {'TimeHorizonYears': list(TIME_HORIZON_OPTIONS)}
+    for key in ("risk_preprocessor", "inv_preprocessor"):
+        for _, transformer, columns in prediction.AI_COMPONENTS[key].transformers_:
+            for column, categories in zip(columns, getattr(transformer, "categories_", [])):
+                if column in fields: options.setdefault(column, [str(c) for c in categories])
+    return pd.DataFrame({field: np.asarray(options[field], dtype=object)[rng.integers(0, len(options[field]), n)] for field in fields})
+
+
+def per_user_losses(prediction, stress, profile, shocks):
+    """The generate_advice path for one user (no SHAP, no projections), then the scenario losses."""
+    import numpy as np
+    risk = prediction.get_risk_profile_and_explanation(profile, explain=False)["prediction"]
+    recommendations = prediction.get_investment_recommendations_and_explanation(profile, risk, explain=False)
+    suitable = [rec["investment"] for rec in recommendations if rec.get("investment") in stress.INVESTMENT_TYPES]
+    plan = prediction.allocation.allocate(*prediction.get_allocation_inputs(), risk, suitable) if suitable else None
+    weights = np.array([plan["weights"].get(t, 0.0) for t in stress.INVESTMENT_TYPES]) if plan else np.zeros(len(stress.INVESTMENT_TYPES))
+    return stress.scenario_losses(weights, shocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch stress test vs per-user scoring.")
+    parser.add_argument("--users", type=int, default=2_000_000)
+    parser.add_argument("--sample", type=int, default=50, help="Users run through the per-user path.")
+    args = parser.parse_args()
+
+    sys.path.insert(0, APP_DIR)
+    import numpy as np
+    with contextlib.redirect_stdout(io.StringIO()): # Model loading logs
+        from ai_integration import prediction, stress
+        from services import stress_service
+    profiles = synthetic_profiles(prediction, stress_service.PORTFOLIO_FIELDS, args.users)
+    stress_service.run_stress_test(profiles.head(1000)) # Warm the frontier cache and numba kernels
+
+    start = time.perf_counter()
+    result = stress_service.run_stress_test(profiles)
+    batch_s = time.perf_counter() - start
+
+    _, shocks = stress.shock_matrix()
+    sample = profiles.sample(args.sample, random_state=0)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        loop = np.array([per_user_losses(prediction, stress, row._asdict(), shocks) for row in sample.itertuples(index=False)])
+    loop_per_user_s = (time.perf_counter() - start) / len(sample)
+    _, codes, weights = stress_service.score_portfolios(sample)
+    batch = stress.scenario_losses(weights, shocks)[codes]
+
+    print("\n--- Stress Test Benchmark ---")
+    print(f"{result['users']:,} users -> {result['portfolios']:,} distinct portfolios; {result['unallocated_users']:,} with no suitable investment")
+    print(f"Batch: {batch_s:.2f} s for {len(stress.SCENARIOS)} scenarios ({batch_s / result['users'] * 1e6:.2f} us/user)")
+    print(f"Per-user path: {loop_per_user_s * 1000:.1f} ms/user -> ~{loop_per_user_s * result['users'] / 3600:.1f} h for all users "
+          f"({loop_per_user_s * result['users'] / batch_s:,.0f}x)")
+    print(f"Max loss difference vs per-user path on {len(sample)} users: {np.max(np.abs(batch - loop)):.1e}")
+    print(result["summary"].query("scenario == 'equity_crash_2008'").to_string(index=False, float_format="{:.3f}".format))
+
+
+if __name__ == "__main__":
+    main()
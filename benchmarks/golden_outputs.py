@@ -0,0 +1,96 @@
+# benchmarks/golden_outputs.py
+# Golden-output check for the inference hot path: for a fixed sample of data/user_profile_data_india.csv,
+# the risk prediction and its SHAP explanation text, every investment recommendation (suitability,
+# explanation text, projection) and the planning recommendation must stay identical to the stored corpus
+# (benchmarks/golden/advice_corpus.json). Exits with status 1 and lists the differences otherwise.
+# Projections use the assumed return mapping (NAV_STORE_DIR is pointed away from any local NAV store),
+# so the corpus does not depend on generated market data.
+#
+#   python benchmarks/golden_outputs.py            # check
+#   python benchmarks/golden_outputs.py --update   # rewrite the corpus after an intended output change
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+PROFILE_DATA_FILE = os.path.join(PROJECT_ROOT, 'data', 'user_profile_data_india.csv')
+CORPUS_FILE = os.path.join(PROJECT_ROOT, 'benchmarks', 'golden', 'advice_corpus.json')
+PROFILE_COLUMNS = ['AgeRange', 'IncomeRange', 'SavingsLevel', 'DebtLevel', 'HasDependents', 'PrimaryGoal',
+                   'TimeHorizonYears', 'SelfReportedTolerance', 'InvestmentKnowledge', 'LiquidityNeeds']
+RECOMMENDATION_KEYS = ['investment', 'suitability', 'explanation', 'projected_value', 'total_growth', 'avg_annual_return_used']
+MAX_REPORTED_DIFFS = 20
+PLANNING_DECIMALS = 6
+
+
+def build_corpus(prediction, profiles):
+    entries = []
+    for _, row in profiles.iterrows():
+        profile = {**row[PROFILE_COLUMNS].to_dict(), 'TimeHorizonYears': int(row['TimeHorizonYears'])}
+        risk = prediction.get_risk_profile_and_explanation(profile)
+        recommendations = prediction.get_investment_recommendations_and_explanation(profile, risk['prediction'])
+        suitable = [rec for rec in recommendations if rec.get('suitability') == 'Suitable']
+        plan = prediction.get_planning_recommendation(profile, risk['prediction'], suitable)
+        entries.append({
+            "user_id": int(row['UserID']), "profile": profile,
+            "risk_profile": risk['prediction'], "risk_explanation": risk['explanation'],
+            "recommendations": [{key: rec.get(key) for key in RECOMMENDATION_KEYS} for rec in recommendations],
+            "planning": {key: plan.get(key) for key in ('actions', 'explanation', 'allocation')},
+            # Optimizer outputs, rounded so last-bit BLAS differences between machines do not count as changes
+            "planning_estimates": {key: round(plan[key], PLANNING_DECIMALS) for key in ('expected_return', 'expected_volatility') if key in plan},
+        })
+    return entries
+
+
+def differences(expected, actual, path=""):
+    """Paths (with both values) where two JSON-like values differ."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return [d for key in sorted(set(expected) | set(actual)) for d in differences(expected.get(key), actual.get(key), f"{path}.{key}")]
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        return [d for i, (e, a) in enumerate(zip(expected, actual)) for d in differences(e, a, f"{path}[{i}]")]
+    return [] if expected == actual else [(path, expected, actual)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check (or update) the golden advice outputs.")
+    parser.add_argument("--profiles", type=int, default=60, help="Sample size when updating.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args()
+
+    os.environ["NAV_STORE_DIR"] = os.path.join(tempfile.mkdtemp(prefix="golden_"), "no_nav_store")
+    sys.path.insert(0, APP_DIR)
+    import pandas as pd
+    with contextlib.redirect_stdout(io.StringIO()):
+        from ai_integration import prediction
+    all_profiles = pd.read_csv(PROFILE_DATA_FILE)
+
+    if args.update:
+        profiles = all_profiles.sample(n=args.profiles, random_state=args.seed)
+    else:
+        with open(CORPUS_FILE, encoding="utf-8") as f: expected = json.load(f)
+        profiles = all_profiles.set_index('UserID', drop=False).loc[[entry["user_id"] for entry in expected]]
+    with contextlib.redirect_stdout(io.StringIO()):
+        actual = json.loads(json.dumps(build_corpus(prediction, profiles))) # Same float/tuple normalisation as the stored file
+
+    if args.update:
+        os.makedirs(os.path.dirname(CORPUS_FILE), exist_ok=True)
+        with open(CORPUS_FILE, "w", encoding="utf-8") as f:
+            json.dump(actual, f, indent=1, ensure_ascii=False)
+            f.write("\n")
+        print(f"Golden corpus written: {len(actual)} profiles -> {os.path.relpath(CORPUS_FILE, PROJECT_ROOT)}")
+        return
+    diffs = differences(expected, actual)
+    if diffs:
+        print(f"Golden outputs changed ({len(diffs)} differences):")
+        for path, before, after in diffs[:MAX_REPORTED_DIFFS]: print(f"  {path}: {before!r} -> {after!r}")
+        sys.exit(1)
+    print(f"Golden outputs identical for {len(expected)} profiles.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/load_test_advice.py
+# Local load test for advice_service.generate_advice: checks that the per-stage deadlines and
+# admission control keep tail latency bounded when the box is saturated or SHAP is slow.
+#
+#   python benchmarks/load_test_advice.py --requests 200 --concurrency 16 --slow-shap-ms 3000
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+PROFILE_DATA_FILE = os.path.join(PROJECT_ROOT, 'data', 'user_profile_data_india.csv')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for generate_advice.")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--slow-shap-ms", type=int, default=0, help="Artificial delay added to every SHAP explanation.")
+    parser.add_argument("--open-explanations", action="store_true", help="Also open the risk rationale after each advice request.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # The DB URL is read at import time, so point it at a throwaway SQLite file first.
+    db_path = os.path.join(tempfile.mkdtemp(prefix="advice_load_"), "load_test.db")
+    os.environ["DATABASE_URL_STREAMLIT"] = f"sqlite:///{db_path}"
+    os.environ["WARM_CACHE"] = "off" # Every run starts cold and leaves no cache snapshot behind
+    sys.path.insert(0, APP_DIR)
+    import pandas as pd
+    import numpy as np
+    from services import advice_service, db_service
+    from ai_integration import prediction
+
+    db_service.init_db()
+    profiles = pd.read_csv(PROFILE_DATA_FILE).sample(n=args.users, random_state=args.seed)
+    profile_columns = prediction.RISK_FEATURE_ORDER + ['InvestmentKnowledge', 'LiquidityNeeds']
+    user_ids = []
+    for i, row in enumerate(profiles[profile_columns].to_dict(orient="records")):
+        user_id = db_service.create_user(f"loadtest_{i}", "not-a-real-hash")
+        row['TimeHorizonYears'] = int(row['TimeHorizonYears'])
+        db_service.save_or_update_profile(user_id, row)
+        user_ids.append(user_id)
+
+    if args.slow_shap_ms:
+        original_explain = prediction.explain_risk_profile
+        def slow_explain(*a, **kw):
+            time.sleep(args.slow_shap_ms / 1000)
+            return original_explain(*a, **kw)
+        prediction.explain_risk_profile = slow_explain
+
+    rng = np.random.default_rng(args.seed)
+    schedule = rng.choice(user_ids, size=args.requests)
+
+    def one_request(user_id):
+        start = time.perf_counter()
+        result = advice_service.generate_advice(int(user_id))
+        advice_s, explanation_s, tier = time.perf_counter() - start, None, result.get("service_tier", "error")
+        if args.open_explanations and result.get("risk_explanation_handle"):
+            start = time.perf_counter()
+            tier = f"{tier}+explanation:{advice_service.get_explanation(result['risk_explanation_handle'])['service_tier']}"
+            explanation_s = time.perf_counter() - start
+        return advice_s, explanation_s, tier
+
+    print(f"\nRunning {args.requests} requests over {args.users} users with concurrency {args.concurrency}...")
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one_request, schedule))
+    wall = time.perf_counter() - wall_start
+
+    tiers = Counter(r[2] for r in results)
+    deadlines = advice_service.STAGE_DEADLINES_S
+    budgets_ms = {"advice": (advice_service.ADMISSION_WAIT_S + deadlines["profile"] + deadlines["prediction"]) * 1000,
+                  "explanation": (advice_service.ADMISSION_WAIT_S + deadlines["explanation"]) * 1000}
+    print("\n--- Advice Load Test Results ---")
+    print(f"Throughput: {args.requests / wall:.1f} req/s over {wall:.1f}s")
+    for column, label in ((0, "advice"), (1, "explanation")):
+        latencies = np.array([r[column] for r in results if r[column] is not None]) * 1000
+        if not len(latencies): continue
+        print(f"{label.capitalize()} latency ms: p50={np.percentile(latencies, 50):.0f} p95={np.percentile(latencies, 95):.0f} "
+              f"p99={np.percentile(latencies, 99):.0f} max={latencies.max():.0f} (worst-case budget {budgets_ms[label]:.0f})")
+    print(f"Service tiers: {dict(tiers)}")
+    print(f"Admission rejections: {advice_service._admission.rejected}")
+
+
+if __name__ == "__main__":
+    main()
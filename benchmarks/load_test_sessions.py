@@ -0,0 +1,173 @@
+# benchmarks/load_test_sessions.py
+# Headless multi-user load test of the services layer: each simulated advisor session logs in
+# (auth_service.authenticate_user, bcrypt included), saves its profile (db_service.save_or_update_profile)
+# and requests advice (advice_service.generate_advice), exactly as the pages call them. Sessions run on a
+# thread or process pool at increasing concurrency levels against a throwaway SQLite file or a given
+# database URL (e.g. a local Postgres), giving throughput, latency percentiles and a saturation curve.
+# Profiles and the session schedule come from --seed, so runs are comparable across commits; --json writes
+# the results and --compare prints the change against an earlier results file.
+#
+#   python benchmarks/load_test_sessions.py --users 50 --levels 1 2 4 8 16 --sessions-per-level 64
+#   python benchmarks/load_test_sessions.py --mode process --database-url postgresql://user:pw@localhost/advisor_load
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+PROFILE_DATA_FILE = os.path.join(PROJECT_ROOT, 'data', 'user_profile_data_india.csv')
+PROFILE_COLUMNS = ['AgeRange', 'IncomeRange', 'SavingsLevel', 'DebtLevel', 'HasDependents', 'PrimaryGoal',
+                   'TimeHorizonYears', 'SelfReportedTolerance', 'InvestmentKnowledge', 'LiquidityNeeds']
+PASSWORD = "load-test-password"
+OPERATIONS = ("login", "save_profile", "advice")
+SATURATION_GAIN = 0.10 # A level whose throughput gain over the previous one is below this is past the knee
+
+
+def _import_services():
+    if APP_DIR not in sys.path: sys.path.insert(0, APP_DIR)
+    from services import advice_service, auth_service, db_service
+    return auth_service, db_service, advice_service
+
+
+def _worker_init():
+    sys.stdout = open(os.devnull, "w") # The services log every call
+    _import_services()
+
+
+def run_session(task):
+    """One advisor session; returns (per-operation seconds, advice tier or error)."""
+    username, profile = task
+    auth_service, db_service, advice_service = _import_services()
+    timings = {}
+    start = time.perf_counter()
+    user = auth_service.authenticate_user(username, PASSWORD)
+    timings["login"] = time.perf_counter() - start
+    if not user: return timings, "error:login"
+    start = time.perf_counter()
+    db_service.save_or_update_profile(user["id"], profile)
+    timings["save_profile"] = time.perf_counter() - start
+    start = time.perf_counter()
+    advice = advice_service.generate_advice(user["id"])
+    timings["advice"] = time.perf_counter() - start
+    return timings, advice.get("service_tier", "error:advice")
+
+
+def seed_users(n_users, seed):
+    """Creates n_users accounts with complete profiles sampled from the profile dataset; returns their (username, profile)."""
+    import pandas as pd
+    auth_service, db_service, _ = _import_services()
+    sample = pd.read_csv(PROFILE_DATA_FILE)[PROFILE_COLUMNS].sample(n=n_users, random_state=seed)
+    password_hash = auth_service.get_password_hash(PASSWORD) # bcrypt once; every account shares it
+    users = []
+    db_service.init_db()
+    for i, row in enumerate(sample.to_dict(orient="records")):
+        username = f"loadtest_{seed}_{i}"
+        if not db_service.get_user_auth_data_by_username(username): db_service.create_user(username, password_hash)
+        users.append((username, {**row, 'TimeHorizonYears': int(row['TimeHorizonYears'])}))
+    return users
+
+
+def run_level(pool, tasks):
+    start = time.perf_counter()
+    results = list(pool.map(run_session, tasks))
+    wall = time.perf_counter() - start
+    return wall, results
+
+
+def summarize_level(concurrency, wall, results):
+    import numpy as np
+    sessions = np.array([sum(timings.values()) for timings, _ in results]) * 1000
+    level = {"concurrency": concurrency, "sessions": len(results), "wall_s": round(wall, 3),
+             "sessions_per_s": round(len(results) / wall, 3), "tiers": dict(Counter(tier for _, tier in results))}
+    level.update({f"session_p{p}_ms": round(float(np.percentile(sessions, p)), 1) for p in (50, 95, 99)})
+    for op in OPERATIONS:
+        values = np.array([timings[op] for timings, _ in results if op in timings]) * 1000
+        if len(values): level.update({f"{op}_p50_ms": round(float(np.percentile(values, 50)), 1), f"{op}_p95_ms": round(float(np.percentile(values, 95)), 1)})
+    return level
+
+
+def saturation_point(levels):
+    """Concurrency after which throughput stops growing by SATURATION_GAIN, or None if it kept growing."""
+    for previous, current in zip(levels, levels[1:]):
+        if current["sessions_per_s"] < previous["sessions_per_s"] * (1 + SATURATION_GAIN): return previous["concurrency"]
+    return None
+
+
+def git_revision():
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless multi-user load test of login, profile save and advice.")
+    parser.add_argument("--users", type=int, default=50, help="Distinct accounts created and sampled from.")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Concurrency levels (simulated users at once).")
+    parser.add_argument("--sessions-per-level", type=int, default=64)
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--database-url", default=None, help="Database to load (default: a throwaway SQLite file).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="Write the results to this file.")
+    parser.add_argument("--compare", default=None, help="Earlier --json results to compare against.")
+    args = parser.parse_args()
+
+    # The DB URL is read at import time, and process workers inherit the environment.
+    os.environ["DATABASE_URL_STREAMLIT"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='session_load_'), 'load.db')}"
+    os.environ["WARM_CACHE"] = "off" # Every run starts cold and leaves no cache snapshot behind
+    # Service logs go to /dev/null for the whole run (redirect_stdout is process-wide, so not per thread).
+    report, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        run(args, report)
+    finally:
+        sys.stdout.close()
+        sys.stdout = report
+
+
+def run(args, report):
+    users = seed_users(args.users, args.seed)
+    import numpy as np
+    rng = np.random.default_rng(args.seed)
+
+    levels = []
+    print(f"\n{args.users} users, {args.sessions_per_level} sessions per level, {args.mode} pool", file=report, flush=True)
+    for concurrency in args.levels:
+        tasks = [users[i] for i in rng.integers(0, len(users), args.sessions_per_level)]
+        pool_class = ThreadPoolExecutor if args.mode == "thread" else ProcessPoolExecutor
+        pool_args = {"max_workers": concurrency} if args.mode == "thread" else {"max_workers": concurrency, "initializer": _worker_init}
+        with pool_class(**pool_args) as pool:
+            list(pool.map(run_session, tasks[:concurrency])) # Warm every worker (process workers load the models once)
+            wall, results = run_level(pool, tasks)
+        level = summarize_level(concurrency, wall, results)
+        levels.append(level)
+        print(f"  c={concurrency:>3}: {level['sessions_per_s']:6.2f} sessions/s  session p50={level['session_p50_ms']:.0f} "
+              f"p95={level['session_p95_ms']:.0f} p99={level['session_p99_ms']:.0f} ms  "
+              f"login p95={level.get('login_p95_ms', 0):.0f} save p95={level.get('save_profile_p95_ms', 0):.0f} "
+              f"advice p95={level.get('advice_p95_ms', 0):.0f} ms  tiers={level['tiers']}", file=report, flush=True)
+
+    knee = saturation_point(levels)
+    best = max(levels, key=lambda level: level["sessions_per_s"])
+    print("\n--- Session Load Test Results ---", file=report)
+    print(f"Peak throughput {best['sessions_per_s']:.2f} sessions/s at concurrency {best['concurrency']}; "
+          + (f"saturates after concurrency {knee}." if knee else "still scaling at the highest level."), file=report)
+    results = {"revision": git_revision(), "mode": args.mode, "seed": args.seed, "users": args.users,
+               "database": "sqlite (throwaway)" if not args.database_url else args.database_url.split("://")[0],
+               "sessions_per_level": args.sessions_per_level, "levels": levels, "saturation_concurrency": knee}
+
+    if args.compare:
+        with open(args.compare) as f: previous = {level["concurrency"]: level for level in json.load(f)["levels"]}
+        for level in levels:
+            before = previous.get(level["concurrency"])
+            if before: print(f"  c={level['concurrency']:>3}: throughput {level['sessions_per_s'] / before['sessions_per_s'] - 1:+.0%}, "
+                             f"session p95 {level['session_p95_ms'] / before['session_p95_ms'] - 1:+.0%} vs {args.compare}", file=report)
+    if args.json:
+        with open(args.json, "w") as f: json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}", file=report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# ml_scripts/data_generation/generate_fund_catalog.py
+# Synthetic mutual fund scheme catalog for the app's fund ranking (streamlit_app/ai_integration/catalog.py).
+# Replace data/fund_catalog.csv with a real scheme master (same columns) when one is available.
+#
+#   python ml_scripts/data_generation/generate_fund_catalog.py --schemes 10000
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+# --- Configuration ---
+# Paths are relative to the project root, like the other generators.
+DATA_DIR = 'data'
+OUTPUT_FILE = os.path.join(DATA_DIR, 'fund_catalog.csv')
+CATALOG_COLUMNS = ['SchemeCode', 'SchemeName', 'AMC', 'InvestmentType', 'Plan', 'Volatility', 'Return5Y', 'ExpenseRatio', 'AUMCr']
+
+AMCS = ['Aditya Birla Sun Life', 'Axis', 'Bandhan', 'DSP', 'Edelweiss', 'HDFC', 'ICICI Prudential', 'Kotak', 'Mirae Asset',
+        'Motilal Oswal', 'Nippon India', 'Parag Parikh', 'PGIM India', 'Quant', 'SBI', 'Sundaram', 'Tata', 'UTI']
+# Catalog categories -> (scheme name stems, volatility mean/sd %, 5y return mean/sd %, expense ratio range %, share of schemes)
+CATEGORY_PROFILES = {
+    'DebtMF':        (['Liquid', 'Short Duration', 'Corporate Bond', 'Banking & PSU Debt', 'Gilt', 'Dynamic Bond'], (3.0, 1.5), (6.5, 1.0), (0.1, 1.2), 0.25),
+    'IndexFund':     (['Nifty 50 Index', 'Nifty Next 50 Index', 'Sensex Index', 'Nifty 100 Index'], (14.0, 2.0), (11.5, 1.5), (0.05, 0.6), 0.12),
+    'BalancedMF':    (['Balanced Advantage', 'Aggressive Hybrid', 'Equity Savings', 'Multi Asset Allocation'], (9.0, 3.0), (9.5, 2.0), (0.4, 2.1), 0.18),
+    'LargeCapMF':    (['Bluechip', 'Large Cap', 'Focused Equity', 'Large & Mid Cap'], (15.0, 2.0), (12.0, 2.0), (0.5, 2.1), 0.2),
+    'MidSmallCapMF': (['Mid Cap', 'Small Cap', 'Emerging Equities', 'Midcap Opportunities'], (20.0, 3.0), (15.0, 3.0), (0.5, 2.3), 0.25),
+}
+
+
+def generate_catalog(n_schemes, seed=46):
+    """DataFrame of n_schemes synthetic schemes with CATALOG_COLUMNS."""
+    rng = np.random.default_rng(seed)
+    categories = list(CATEGORY_PROFILES)
+    shares = np.array([CATEGORY_PROFILES[c][4] for c in categories]); shares /= shares.sum()
+    category_idx = rng.choice(len(categories), size=n_schemes, p=shares)
+    columns = {name: [] for name in CATALOG_COLUMNS}
+    for i, c in enumerate(category_idx):
+        stems, (vol_mean, vol_sd), (ret_mean, ret_sd), (ter_low, ter_high), _ = CATEGORY_PROFILES[categories[c]]
+        plan = 'Direct' if rng.random() < 0.5 else 'Regular'
+        amc = AMCS[rng.integers(len(AMCS))]
+        columns['SchemeCode'].append(100000 + i)
+        columns['SchemeName'].append(f"{amc} {stems[rng.integers(len(stems))]} Fund - {plan} Plan - Growth")
+        columns['AMC'].append(amc)
+        columns['InvestmentType'].append(categories[c])
+        columns['Plan'].append(plan)
+        columns['Volatility'].append(round(max(0.2, rng.normal(vol_mean, vol_sd)), 2))
+        columns['Return5Y'].append(round(rng.normal(ret_mean, ret_sd), 2))
+        expense_ratio = rng.uniform(ter_low, ter_high) * (0.6 if plan == 'Direct' else 1.0)
+        columns['ExpenseRatio'].append(round(expense_ratio, 2))
+        columns['AUMCr'].append(round(float(rng.lognormal(7.0, 1.5)), 1))
+    return pd.DataFrame(columns, columns=CATALOG_COLUMNS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic mutual fund scheme catalog.")
+    parser.add_argument("--schemes", type=int, default=10000)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    catalog_df = generate_catalog(args.schemes)
+    catalog_df.to_csv(args.output, index=False)
+    print(f"Generated {len(catalog_df)} schemes. Data saved to: {args.output}")
+    print(catalog_df['InvestmentType'].value_counts())
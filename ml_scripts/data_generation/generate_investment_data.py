@@ -2,6 +2,7 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 
 # --- Configuration ---
 # Paths are relative to the project root (ai_financial_advisor_india)
@@ -11,17 +12,9 @@ DATA_DIR = 'data'                                                          # Dir
 OUTPUT_FILE = os.path.join(DATA_DIR, 'investment_suitability_data_india.csv') # Path to WRITE investment data
 os.makedirs(DATA_DIR, exist_ok=True) # Ensure data directory exists
 
-# Define investment options (same as in prediction.py)
-AVAILABLE_INVESTMENTS = {
-    'FD':           {'Volatility': 'Very Low', 'Return': 'Very Low'},
-    'PPF':          {'Volatility': 'Very Low', 'Return': 'Low'},
-    'DebtMF':       {'Volatility': 'Low',      'Return': 'Low'},
-    'IndexFund':    {'Volatility': 'Medium',   'Return': 'Medium'},
-    'BalancedMF':   {'Volatility': 'Medium',   'Return': 'Medium'},
-    'LargeCapMF':   {'Volatility': 'High',     'Return': 'High'},
-    'MidSmallCapMF':{'Volatility': 'Very High','Return': 'Very High'},
-    'DirectEquity': {'Volatility': 'Very High','Return': 'Very High'}
-}
+# Investment options, shared with the app (streamlit_app/ai_integration/instruments.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'streamlit_app'))
+from ai_integration.instruments import AVAILABLE_INVESTMENTS
 investment_types = list(AVAILABLE_INVESTMENTS.keys())
 
 # --- Load User Profile Data ---
@@ -0,0 +1,92 @@
+# ml_scripts/data_generation/generate_nav_history.py
+# Synthetic daily NAV history for the fund catalog (data/fund_catalog.csv) plus proxy series for the
+# non-fund investment types (FD, PPF, DirectEquity), written to the app's NAV store (data/nav_store).
+# Each scheme follows a one-factor model around its catalog 5-year return and volatility. With --append-days
+# the existing store is extended day by day, the way a daily NAV feed would update it.
+#
+#   python ml_scripts/data_generation/generate_nav_history.py --years 5
+#   python ml_scripts/data_generation/generate_nav_history.py --append-days 1
+import argparse
+import os
+import shutil
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'streamlit_app'))
+from ai_integration.nav_store import NavStore, TRADING_DAYS_PER_YEAR
+
+# --- Configuration ---
+# Paths are relative to the project root, like the other generators.
+CATALOG_FILE = os.path.join('data', 'fund_catalog.csv')
+STORE_DIR = os.path.join('data', 'nav_store')
+GENERATION_CHUNK_DAYS = 64 # Days simulated and appended per step, to bound memory
+# InvestmentType -> correlation of its category factor with the market factor
+MARKET_LOADING = {'FD': 0.0, 'PPF': 0.0, 'DebtMF': 0.1, 'BalancedMF': 0.8, 'IndexFund': 0.97, 'LargeCapMF': 0.92, 'MidSmallCapMF': 0.85, 'DirectEquity': 0.9}
+SCHEME_FACTOR_LOADING = 0.9 # Correlation of a scheme with its category factor
+# Proxy series for types without catalog schemes: (code, InvestmentType, annual return %, annual volatility %)
+PROXY_SERIES = [('PROXY_FD', 'FD', 6.8, 0.2), ('PROXY_PPF', 'PPF', 7.1, 0.1), ('PROXY_DIRECT_EQUITY', 'DirectEquity', 14.0, 24.0)]
+
+
+def load_universe(catalog_file, max_schemes=None):
+    """(codes, investment types, annual drift, annual volatility) for the catalog schemes and proxies."""
+    catalog_df = pd.read_csv(catalog_file)
+    if max_schemes: catalog_df = catalog_df.head(max_schemes)
+    codes = catalog_df['SchemeCode'].astype(str).tolist() + [p[0] for p in PROXY_SERIES]
+    types = catalog_df['InvestmentType'].tolist() + [p[1] for p in PROXY_SERIES]
+    returns = np.concatenate([catalog_df['Return5Y'].to_numpy(), [p[2] for p in PROXY_SERIES]]) / 100
+    volatility = np.concatenate([catalog_df['Volatility'].to_numpy(), [p[3] for p in PROXY_SERIES]]) / 100
+    return codes, types, np.log1p(returns), volatility
+
+
+def simulate_days(rng, n_days, types, log_drift, volatility):
+    """(n_days, n_schemes) daily log returns; schemes correlate through category factors and a market factor."""
+    categories = list(dict.fromkeys(types))
+    category_of = np.array([categories.index(t) for t in types])
+    loading = np.array([MARKET_LOADING.get(c, 0.5) for c in categories])
+    market = rng.standard_normal((n_days, 1))
+    category_factor = loading * market + np.sqrt(1 - loading ** 2) * rng.standard_normal((n_days, len(categories)))
+    shocks = (SCHEME_FACTOR_LOADING * category_factor[:, category_of]
+              + np.sqrt(1 - SCHEME_FACTOR_LOADING ** 2) * rng.standard_normal((n_days, len(types))))
+    daily_sigma = volatility / np.sqrt(TRADING_DAYS_PER_YEAR)
+    return (log_drift / TRADING_DAYS_PER_YEAR - 0.5 * daily_sigma ** 2) + daily_sigma * shocks
+
+
+def business_days_after(last_day, n_days):
+    days = np.busday_offset(np.datetime64(last_day, 'D'), np.arange(1, n_days + 1), roll='forward')
+    return days.astype('datetime64[D]')
+
+
+def append_simulated(store, rng, n_days, log_drift, volatility, last_navs, last_day):
+    """Appends n_days simulated business days after last_day, GENERATION_CHUNK_DAYS at a time."""
+    for start in range(0, n_days, GENERATION_CHUNK_DAYS):
+        count = min(GENERATION_CHUNK_DAYS, n_days - start)
+        navs = last_navs * np.exp(np.cumsum(simulate_days(rng, count, store.investment_types, log_drift, volatility), axis=0))
+        dates = business_days_after(last_day, count)
+        store.append(dates, navs)
+        last_navs, last_day = navs[-1], dates[-1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic NAV history into the NAV store.")
+    parser.add_argument("--years", type=float, default=5.0)
+    parser.add_argument("--max-schemes", type=int, default=None, help="Only the first N catalog schemes (default: all).")
+    parser.add_argument("--append-days", type=int, default=None, help="Extend the existing store by N business days instead.")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--seed", type=int, default=47)
+    args = parser.parse_args()
+
+    codes, types, log_drift, volatility = load_universe(CATALOG_FILE, args.max_schemes)
+    if args.append_days:
+        store = NavStore(args.store)
+        _, last = store.read(start=store.dates()[-1])
+        rng = np.random.default_rng(args.seed + len(store))
+        order = [codes.index(code) for code in store.scheme_codes]
+        append_simulated(store, rng, args.append_days, log_drift[order], volatility[order], last[-1], store.dates()[-1])
+    else:
+        if os.path.exists(args.store): shutil.rmtree(args.store)
+        store = NavStore.create(args.store, codes, types)
+        n_days = int(args.years * TRADING_DAYS_PER_YEAR)
+        start_day = np.busday_offset(np.datetime64('today', 'D'), -n_days - 1, roll='backward')
+        append_simulated(store, np.random.default_rng(args.seed), n_days, log_drift, volatility, np.full(len(codes), 10.0), start_day)
+    print(f"NAV store at {args.store}: {len(store.scheme_codes)} series, {len(store)} days ({store.dates()[0]} .. {store.dates()[-1]}).")
@@ -0,0 +1,171 @@
+# ml_scripts/explainability/global_shap.py
+# Offline global explainability job. It computes SHAP values for the full training datasets of both
+# models (risk RF over the user profiles, suitability XGBoost over the investment rows) and writes two
+# summaries to Parquet (ai_integration/shap_summaries.py reads them in the app):
+# - global feature importance per predicted class,
+# - per-segment drivers (for every value of every input feature, the mean SHAP of each feature among the
+#   rows predicted as each class, e.g. why 55+ users come out Conservative).
+# The data is categorical, so identical encoded rows are common. They are deduplicated before running
+# SHAP, and each unique row is explained once. The unique rows are split into chunks and explained in
+# parallel worker processes, each of which builds its TreeExplainer once.
+# One-hot SHAP columns are summed back to their raw feature.
+#
+#   python ml_scripts/explainability/global_shap.py --jobs 4
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+import shap
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'streamlit_app'))
+from ai_integration.shap_summaries import SUMMARY_DIR, GLOBAL_IMPORTANCE_FILE, SEGMENT_SUMMARY_FILE
+from ai_integration.artifacts import artifact_hash
+
+# --- Configuration ---
+# Paths are relative to the project root, like the training scripts.
+MODELS = {
+    "risk": {"data": os.path.join('data', 'user_profile_data_india.csv'),
+             "preprocessor": os.path.join('models', 'user_data_preprocessor.joblib'),
+             "model": os.path.join('models', 'risk_profile_rf_model.joblib')},
+    "investment": {"data": os.path.join('data', 'investment_suitability_data_india.csv'),
+                   "preprocessor": os.path.join('models', 'investment_data_preprocessor.joblib'),
+                   "model": os.path.join('models', 'investment_suitability_xgb_model.joblib'),
+                   "class_names": ("Not Suitable", "Suitable")}, # Binary model: SHAP is towards class 1
+}
+DEFAULT_CHUNK_SIZE = 64 # Unique rows per worker task
+MAX_SEGMENT_VALUES = 20 # Input features with more distinct values are not used as segments
+
+_explainer = None # Per worker process
+
+
+def _init_worker(model_path):
+    global _explainer
+    _explainer = shap.TreeExplainer(joblib.load(model_path))
+
+
+def _shap_chunk(rows):
+    """(rows, encoded features, model outputs) SHAP values for one chunk."""
+    values = _explainer.shap_values(rows)
+    if isinstance(values, list): values = np.stack(values, axis=-1) # Older shap: one array per class
+    return values if values.ndim == 3 else values[:, :, None]
+
+
+def compute_shap(rows, model_path, jobs, chunk_size):
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    if jobs <= 1:
+        _init_worker(model_path)
+        return np.concatenate([_shap_chunk(chunk) for chunk in chunks])
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(model_path,)) as pool:
+        return np.concatenate(list(pool.map(_shap_chunk, chunks)))
+
+
+def raw_feature_groups(preprocessor):
+    """Raw input feature of every encoded column, in the preprocessor's output order."""
+    groups = []
+    for _, transformer, columns in preprocessor.transformers_:
+        if isinstance(transformer, str) and transformer == 'drop': continue
+        columns = [preprocessor.feature_names_in_[c] if isinstance(c, (int, np.integer)) else c for c in columns]
+        if hasattr(transformer, 'categories_'):
+            drop_idx = getattr(transformer, 'drop_idx_', None)
+            for i, (column, categories) in enumerate(zip(columns, transformer.categories_)):
+                groups += [column] * (len(categories) - int(drop_idx is not None and drop_idx[i] is not None))
+        else: groups += columns
+    return np.array(groups)
+
+
+def explain_model(name, spec, jobs, chunk_size, dedupe=True):
+    """(global importance DataFrame, segment summary DataFrame, stats) for one model."""
+    preprocessor, model = joblib.load(spec["preprocessor"]), joblib.load(spec["model"])
+    data = pd.read_csv(spec["data"])
+    features = list(preprocessor.feature_names_in_)
+    encoded = preprocessor.transform(data[features])
+    encoded = np.asarray(encoded.toarray() if hasattr(encoded, 'toarray') else encoded, dtype=np.float64)
+    if dedupe: unique, inverse = np.unique(encoded, axis=0, return_inverse=True)
+    else: unique, inverse = encoded, np.arange(len(encoded))
+    inverse = np.asarray(inverse).ravel()
+
+    start = time.perf_counter()
+    shap_unique = compute_shap(unique, spec["model"], jobs, chunk_size)
+    shap_s = time.perf_counter() - start
+    groups = raw_feature_groups(preprocessor)
+    if len(groups) != shap_unique.shape[1]: raise ValueError(f"{name}: {len(groups)} encoded feature groups for {shap_unique.shape[1]} SHAP columns")
+    raw_features = list(dict.fromkeys(groups))
+    raw = np.stack([shap_unique[:, groups == feature, :].sum(axis=1) for feature in raw_features], axis=1)
+    predicted = model.predict(unique)
+    if "class_names" in spec: # One log-odds output: 'Not Suitable' is the mirror image of 'Suitable'
+        classes = list(spec["class_names"])
+        raw = np.concatenate([-raw, raw], axis=2)
+        predicted = np.asarray(classes)[np.asarray(predicted).astype(int)]
+    else: classes = [str(c) for c in model.classes_]
+    raw, predicted = raw[inverse], np.asarray(predicted).astype(str)[inverse] # Back to one row per dataset row
+
+    model_hash = artifact_hash([spec["preprocessor"], spec["model"]])
+    importance = []
+    for c, target in enumerate(classes):
+        values = raw[:, :, c]
+        for feature, mean_abs, mean in zip(raw_features, np.abs(values).mean(axis=0), values.mean(axis=0)):
+            importance.append({"model": name, "target": target, "feature": feature, "mean_abs_shap": float(mean_abs), "mean_shap": float(mean)})
+    importance = pd.DataFrame(importance)
+    importance["rank"] = importance.groupby("target")["mean_abs_shap"].rank(ascending=False, method="first").astype(int)
+
+    segments = []
+    for segment_feature in features:
+        segment_values = data[segment_feature].astype(str).to_numpy()
+        if len(np.unique(segment_values)) > MAX_SEGMENT_VALUES: continue
+        segment_sizes = pd.Series(segment_values).value_counts()
+        for c, target in enumerate(classes):
+            mask = predicted == target
+            if not mask.any(): continue
+            frame = pd.DataFrame(raw[mask, :, c], columns=raw_features)
+            frame["segment_value"] = segment_values[mask]
+            grouped = frame.groupby("segment_value")
+            means = grouped.mean().rename_axis(columns="feature").stack().rename("mean_shap").reset_index()
+            counts = grouped.size()
+            means["rows"] = means["segment_value"].map(counts).astype(int)
+            means["target_share"] = means["rows"] / means["segment_value"].map(segment_sizes)
+            means["segment_feature"], means["target"] = segment_feature, target
+            segments.append(means)
+    segments = pd.concat(segments, ignore_index=True)
+    segments["model"] = name
+    segments["rank"] = segments.groupby(["segment_feature", "segment_value", "target"])["mean_shap"].rank(ascending=False, method="first").astype(int)
+    segments = segments[["model", "segment_feature", "segment_value", "target", "rows", "target_share", "feature", "mean_shap", "rank"]]
+    importance["model_hash"] = segments["model_hash"] = model_hash
+    stats = {"rows": len(encoded), "unique_rows": len(unique), "shap_s": shap_s}
+    return importance, segments, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Global and per-segment SHAP summaries for the app's models.")
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), default=list(MODELS))
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes for SHAP.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--no-dedupe", action="store_true", help="Explain every row, duplicates included (for comparison).")
+    parser.add_argument("--output-dir", default=SUMMARY_DIR)
+    args = parser.parse_args()
+
+    importances, segment_summaries = [], []
+    for name in args.models:
+        print(f"Explaining {name} model with {args.jobs} worker(s)...")
+        importance, segments, stats = explain_model(name, MODELS[name], args.jobs, args.chunk_size, dedupe=not args.no_dedupe)
+        print(f"-> {stats['rows']:,} rows, {stats['unique_rows']:,} unique encoded rows ({stats['rows'] / stats['unique_rows']:.1f}x fewer SHAP evaluations); "
+              f"SHAP took {stats['shap_s']:.1f} s ({stats['unique_rows'] / stats['shap_s']:,.0f} rows/s)")
+        importances.append(importance); segment_summaries.append(segments)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    importance, segments = pd.concat(importances, ignore_index=True), pd.concat(segment_summaries, ignore_index=True)
+    importance.to_parquet(os.path.join(args.output_dir, GLOBAL_IMPORTANCE_FILE), index=False)
+    segments.to_parquet(os.path.join(args.output_dir, SEGMENT_SUMMARY_FILE), index=False)
+    print(f"Summaries written to {args.output_dir} ({len(importance)} importance rows, {len(segments)} segment rows).")
+    example = segments.query("model == 'risk' and segment_feature == 'AgeRange' and segment_value == '55+' and target == 'Conservative'")
+    if not example.empty:
+        top = example.sort_values("rank").head(3)
+        print(f"Example - 55+ users predicted Conservative ({top['target_share'].iloc[0]:.0%} of them), top drivers: "
+              + ", ".join(f"{row.feature} ({row.mean_shap:+.3f})" for row in top.itertuples()))
+
+
+if __name__ == "__main__":
+    main()
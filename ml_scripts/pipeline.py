@@ -0,0 +1,325 @@
+# ml_scripts/pipeline.py
+# Incremental runner for the data generation and training scripts. Each stage declares its script, the
+# files it reads, the files it writes, and the packages whose versions affect its outputs. The stage key
+# is a content hash over the script, its code dependencies, its input files and those versions.
+# - Up to date: the key matches the last run and the outputs on disk are unchanged, so the stage is skipped.
+# - Restored: the key matches an earlier run, so its outputs are restored from the object store without
+#   running the script. Objects are content-addressed copies (not links: the scripts run by hand
+#   rewrite their outputs in place).
+# - Ran: the script runs unchanged as a subprocess, in a scratch directory under .pipeline/ that holds
+#   links to its inputs. Only once it succeeds are its outputs moved into data/ and models/, one
+#   os.replace each. A failed or interrupted stage leaves the existing artifacts untouched.
+# Stages whose dependencies are met run in parallel processes (--jobs), e.g. the risk and investment
+# training. Downstream stages of a failure are skipped. A per-stage timing report is printed and saved
+# to .pipeline/last_run.json.
+#
+#   python ml_scripts/pipeline.py                      # Everything
+#   python ml_scripts/pipeline.py risk_model --force   # One stage and whatever it needs; --force reruns it
+#   python ml_scripts/pipeline.py --dry-run            # What would run
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from importlib import metadata
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PIPELINE_DIR = os.path.join(PROJECT_ROOT, '.pipeline') # State, object store, logs and scratch directories
+STATE_FILE = os.path.join(PIPELINE_DIR, 'state.json')
+REPORT_FILE = os.path.join(PIPELINE_DIR, 'last_run.json')
+OBJECTS_DIR = os.path.join(PIPELINE_DIR, 'objects')
+LOGS_DIR = os.path.join(PIPELINE_DIR, 'logs')
+WORK_DIR = os.path.join(PIPELINE_DIR, 'work')
+CACHED_RUNS_PER_STAGE = 5 # Earlier keys whose outputs can be restored without rerunning
+
+
+# --- Stages ---
+class Stage:
+    """
+    A script and its declared files, all relative to the project root. inputs are data files (and
+    directories) read relative to cwd; optional_inputs are hashed and linked only when present (a missing
+    one hashes as None); code lists imported modules whose changes must rerun the stage; packages are
+    hashed by version. cwd is where the script expects to be started (inside the scratch dir).
+    """
+    def __init__(self, name, script, outputs, inputs=(), optional_inputs=(), code=(), packages=(), cwd='.'):
+        self.name, self.script, self.outputs = name, script, list(outputs)
+        self.inputs, self.optional_inputs = list(inputs), list(optional_inputs)
+        self.code, self.packages, self.cwd = list(code), list(packages), cwd
+
+
+STAGES = [
+    Stage("user_profiles", "ml_scripts/data_generation/generate_user_profile.py",
+          outputs=["data/user_profile_data_india.csv"], packages=["numpy", "pandas"]),
+    Stage("investment_data", "ml_scripts/data_generation/generate_investment_data.py",
+          inputs=["data/user_profile_data_india.csv"], code=["streamlit_app/ai_integration/instruments.py"],
+          outputs=["data/investment_suitability_data_india.csv"], packages=["numpy", "pandas"]),
+    Stage("risk_model", "ml_scripts/training/train_risk_model.py",
+          inputs=["data/user_profile_data_india.csv"],
+          outputs=["models/user_data_preprocessor.joblib", "models/risk_profile_rf_model.joblib"],
+          packages=["numpy", "pandas", "scikit-learn", "joblib"]),
+    Stage("investment_model", "ml_scripts/training/train_investment_model.py",
+          inputs=["data/investment_suitability_data_india.csv"],
+          outputs=["models/investment_data_preprocessor.joblib", "models/investment_suitability_xgb_model.joblib"],
+          packages=["numpy", "pandas", "scikit-learn", "xgboost", "joblib"]),
+    # Saves to ../../models and logs to ./rl_logs, i.e. it expects to be started from ml_scripts/training.
+    # Market inputs come from ai_integration.market_inputs: the NAV store when present, else the band assumptions.
+    Stage("rl_policy", "ml_scripts/training/train_rl_model.py", cwd="ml_scripts/training",
+          optional_inputs=["data/nav_store"],
+          code=["ml_scripts/training/rl_environment.py", "streamlit_app/ai_integration/instruments.py",
+                "streamlit_app/ai_integration/market_inputs.py", "streamlit_app/ai_integration/nav_store.py",
+                "streamlit_app/ai_integration/allocation.py"],
+          outputs=["models/rl_planner_ppo_v1.zip"], packages=["numpy", "gymnasium", "stable-baselines3", "torch"]),
+]
+STAGES_BY_NAME = {stage.name: stage for stage in STAGES}
+
+
+def dependencies(stage):
+    """Names of the stages that write a file this stage reads."""
+    producers = {output: other.name for other in STAGES for output in other.outputs}
+    return sorted({producers[path] for path in stage.inputs + stage.optional_inputs if path in producers and producers[path] != stage.name})
+
+
+def with_upstream(names):
+    selected, pending = set(), list(names)
+    while pending:
+        name = pending.pop()
+        if name in selected: continue
+        selected.add(name)
+        pending += dependencies(STAGES_BY_NAME[name])
+    return [stage for stage in STAGES if stage.name in selected] # Declaration order
+
+
+# --- Hashing ---
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''): digest.update(chunk)
+    return digest.hexdigest()
+
+
+def path_hash(relative):
+    """Hash of a file, or of every file under a directory (names included); None when missing."""
+    path = os.path.join(PROJECT_ROOT, relative)
+    if os.path.isfile(path): return file_hash(path)
+    if not os.path.isdir(path): return None
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            digest.update(os.path.relpath(full, path).encode() + b'\0' + file_hash(full).encode())
+    return digest.hexdigest()
+
+
+def package_version(name):
+    try: return metadata.version(name)
+    except metadata.PackageNotFoundError: return None
+
+
+def stage_key(stage):
+    """Content hash of everything that determines the stage's outputs."""
+    spec = {"script": path_hash(stage.script), "code": {path: path_hash(path) for path in stage.code},
+            "inputs": {path: path_hash(path) for path in stage.inputs + stage.optional_inputs}, "outputs": stage.outputs, "cwd": stage.cwd,
+            "params": {"python": platform.python_version(), **{name: package_version(name) for name in stage.packages}}}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+# --- State and object store ---
+def load_state():
+    try:
+        with open(STATE_FILE) as f: return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError): return {}
+
+
+def write_json_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f: json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def store_object(path, digest):
+    target = os.path.join(OBJECTS_DIR, digest[:2], digest)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        shutil.copy2(path, tmp); os.replace(tmp, target)
+
+
+def object_path(digest):
+    return os.path.join(OBJECTS_DIR, digest[:2], digest)
+
+
+def install(source, relative):
+    """Atomically puts source at relative (under the project root); source is consumed."""
+    target = os.path.join(PROJECT_ROOT, relative)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(source, target)
+
+
+def outputs_match(outputs):
+    return all(path_hash(path) == digest for path, digest in outputs.items())
+
+
+# --- Running one stage ---
+def _prepare_scratch(stage):
+    """Scratch project tree for one run: links to the stage's inputs and empty output directories."""
+    os.makedirs(WORK_DIR, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix=f"{stage.name}-", dir=WORK_DIR) # Same filesystem, so os.replace is atomic
+    for relative in stage.inputs + stage.optional_inputs:
+        source, target = os.path.join(PROJECT_ROOT, relative), os.path.join(scratch, relative)
+        if not os.path.exists(source):
+            if relative in stage.optional_inputs: continue
+            raise FileNotFoundError(f"input {relative} is missing")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.symlink(source, target)
+    for relative in stage.outputs + [os.path.join(stage.cwd, 'x')]:
+        os.makedirs(os.path.dirname(os.path.join(scratch, relative)), exist_ok=True)
+    return scratch
+
+
+def run_stage(stage, record, force=False):
+    """Brings one stage up to date. Returns its result dict (status, seconds, key, outputs, log)."""
+    start = time.perf_counter()
+    key = stage_key(stage)
+    result = {"stage": stage.name, "key": key, "outputs": record.get("outputs", {}), "log": None}
+    done = lambda status, **extra: {**result, "status": status, "seconds": time.perf_counter() - start, **extra}
+
+    if not force and record.get("key") == key and outputs_match(record.get("outputs", {})):
+        return done("up to date")
+    cached = record.get("runs", {}).get(key)
+    if not force and cached and all(os.path.exists(object_path(digest)) for digest in cached.values()):
+        for relative, digest in cached.items():
+            tmp = os.path.join(PROJECT_ROOT, f"{relative}.{os.getpid()}.restore.tmp")
+            os.makedirs(os.path.dirname(tmp), exist_ok=True)
+            shutil.copy2(object_path(digest), tmp); install(tmp, relative)
+        return done("restored", outputs=dict(cached))
+
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    log_path = os.path.join(LOGS_DIR, f"{stage.name}.log")
+    scratch = None
+    try:
+        scratch = _prepare_scratch(stage)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+        with open(log_path, 'w') as log:
+            returncode = subprocess.run([sys.executable, os.path.join(PROJECT_ROOT, stage.script)], cwd=os.path.join(scratch, stage.cwd),
+                                        env=env, stdout=log, stderr=subprocess.STDOUT).returncode
+        if returncode != 0: return done("failed", log=log_path, error=f"exit status {returncode}")
+        missing = [relative for relative in stage.outputs if not os.path.isfile(os.path.join(scratch, relative))]
+        if missing: return done("failed", log=log_path, error=f"did not write {', '.join(missing)}")
+        outputs = {}
+        for relative in stage.outputs: # Hash and store first, so the object store never lags behind the tree
+            produced = os.path.join(scratch, relative)
+            outputs[relative] = file_hash(produced)
+            store_object(produced, outputs[relative])
+        for relative in stage.outputs: install(os.path.join(scratch, relative), relative)
+        return done("ran", outputs=outputs, log=log_path)
+    except Exception as e:
+        return done("failed", log=log_path, error=str(e))
+    finally:
+        if scratch: shutil.rmtree(scratch, ignore_errors=True)
+
+
+def update_record(record, result):
+    """State entry after a successful run: current key/outputs plus the last few restorable runs."""
+    runs = {k: v for k, v in record.get("runs", {}).items() if k != result["key"]}
+    runs[result["key"]] = result["outputs"]
+    runs = dict(list(runs.items())[-CACHED_RUNS_PER_STAGE:])
+    return {"key": result["key"], "outputs": result["outputs"], "runs": runs, "updated": time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def prune_objects(state):
+    """Removes objects no state entry refers to any more."""
+    referenced = {digest for record in state.values() for run in record.get("runs", {}).values() for digest in run.values()}
+    if not os.path.isdir(OBJECTS_DIR): return
+    for root, _, files in os.walk(OBJECTS_DIR):
+        for name in files:
+            if name not in referenced: os.remove(os.path.join(root, name))
+
+
+# --- Scheduler ---
+def run_pipeline(stages, jobs=2, force=(), dry_run=False):
+    """Runs stages in dependency order, independent ones concurrently. Returns the results in stage order."""
+    state = load_state()
+    selected = {stage.name for stage in stages}
+    deps = {stage.name: [d for d in dependencies(stage) if d in selected] for stage in stages}
+    results, running = {}, {}
+    if dry_run:
+        for stage in stages:
+            record, key = state.get(stage.name, {}), stage_key(stage)
+            if any(results[d]["status"].startswith("would run") for d in deps[stage.name]): status = "would run (after upstream)"
+            elif stage.name not in force and record.get("key") == key and outputs_match(record.get("outputs", {})): status = "up to date"
+            elif stage.name not in force and key in record.get("runs", {}): status = "would restore"
+            else: status = "would run"
+            results[stage.name] = {"stage": stage.name, "status": status, "seconds": 0.0, "key": key}
+        return [results[stage.name] for stage in stages]
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool: # Threads only wait on the stage subprocesses
+        while len(results) < len(stages):
+            for stage in stages:
+                name = stage.name
+                if name in results or name in running: continue
+                failed = [d for d in deps[name] if d in results and results[d]["status"] in ("failed", "skipped")]
+                if failed:
+                    results[name] = {"stage": name, "status": "skipped", "seconds": 0.0, "key": None, "error": f"{', '.join(failed)} failed"}
+                elif all(d in results for d in deps[name]):
+                    print(f"[{time.strftime('%H:%M:%S')}] {name}: started")
+                    running[name] = pool.submit(run_stage, stage, state.get(name, {}), name in force)
+            if not running: continue # Only skips were added; schedule again
+            finished, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+            for name in [n for n, future in running.items() if future in finished]:
+                result = results[name] = running.pop(name).result()
+                print(f"[{time.strftime('%H:%M:%S')}] {name}: {result['status']} ({result['seconds']:.1f} s)"
+                      + (f" - {result['error']}; log: {result['log']}" if result.get("error") else ""))
+                if result["status"] in ("ran", "restored", "up to date"):
+                    state[name] = update_record(state.get(name, {}), result)
+                    write_json_atomic(STATE_FILE, state)
+    prune_objects(state)
+    return [results[stage.name] for stage in stages]
+
+
+def format_report(results, wall_s):
+    lines = [f"{'Stage':<18} {'Status':<28} {'Seconds':>8}  Key", "-" * 70]
+    for r in results:
+        lines.append(f"{r['stage']:<18} {r['status']:<28} {r['seconds']:>8.1f}  {(r.get('key') or '-')[:12]}")
+    serial = sum(r["seconds"] for r in results)
+    lines.append("-" * 70)
+    lines.append(f"Wall time {wall_s:.1f} s (stage times add up to {serial:.1f} s)")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the data generation and training stages that are out of date.")
+    parser.add_argument("stages", nargs="*", metavar="STAGE",
+                        help=f"Stages to bring up to date, with their upstream stages (default: all). One of: {', '.join(STAGES_BY_NAME)}")
+    parser.add_argument("--jobs", type=int, default=2, help="Stages run at the same time.")
+    parser.add_argument("--force", action="store_true", help="Rerun the named stages (all stages if none are named) even if up to date.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would run.")
+    parser.add_argument("--list", action="store_true", help="Show the declared stages and exit.")
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in STAGES_BY_NAME]
+    if unknown: parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    if args.list:
+        for stage in STAGES:
+            print(f"{stage.name}: {stage.script}\n  after:   {', '.join(dependencies(stage)) or '-'}\n"
+                  f"  inputs:  {', '.join(stage.inputs + stage.optional_inputs + stage.code) or '-'}\n  outputs: {', '.join(stage.outputs)}\n  params:  {', '.join(stage.packages)}")
+        return 0
+    stages = with_upstream(args.stages or list(STAGES_BY_NAME))
+    force = set(args.stages or STAGES_BY_NAME) if args.force else set()
+    start = time.perf_counter()
+    results = run_pipeline(stages, jobs=args.jobs, force=force, dry_run=args.dry_run)
+    wall_s = time.perf_counter() - start
+    print(f"\n--- Pipeline Report ---\n{format_report(results, wall_s)}")
+    if not args.dry_run: write_json_atomic(REPORT_FILE, {"finished": time.strftime('%Y-%m-%dT%H:%M:%S'), "wall_s": wall_s, "stages": results})
+    return 1 if any(r["status"] in ("failed", "skipped") for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
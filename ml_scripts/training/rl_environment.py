@@ -1,22 +1,59 @@
 # ml_scripts/rl_environment.py
+import os
+import sys
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'streamlit_app'))
+from ai_integration.instruments import AVAILABLE_INVESTMENTS
+from ai_integration.market_inputs import get_allocation_inputs
+
+MONTHS_PER_YEAR = 12
+
+
+def market_investment_options():
+    """
+    (investment_options, correlation) over AVAILABLE_INVESTMENTS from the app's market estimates (NAV store
+    when present, otherwise the band assumptions); see market_inputs.get_allocation_inputs.
+    """
+    mu, cov = get_allocation_inputs()
+    volatility = np.sqrt(np.diag(cov))
+    options = {t: {"avg_return": float(r), "volatility": float(v)} for t, r, v in zip(AVAILABLE_INVESTMENTS, mu, volatility)}
+    return options, cov / np.outer(volatility, volatility)
+
+
 class FinancialPlannerEnv(gym.Env):
     metadata = {"render_modes": [], "render_fps": 4}
 
-    def __init__(self, user_profile, goal_amount, time_steps, investment_options):
+    def __init__(self, user_profile, goal_amount, time_steps, investment_options, correlation=None, verbose=0):
+        """
+        investment_options: {name: {'avg_return', 'volatility'}} with annual figures (0.08 for 8%); its order is
+        the order of the allocation weights in the action. correlation: matrix of annual return correlations in
+        that order (default: uncorrelated). verbose: 0 silent, 1 reset/episode summaries, 2 every step.
+        """
         super().__init__()
         self.start_profile = user_profile # Dict with initial Age, Income, Savings etc.
         self.goal_amount = goal_amount
         self.total_time_steps = time_steps # e.g., number of months
         self.investment_options = investment_options # Dict with 'avg_return', 'volatility' per type
-
-        # --- Define Action Space (Example: Save %, Allocate % to 2 options) ---
-        # Action: [save_pct, alloc_inv1_pct] (alloc_inv2 = 1 - alloc_inv1)
-        # Bounds: Save 0-50%, Alloc 0-100%
-        self.action_space = spaces.Box(low=np.array([0, 0]), high=np.array([0.5, 1.0]), dtype=np.float32)
+        self.asset_names = list(investment_options)
+        self.verbose = verbose
+        n_assets = len(self.asset_names)
+
+        # --- Return Model (monthly, lognormal, correlated) ---
+        annual_return = np.array([investment_options[a]["avg_return"] for a in self.asset_names], dtype=np.float64)
+        annual_volatility = np.array([investment_options[a]["volatility"] for a in self.asset_names], dtype=np.float64)
+        self._monthly_sigma = annual_volatility / np.sqrt(MONTHS_PER_YEAR)
+        self._monthly_drift = np.log1p(annual_return) / MONTHS_PER_YEAR - 0.5 * self._monthly_sigma ** 2 # Mean growth matches avg_return
+        correlation = np.eye(n_assets) if correlation is None else np.asarray(correlation, dtype=np.float64)
+        try: self._cholesky = np.linalg.cholesky(correlation) # Factored once; reset() only multiplies by it
+        except np.linalg.LinAlgError: raise ValueError("correlation must be a positive definite matrix over investment_options.")
+        self._monthly_returns = np.zeros((time_steps, n_assets)) # Filled per episode by reset()
+
+        # --- Define Action Space: [save_pct, weight per investment option] ---
+        # Bounds: Save 0-50%; weights 0-1, normalised to sum to 1 (all zero means equal weights)
+        self.action_space = spaces.Box(low=np.zeros(1 + n_assets), high=np.array([0.5] + [1.0] * n_assets), dtype=np.float32)
 
         # --- Define Observation Space (Example: simplified state) ---
         # State: [current_savings, current_inv_value, time_steps_left]
@@ -29,8 +66,9 @@ class FinancialPlannerEnv(gym.Env):
         self.current_savings = 0
         self.current_investment_value = 0
         self.current_step = 0
+        self.monthly_income = self.start_profile.get("MonthlyIncomeEstimate", 50000) # Example income
 
-        print("FinancialPlannerEnv initialized.")
+        if self.verbose: print(f"FinancialPlannerEnv initialized with {n_assets} investment options.")
 
     def _get_obs(self):
         """Returns the current state observation."""
@@ -42,9 +80,10 @@ class FinancialPlannerEnv(gym.Env):
         return {"current_step": self.current_step}
 
     def reset(self, seed=None, options=None):
-        """Resets the environment to the initial state."""
+        """Resets the environment and draws the episode's monthly returns in one batch from self.np_random."""
         super().reset(seed=seed)
-        print("Resetting environment...")
+        shocks = self.np_random.standard_normal((self.total_time_steps, len(self.asset_names))) @ self._cholesky.T
+        self._monthly_returns = np.expm1(self._monthly_drift + self._monthly_sigma * shocks)
         # Initialize state based on starting profile (simplified example)
         self.current_savings = self.start_profile.get("InitialSavings", 10000) # Get initial savings or default
         self.current_investment_value = self.start_profile.get("InitialInvestments", 5000) # Example
@@ -52,38 +91,31 @@ class FinancialPlannerEnv(gym.Env):
 
         observation = self._get_obs()
         info = self._get_info()
-        print(f"Reset complete. Initial Obs: {observation}")
+        if self.verbose: print(f"Reset complete. Initial Obs: {observation}")
         return observation, info
 
     def step(self, action):
-        """Applies action, simulates time step, calculates reward."""
+        """Applies action, simulates time step with the pre-drawn returns, calculates reward."""
         self.current_step += 1
-        print(f"\n--- Step {self.current_step} ---")
-        print(f"Action taken: {action}")
+        if self.verbose >= 2: print(f"\n--- Step {self.current_step} ---\nAction taken: {action}")
 
-        save_pct = action[0]
-        alloc_inv1_pct = action[1]
-        alloc_inv2_pct = 1.0 - alloc_inv1_pct # Assuming 2 investment choices for simplicity
+        save_pct = float(action[0])
+        weights = np.asarray(action[1:], dtype=np.float64)
+        total_weight = weights.sum()
+        weights = weights / total_weight if total_weight > 0 else np.full(len(weights), 1.0 / len(weights))
 
         # --- Simulate Savings ---
         # Simplified: Add saving based on a fraction of 'income' (needs income in profile)
-        monthly_income = self.start_profile.get("MonthlyIncomeEstimate", 50000) # Example income
-        saved_this_step = monthly_income * save_pct
+        saved_this_step = self.monthly_income * save_pct
         self.current_savings += saved_this_step
-        print(f"Savings: Added {saved_this_step:.2f}, Total Savings: {self.current_savings:.2f}")
 
         # --- Simulate Investment ---
-        # Simplified: Assume savings are invested immediately based on allocation
-        # Calculate growth/loss based on stochastic returns (mean + random noise * volatility)
-        # This needs a more robust simulation model!
-        # Example placeholder: just add a small fixed % for now
-        inv_growth_factor = 0.005 # Placeholder monthly growth
-        invested_amount = self.current_investment_value + saved_this_step # Invest new savings too
-        # More complex: calculate weighted return based on alloc_inv1/2_pct and their simulated returns
-        self.current_investment_value = invested_amount * (1 + inv_growth_factor + np.random.normal(0, 0.01)) # Add noise
+        # Savings are invested immediately and the portfolio is rebalanced to the action's weights,
+        # so it grows by the weighted return of this month's draw.
+        portfolio_return = float(weights @ self._monthly_returns[self.current_step - 1])
+        self.current_investment_value = (self.current_investment_value + self.current_savings) * (1 + portfolio_return)
         self.current_savings = 0 # Assume all savings are invested for simplicity here
-        print(f"Investment Value: {self.current_investment_value:.2f}")
-
+        if self.verbose >= 2: print(f"Savings: Added {saved_this_step:.2f}; portfolio return {portfolio_return:.4f}; Investment Value: {self.current_investment_value:.2f}")
 
         # --- Calculate Reward ---
         reward = 0
@@ -99,10 +131,10 @@ class FinancialPlannerEnv(gym.Env):
 
         if terminated:
             reward += 100 # Large reward for reaching goal
-            print("GOAL REACHED!")
+            if self.verbose: print(f"GOAL REACHED at step {self.current_step}.")
         elif truncated:
             reward -= 50 # Penalty for running out of time
-            print("TIME LIMIT REACHED.")
+            if self.verbose: print(f"TIME LIMIT REACHED at {current_total_value:.2f} of {self.goal_amount:.2f}.")
             # Penalty based on how far off the goal?
             reward -= (self.goal_amount - current_total_value) / self.goal_amount * 10
 
@@ -114,12 +146,11 @@ class FinancialPlannerEnv(gym.Env):
         observation = self._get_obs()
         info = self._get_info()
 
-        print(f"Reward this step: {reward:.3f}")
+        if self.verbose >= 2: print(f"Reward this step: {reward:.3f}")
         return observation, reward, terminated, truncated, info
 
     def close(self):
-        print("Closing environment.")
-        pass
+        if self.verbose: print("Closing environment.")
 
 # --- Example Usage (for testing the environment) ---
 if __name__ == '__main__':
@@ -127,12 +158,11 @@ if __name__ == '__main__':
     profile = {"InitialSavings": 5000, "InitialInvestments": 10000, "MonthlyIncomeEstimate": 60000}
     goal = 1000000
     steps = 120 # 10 years
-    # Dummy investment options (replace with actual simulated characteristics)
-    options = {"Inv1": {"avg_return": 0.08, "volatility": 0.15}, "Inv2": {"avg_return": 0.04, "volatility": 0.05}}
+    options, correlation = market_investment_options() # Every AVAILABLE_INVESTMENTS type, correlated
 
-    env = FinancialPlannerEnv(profile, goal, steps, options)
+    env = FinancialPlannerEnv(profile, goal, steps, options, correlation, verbose=2)
     # Test reset
-    obs, info = env.reset()
+    obs, info = env.reset(seed=42)
     print("Initial Observation:", obs)
     print("Initial Info:", info)
 
@@ -145,4 +175,4 @@ if __name__ == '__main__':
     print("Truncated:", truncated)
     print("Info:", info)
 
-    env.close()
\ No newline at end of file
+    env.close()
@@ -5,7 +5,7 @@ from stable_baselines3.common.env_util import make_vec_env
 # Import your custom environment
 try:
     # Direct import since it's in the same directory
-    from ml_scripts.training.rl_environment import FinancialPlannerEnv # <--- CORRECTED DIRECT IMPORT
+    from ml_scripts.training.rl_environment import FinancialPlannerEnv, market_investment_options # <--- CORRECTED DIRECT IMPORT
 except ImportError as e:
     print(f"Error importing FinancialPlannerEnv: {e}")
     print("Make sure rl_environment.py exists in the ml_scripts/training/ directory.")
@@ -18,7 +18,7 @@ except ImportError as e:
 profile = {"InitialSavings": 5000, "InitialInvestments": 10000, "MonthlyIncomeEstimate": 60000}
 goal = 1000000
 steps = 240 # Increase steps for more learning (e.g., 20 years)
-options = {"Inv1": {"avg_return": 0.08, "volatility": 0.15}, "Inv2": {"avg_return": 0.04, "volatility": 0.05}}
+options, correlation = market_investment_options() # Every AVAILABLE_INVESTMENTS type, correlated
 
 # Where to save the trained model
 MODELS_DIR = '../../models'
@@ -32,7 +32,7 @@ TOTAL_TIMESTEPS = 100000 # Start small (e.g., 100k), increase significantly for
 # --- Create Environment ---
 # You can wrap the environment creation if needed
 def make_env():
-    return FinancialPlannerEnv(profile, goal, steps, options)
+    return FinancialPlannerEnv(profile, goal, steps, options, correlation)
 
 # Vectorized environments often speed up training
 num_cpu = 4 # Use multiple cores if available
@@ -1,9 +1,9 @@
 # streamlit_app/Home.py
 import streamlit as st
 from utils import load_css # Import the utility function
-# Import the init function - Ensure db_service is importable
+# Import the schema check - Ensure services is importable
 try:
-    from services.db_service import init_db
+    from services import schema_service
 except ImportError:
      st.error("Failed to import services. Check structure/run command.")
      st.stop()
@@ -19,8 +19,8 @@ st.set_page_config(
 # --- Load CSS ---
 load_css("style.css") # Load custom styles
 
-# --- Initialize Database ---
-try: init_db()
+# --- Check Database Schema (queries the DB once per process; migrations run via schema_service) ---
+try: schema_service.ensure_schema()
 except Exception as e: st.error(f"Database initialization failed: {e}"); st.stop()
 
 # --- Session State Initialization ---
@@ -45,7 +45,7 @@ with col1:
         *   **📊 Dashboard & Advice:** Get your personalized assessment.
         """)
         if st.button("Logout", key="home_logout"):
-            st.session_state.logged_in = False; st.session_state.user_id = None; st.session_state.username = None
+            st.session_state.logged_in = False; st.session_state.user_id = None; st.session_state.username = None; st.session_state.profile_complete = None
             st.success("You have been logged out."); time.sleep(1); st.rerun()
     else:
         st.info("🔑 Please **Login** or **Register** using the sidebar to begin.")
@@ -0,0 +1,167 @@
+# streamlit_app/ai_integration/allocation.py
+# Long-only mean-variance allocation over the suitable subset of AVAILABLE_INVESTMENTS. The efficient
+# frontier of every subset (identified by a bitmask over AVAILABLE_INVESTMENTS order, 255 of them) is
+# computed once per set of market inputs and cached, in memory and optionally in an .npz file written by
+# the CLI, so a request is a frontier lookup plus interpolation at the risk profile's target volatility.
+# Pure NumPy/SciPy; market_inputs.py supplies the return and covariance estimates.
+#
+#   cd streamlit_app && python -m ai_integration.allocation --precompute
+import argparse
+import hashlib
+import os
+import threading
+import time
+from typing import NamedTuple
+import numpy as np
+from scipy.optimize import minimize
+from .instruments import AVAILABLE_INVESTMENTS
+
+INVESTMENT_TYPES = list(AVAILABLE_INVESTMENTS)
+FRONTIER_POINTS = 15
+# Portfolio volatility each risk profile is allocated at (clamped to the subset's frontier).
+PROFILE_TARGET_VOLATILITY = {"Conservative": 0.04, "Moderate": 0.09, "Aggressive": 0.15}
+# Used when there is no NAV history: annual volatility per band and one correlation for every pair.
+ASSUMED_VOLATILITY = {"Very Low": 0.01, "Low": 0.04, "Medium": 0.12, "High": 0.16, "Very High": 0.22}
+ASSUMED_CORRELATION = 0.5
+FRONTIER_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'allocation_frontiers.npz')
+
+
+class Frontier(NamedTuple):
+    returns: np.ndarray      # (points,) expected annual return, increasing
+    volatilities: np.ndarray # (points,) annual volatility, increasing
+    weights: np.ndarray      # (points, len(INVESTMENT_TYPES)), zero outside the subset
+
+
+def subset_mask(inv_types):
+    """Bitmask of inv_types over INVESTMENT_TYPES order (unknown types are ignored)."""
+    return sum(1 << INVESTMENT_TYPES.index(t) for t in set(inv_types) if t in AVAILABLE_INVESTMENTS)
+
+
+def assumed_covariance(volatilities, correlation=ASSUMED_CORRELATION):
+    correlations = np.full((len(volatilities), len(volatilities)), correlation)
+    np.fill_diagonal(correlations, 1.0)
+    return correlations * np.outer(volatilities, volatilities)
+
+
+def inputs_fingerprint(mu, cov):
+    return hashlib.sha256(np.ascontiguousarray(mu, dtype=np.float64).tobytes() + np.ascontiguousarray(cov, dtype=np.float64).tobytes()).hexdigest()[:12]
+
+
+# --- Frontier Computation ---
+def _min_variance(mu, cov, target_return, start):
+    n = len(mu)
+    constraints = [{'type': 'eq', 'fun': lambda w: w.sum() - 1, 'jac': lambda w: np.ones(n)}]
+    if target_return is not None: constraints.append({'type': 'eq', 'fun': lambda w: w @ mu - target_return, 'jac': lambda w: mu})
+    result = minimize(lambda w: w @ cov @ w, start, jac=lambda w: 2 * cov @ w, bounds=[(0.0, 1.0)] * n,
+                      constraints=constraints, method='SLSQP', options={'ftol': 1e-12, 'maxiter': 200})
+    weights = np.clip(result.x, 0.0, None)
+    return weights / weights.sum()
+
+
+def compute_frontier(mu, cov, mask, points=FRONTIER_POINTS):
+    """Long-only efficient frontier of the assets in mask, from the minimum-variance portfolio to the best-returning asset."""
+    assets = [i for i in range(len(INVESTMENT_TYPES)) if mask >> i & 1]
+    if not assets: raise ValueError("Empty investment subset.")
+    sub_mu, sub_cov = np.asarray(mu)[assets], np.asarray(cov)[np.ix_(assets, assets)]
+    weights = np.zeros((points, len(INVESTMENT_TYPES)))
+    if len(assets) == 1: weights[:, assets[0]] = 1.0
+    else:
+        start = _min_variance(sub_mu, sub_cov, None, np.full(len(assets), 1 / len(assets)))
+        targets = np.linspace(start @ sub_mu, sub_mu.max(), points)
+        for k, target in enumerate(targets):
+            start = _min_variance(sub_mu, sub_cov, target, start) if k else start # Warm start from the previous point
+            weights[k, assets] = start
+    returns = weights @ np.asarray(mu)
+    volatilities = np.sqrt(np.maximum(np.einsum('pi,ij,pj->p', weights, np.asarray(cov), weights), 0.0))
+    return Frontier(returns, np.maximum.accumulate(volatilities), weights) # Guard interpolation against solver noise
+
+
+def precompute_frontiers(mu, cov):
+    """Frontier of every non-empty subset, keyed by bitmask."""
+    return {mask: compute_frontier(mu, cov, mask) for mask in range(1, 1 << len(INVESTMENT_TYPES))}
+
+
+def save_frontiers(frontiers, fingerprint, path=FRONTIER_CACHE_PATH):
+    masks = np.array(sorted(frontiers))
+    np.savez(path, fingerprint=np.asarray(fingerprint), masks=masks,
+             returns=np.stack([frontiers[m].returns for m in masks]), volatilities=np.stack([frontiers[m].volatilities for m in masks]),
+             weights=np.stack([frontiers[m].weights for m in masks]))
+
+
+def load_frontiers(fingerprint, path=FRONTIER_CACHE_PATH):
+    """Frontiers saved for these market inputs, or {} if the file is missing or was built from other inputs."""
+    if not os.path.exists(path): return {}
+    with np.load(path, allow_pickle=False) as data:
+        if str(data["fingerprint"]) != fingerprint: return {}
+        return {int(m): Frontier(data["returns"][i], data["volatilities"][i], data["weights"][i]) for i, m in enumerate(data["masks"])}
+
+
+# --- Lookup ---
+_lock = threading.Lock()
+_frontiers = {} # fingerprint -> {mask: Frontier}
+
+
+def get_frontier(mu, cov, mask):
+    """Cached frontier for mask under (mu, cov); loads the precomputed file once per fingerprint, computes missing subsets."""
+    fingerprint = inputs_fingerprint(mu, cov)
+    with _lock:
+        if fingerprint not in _frontiers:
+            _frontiers.clear() # Only the current market inputs are worth keeping
+            _frontiers[fingerprint] = load_frontiers(fingerprint)
+        cached = _frontiers[fingerprint].get(mask)
+    if cached is not None: return cached
+    frontier = compute_frontier(mu, cov, mask)
+    with _lock: _frontiers.setdefault(fingerprint, {})[mask] = frontier
+    return frontier
+
+
+def allocate(mu, cov, risk_profile, inv_types):
+    """
+    Weights over inv_types for a risk profile: the frontier portfolio at PROFILE_TARGET_VOLATILITY,
+    interpolated between the two nearest frontier points. Returns {'weights': {type: w}, 'expected_return',
+    'expected_volatility'}, or None when no known type is given.
+    """
+    mask = subset_mask(inv_types)
+    if not mask: return None
+    frontier = get_frontier(mu, cov, mask)
+    target = PROFILE_TARGET_VOLATILITY.get(risk_profile, PROFILE_TARGET_VOLATILITY["Moderate"])
+    weights = np.array([np.interp(target, frontier.volatilities, frontier.weights[:, i]) for i in range(len(INVESTMENT_TYPES))])
+    weights /= weights.sum()
+    return {
+        "weights": {t: float(w) for t, w in zip(INVESTMENT_TYPES, weights) if w > 1e-9},
+        "expected_return": float(weights @ np.asarray(mu)),
+        "expected_volatility": float(np.sqrt(weights @ np.asarray(cov) @ weights)),
+    }
+
+
+def rounded_percentages(weights, step=5):
+    """{type: percent} rounded to multiples of step that still sum to 100 (largest remainder); zero entries dropped."""
+    units = 100 // step
+    raw = {t: w * units for t, w in weights.items()}
+    floors = {t: int(np.floor(v)) for t, v in raw.items()}
+    for t in sorted(raw, key=lambda t: raw[t] - floors[t], reverse=True)[:units - sum(floors.values())]: floors[t] += 1
+    return {t: units_ * step for t, units_ in sorted(floors.items(), key=lambda item: -item[1]) if units_}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute efficient frontiers for every investment subset.")
+    parser.add_argument("--precompute", action="store_true", help=f"Compute all subsets and write {os.path.normpath(FRONTIER_CACHE_PATH)}.")
+    args = parser.parse_args()
+    from .market_inputs import get_allocation_inputs # Imports allocation; deferred to avoid the cycle
+    mu, cov = get_allocation_inputs()
+    fingerprint = inputs_fingerprint(mu, cov)
+    if args.precompute:
+        start = time.perf_counter()
+        frontiers = precompute_frontiers(mu, cov)
+        save_frontiers(frontiers, fingerprint)
+        print(f"Computed {len(frontiers)} frontiers in {time.perf_counter() - start:.1f}s; saved to {os.path.normpath(FRONTIER_CACHE_PATH)} (inputs {fingerprint}).")
+    for profile in PROFILE_TARGET_VOLATILITY:
+        start = time.perf_counter()
+        allocation = allocate(mu, cov, profile, INVESTMENT_TYPES)
+        lookup_ms = (time.perf_counter() - start) * 1000
+        print(f"{profile:>12}: {rounded_percentages(allocation['weights'])} return {allocation['expected_return']:.1%}, "
+              f"volatility {allocation['expected_volatility']:.1%} ({lookup_ms:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
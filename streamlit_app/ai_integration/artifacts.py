@@ -0,0 +1,36 @@
+# streamlit_app/ai_integration/artifacts.py
+# Content hashes of model artifacts. prediction and model_serving record one as the model version; the
+# offline global SHAP job (ml_scripts/explainability/global_shap.py) stamps its summaries with each model's
+# hash, and the Monitoring page compares it with deployed_model_hash() to flag summaries of a retrained model.
+import hashlib
+import os
+from functools import lru_cache
+
+PROJECT_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+MODEL_DIR = os.path.join(PROJECT_ROOT_DIR, 'models')
+# Model name (as in the SHAP summaries) -> its preprocessor and model, in the order they are hashed
+MODEL_ARTIFACTS = {
+    "risk": [os.path.join(MODEL_DIR, 'user_data_preprocessor.joblib'), os.path.join(MODEL_DIR, 'risk_profile_rf_model.joblib')],
+    "investment": [os.path.join(MODEL_DIR, 'investment_data_preprocessor.joblib'), os.path.join(MODEL_DIR, 'investment_suitability_xgb_model.joblib')],
+}
+
+
+def artifact_hash(paths):
+    """Short content hash of model artifacts; changes whenever any of them is retrained."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''): digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+@lru_cache(maxsize=8)
+def _cached_hash(paths, mtimes):
+    return artifact_hash(paths)
+
+
+def deployed_model_hash(name):
+    """artifact_hash of a MODEL_ARTIFACTS model as it is on disk now (re-hashed when a file changes); None if any file is missing."""
+    paths = tuple(MODEL_ARTIFACTS[name])
+    try: return _cached_hash(paths, tuple(os.path.getmtime(path) for path in paths))
+    except OSError: return None
@@ -0,0 +1,262 @@
+# streamlit_app/ai_integration/backtest.py
+# Vectorized backtests of SIP schedules into fixed-weight allocations over historical monthly returns
+# (per investment type, from the NAV store). The allocations are the plans the app suggests: for every
+# (risk profile, suitable set) the models give the users in a profile file, allocation.allocate's weights,
+# rounded as the Dashboard shows them, and each plan counts by its number of users. --sweep instead
+# backtests every weight-step mix of PROFILE_UNIVERSES. All allocation x start month x schedule scenarios of one
+# horizon are evaluated with array operations: portfolio returns are an einsum over sliding windows of the
+# return matrix, final values an einsum of contributions against tail growth factors, and XIRR is solved
+# by Newton iterations on every scenario at once. run_grid() splits the allocations into chunks and can
+# spread them over worker processes.
+#
+#   cd streamlit_app && python -m ai_integration.backtest ../data/nav_store --workers 4
+#   cd streamlit_app && python -m ai_integration.backtest ../data/nav_store --sweep
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from . import allocation
+
+MONTHS_PER_YEAR = 12
+XIRR_ITERATIONS = 50
+XIRR_TOLERANCE = 1e-10
+PROFILE_DATA_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'user_profile_data_india.csv')
+# Investment types each risk profile's --sweep allocations are drawn from.
+PROFILE_UNIVERSES = {
+    "Conservative": ["FD", "PPF", "DebtMF", "BalancedMF"],
+    "Moderate": ["DebtMF", "BalancedMF", "IndexFund", "LargeCapMF"],
+    "Aggressive": ["IndexFund", "LargeCapMF", "MidSmallCapMF", "DirectEquity"],
+}
+
+
+class Schedule(NamedTuple):
+    months: int                # Investment horizon
+    monthly_amount: float      # First-year SIP instalment, invested at the start of each month
+    annual_step_up: float = 0.0 # Yearly instalment increase, e.g. 0.1 for 10%
+    target: float = None       # Goal value for shortfall; default: the total amount invested
+
+
+def contributions(schedule):
+    """(months,) instalments of a schedule."""
+    return schedule.monthly_amount * (1 + schedule.annual_step_up) ** (np.arange(schedule.months) // MONTHS_PER_YEAR)
+
+
+def monthly_type_returns(store):
+    """
+    (months, types DataFrame) of simple monthly returns of each investment type's equal-weight index,
+    built from the NAV store's daily NAVs. Months are labelled by their last trading day.
+    """
+    from . import nav_store
+    dates, navs = store.read()
+    daily = nav_store.log_returns(navs)
+    investment_types = np.asarray(store.investment_types)
+    types = list(dict.fromkeys(store.investment_types))
+    index = np.vstack([np.zeros(len(types)), np.cumsum(np.column_stack(
+        [np.nanmean(daily[:, investment_types == t], axis=1) for t in types]), axis=0)])
+    months = dates.astype('datetime64[M]')
+    month_end = np.flatnonzero(np.append(months[1:] != months[:-1], True))
+    returns = np.expm1(np.diff(index[month_end], axis=0))
+    return pd.DataFrame(returns, index=pd.DatetimeIndex(dates[month_end[1:]]), columns=types)
+
+
+def simplex_allocations(n_assets, step=0.1):
+    """Every weight vector over n_assets with weights in multiples of step summing to 1."""
+    units = int(round(1 / step))
+    grid = [w for w in itertools.product(range(units + 1), repeat=n_assets - 1) if sum(w) <= units]
+    return np.array([list(w) + [units - sum(w)] for w in grid], dtype=np.float64) / units
+
+
+def profile_allocations(types, step=0.1):
+    """(weights (n, len(types)), profile label per row) of the simplex grid over every PROFILE_UNIVERSES profile."""
+    weights, labels = [], []
+    for profile, universe in PROFILE_UNIVERSES.items():
+        columns = [types.index(t) for t in universe if t in types]
+        grid = simplex_allocations(len(columns), step)
+        full = np.zeros((len(grid), len(types))); full[:, columns] = grid
+        weights.append(full); labels += [profile] * len(grid)
+    return np.vstack(weights), labels
+
+
+def suitable_sets(profiles_df):
+    """{(risk profile, suitable investment types): users} as the app's models predict them for profiles_df."""
+    from . import prediction # Loads the models; only the suggested-plan backtest needs them
+    labels = prediction.predict_risk_profiles_batch(profiles_df)
+    suitable = prediction.predict_investment_suitability_batch(profiles_df, labels)
+    inv_types = np.array(list(prediction.AVAILABLE_INVESTMENTS))
+    counts = {}
+    for label, row in zip(labels, suitable):
+        key = (str(label), tuple(inv_types[row]))
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def suggested_allocations(types, sets, mu, cov):
+    """
+    (weights (n, len(types)), profile label per row, users per row): allocation.allocate for each
+    (risk profile, suitable types) in sets, rounded to the percentages the plan shows. Sets without an
+    allocation (nothing suitable) or with weight outside types are skipped, with a warning.
+    """
+    weights, labels, users = [], [], []
+    for (profile, inv_types), count in sorted(sets.items()):
+        result = allocation.allocate(mu, cov, profile, list(inv_types))
+        if not result: continue
+        row = np.zeros(len(types))
+        for inv_type, percent in allocation.rounded_percentages(result["weights"]).items():
+            if inv_type not in types: print(f"Warning: no return history for {inv_type}; skipping a {profile} plan."); break
+            row[types.index(inv_type)] = percent / 100
+        else: weights.append(row); labels.append(profile); users.append(count)
+    return np.array(weights).reshape(-1, len(types)), labels, np.array(users, dtype=np.float64)
+
+
+# --- Vectorized Engine ---
+def _xirr(flows, exponents, final_value, guess):
+    """
+    Annual rate r with sum_t flows[..., t] * (1 + r) ** exponents[t] == final_value, solved by Newton
+    iterations on every scenario at once. NaN where it does not converge.
+    """
+    rate = np.clip(guess, -0.9, 10.0)
+    active = np.ones(rate.shape, dtype=bool)
+    for _ in range(XIRR_ITERATIONS):
+        base = (1 + rate)[..., np.newaxis]
+        grown = flows * base ** exponents
+        value = grown.sum(axis=-1) - final_value
+        slope = (grown * exponents / base).sum(axis=-1)
+        step = np.where(active, value / slope, 0.0)
+        rate = np.clip(rate - step, -0.99, 100.0)
+        active &= np.abs(step) > XIRR_TOLERANCE
+        if not active.any(): break
+    return np.where(active, np.nan, rate)
+
+
+def backtest_horizon(returns, allocations, schedules, starts=None):
+    """
+    Evaluates allocations (n_alloc, n_assets) x start months x schedules that share one horizon.
+    returns is (n_months, n_assets) simple monthly returns. Returns a dict of arrays: per
+    (allocation, start) 'cagr' and 'max_drawdown' of the rebalanced portfolio, and per
+    (allocation, start, schedule) 'final_value', 'invested', 'xirr' and 'shortfall'.
+    """
+    horizon = schedules[0].months
+    if any(s.months != horizon for s in schedules): raise ValueError("All schedules must share one horizon.")
+    windows = sliding_window_view(np.asarray(returns, dtype=np.float64), horizon, axis=0) # (n_starts, n_assets, horizon)
+    if starts is not None: windows = windows[starts]
+    growth = 1 + np.einsum('ka,sah->ksh', allocations, windows)  # Monthly-rebalanced portfolio growth factors
+    nav = np.cumprod(growth, axis=2)
+    peak = np.maximum(np.maximum.accumulate(nav, axis=2), 1.0)
+    # Growth from the start of month t to the end of the horizon: nav[-1] / nav[t - 1].
+    tail = nav[..., -1:] / np.concatenate([np.ones(nav.shape[:2] + (1,)), nav[..., :-1]], axis=2)
+    flows = np.stack([contributions(s) for s in schedules]) # (n_schedules, horizon)
+    final_value = np.einsum('ksh,ch->ksc', tail, flows)
+    invested = flows.sum(axis=1)
+    targets = np.array([invested[i] if s.target is None else s.target for i, s in enumerate(schedules)])
+    exponents = (horizon - np.arange(horizon)) / MONTHS_PER_YEAR
+    guess = (final_value / invested) ** (2 * MONTHS_PER_YEAR / horizon) - 1 # Growth over the average holding period
+    return {
+        "cagr": nav[..., -1] ** (MONTHS_PER_YEAR / horizon) - 1,
+        "max_drawdown": (nav / peak - 1).min(axis=2),
+        "final_value": final_value,
+        "invested": np.broadcast_to(invested, final_value.shape),
+        "xirr": _xirr(flows[np.newaxis, np.newaxis], exponents, final_value, guess),
+        "shortfall": final_value < targets,
+    }
+
+
+def backtest(returns, allocations, schedules, start_labels=None):
+    """
+    Backtests every allocation x start month x schedule (schedules may differ in horizon; each horizon
+    uses every start month with a full window). Returns one DataFrame row per scenario.
+    """
+    frames = []
+    n_months = len(returns)
+    for horizon in sorted({s.months for s in schedules}):
+        if horizon > n_months: print(f"Warning: skipping {horizon}-month schedules, only {n_months} months of history."); continue
+        schedule_ids = [i for i, s in enumerate(schedules) if s.months == horizon]
+        result = backtest_horizon(returns, allocations, [schedules[i] for i in schedule_ids])
+        n_alloc, n_starts, n_sched = result["final_value"].shape
+        alloc_idx, start_idx, sched_idx = np.indices((n_alloc, n_starts, n_sched)).reshape(3, -1)
+        frames.append(pd.DataFrame({
+            "allocation": alloc_idx, "start": start_idx if start_labels is None else np.asarray(start_labels)[start_idx],
+            "schedule": np.asarray(schedule_ids)[sched_idx], "months": horizon,
+            "final_value": result["final_value"].ravel(), "invested": result["invested"].ravel(),
+            "cagr": result["cagr"][alloc_idx, start_idx], "xirr": result["xirr"].ravel(),
+            "max_drawdown": result["max_drawdown"][alloc_idx, start_idx], "shortfall": result["shortfall"].ravel(),
+        }))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _backtest_chunk(args):
+    returns, allocations, schedules, offset = args
+    results = backtest(returns, allocations, schedules)
+    results["allocation"] += offset
+    return results
+
+
+def run_grid(returns, allocations, schedules, workers=1, chunk_allocations=64):
+    """backtest() over allocation chunks, in worker processes when workers > 1. Same rows as backtest()."""
+    returns = np.asarray(returns, dtype=np.float64)
+    tasks = [(returns, allocations[i:i + chunk_allocations], schedules, i) for i in range(0, len(allocations), chunk_allocations)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool: parts = list(pool.map(_backtest_chunk, tasks))
+    else: parts = [_backtest_chunk(task) for task in tasks]
+    return pd.concat(parts, ignore_index=True)
+
+
+def _weighted_median(values, weights):
+    keep = np.isfinite(values)
+    values, weights = values[keep], weights[keep]
+    if not len(values): return np.nan
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    return float(values[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+
+def summarize(results, allocation_labels, allocation_weights=None):
+    """
+    Per (risk profile, horizon): median CAGR and XIRR, median and worst max drawdown, shortfall probability.
+    allocation_weights (e.g. users per suggested plan) weights each allocation's scenarios; default equal.
+    """
+    weights = np.ones(len(allocation_labels)) if allocation_weights is None else np.asarray(allocation_weights, dtype=np.float64)
+    results = results.assign(profile=np.asarray(allocation_labels)[results["allocation"]], weight=weights[results["allocation"]])
+    rows = {}
+    for key, group in results.groupby(["profile", "months"]):
+        w = group["weight"].to_numpy()
+        rows[key] = {
+            "plans": group["allocation"].nunique(), "scenarios": len(group),
+            "median_cagr": _weighted_median(group["cagr"].to_numpy(), w), "median_xirr": _weighted_median(group["xirr"].to_numpy(), w),
+            "median_max_drawdown": _weighted_median(group["max_drawdown"].to_numpy(), w), "worst_max_drawdown": group["max_drawdown"].min(),
+            "shortfall_probability": float(np.average(group["shortfall"].to_numpy(), weights=w)),
+        }
+    return pd.DataFrame.from_dict(rows, orient="index").rename_axis(["profile", "months"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest SIP schedules into the suggested allocations per risk profile.")
+    parser.add_argument("store_dir")
+    parser.add_argument("--profiles", default=PROFILE_DATA_FILE, help="User profiles whose suggested plans are backtested.")
+    parser.add_argument("--sweep", action="store_true", help="Backtest every --weight-step mix of PROFILE_UNIVERSES instead.")
+    parser.add_argument("--horizons", type=int, nargs="+", default=[12, 24, 36], help="Months.")
+    parser.add_argument("--step-ups", type=float, nargs="+", default=[0.0, 0.1])
+    parser.add_argument("--monthly-amount", type=float, default=10000)
+    parser.add_argument("--weight-step", type=float, default=0.1, help="Grid step for --sweep.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    from .nav_store import NavStore
+    monthly = monthly_type_returns(NavStore(args.store_dir))
+    if args.sweep: (allocations, labels), users = profile_allocations(list(monthly.columns), args.weight_step), None
+    else:
+        from .market_inputs import get_allocation_inputs
+        sets = suitable_sets(pd.read_csv(args.profiles))
+        allocations, labels, users = suggested_allocations(list(monthly.columns), sets, *get_allocation_inputs())
+    schedules = [Schedule(h, args.monthly_amount, step_up) for h in args.horizons for step_up in args.step_ups]
+    results = run_grid(monthly.to_numpy(), allocations, schedules, workers=args.workers)
+    print(f"{len(results):,} scenarios: {len(allocations)} {'grid' if args.sweep else 'suggested'} allocations x {len(monthly)} months of history x {len(schedules)} schedules")
+    with pd.option_context("display.float_format", "{:.4f}".format, "display.width", 160):
+        print(summarize(results, labels, users).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# streamlit_app/ai_integration/catalog.py
+# Mutual fund scheme catalog (data/fund_catalog.csv, see ml_scripts/data_generation/generate_fund_catalog.py).
+# The catalog is held column-wise as NumPy arrays with posting-list indexes by category, volatility band
+# and return band, so filtering is a few sorted-array intersections instead of a scan. The suitability
+# model was trained on each InvestmentType's bands in AVAILABLE_INVESTMENTS only, so every scheme is scored
+# with its type's bands (one batched predict_proba over the distinct types among the candidates), and the
+# scheme's own measured bands only serve the filters. The top k, ranked by that score and then by the
+# scheme's return and expense ratio, are picked with a heap.
+import heapq
+import os
+import time
+from functools import lru_cache
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from . import prediction
+from .instruments import AVAILABLE_INVESTMENTS, BANDS, RETURN_BAND_EDGES, VOLATILITY_BAND_EDGES, band_codes
+
+CATALOG_PATH = os.path.join(prediction.PROJECT_ROOT_DIR, 'data', 'fund_catalog.csv')
+CATALOG_COLUMNS = ['SchemeCode', 'SchemeName', 'AMC', 'InvestmentType', 'Plan', 'Volatility', 'Return5Y', 'ExpenseRatio', 'AUMCr']
+SUITABILITY_THRESHOLD = 0.5 # Same cut-off as model.predict
+
+
+class FundCatalog(NamedTuple):
+    columns: dict          # Column name -> np.ndarray with one entry per scheme
+    volatility_band: np.ndarray # (n,) int8 index into BANDS
+    return_band: np.ndarray     # (n,) int8 index into BANDS
+    category: np.ndarray   # (n,) int32 index into categories
+    categories: list       # InvestmentType names, sorted
+    by_category: dict      # InvestmentType -> sorted row ids
+    by_volatility: list    # band index -> sorted row ids
+    by_return: list        # band index -> sorted row ids
+
+    def __len__(self): return len(self.category)
+
+
+def build_catalog(catalog_df):
+    """Builds the columnar FundCatalog and its indexes from a DataFrame with CATALOG_COLUMNS."""
+    unknown = ~catalog_df['InvestmentType'].isin(list(AVAILABLE_INVESTMENTS))
+    if unknown.any():
+        print(f"Warning: skipping {int(unknown.sum())} catalog schemes with unknown InvestmentType.")
+        catalog_df = catalog_df[~unknown]
+    columns = {name: catalog_df[name].to_numpy() for name in CATALOG_COLUMNS}
+    volatility_band = band_codes(columns['Volatility'], VOLATILITY_BAND_EDGES)
+    return_band = band_codes(columns['Return5Y'], RETURN_BAND_EDGES)
+    categories, category_codes = np.unique(columns['InvestmentType'].astype(str), return_inverse=True)
+    rows = np.arange(len(catalog_df), dtype=np.int32) # Row ids within each posting list stay sorted
+    return FundCatalog(
+        columns=columns, volatility_band=volatility_band, return_band=return_band,
+        category=category_codes.astype(np.int32), categories=[str(c) for c in categories],
+        by_category={str(c): rows[category_codes == i] for i, c in enumerate(categories)},
+        by_volatility=[rows[volatility_band == b] for b in range(len(BANDS))],
+        by_return=[rows[return_band == b] for b in range(len(BANDS))])
+
+
+@lru_cache(maxsize=2)
+def _load_catalog(path, mtime):
+    start = time.perf_counter()
+    catalog = build_catalog(pd.read_csv(path))
+    print(f"-> Fund catalog loaded: {len(catalog)} schemes in {(time.perf_counter() - start) * 1000:.0f} ms.")
+    return catalog
+
+
+def get_catalog(path=CATALOG_PATH):
+    """The catalog at path, loaded once per process and reloaded when the file changes."""
+    return _load_catalog(path, os.path.getmtime(path))
+
+
+def _band_range(postings, lowest, highest):
+    """Sorted row ids of every band from lowest to highest (band names, inclusive)."""
+    return np.sort(np.concatenate(postings[BANDS.index(lowest):BANDS.index(highest) + 1]))
+
+
+def filter_schemes(catalog, categories=None, max_volatility=None, min_return=None):
+    """Sorted row ids of the schemes in any of `categories` with volatility band <= max_volatility and return band >= min_return."""
+    candidate_sets = []
+    if categories is not None:
+        postings = [catalog.by_category[c] for c in categories if c in catalog.by_category]
+        candidate_sets.append(np.sort(np.concatenate(postings)) if postings else np.empty(0, dtype=np.int32))
+    if max_volatility is not None: candidate_sets.append(_band_range(catalog.by_volatility, BANDS[0], max_volatility))
+    if min_return is not None: candidate_sets.append(_band_range(catalog.by_return, min_return, BANDS[-1]))
+    if not candidate_sets: return np.arange(len(catalog), dtype=np.int32)
+    candidate_sets.sort(key=len) # Intersect the most selective index first
+    row_ids = candidate_sets[0]
+    for other in candidate_sets[1:]: row_ids = np.intersect1d(row_ids, other, assume_unique=True)
+    return row_ids
+
+
+def score_schemes(catalog, row_ids, user_profile_dict, risk_profile):
+    """P('Suitable') for each scheme in row_ids: its InvestmentType's score, from one predict_proba call over the distinct types."""
+    codes, inverse = np.unique(catalog.category[row_ids], return_inverse=True)
+    types = [catalog.categories[c] for c in codes]
+    rows = pd.DataFrame({
+        'RiskProfile': risk_profile,
+        'InvestmentKnowledge': user_profile_dict.get('InvestmentKnowledge'),
+        'LiquidityNeeds': user_profile_dict.get('LiquidityNeeds'),
+        'TimeHorizonYears': user_profile_dict.get('TimeHorizonYears'),
+        'InvestmentType': types, 'InvestmentVolRange': [AVAILABLE_INVESTMENTS[t]['Volatility'] for t in types],
+        'InvestmentRetRange': [AVAILABLE_INVESTMENTS[t]['Return'] for t in types], # The bands the model was trained on
+    }, columns=prediction.INV_FEATURE_ORDER)
+    return prediction.predict_suitability_proba(rows)[inverse] if len(types) else np.empty(0)
+
+
+def top_k(catalog, row_ids, scores, k):
+    """
+    Row ids of the k best schemes: highest suitability (shared by a type's schemes), then highest 5-year
+    return, then lowest expense ratio. Schemes below SUITABILITY_THRESHOLD are not ranked.
+    """
+    keep = scores >= SUITABILITY_THRESHOLD
+    row_ids, scores = row_ids[keep], scores[keep]
+    entries = zip(scores.tolist(), catalog.columns['Return5Y'][row_ids].tolist(),
+                  (-catalog.columns['ExpenseRatio'][row_ids]).tolist(), row_ids.tolist())
+    return [(entry[3], entry[0]) for entry in heapq.nlargest(k, entries)]
+
+
+def _python_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def recommend_schemes(user_profile_dict, risk_profile, categories=None, max_volatility=None, min_return=None, k=10, catalog=None):
+    """
+    Top-k schemes for a user. Returns {'schemes': [...], 'candidates': n}; each scheme is a dict of
+    catalog columns plus 'suitability_score' and its volatility/return bands.
+    """
+    catalog = get_catalog() if catalog is None else catalog
+    row_ids = filter_schemes(catalog, categories, max_volatility, min_return)
+    scores = score_schemes(catalog, row_ids, user_profile_dict, risk_profile)
+    picks = []
+    for row, score in top_k(catalog, row_ids, scores, k):
+        scheme = {name: _python_value(catalog.columns[name][row]) for name in CATALOG_COLUMNS}
+        scheme.update(suitability_score=round(score, 3), volatility_band=BANDS[catalog.volatility_band[row]], return_band=BANDS[catalog.return_band[row]])
+        picks.append(scheme)
+    return {"schemes": picks, "candidates": len(row_ids)}
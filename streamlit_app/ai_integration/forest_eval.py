@@ -0,0 +1,136 @@
+# streamlit_app/ai_integration/forest_eval.py
+# Array-backed evaluator for fitted sklearn RandomForestClassifiers. The forest is flattened into
+# contiguous node arrays (optionally exported to .npz) and scored by a numba kernel, avoiding
+# sklearn's per-call validation and per-tree dispatch. Output matches predict_proba bit for bit:
+# X is cast to float32 like sklearn does, leaf class fractions are normalised the same way and the
+# per-tree probabilities are summed in tree order before dividing by the number of trees.
+#
+#   python -m ai_integration.forest_eval ../models/risk_profile_rf_model.joblib ../models/risk_profile_rf_forest.npz
+import argparse
+from typing import NamedTuple
+import numpy as np
+from numba import njit, prange
+
+TREE_LEAF = -1 # sklearn's children_left/children_right marker for leaves
+LOCKSTEP_ROWS = 8 # Rows walked through a tree together, so their cache misses overlap
+BLOCK_ROWS = 4096 # Rows per parallel task; large enough that each tree is reused while cached
+PARALLEL_MIN_ROWS = 2 * BLOCK_ROWS # Below this, one thread does the whole batch
+
+
+class FlatForest(NamedTuple):
+    # Node arrays of all trees concatenated. Leaves point to themselves with threshold +inf, so a
+    # tree is walked a fixed depths[t] steps without testing for leaves.
+    feature: np.ndarray            # (n_nodes,) int32, split feature per node
+    threshold: np.ndarray          # (n_nodes,) float64, go left when x <= threshold
+    children_left: np.ndarray      # (n_nodes,) int32, global node ids
+    children_right: np.ndarray     # (n_nodes,) int32
+    missing_go_to_left: np.ndarray # (n_nodes,) bool, where NaNs go (sklearn >= 1.3 semantics)
+    leaf_proba: np.ndarray         # (n_nodes, n_classes) float64, normalised class fractions
+    roots: np.ndarray              # (n_trees,) int32, node id of each tree's root
+    depths: np.ndarray             # (n_trees,) int32, max depth of each tree
+    classes: np.ndarray            # (n_classes,) labels, as model.classes_
+    n_features: int
+
+
+def flatten_forest(model):
+    """Concatenates every tree of a fitted RandomForestClassifier into one FlatForest."""
+    features, thresholds, lefts, rights, missing_left, leaf_probas, roots = [], [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(offset, offset + tree.node_count, dtype=np.int32)
+        is_leaf = tree.children_left == TREE_LEAF
+        # Same normalisation as DecisionTreeClassifier.predict_proba.
+        proba = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        proba /= normalizer
+        missing = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+        features.append(np.where(is_leaf, 0, tree.feature)); thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset)); rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+        missing_left.append(np.asarray(missing).astype(bool) & ~is_leaf); leaf_probas.append(proba); roots.append(offset)
+        offset += tree.node_count
+    return FlatForest(
+        feature=np.concatenate(features).astype(np.int32), threshold=np.concatenate(thresholds).astype(np.float64),
+        children_left=np.concatenate(lefts).astype(np.int32), children_right=np.concatenate(rights).astype(np.int32),
+        missing_go_to_left=np.concatenate(missing_left), leaf_proba=np.ascontiguousarray(np.concatenate(leaf_probas)),
+        roots=np.asarray(roots, dtype=np.int32), depths=np.asarray([e.tree_.max_depth for e in model.estimators_], dtype=np.int32),
+        classes=np.asarray(model.classes_), n_features=int(model.n_features_in_))
+
+
+def save_forest(forest, path):
+    """Writes a FlatForest to .npz; loading it needs only NumPy (class labels are stored as strings)."""
+    arrays = {field: getattr(forest, field) for field in FlatForest._fields if field != "n_features"}
+    np.savez(path, n_features=np.asarray(forest.n_features), **{**arrays, "classes": forest.classes.astype(str)})
+
+
+def load_forest(path):
+    """Reads a FlatForest written by save_forest."""
+    with np.load(path, allow_pickle=False) as data:
+        return FlatForest(**{field: data[field] for field in FlatForest._fields if field != "n_features"},
+                          n_features=int(data["n_features"]))
+
+
+# --- Kernels ---
+# Tree-major: each tree scores a whole range of rows while its nodes are hot in cache, walking
+# LOCKSTEP_ROWS rows at once. Every row still accumulates trees in order, so the sums round
+# exactly like sklearn's.
+@njit(cache=True)
+def _score_rows(X, start, stop, feature, threshold, left, right, missing_left, depths, leaf_proba, roots, out):
+    nodes = np.empty(LOCKSTEP_ROWS, dtype=np.int32)
+    for t in range(roots.shape[0]):
+        for block_start in range(start, stop, LOCKSTEP_ROWS):
+            n = min(LOCKSTEP_ROWS, stop - block_start)
+            for k in range(n): nodes[k] = roots[t]
+            for _ in range(depths[t]):
+                for k in range(n):
+                    node = nodes[k]
+                    x = X[block_start + k, feature[node]]
+                    go_left = (x <= threshold[node]) | ((x != x) & missing_left[node]) # Bitwise, so it compiles branch-free
+                    nodes[k] = left[node] if go_left else right[node]
+            for k in range(n):
+                for c in range(leaf_proba.shape[1]): out[block_start + k, c] += leaf_proba[nodes[k], c]
+    for i in range(start, stop):
+        for c in range(leaf_proba.shape[1]): out[i, c] /= roots.shape[0]
+
+
+@njit(cache=True, parallel=True)
+def _score_blocks(X, feature, threshold, left, right, missing_left, depths, leaf_proba, roots, out):
+    n_blocks = (X.shape[0] + BLOCK_ROWS - 1) // BLOCK_ROWS
+    for b in prange(n_blocks):
+        _score_rows(X, b * BLOCK_ROWS, min(X.shape[0], (b + 1) * BLOCK_ROWS),
+                    feature, threshold, left, right, missing_left, depths, leaf_proba, roots, out)
+
+
+def predict_proba(forest, X):
+    """Class probabilities for a 2-D feature matrix (dense or scipy sparse), identical to model.predict_proba(X)."""
+    if hasattr(X, "toarray"): X = X.toarray()
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    if X.ndim != 2 or X.shape[1] != forest.n_features:
+        raise ValueError(f"X has shape {X.shape}, the forest expects {forest.n_features} features.")
+    out = np.zeros((X.shape[0], len(forest.classes)), dtype=np.float64)
+    arrays = (forest.feature, forest.threshold, forest.children_left, forest.children_right,
+              forest.missing_go_to_left, forest.depths, forest.leaf_proba, forest.roots, out)
+    if X.shape[0] < PARALLEL_MIN_ROWS: _score_rows(X, 0, X.shape[0], *arrays)
+    else: _score_blocks(X, *arrays)
+    return out
+
+
+def predict(forest, X):
+    """Predicted labels, identical to model.predict(X)."""
+    return forest.classes.take(np.argmax(predict_proba(forest, X), axis=1), axis=0)
+
+
+def main():
+    import joblib
+    parser = argparse.ArgumentParser(description="Export a fitted RandomForestClassifier to a FlatForest .npz.")
+    parser.add_argument("model_path"); parser.add_argument("output_path")
+    args = parser.parse_args()
+    model = joblib.load(args.model_path)
+    forest = flatten_forest(model)
+    save_forest(forest, args.output_path)
+    print(f"Exported {len(forest.roots)} trees / {len(forest.feature)} nodes to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
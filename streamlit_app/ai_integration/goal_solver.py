@@ -0,0 +1,91 @@
+# streamlit_app/ai_integration/goal_solver.py
+# Inverse of the SIP calculators for many goals at once: the monthly SIP that reaches a goal amount by a
+# horizon (closed form: the value is linear in the instalment), and the months until a SIP reaches a goal
+# (bisection over whole months on every goal at once; the value only grows with time for non-negative
+# instalments). Same math and conventions as the Dashboard's calculate_sip_investment: monthly compounding,
+# instalments at the end of each month, step-ups once a year, via projection.value_after_periods.
+# Pure NumPy (no model imports).
+#
+#   cd streamlit_app && python -m ai_integration.goal_solver 5000000 15 --rate 12 --step-up 10
+import argparse
+import numpy as np
+import pandas as pd
+from . import projection
+
+PERIODS_PER_YEAR = 12
+MAX_YEARS = 50 # time_to_goal searches this far ahead; later goals come back as NaN (not reachable)
+
+
+def _broadcast(*arrays):
+    return np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in arrays))
+
+
+def goal_value(sip_amounts, annual_rates, periods, step_up_rates=0.0, initial_amounts=0.0, periods_per_year=PERIODS_PER_YEAR):
+    """Value after `periods` months of a (step-up) SIP plus an initial lump sum invested at month 0."""
+    sip = projection.value_after_periods(sip_amounts, annual_rates, periods, projection.CONTRIBUTION_STEP_UP_SIP, periods_per_year, step_up_rates)
+    return sip + projection.value_after_periods(initial_amounts, annual_rates, periods, projection.CONTRIBUTION_LUMPSUM, periods_per_year)
+
+
+def required_sip(goal_amounts, annual_rates, years, step_up_rates=0.0, initial_amounts=0.0, periods_per_year=PERIODS_PER_YEAR):
+    """
+    First-year monthly SIP that reaches each goal at its horizon (rates as fractions, e.g. 0.12).
+    0 where the initial amount alone gets there; NaN for horizons under one period with the goal not yet met.
+    """
+    goals, rates, years, step_ups, initial = _broadcast(goal_amounts, annual_rates, years, step_up_rates, initial_amounts)
+    periods = np.round(years * periods_per_year)
+    shortfall = np.maximum(goals - goal_value(0.0, rates, periods, step_ups, initial, periods_per_year), 0.0)
+    per_rupee = goal_value(1.0, rates, periods, step_ups, 0.0, periods_per_year) # Value of a SIP of 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(shortfall == 0, 0.0, np.where(per_rupee > 0, shortfall / per_rupee, np.nan))
+
+
+def time_to_goal(goal_amounts, sip_amounts, annual_rates, step_up_rates=0.0, initial_amounts=0.0,
+                 periods_per_year=PERIODS_PER_YEAR, max_years=MAX_YEARS):
+    """
+    Months until each goal is reached (the first month-end with value >= goal), or NaN if not within
+    max_years. Bisection on all goals together: about log2(max_years * 12) evaluations of goal_value.
+    """
+    goals, sips, rates, step_ups, initial = _broadcast(goal_amounts, sip_amounts, annual_rates, step_up_rates, initial_amounts)
+    low = np.zeros(goals.shape)                            # Invariant: value(low) < goal ...
+    high = np.full(goals.shape, float(max_years * periods_per_year)) # ... <= value(high) where reachable
+    reached_now = initial >= goals
+    reachable = goal_value(sips, rates, high, step_ups, initial, periods_per_year) >= goals
+    for _ in range(int(np.ceil(np.log2(max_years * periods_per_year)))):
+        mid = np.floor((low + high) / 2)
+        done = goal_value(sips, rates, mid, step_ups, initial, periods_per_year) >= goals
+        high, low = np.where(done, mid, high), np.where(done, low, mid)
+    return np.where(reached_now, 0.0, np.where(reachable, high, np.nan))
+
+
+def solve_goals(goals_df, max_years=MAX_YEARS):
+    """
+    Batch API: goals_df has GoalAmount, Years and AnnualReturn (%) and optionally StepUp (%),
+    CurrentSavings and MonthlySIP. Returns a copy with RequiredMonthlySIP and, when MonthlySIP is given,
+    MonthsToGoal (NaN when not reached within max_years).
+    """
+    rates = goals_df["AnnualReturn"].to_numpy(dtype=float) / 100
+    step_ups = goals_df["StepUp"].to_numpy(dtype=float) / 100 if "StepUp" in goals_df else 0.0
+    initial = goals_df["CurrentSavings"].to_numpy(dtype=float) if "CurrentSavings" in goals_df else 0.0
+    result = goals_df.copy()
+    result["RequiredMonthlySIP"] = required_sip(goals_df["GoalAmount"].to_numpy(dtype=float), rates, goals_df["Years"].to_numpy(dtype=float), step_ups, initial)
+    if "MonthlySIP" in goals_df:
+        result["MonthsToGoal"] = time_to_goal(goals_df["GoalAmount"].to_numpy(dtype=float), goals_df["MonthlySIP"].to_numpy(dtype=float), rates, step_ups, initial, max_years=max_years)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Required monthly SIP for a goal, and months to reach it with a given SIP.")
+    parser.add_argument("goal", type=float, help="Goal amount (₹).")
+    parser.add_argument("years", type=float)
+    parser.add_argument("--rate", type=float, default=12.0, help="Expected annual return (%%).")
+    parser.add_argument("--step-up", type=float, default=0.0, help="Annual SIP step-up (%%).")
+    parser.add_argument("--savings", type=float, default=0.0, help="Amount already invested (₹).")
+    parser.add_argument("--sip", type=float, default=None, help="Monthly SIP to compute the time to goal for.")
+    args = parser.parse_args()
+    goals = pd.DataFrame({"GoalAmount": [args.goal], "Years": [args.years], "AnnualReturn": [args.rate], "StepUp": [args.step_up], "CurrentSavings": [args.savings]})
+    if args.sip is not None: goals["MonthlySIP"] = args.sip
+    print(solve_goals(goals).T.to_string(header=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# streamlit_app/ai_integration/instruments.py
+# Investment categories and the volatility/return bands the suitability model is trained on. Shared by
+# prediction.py, the fund catalog and the data generation scripts, so the categories are defined once.
+import numpy as np
+
+AVAILABLE_INVESTMENTS = {
+    'FD':           {'Volatility': 'Very Low', 'Return': 'Very Low'},
+    'PPF':          {'Volatility': 'Very Low', 'Return': 'Low'},
+    'DebtMF':       {'Volatility': 'Low',      'Return': 'Low'},
+    'IndexFund':    {'Volatility': 'Medium',   'Return': 'Medium'},
+    'BalancedMF':   {'Volatility': 'Medium',   'Return': 'Medium'},
+    'LargeCapMF':   {'Volatility': 'High',     'Return': 'High'},
+    'MidSmallCapMF':{'Volatility': 'Very High','Return': 'Very High'},
+    'DirectEquity': {'Volatility': 'Very High','Return': 'Very High'}
+}
+BANDS = ['Very Low', 'Low', 'Medium', 'High', 'Very High'] # Ordered, lowest first
+
+# Band edges for measured scheme statistics, in annualised %. Return edges sit halfway between the
+# rates market_inputs.INVESTMENT_RETURN_MAPPING assumes for neighbouring bands (4/6/8/12/15%).
+VOLATILITY_BAND_EDGES = (1.0, 5.0, 12.0, 18.0)
+RETURN_BAND_EDGES = (5.0, 7.0, 10.0, 13.5)
+
+
+def band_codes(values, edges):
+    """Index into BANDS for each value (a value equal to an edge falls in the higher band)."""
+    return np.searchsorted(np.asarray(edges, dtype=np.float64), np.asarray(values, dtype=np.float64), side='right').astype(np.int8)
@@ -0,0 +1,81 @@
+# streamlit_app/ai_integration/market_inputs.py
+# Expected returns and covariance per investment type, for projections, the allocator, stress tests and
+# RL training. When a NAV store exists (see ml_scripts/data_generation/generate_nav_history.py), the
+# covariance comes from it and each type's expected return is its band assumption moved
+# MARKET_HISTORY_WEIGHT of the way towards the trailing median CAGR. A three-year realised CAGR is one noisy
+# draw, and for a type with fewer than MARKET_MIN_SCHEMES schemes (the single FD, PPF and DirectEquity proxy
+# series) it is not used at all. Without a store, the band assumptions below and allocation.ASSUMED_VOLATILITY
+# are used. NumPy only, so training scripts can import it without the app.
+import os
+import threading
+from functools import lru_cache
+import numpy as np
+from . import nav_store, allocation
+from .instruments import AVAILABLE_INVESTMENTS
+
+PROJECT_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+NAV_STORE_DIR = os.environ.get("NAV_STORE_DIR", os.path.join(PROJECT_ROOT_DIR, 'data', 'nav_store'))
+MARKET_MIN_SCHEMES = int(os.environ.get("MARKET_MIN_SCHEMES", 3)) # Fewer schemes of a type: its history is not used for returns
+MARKET_HISTORY_WEIGHT = float(os.environ.get("MARKET_HISTORY_WEIGHT", 0.5)) # Share of the realised CAGR in the expected return
+_estimates_lock = threading.Lock() # One cold load per store version, however many requests arrive at once
+
+# These are ILLUSTRATIVE. Research appropriate long-term averages for Indian markets.
+INVESTMENT_RETURN_MAPPING = {
+    "Very Low": 0.04,  # 4%
+    "Low": 0.06,       # 6%
+    "Medium": 0.08,    # 8%
+    "High": 0.12,      # 12%
+    "Very High": 0.15  # 15%
+}
+
+
+@lru_cache(maxsize=1)
+def _load_market_estimates(store_dir, store_version):
+    try: estimates = nav_store.category_estimates(nav_store.NavStore(store_dir))
+    except Exception as e: print(f"Warning: NAV store estimates unavailable ({e}); using assumed returns."); return None
+    print(f"-> Market estimates loaded from NAV store ({estimates['start']} .. {estimates['end']}).")
+    return estimates
+
+
+def get_market_estimates():
+    """Per-type estimates from nav_store.category_estimates, recomputed when the store changes; None without a store."""
+    meta_path = os.path.join(NAV_STORE_DIR, nav_store.META_FILE)
+    if not os.path.exists(meta_path): return None
+    with _estimates_lock: return _load_market_estimates(NAV_STORE_DIR, os.path.getmtime(meta_path))
+
+
+def _estimate(inv_type, key, min_schemes=1):
+    estimates = get_market_estimates()
+    if not estimates or inv_type not in estimates["investment_types"]: return None
+    i = estimates["investment_types"].index(inv_type)
+    if estimates["schemes"][i] < min_schemes: return None
+    value = float(estimates[key][i])
+    return value if np.isfinite(value) else None
+
+
+def history_return(inv_type):
+    """Trailing median CAGR of inv_type from the NAV store, or None without one or with too few schemes."""
+    return _estimate(inv_type, "annual_return", MARKET_MIN_SCHEMES)
+
+
+def expected_annual_return(inv_type):
+    """Annual return used to project inv_type: the band's assumed rate, blended with history_return when there is one."""
+    assumed, realised = INVESTMENT_RETURN_MAPPING.get(AVAILABLE_INVESTMENTS[inv_type]['Return']), history_return(inv_type)
+    return assumed if realised is None else assumed + MARKET_HISTORY_WEIGHT * (realised - assumed)
+
+
+def expected_annual_volatility(inv_type):
+    """Annualised volatility of inv_type from the NAV store, or None without history."""
+    return _estimate(inv_type, "annual_volatility")
+
+
+def get_allocation_inputs():
+    """(expected returns, covariance) over AVAILABLE_INVESTMENTS order for the allocator; NAV store estimates when they cover every type."""
+    inv_types = list(AVAILABLE_INVESTMENTS)
+    mu = np.array([expected_annual_return(t) for t in inv_types])
+    estimates = get_market_estimates()
+    if estimates and set(inv_types) <= set(estimates["investment_types"]):
+        order = [estimates["investment_types"].index(t) for t in inv_types]
+        cov = np.asarray(estimates["covariance"])[np.ix_(order, order)]
+        if np.all(np.isfinite(cov)): return mu, cov
+    return mu, allocation.assumed_covariance(np.array([allocation.ASSUMED_VOLATILITY[AVAILABLE_INVESTMENTS[t]['Volatility']] for t in inv_types]))
@@ -0,0 +1,148 @@
+# streamlit_app/ai_integration/memory_report.py
+# Memory accounting for the loaded AI stack: what each heavy import and each AI_COMPONENTS entry adds to a
+# worker process, as an RSS delta (what decides how many Streamlit workers fit per box) and as the
+# tracemalloc-traced allocations. load_ai_components records its artifacts with track() into
+# AI_COMPONENTS["memory"]; import costs only show in a fresh interpreter, so import_costs() measures them
+# in a child process. The budgeted footprint is their sum (footprint_mib), against MEMORY_BUDGET_MIB
+# (or AI_MEMORY_BUDGET_MIB in the environment). The same sum is checked in three places:
+# - the CLI, which prints both and exits with status 1 when it is over;
+# - tests/test_memory_budget.py;
+# - the app, which warns at startup using import costs cached per interpreter and library versions.
+# Standard library only, so it can be imported before the libraries it measures.
+#
+#   cd streamlit_app && python -m ai_integration.memory_report --budget-mib 512
+import argparse
+import contextlib
+import hashlib
+import importlib.metadata
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Heavy libraries in the order the app imports them; each one's cost is on top of the previous ones.
+IMPORT_ORDER = ("numpy", "pandas", "sklearn", "xgboost", "shap", "sqlalchemy", "streamlit")
+MEMORY_BUDGET_MIB = float(os.environ.get("AI_MEMORY_BUDGET_MIB", 512))
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+IMPORT_COSTS_CACHE_DIR = os.environ.get("AI_IMPORT_COSTS_CACHE_DIR", tempfile.gettempdir())
+
+
+def rss_mib():
+    """Current resident set size of this process in MiB (peak RSS where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024 # Bytes on macOS, KiB on Linux
+
+
+@contextlib.contextmanager
+def track(report, name):
+    """Records what the block adds under report[name]: RSS and traced MiB, and its wall time in ms."""
+    was_tracing = tracemalloc.is_tracing() # Leave an outer tracemalloc session (e.g. a benchmark) running
+    if not was_tracing: tracemalloc.start()
+    traced_before, rss_before, start = tracemalloc.get_traced_memory()[0], rss_mib(), time.perf_counter()
+    try:
+        yield
+    finally:
+        traced = tracemalloc.get_traced_memory()[0] - traced_before
+        if not was_tracing: tracemalloc.stop()
+        report[name] = {"rss_mib": rss_mib() - rss_before, "traced_mib": traced / 2**20, "ms": (time.perf_counter() - start) * 1000}
+
+
+def import_costs(modules=IMPORT_ORDER, nice=False):
+    """{"python": base interpreter, module: cost, ...} for importing modules one after another into a fresh interpreter."""
+    code = ("import importlib, json, sys\n"
+            "from ai_integration.memory_report import rss_mib, track\n"
+            "report = {'python': {'rss_mib': rss_mib(), 'traced_mib': 0.0, 'ms': 0.0}}\n"
+            "for name in sys.argv[1:]:\n"
+            "    with track(report, name): importlib.import_module(name)\n"
+            "print(json.dumps(report))\n")
+    lower_priority = (lambda: os.nice(10)) if nice and hasattr(os, "nice") else None
+    child = subprocess.run([sys.executable, "-c", code, *modules], cwd=APP_DIR, capture_output=True, text=True, check=True, preexec_fn=lower_priority)
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def _library_versions(modules):
+    distributions = importlib.metadata.packages_distributions()
+    versions = {}
+    for name in modules:
+        try: versions[name] = [importlib.metadata.version(dist) for dist in distributions.get(name, [name])]
+        except importlib.metadata.PackageNotFoundError: versions[name] = None
+    return versions
+
+
+def cached_import_costs(modules=IMPORT_ORDER):
+    """import_costs(), measured once per interpreter and library versions and reused from IMPORT_COSTS_CACHE_DIR."""
+    key = hashlib.sha256(json.dumps([sys.executable, sys.version, list(modules), _library_versions(modules)]).encode()).hexdigest()[:12]
+    path = os.path.join(IMPORT_COSTS_CACHE_DIR, f"ai_import_costs-{key}.json")
+    try:
+        with open(path) as f: return json.load(f)
+    except (OSError, ValueError): pass
+    costs = import_costs(modules, nice=True) # Usually measured from a background thread of a starting worker
+    try:
+        with open(f"{path}.{os.getpid()}.tmp", "w") as f: json.dump(costs, f)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+    except OSError as e: print(f"Warning: could not cache import costs: {e}")
+    return costs
+
+
+def total_mib(*reports):
+    return sum(entry["rss_mib"] for report in reports for entry in report.values())
+
+
+def footprint_mib(components, imports=None):
+    """The budgeted footprint: import costs (cached_import_costs() when not given) plus the loaded AI components."""
+    return total_mib(cached_import_costs() if imports is None else imports, components)
+
+
+def warn_if_over_budget(components, budget_mib=MEMORY_BUDGET_MIB):
+    """The CLI's budget check as a startup warning (load_ai_components runs it in a background thread). Returns the footprint."""
+    try: footprint = footprint_mib(components)
+    except Exception as e: print(f"Warning: memory budget check failed: {e}"); return None
+    if footprint > budget_mib: print(f"Warning: AI memory footprint {footprint:.1f} MiB is over the {budget_mib:.0f} MiB memory budget.")
+    return footprint
+
+
+def format_report(sections, budget_mib=MEMORY_BUDGET_MIB):
+    """Text table of {section title: report} with the total against the budget."""
+    lines = [f"{'':<28}{'RSS MiB':>10}{'traced MiB':>12}{'ms':>9}"]
+    for title, report in sections.items():
+        lines.append(f"{title}:")
+        for name, entry in report.items():
+            lines.append(f"  {name:<26}{entry['rss_mib']:>10.1f}{entry['traced_mib']:>12.1f}{entry['ms']:>9.0f}")
+    total = total_mib(*sections.values())
+    lines.append(f"{'Total':<28}{total:>10.1f}   (budget {budget_mib:.0f} MiB, {'OVER' if total > budget_mib else 'within'})")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-component memory report for the AI stack, with a budget check.")
+    parser.add_argument("--budget-mib", type=float, default=MEMORY_BUDGET_MIB)
+    parser.add_argument("--json", action="store_true", help="Print the measurements as JSON instead of a table.")
+    args = parser.parse_args()
+
+    imports = import_costs()
+    with contextlib.redirect_stdout(sys.stderr): # Model loading logs
+        from . import prediction
+    components = prediction.AI_COMPONENTS.get("memory") or {}
+    sections = {"Imports (fresh interpreter)": imports, "AI components": components}
+    total = footprint_mib(components, imports)
+    if args.json:
+        print(json.dumps({"imports": imports, "components": components, "total_mib": total, "budget_mib": args.budget_mib,
+                          "process_rss_mib": rss_mib()}, indent=2))
+    else:
+        print("\n--- AI Memory Report ---")
+        print(format_report(sections, args.budget_mib))
+        print(f"Process RSS after loading: {rss_mib():.1f} MiB")
+    if total > args.budget_mib:
+        print(f"Memory budget exceeded: {total:.1f} MiB > {args.budget_mib:.0f} MiB", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
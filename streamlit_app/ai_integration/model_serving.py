@@ -0,0 +1,285 @@
+# streamlit_app/ai_integration/model_serving.py
+# Candidate model serving next to production, for rolling out a retrained risk or investment model.
+# - Shadow: production answers every request. Afterwards the request queues a job that a background
+#   worker pool scores with the candidate and compares with the production answer. The request never
+#   waits for the candidate. Shadow scoring is low priority. Workers score freely while no advice request
+#   is in flight (set_busy_check). Steady traffic leaves too little idle time, so once a quarter of the
+#   backlog is waiting they also score during requests, within SHADOW_CPU_SHARE of the wall time.
+#   When the backlog is full, new jobs are dropped and counted.
+# - A/B (CANDIDATE_MODE=ab): CANDIDATE_TRAFFIC_PERCENT of users, chosen by a stable hash of their user id,
+#   are served by the candidate. The remaining users are shadow-scored as above.
+# Disagreement statistics are aggregated in memory per process (get_report). benchmarks/bench_shadow_serving.py
+# checks that shadow scoring does not raise the primary p95.
+# Candidates are configured with CANDIDATE_RISK_MODEL_PATH / CANDIDATE_INV_MODEL_PATH, plus optional
+# CANDIDATE_*_PREPROCESSOR_PATH when they were trained with new preprocessors; otherwise they share production's.
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import Counter
+import joblib
+import numpy as np
+import pandas as pd
+from . import forest_eval, prediction
+from .artifacts import artifact_hash
+
+CANDIDATE_PATHS = {key: os.environ.get(f"CANDIDATE_{key.upper()}_PATH") or None
+                   for key in ("risk_model", "risk_preprocessor", "inv_model", "inv_preprocessor")}
+CANDIDATE_MODE = os.environ.get("CANDIDATE_MODE", "shadow") # 'shadow' or 'ab'
+CANDIDATE_TRAFFIC_PERCENT = float(os.environ.get("CANDIDATE_TRAFFIC_PERCENT", 10)) # A/B only
+CANDIDATE_SPLIT_SALT = os.environ.get("CANDIDATE_SPLIT_SALT", "candidate") # Change to reshuffle the A/B groups
+SHADOW_WORKERS = int(os.environ.get("SHADOW_WORKERS", 1)) # 0 scores inline on the request thread (benchmark baseline only)
+SHADOW_MAX_BACKLOG = int(os.environ.get("SHADOW_MAX_BACKLOG", 256))
+SHADOW_CPU_SHARE = float(os.environ.get("SHADOW_CPU_SHARE", 0.2)) # Per worker, while requests are in flight: scoring CPU time / wall time
+SHADOW_BURST_S = 0.05 # CPU time a worker may save up for busy periods
+SHADOW_IDLE_POLL_S = 0.002 # How often a waiting worker re-checks whether the service is saturated
+
+ARM_PRODUCTION = "production"
+ARM_CANDIDATE = "candidate"
+MODE_SHADOW = "shadow"
+MODE_AB = "ab"
+
+
+# --- Candidate ---
+def load_candidate(risk_model=None, risk_preprocessor=None, inv_model=None, inv_preprocessor=None):
+    """Component dict for the candidate (production's for anything not replaced), or None when nothing is configured."""
+    paths = {"risk_model": risk_model, "risk_preprocessor": risk_preprocessor, "inv_model": inv_model, "inv_preprocessor": inv_preprocessor}
+    paths = {key: path for key, path in paths.items() if path}
+    if not {"risk_model", "inv_model"} & set(paths): return None
+    components = dict(prediction.AI_COMPONENTS)
+    for key, path in paths.items():
+        components[key] = joblib.load(path); print(f"-> Candidate {key.replace('_', ' ')} loaded from {path}")
+    if "risk_model" in paths:
+        try: components["risk_forest"] = forest_eval.flatten_forest(components["risk_model"])
+        except Exception as e: components["risk_forest"] = None; print(f"Warning: Could not flatten candidate risk forest, using sklearn predict: {e}")
+    components["model_version"] = artifact_hash(list(paths.values()))
+    components["compared"] = [name for name, key in (("risk", "risk_model"), ("investment", "inv_model")) if key in paths]
+    components["own_preprocessors"] = [name for name, key in (("risk", "risk_preprocessor"), ("investment", "inv_preprocessor")) if key in paths]
+    return components
+
+
+# --- Statistics ---
+class ServingStats:
+    """In-memory disagreement and traffic counters; thread-safe, constant size."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = Counter()         # requests per arm, shadow jobs queued/dropped/scored/failed
+        self.risk_pairs = Counter()     # (production label, candidate label) for shadow-scored requests
+        self.instrument_flips = Counter() # (instrument, 'candidate only' / 'production only') suitability disagreements
+        self.arm_outcomes = {}          # arm -> Counter of risk labels and suitable instruments served
+        self.shadow_ms = []             # Recent shadow scoring times (bounded)
+        self.lag_ms = []                # Recent queue-to-done delays (bounded)
+
+    def count(self, key, n=1):
+        with self._lock: self.counts[key] += n
+
+    def served(self, arm, risk_label, n_suitable):
+        with self._lock:
+            self.counts[f"served_{arm}"] += 1
+            outcome = self.arm_outcomes.setdefault(arm, Counter())
+            outcome[f"risk: {risk_label}"] += 1; outcome["suitable instruments"] += n_suitable
+
+    def compared(self, risk_pair, instrument_pairs, shadow_ms, lag_ms):
+        with self._lock:
+            self.counts["shadow_scored"] += 1
+            if risk_pair is not None:
+                self.risk_pairs[risk_pair] += 1
+                self.counts["risk_compared"] += 1; self.counts["risk_disagreed"] += int(risk_pair[0] != risk_pair[1])
+            if instrument_pairs is not None:
+                flips = [(name, "candidate only" if candidate else "production only") for name, production, candidate in instrument_pairs if production != candidate]
+                self.instrument_flips.update(flips)
+                self.counts["investment_compared"] += 1; self.counts["investment_disagreed"] += int(bool(flips))
+                self.counts["investment_rows_compared"] += len(instrument_pairs); self.counts["investment_rows_disagreed"] += len(flips)
+            for samples, value in ((self.shadow_ms, shadow_ms), (self.lag_ms, lag_ms)):
+                samples.append(value)
+                if len(samples) > 1024: del samples[:512]
+
+
+# --- Shadow worker pool ---
+class ShadowScorer:
+    """
+    Bounded queue and daemon worker threads for shadow jobs. submit() never blocks: a full backlog drops
+    the job. Each worker scores freely while busy() is False. While busy() is True it only scores while a
+    quarter of the backlog is waiting, spending CPU time from a budget that refills at cpu_share of wall
+    time, up to SHADOW_BURST_S.
+    """
+    def __init__(self, score, workers=SHADOW_WORKERS, max_backlog=SHADOW_MAX_BACKLOG, busy=None, cpu_share=SHADOW_CPU_SHARE):
+        self.score, self.workers = score, workers
+        self.busy = busy or (lambda: False)
+        self.cpu_share = min(max(cpu_share, 0.0), 1.0)
+        self.pressure_backlog = max(max_backlog // 4, 1) # Below this, jobs wait for idle time
+        self._queue = queue.Queue(max_backlog)
+        self._threads, self._start_lock = [], threading.Lock()
+        self.scored_while_busy = 0
+
+    def _ensure_started(self):
+        with self._start_lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f"shadow-scorer-{len(self._threads)}", daemon=True)
+                thread.start(); self._threads.append(thread)
+
+    def submit(self, job):
+        """Queues job; False when the backlog is full and it was dropped. With no workers it is scored right here."""
+        if self.workers <= 0: self.score(job); return True
+        if len(self._threads) < self.workers: self._ensure_started()
+        try: self._queue.put_nowait(job); return True
+        except queue.Full: return False
+
+    def _run(self):
+        budget_s, refilled_at = 0.0, time.monotonic()
+        while True:
+            job = self._queue.get()
+            try:
+                while True:
+                    now = time.monotonic()
+                    budget_s, refilled_at = min(budget_s + (now - refilled_at) * self.cpu_share, SHADOW_BURST_S), now
+                    busy = self.busy()
+                    if not busy or (budget_s > 0 and self._queue.qsize() >= self.pressure_backlog): break
+                    time.sleep(SHADOW_IDLE_POLL_S)
+                start = time.thread_time()
+                try: self.score(job)
+                finally:
+                    if busy: budget_s -= time.thread_time() - start; self.scored_while_busy += 1 # Only busy-time scoring competes with requests
+            except Exception as e: print(f"Warning: shadow scoring failed: {e}")
+            finally: self._queue.task_done()
+
+    def drain(self, timeout=None):
+        """Waits until every queued job has been scored (or timeout s). Returns True if the backlog emptied."""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: self._queue.unfinished_tasks == 0, timeout)
+
+    @property
+    def backlog(self):
+        return self._queue.qsize()
+
+
+# --- Serving state ---
+_candidate = None
+_mode, _traffic_percent = CANDIDATE_MODE, CANDIDATE_TRAFFIC_PERCENT
+_stats = ServingStats()
+_busy_check = None
+_scorer = None
+
+
+def configure(candidate=None, mode=CANDIDATE_MODE, traffic_percent=CANDIDATE_TRAFFIC_PERCENT, shadow_workers=SHADOW_WORKERS, max_backlog=SHADOW_MAX_BACKLOG):
+    """Installs a candidate (load_candidate's dict, or None to serve production only) and resets the statistics."""
+    global _candidate, _mode, _traffic_percent, _stats, _scorer
+    if mode not in (MODE_SHADOW, MODE_AB): raise ValueError(f"Unknown candidate mode '{mode}'.")
+    if _scorer is not None: _scorer.drain(timeout=5.0) # Old jobs belong to the old candidate
+    _candidate, _mode, _traffic_percent, _stats = candidate, mode, traffic_percent, ServingStats()
+    _scorer = ShadowScorer(_score_shadow_job, shadow_workers, max_backlog, busy=lambda: _busy_check is not None and _busy_check())
+
+
+def set_busy_check(busy):
+    """busy() -> True while primary requests are in flight; shadow workers then score within SHADOW_CPU_SHARE."""
+    global _busy_check
+    _busy_check = busy
+
+
+def arm_for(user_id):
+    """Stable serving arm for a user: the same user always gets the same arm for a given salt and percentage."""
+    if _candidate is None or _mode != MODE_AB or user_id is None: return ARM_PRODUCTION
+    bucket = int.from_bytes(hashlib.sha256(f"{CANDIDATE_SPLIT_SALT}:{user_id}".encode()).digest()[:8], "big") % 10_000
+    return ARM_CANDIDATE if bucket < _traffic_percent * 100 else ARM_PRODUCTION
+
+
+def components_for(arm):
+    """Components that serve an arm (None means prediction.AI_COMPONENTS)."""
+    return _candidate if arm == ARM_CANDIDATE else None
+
+
+def candidate_version():
+    return _candidate["model_version"] if _candidate is not None else None
+
+
+def uses_production_preprocessors(arm):
+    """Whether production-encoded rows (the feature store) are valid inputs for the arm's models."""
+    return arm != ARM_CANDIDATE or not _candidate["own_preprocessors"]
+
+
+def _suitable_mask(recommendations):
+    suitable = {rec.get("investment") for rec in recommendations if rec.get("suitability") == "Suitable"}
+    return np.array([name in suitable for name in prediction.AVAILABLE_INVESTMENTS], dtype=bool)
+
+
+def after_prediction(user_id, arm, profile, risk_label, recommendations, risk_row=None, investment_rows=None):
+    """
+    Records what an arm served and, for production-served requests, queues the shadow comparison. Takes
+    microseconds. risk_row / investment_rows are production's encoded inputs when the request had them.
+    """
+    if _candidate is None or not risk_label or risk_label == "Error": return
+    production_suitable = _suitable_mask(recommendations)
+    _stats.served(arm, risk_label, int(production_suitable.sum()))
+    if arm != ARM_PRODUCTION: return
+    job = (time.perf_counter(), dict(profile), str(risk_label), production_suitable, risk_row, investment_rows)
+    if _scorer.submit(job): _stats.count("shadow_queued")
+    else: _stats.count("shadow_dropped")
+
+
+def _score_shadow_job(job):
+    """Candidate predictions for one production-served request, compared model by model."""
+    queued_at, profile, risk_label, production_suitable, risk_row, investment_rows = job
+    candidate, start = _candidate, time.perf_counter()
+    if candidate is None: return
+    try:
+        risk_pair = instrument_pairs = None
+        if "risk" in candidate["compared"]:
+            if risk_row is None or "risk" in candidate["own_preprocessors"]:
+                risk_row = candidate["risk_preprocessor"].transform(pd.DataFrame([profile], columns=prediction.RISK_FEATURE_ORDER))
+            risk_pair = (risk_label, str(prediction.predict_risk_labels(risk_row, candidate)[0]))
+        if "investment" in candidate["compared"]: # Fed production's risk label, so only the investment model differs
+            if investment_rows is None or "investment" in candidate["own_preprocessors"]:
+                investment_rows = candidate["inv_preprocessor"].transform(prediction._investment_rows_frame(pd.DataFrame([profile]), [risk_label]))
+            candidate_suitable = np.asarray(candidate["inv_model"].predict(investment_rows)) == 1
+            instrument_pairs = list(zip(prediction.AVAILABLE_INVESTMENTS, production_suitable, candidate_suitable))
+    except Exception:
+        _stats.count("shadow_failed"); raise
+    done = time.perf_counter()
+    _stats.compared(risk_pair, instrument_pairs, (done - start) * 1e3, (done - queued_at) * 1e3)
+
+
+# --- Reporting ---
+def get_report():
+    """
+    dict with 'summary' (one row per compared model), 'risk_confusion' (production x candidate labels),
+    'instruments' (suitability flips per instrument), 'arms' (what each arm served) DataFrames and 'config'.
+    """
+    with _stats._lock:
+        counts, risk_pairs, flips = Counter(_stats.counts), Counter(_stats.risk_pairs), Counter(_stats.instrument_flips)
+        arm_outcomes = {arm: Counter(outcome) for arm, outcome in _stats.arm_outcomes.items()}
+        shadow_ms, lag_ms = list(_stats.shadow_ms), list(_stats.lag_ms)
+    config = {"candidate_version": candidate_version(), "mode": _mode, "traffic_percent": _traffic_percent if _mode == MODE_AB else 0.0,
+              "compared": list(_candidate["compared"]) if _candidate else [], "backlog": _scorer.backlog if _scorer else 0,
+              "shadow_scored_while_busy": _scorer.scored_while_busy if _scorer else 0,
+              "shadow_queued": counts["shadow_queued"], "shadow_dropped": counts["shadow_dropped"], "shadow_failed": counts["shadow_failed"],
+              "shadow_ms_p95": float(np.percentile(shadow_ms, 95)) if shadow_ms else None, "lag_ms_p95": float(np.percentile(lag_ms, 95)) if lag_ms else None}
+    summary = []
+    for name in config["compared"]:
+        compared, disagreed = counts[f"{name}_compared"], counts[f"{name}_disagreed"]
+        row = {"model": name, "compared": compared, "disagreed": disagreed, "disagreement_rate": disagreed / compared if compared else None}
+        if name == "investment":
+            rows = counts["investment_rows_compared"]
+            row["row_disagreement_rate"] = counts["investment_rows_disagreed"] / rows if rows else None
+        summary.append(row)
+    risk_confusion = pd.DataFrame([{"production": p, "candidate": c, "requests": n} for (p, c), n in risk_pairs.items()],
+                                  columns=["production", "candidate", "requests"])
+    if not risk_confusion.empty: risk_confusion = risk_confusion.pivot(index="production", columns="candidate", values="requests").fillna(0).astype(int)
+    instruments = pd.DataFrame([{"investment": name, "direction": direction, "requests": n} for (name, direction), n in flips.items()],
+                               columns=["investment", "direction", "requests"]).sort_values("requests", ascending=False)
+    arms = pd.DataFrame([{"arm": arm, "requests": counts[f"served_{arm}"],
+                          "mean_suitable": outcome["suitable instruments"] / counts[f"served_{arm}"] if counts[f"served_{arm}"] else None,
+                          **{key: value / counts[f"served_{arm}"] for key, value in sorted(outcome.items()) if key.startswith("risk: ")}}
+                         for arm, outcome in arm_outcomes.items()])
+    arms = arms.fillna({column: 0.0 for column in arms.columns if column.startswith("risk: ")})
+    return {"summary": pd.DataFrame(summary), "risk_confusion": risk_confusion, "instruments": instruments, "arms": arms, "config": config}
+
+
+def drain(timeout=None):
+    return _scorer.drain(timeout) if _scorer is not None else True
+
+
+if any(CANDIDATE_PATHS.values()):
+    try: configure(load_candidate(**CANDIDATE_PATHS))
+    except Exception as e: print(f"Warning: candidate models not loaded, serving production only: {e}"); configure(None)
+else: configure(None)
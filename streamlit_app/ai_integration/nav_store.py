@@ -0,0 +1,227 @@
+# streamlit_app/ai_integration/nav_store.py
+# Local time-series store for daily NAV/price history, plus vectorized return and risk estimates.
+#
+# Layout of a store directory:
+#   meta.json           scheme codes, their InvestmentType, chunk size and the number of stored days
+#   dates_00000.npy     (CHUNK_DAYS,) int64 days since 1970-01-01, one file per chunk
+#   navs_00000.npy      (CHUNK_DAYS, n_schemes) float64, Fortran order so each scheme's chunk is contiguous
+# Chunks are opened memory-mapped. Appending days only writes the last, partially filled chunk and new
+# chunks; meta.json is replaced atomically afterwards, so readers never see half-written days and
+# history is never rewritten. Days a scheme has no NAV for (not launched yet, holidays) hold NaN.
+#
+#   cd streamlit_app && python -m ai_integration.nav_store ../data/nav_store
+import argparse
+import json
+import os
+import numpy as np
+
+CHUNK_DAYS = 256
+TRADING_DAYS_PER_YEAR = 252
+META_FILE = 'meta.json'
+STORE_FORMAT_VERSION = 1
+
+
+class NavStore:
+    """A chunked, memory-mapped NAV store. Use NavStore.create() for a new store and NavStore(root) to open one."""
+
+    def __init__(self, root):
+        self.root = root
+        with open(os.path.join(root, META_FILE)) as f: meta = json.load(f)
+        if meta.get("format_version") != STORE_FORMAT_VERSION: raise ValueError(f"Unsupported NAV store format in {root}.")
+        self.scheme_codes = [str(code) for code in meta["scheme_codes"]]
+        self.investment_types = meta["investment_types"]
+        self.chunk_days = meta["chunk_days"]
+        self.n_days = meta["n_days"]
+        self._columns = {code: i for i, code in enumerate(self.scheme_codes)}
+
+    @classmethod
+    def create(cls, root, scheme_codes, investment_types, chunk_days=CHUNK_DAYS):
+        """Creates an empty store for the given schemes (one InvestmentType per scheme)."""
+        if len(scheme_codes) != len(investment_types): raise ValueError("One investment type is needed per scheme.")
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(os.path.join(root, META_FILE)): raise FileExistsError(f"A NAV store already exists in {root}.")
+        _write_meta(root, {"format_version": STORE_FORMAT_VERSION, "scheme_codes": [str(c) for c in scheme_codes],
+                           "investment_types": list(investment_types), "chunk_days": chunk_days, "n_days": 0})
+        return cls(root)
+
+    def __len__(self): return self.n_days
+
+    def column(self, scheme_code):
+        return self._columns[str(scheme_code)]
+
+    def _chunk_path(self, kind, chunk): return os.path.join(self.root, f"{kind}_{chunk:05d}.npy")
+
+    def _open_chunk(self, chunk, mode='r'):
+        return (np.load(self._chunk_path("dates", chunk), mmap_mode=mode),
+                np.load(self._chunk_path("navs", chunk), mmap_mode=mode))
+
+    # --- Reads ---
+    def dates(self):
+        """All stored dates as datetime64[D]."""
+        n_chunks = -(-self.n_days // self.chunk_days)
+        if not n_chunks: return np.empty(0, dtype='datetime64[D]')
+        days = np.concatenate([np.load(self._chunk_path("dates", c), mmap_mode='r') for c in range(n_chunks)])
+        return days[:self.n_days].astype('datetime64[D]')
+
+    def read(self, start=None, end=None, scheme_codes=None):
+        """
+        (dates, navs) for start <= date <= end (datetime64-compatible, inclusive; None means unbounded) and
+        the given schemes (default: all). Only the chunks overlapping the range are touched.
+        """
+        dates = self.dates()
+        first = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, 'D'), side='left'))
+        stop = self.n_days if end is None else int(np.searchsorted(dates, np.datetime64(end, 'D'), side='right'))
+        columns = slice(None) if scheme_codes is None else [self.column(code) for code in scheme_codes]
+        n_columns = len(self.scheme_codes) if scheme_codes is None else len(columns)
+        navs = np.empty((max(stop - first, 0), n_columns), dtype=np.float64, order='F')
+        for chunk in range(first // self.chunk_days, -(-stop // self.chunk_days)):
+            chunk_start = chunk * self.chunk_days
+            lo, hi = max(first, chunk_start), min(stop, chunk_start + self.chunk_days)
+            navs[lo - first:hi - first] = self._open_chunk(chunk)[1][lo - chunk_start:hi - chunk_start, columns]
+        return dates[first:stop], navs
+
+    # --- Appends ---
+    def append(self, dates, navs):
+        """Appends days (strictly after the last stored date). navs is (len(dates), n_schemes); NaN marks no NAV."""
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        navs = np.asarray(navs, dtype=np.float64)
+        if navs.shape != (len(dates), len(self.scheme_codes)): raise ValueError(f"navs has shape {navs.shape}, expected {(len(dates), len(self.scheme_codes))}.")
+        if len(dates) == 0: return
+        if np.any(np.diff(dates.astype(np.int64)) <= 0): raise ValueError("Dates must be strictly increasing.")
+        if self.n_days and dates[0] <= self.dates()[-1]: raise ValueError("Appended dates must be after the last stored date.")
+        written = 0
+        while written < len(dates):
+            chunk, offset = divmod(self.n_days + written, self.chunk_days)
+            if offset == 0: self._new_chunk(chunk)
+            chunk_dates, chunk_navs = self._open_chunk(chunk, mode='r+')
+            count = min(self.chunk_days - offset, len(dates) - written)
+            chunk_dates[offset:offset + count] = dates[written:written + count].astype(np.int64)
+            chunk_navs[offset:offset + count] = navs[written:written + count]
+            chunk_dates.flush(); chunk_navs.flush()
+            del chunk_dates, chunk_navs
+            written += count
+        self.n_days += len(dates)
+        _write_meta(self.root, {"format_version": STORE_FORMAT_VERSION, "scheme_codes": self.scheme_codes,
+                                "investment_types": self.investment_types, "chunk_days": self.chunk_days, "n_days": self.n_days})
+
+    def _new_chunk(self, chunk):
+        dates = np.lib.format.open_memmap(self._chunk_path("dates", chunk), mode='w+', dtype=np.int64, shape=(self.chunk_days,))
+        navs = np.lib.format.open_memmap(self._chunk_path("navs", chunk), mode='w+', dtype=np.float64,
+                                         shape=(self.chunk_days, len(self.scheme_codes)), fortran_order=True)
+        navs[:] = np.nan; dates.flush(); navs.flush()
+
+
+def _write_meta(root, meta):
+    tmp_path = os.path.join(root, META_FILE + '.tmp')
+    with open(tmp_path, 'w') as f: json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(root, META_FILE))
+
+
+# --- Vectorized Estimates ---
+# All functions take navs as (n_days, n_schemes) and compute every scheme at once.
+def log_returns(navs):
+    """Daily log returns, (n_days - 1, n_schemes); NaN where either day has no NAV."""
+    with np.errstate(divide='ignore', invalid='ignore'): return np.diff(np.log(navs), axis=0)
+
+
+def rolling_cagr(navs, window, periods_per_year=TRADING_DAYS_PER_YEAR):
+    """Annualised growth over each trailing `window` days; rows before the first full window are NaN."""
+    out = np.full(navs.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[window:] = (navs[window:] / navs[:-window]) ** (periods_per_year / window) - 1
+    return out
+
+
+def _running_sum(values, dtype=np.float64):
+    """Cumulative sums along axis 0 with a leading zero row, so window sums are out[i + w] - out[i]."""
+    out = np.empty((values.shape[0] + 1, values.shape[1]), dtype=dtype, order='F')
+    out[0] = 0
+    np.cumsum(values, axis=0, dtype=dtype, out=out[1:])
+    return out
+
+
+def rolling_volatility(navs, window, periods_per_year=TRADING_DAYS_PER_YEAR, min_periods=None):
+    """
+    Annualised standard deviation of daily log returns over each trailing `window` returns, from
+    running sums (O(n) per scheme). Missing returns are skipped; windows with fewer than min_periods
+    (default: window) present returns are NaN.
+    """
+    min_periods = window if min_periods is None else max(min_periods, 2)
+    returns = log_returns(navs)
+    out = np.full(navs.shape, np.nan)
+    if len(returns) < window: return out
+    present = np.isfinite(returns)
+    returns[~present] = 0.0
+    counts, sums = _running_sum(present, np.int32), _running_sum(returns)
+    np.square(returns, out=returns)
+    squares = _running_sum(returns)
+    n = counts[window:] - counts[:-window]
+    window_sum = sums[window:] - sums[:-window]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (squares[window:] - squares[:-window] - window_sum * window_sum / n) / (n - 1)
+    out[window:] = np.where(n >= min_periods, np.sqrt(np.maximum(variance, 0.0) * periods_per_year), np.nan)
+    return out
+
+
+def drawdowns(navs):
+    """Fall from the running peak on each day (0 at a new high, -0.25 for 25% below it)."""
+    with np.errstate(invalid='ignore'): return navs / np.fmax.accumulate(navs, axis=0) - 1
+
+
+def max_drawdown(navs):
+    """Worst drawdown of each scheme over the whole window."""
+    with np.errstate(invalid='ignore'):
+        return np.nanmin(np.where(np.isnan(navs), 0.0, drawdowns(navs)), axis=0)
+
+
+def correlation_matrix(returns):
+    """Correlation of return columns over the rows where every column is present; NaN for constant columns."""
+    returns = returns[np.all(np.isfinite(returns), axis=1)]
+    centered = returns - returns.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        standardized = centered / np.sqrt((centered * centered).sum(axis=0))
+    return standardized.T @ standardized
+
+
+def category_estimates(store, lookback_days=3 * TRADING_DAYS_PER_YEAR, periods_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    Per-InvestmentType estimates from the trailing lookback_days: median scheme CAGR, volatility and
+    max drawdown and the number of schemes behind them, plus the correlation and annualised covariance of
+    the types' equal-weight daily returns.
+    """
+    dates, navs = store.read(start=store.dates()[-(lookback_days + 1)] if len(store) > lookback_days else None)
+    window = len(navs) - 1
+    if window < 2: raise ValueError("Not enough NAV history for estimates.")
+    cagr = rolling_cagr(navs, window, periods_per_year)[-1]
+    volatility = rolling_volatility(navs, window, periods_per_year, min_periods=window // 2)[-1]
+    drawdown, returns = max_drawdown(navs), log_returns(navs)
+    investment_types = np.asarray(store.investment_types)
+    types = list(dict.fromkeys(store.investment_types))
+    type_returns = np.column_stack([np.nanmean(returns[:, investment_types == t], axis=1) for t in types])
+    return {
+        "investment_types": types,
+        "annual_return": np.array([np.nanmedian(cagr[investment_types == t]) for t in types]),
+        "annual_volatility": np.array([np.nanmedian(volatility[investment_types == t]) for t in types]),
+        "max_drawdown": np.array([np.nanmedian(drawdown[investment_types == t]) for t in types]),
+        "schemes": np.array([np.count_nonzero(investment_types == t) for t in types]),
+        "correlation": correlation_matrix(type_returns),
+        "covariance": np.cov(type_returns[np.all(np.isfinite(type_returns), axis=1)], rowvar=False) * periods_per_year,
+        "start": str(dates[0]), "end": str(dates[-1]), "n_schemes": len(store.scheme_codes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise a NAV store and its per-category estimates.")
+    parser.add_argument("store_dir")
+    parser.add_argument("--lookback-days", type=int, default=3 * TRADING_DAYS_PER_YEAR)
+    args = parser.parse_args()
+    store = NavStore(args.store_dir)
+    estimates = category_estimates(store, args.lookback_days)
+    print(f"{len(store.scheme_codes)} schemes, {len(store)} days; estimates over {estimates['start']} .. {estimates['end']}")
+    print(f"{'type':>14} {'CAGR %':>8} {'vol %':>7} {'max DD %':>9}")
+    for i, inv_type in enumerate(estimates["investment_types"]):
+        print(f"{inv_type:>14} {estimates['annual_return'][i] * 100:>8.2f} {estimates['annual_volatility'][i] * 100:>7.2f} {estimates['max_drawdown'][i] * 100:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 # streamlit_app/ai_integration/prediction.py
 # (Keep all existing imports and other functions like load_ai_components, format_shap, get_risk_profile)
 # ... (Imports and Config, RISK_FEATURE_ORDER, AVAILABLE_INVESTMENTS, load_ai_components, format_shap_explanation_user_focused, get_risk_profile_and_explanation) ...
-import joblib, pandas as pd, numpy as np, shap, os, streamlit as st, xgboost as xgb, traceback
+import joblib, pandas as pd, numpy as np, shap, os, streamlit as st, xgboost as xgb, traceback, threading, hashlib
+from collections import OrderedDict
+from typing import NamedTuple
+from . import projection, forest_eval, allocation, memory_report
+from .artifacts import artifact_hash
+from .market_inputs import (INVESTMENT_RETURN_MAPPING, get_market_estimates, history_return, expected_annual_return,
+                            expected_annual_volatility, get_allocation_inputs) # Re-exported for the app's callers
+from .instruments import AVAILABLE_INVESTMENTS
 PROJECT_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')); MODEL_DIR = os.path.join(PROJECT_ROOT_DIR, 'models')
 RISK_PREPROCESSOR_PATH = os.path.join(MODEL_DIR, 'user_data_preprocessor.joblib'); RISK_MODEL_PATH = os.path.join(MODEL_DIR, 'risk_profile_rf_model.joblib')
 INV_PREPROCESSOR_PATH = os.path.join(MODEL_DIR, 'investment_data_preprocessor.joblib'); INV_MODEL_PATH = os.path.join(MODEL_DIR, 'investment_suitability_xgb_model.joblib')
@@ -17,26 +24,63 @@ INV_FEATURE_ORDER = [
     'InvestmentRetRange'
 ]
 # --- *** END UPDATE *** ---
-AVAILABLE_INVESTMENTS = {'FD':{'Volatility':'Very Low','Return':'Very Low'},'PPF':{'Volatility':'Very Low','Return':'Low'},'DebtMF':{'Volatility':'Low','Return':'Low'},'IndexFund':{'Volatility':'Medium','Return':'Medium'},'BalancedMF':{'Volatility':'Medium','Return':'Medium'},'LargeCapMF':{'Volatility':'High','Return':'High'},'MidSmallCapMF':{'Volatility':'Very High','Return':'Very High'},'DirectEquity':{'Volatility':'Very High','Return':'Very High'}}
 @st.cache_resource
 def load_ai_components():
     # ...(Same robust loading logic as before)...
-    print("Attempting.. AI components.."); components = {"risk_preprocessor":None,"risk_model":None,"risk_explainer":None,"inv_preprocessor":None,"inv_model":None,"inv_explainer":None,"risk_feature_names":None,"inv_feature_names":None,"load_error":None}
+    print("Attempting.. AI components.."); components = {"risk_preprocessor":None,"risk_model":None,"risk_forest":None,"risk_explainer":None,"inv_preprocessor":None,"inv_model":None,"inv_explainer":None,"risk_feature_names":None,"inv_feature_names":None,"model_version":None,"preprocessor_version":None,"memory":{},"load_error":None}
+    memory = components["memory"] # Per-component footprint (memory_report.track); the CLI adds import costs
     try:
-        if os.path.exists(RISK_PREPROCESSOR_PATH): components["risk_preprocessor"]=joblib.load(RISK_PREPROCESSOR_PATH);print("-> Risk preproc loaded.");_try_get_feature_names(components, "risk_preprocessor", "risk_feature_names")
+        if os.path.exists(RISK_PREPROCESSOR_PATH):
+            with memory_report.track(memory, "risk_preprocessor"): components["risk_preprocessor"]=joblib.load(RISK_PREPROCESSOR_PATH)
+            print("-> Risk preproc loaded.");_try_get_feature_names(components, "risk_preprocessor", "risk_feature_names")
         else: raise FileNotFoundError(f"Risk preproc missing: {RISK_PREPROCESSOR_PATH}")
-        if os.path.exists(RISK_MODEL_PATH): components["risk_model"]=joblib.load(RISK_MODEL_PATH); print("-> Risk model loaded."); _try_init_explainer(components, "risk_model", "risk_explainer")
+        if os.path.exists(RISK_MODEL_PATH):
+            with memory_report.track(memory, "risk_model"): components["risk_model"]=joblib.load(RISK_MODEL_PATH)
+            print("-> Risk model loaded.")
+            with memory_report.track(memory, "risk_explainer"): _try_init_explainer(components, "risk_model", "risk_explainer")
+            with memory_report.track(memory, "risk_forest"): _try_flatten_forest(components)
         else: raise FileNotFoundError(f"Risk model missing: {RISK_MODEL_PATH}")
-        if os.path.exists(INV_PREPROCESSOR_PATH): components["inv_preprocessor"]=joblib.load(INV_PREPROCESSOR_PATH); print("-> Inv preproc loaded."); _try_get_feature_names(components, "inv_preprocessor", "inv_feature_names")
+        if os.path.exists(INV_PREPROCESSOR_PATH):
+            with memory_report.track(memory, "inv_preprocessor"): components["inv_preprocessor"]=joblib.load(INV_PREPROCESSOR_PATH)
+            print("-> Inv preproc loaded."); _try_get_feature_names(components, "inv_preprocessor", "inv_feature_names")
         else: raise FileNotFoundError(f"Inv preproc missing: {INV_PREPROCESSOR_PATH}")
-        if os.path.exists(INV_MODEL_PATH): components["inv_model"]=joblib.load(INV_MODEL_PATH); print("-> Inv model loaded."); _try_init_explainer(components, "inv_model", "inv_explainer")
+        if os.path.exists(INV_MODEL_PATH):
+            with memory_report.track(memory, "inv_model"): components["inv_model"]=joblib.load(INV_MODEL_PATH)
+            print("-> Inv model loaded.")
+            with memory_report.track(memory, "inv_explainer"): _try_init_explainer(components, "inv_model", "inv_explainer")
         else: raise FileNotFoundError(f"Inv model missing: {INV_MODEL_PATH}")
+        components["model_version"] = artifact_hash([RISK_PREPROCESSOR_PATH, RISK_MODEL_PATH, INV_PREPROCESSOR_PATH, INV_MODEL_PATH]); print(f"-> Model version {components['model_version']}")
+        components["preprocessor_version"] = _preprocessor_fingerprint()
+        loaded_mib, process_mib = memory_report.total_mib(memory), memory_report.rss_mib()
+        print(f"-> Components {loaded_mib:.1f} MiB, process RSS {process_mib:.1f} MiB")
+        # Market estimates are warmed here rather than on the import path: in the background, so loading does not wait for
+        # them, and after the tracked loads, so their footprint stays clean. The first advice request then finds them cached.
+        threading.Thread(target=get_market_estimates, name="market-estimates", daemon=True).start()
+        threading.Thread(target=memory_report.warn_if_over_budget, args=(memory,), name="memory-budget", daemon=True).start() # Same sum as the CLI; may measure imports in a child
         print("--- AI loading OK ---")
     except Exception as e: critical_error=f"AI Loading Error: {e}"; print(f"!!! {critical_error} !!!"); components["load_error"]=critical_error; st.error(critical_error)
     return components
+def _preprocessor_fingerprint():
+    """Version of the encoded features (services/feature_service.py): both preprocessors plus the instrument rows they encode."""
+    digest = hashlib.sha256(artifact_hash([RISK_PREPROCESSOR_PATH, INV_PREPROCESSOR_PATH]).encode())
+    digest.update(repr([(name, details['Volatility'], details['Return']) for name, details in AVAILABLE_INVESTMENTS.items()]).encode())
+    return digest.hexdigest()[:12]
 def _try_get_feature_names(components, preprocessor_key, feature_names_key):
     try: components[feature_names_key] = components[preprocessor_key].get_feature_names_out(); print(f"-> {feature_names_key.replace('_',' ')} ({len(components[feature_names_key])})")
     except Exception as e: print(f"Warning: Could not get {feature_names_key}: {e}")
+def _try_flatten_forest(components):
+    # Array-backed copy of the risk RF for fast scoring; falls back to sklearn's predict if this fails.
+    try:
+        forest = forest_eval.flatten_forest(components["risk_model"])
+        forest_eval.predict_proba(forest, np.zeros((1, forest.n_features))) # Compile (or load cached) numba kernel now, not on first request
+        components["risk_forest"] = forest; print(f"-> Risk forest flattened ({len(forest.feature)} nodes).")
+    except Exception as e: print(f"Warning: Could not flatten risk forest, using sklearn predict: {e}")
+def predict_risk_labels(processed_input, components=None):
+    """Risk labels for preprocessed rows; same result as risk_model.predict, without sklearn's per-call overhead."""
+    components = components or AI_COMPONENTS
+    forest = components.get("risk_forest")
+    if forest is not None: return forest_eval.predict(forest, processed_input)
+    return components["risk_model"].predict(processed_input)
 def _try_init_explainer(components, model_key, explainer_key):
     if components[model_key]:
         try: components[explainer_key] = shap.TreeExplainer(components[model_key]); print(f"-> SHAP {model_key.replace('_',' ')} explainer init.")
@@ -86,133 +130,98 @@ def format_shap_explanation_user_focused(shap_values_instance, preprocessor_feat
     except Exception as e: print(f"ERROR in format_shap: {e}"); traceback.print_exc(); return no_detail_msg
 
 # --- Risk Profile Prediction Function (Calls user-focused formatter) ---
-def get_risk_profile_and_explanation(user_profile_dict):
-    # ...(Function logic remains the same as the previous working version)...
+def get_risk_profile_and_explanation(user_profile_dict, explain=True, processed_input=None, components=None):
+    """
+    Predicts the user's risk profile. With explain=False the SHAP step is skipped and
+    'explanation' is None; 'explanation_handle' can be passed to get_explanation() later.
+    processed_input is the already-encoded row (feature store), skipping the preprocessor.
+    components replaces AI_COMPONENTS for the prediction (model_serving candidates). SHAP only explains
+    production, so a candidate's answer has no handle and CANDIDATE_EXPLANATION_TEXT as its explanation.
+    """
     print("--- Running Risk Prediction (with user-focused SHAP) ---")
-    preprocessor = AI_COMPONENTS.get("risk_preprocessor"); model = AI_COMPONENTS.get("risk_model"); explainer = AI_COMPONENTS.get("risk_explainer"); preprocessor_feature_names = AI_COMPONENTS.get("risk_feature_names"); load_error = AI_COMPONENTS.get("load_error") # Changed feature_names to preprocessor_feature_names
+    components = components or AI_COMPONENTS
+    preprocessor = components.get("risk_preprocessor"); model = components.get("risk_model"); load_error = components.get("load_error")
     if load_error or not all([preprocessor, model]): return None
     print(f"Risk Pred: Received profile keys: {list(user_profile_dict.keys())}")
     try:
         missing_keys = set(RISK_FEATURE_ORDER) - set(user_profile_dict.keys())
         if missing_keys: print(f"Error: Missing keys {missing_keys}"); st.error(f"Missing info: {missing_keys}"); return None
-        input_df = pd.DataFrame([user_profile_dict], columns=RISK_FEATURE_ORDER)
-        processed_input = preprocessor.transform(input_df)
-        classes = model.classes_ ; prediction_label = model.predict(processed_input)[0]
+        if processed_input is None: processed_input = preprocessor.transform(pd.DataFrame([user_profile_dict], columns=RISK_FEATURE_ORDER))
+        classes = model.classes_ ; prediction_label = predict_risk_labels(processed_input, components)[0]
         try: predicted_class_index = np.where(classes == prediction_label)[0][0]
         except IndexError: print(f"Error: Label '{prediction_label}' not in classes '{classes}'"); st.error("Prediction error."); return None
         print(f"Risk Pred: Raw prediction: {prediction_label} (Index: {predicted_class_index})")
-        explanation_text = "*Detailed factor analysis unavailable.*"
-        if explainer and preprocessor_feature_names is not None:
-            try:
-                print(f"Risk Pred: Calculating SHAP values...")
-                shap_values = explainer.shap_values(processed_input)
-                shap_values_instance = None
-                if isinstance(shap_values, np.ndarray) and shap_values.ndim == 3:
-                     if 0 <= predicted_class_index < shap_values.shape[2]: shap_values_instance = shap_values[0, :, predicted_class_index]
-                elif isinstance(shap_values, list) and len(shap_values) == len(classes):
-                     if 0 <= predicted_class_index < len(shap_values): shap_values_instance = shap_values[predicted_class_index][0]
-                else: print(f"Warning: Unexpected SHAP format for risk.")
-                if shap_values_instance is not None:
-                     print(f"Risk Pred: Extracted SHAP values. Shape: {shap_values_instance.shape}.")
-                     explanation_text = format_shap_explanation_user_focused(shap_values_instance, preprocessor_feature_names, user_profile_dict, prediction_label, explanation_type='risk')
-                else: explanation_text = "*Could not process risk explanation format.*"
-            except Exception as shap_e: print(f"Risk Pred: SHAP calculation failed: {shap_e}"); traceback.print_exc(); explanation_text = "*Error generating risk factors.*"
-        elif not explainer: explanation_text = "*Explanation unavailable (explainer).*"
-        else: explanation_text = "*Explanation unavailable (feature names).*"
+        if components is not AI_COMPONENTS: return {'prediction': str(prediction_label), 'explanation': CANDIDATE_EXPLANATION_TEXT, 'explanation_handle': None}
+        explanation_handle = make_risk_explanation_handle(user_profile_dict, str(prediction_label)); explanation_text = None
+        if explain: explanation_text = _risk_shap_explanation(processed_input, predicted_class_index, user_profile_dict, prediction_label); _remember_explanation(explanation_handle, explanation_text)
         print(f"--- Risk Prediction Finished: {prediction_label} ---")
-        return {'prediction': str(prediction_label), 'explanation': explanation_text}
+        return {'prediction': str(prediction_label), 'explanation': explanation_text, 'explanation_handle': explanation_handle}
     except Exception as e: error_msg = f"Error during risk prediction: {e}"; print(error_msg); traceback.print_exc(); st.error(error_msg); return None
 
+def explain_risk_profile(user_profile_dict, prediction_label):
+    """Computes the SHAP explanation for an already-predicted risk profile."""
+    preprocessor = AI_COMPONENTS.get("risk_preprocessor"); model = AI_COMPONENTS.get("risk_model")
+    if AI_COMPONENTS.get("load_error") or not all([preprocessor, model]): return "*Detailed factor analysis unavailable.*"
+    try:
+        processed_input = preprocessor.transform(pd.DataFrame([user_profile_dict], columns=RISK_FEATURE_ORDER))
+        predicted_class_index = np.where(model.classes_ == prediction_label)[0][0]
+    except Exception as e: print(f"Risk Explain: Could not prepare input: {e}"); return "*Detailed factor analysis unavailable.*"
+    return _risk_shap_explanation(processed_input, predicted_class_index, user_profile_dict, prediction_label)
 
-# --- *** MODIFIED: Investment Recommendation Function *** ---
-def get_investment_recommendations_and_explanation(user_profile_dict_full, user_risk_profile: str): # Takes full user profile
-    """
-    Predicts suitability for available investments based on user's FULL profile
-    and generates USER-FOCUSED explanations for suitable ones.
-    """
-    print(f"\n--- Running Investment Recommendations for Profile: {user_risk_profile} ---")
-    preprocessor = AI_COMPONENTS.get("inv_preprocessor")
-    model = AI_COMPONENTS.get("inv_model")
-    explainer = AI_COMPONENTS.get("inv_explainer")
-    preprocessor_feature_names = AI_COMPONENTS.get("inv_feature_names") # Use names from preprocessor
-    load_error = AI_COMPONENTS.get("load_error")
-
-    if load_error or not all([preprocessor, model]):
-        return [{"investment": "Error", "explanation": "AI components missing."}]
-
-    recommendations = []
-    for inv_type, details in AVAILABLE_INVESTMENTS.items():
-        try:
-            # --- Construct input_data with ALL relevant fields for the investment model ---
-            input_data = {
-                'RiskProfile': user_risk_profile, # User's overall risk profile
-                'InvestmentKnowledge': user_profile_dict_full.get('InvestmentKnowledge'),
-                'LiquidityNeeds': user_profile_dict_full.get('LiquidityNeeds'),
-                'TimeHorizonYears': user_profile_dict_full.get('TimeHorizonYears'), # User's actual time horizon
-                'InvestmentType': inv_type,                 # Current investment being evaluated
-                'InvestmentVolRange': details['Volatility'],  # Characteristic of inv_type
-                'InvestmentRetRange': details['Return']       # Characteristic of inv_type
-            }
-            # Ensure all keys in INV_FEATURE_ORDER are present in input_data, even if None
-            for key in INV_FEATURE_ORDER:
-                input_data.setdefault(key, None)
-
-
-            input_df = pd.DataFrame([input_data], columns=INV_FEATURE_ORDER) # Use updated INV_FEATURE_ORDER
-            # print(f"Inv Rec: Checking {inv_type}. Input for model:\n{input_df}") # Debug
-
-            processed_input = preprocessor.transform(input_df)
-            prediction_code = model.predict(processed_input)[0]
-            suitability = 'Suitable' if prediction_code == 1 else 'Not Suitable'
-
-            if suitability == 'Suitable':
-                explanation_text = "*Detailed rationale unavailable.*"
-                if explainer and preprocessor_feature_names is not None:
-                    try:
-                        print(f"Inv Rec: Calculating SHAP for {inv_type}...")
-                        shap_values = explainer.shap_values(processed_input)
-                        shap_values_instance = None
-                        if isinstance(shap_values, np.ndarray) and shap_values.ndim >= 1:
-                            shap_values_instance = shap_values[0]
-                        else: print(f"Warning: Unexpected SHAP format for {inv_type}.")
-
-                        if shap_values_instance is not None:
-                             print(f"Inv Rec: Extracted SHAP values for {inv_type}. Shape: {shap_values_instance.shape}.")
-                             # Call USER-FOCUSED formatter, pass the 'input_data' for this investment
-                             explanation_text = format_shap_explanation_user_focused(
-                                 shap_values_instance, preprocessor_feature_names, input_data, "Suitable", explanation_type='investment'
-                             )
-                        else: explanation_text = "*Could not process investment explanation format.*"
-                    except Exception as shap_e: print(f"Inv Rec: SHAP failed for {inv_type}: {shap_e}"); traceback.print_exc(); explanation_text = "*Error generating rationale.*"
-                elif not explainer: explanation_text = "*Rationale unavailable (explainer).*"
-                else: explanation_text = "*Rationale unavailable (feature names).*"
-
-                recommendations.append({"investment": inv_type, "suitability": suitability, "explanation": explanation_text})
-        except Exception as e: error_msg = f"Error predicting suitability for {inv_type}: {e}"; print(error_msg); traceback.print_exc()
+def _risk_shap_explanation(processed_input, predicted_class_index, user_profile_dict, prediction_label):
+    explainer = AI_COMPONENTS.get("risk_explainer"); preprocessor_feature_names = AI_COMPONENTS.get("risk_feature_names"); classes = AI_COMPONENTS["risk_model"].classes_
+    if not explainer: return "*Explanation unavailable (explainer).*"
+    if preprocessor_feature_names is None: return "*Explanation unavailable (feature names).*"
+    try:
+        print(f"Risk Pred: Calculating SHAP values...")
+        shap_values = explainer.shap_values(processed_input)
+        shap_values_instance = None
+        if isinstance(shap_values, np.ndarray) and shap_values.ndim == 3:
+             if 0 <= predicted_class_index < shap_values.shape[2]: shap_values_instance = shap_values[0, :, predicted_class_index]
+        elif isinstance(shap_values, list) and len(shap_values) == len(classes):
+             if 0 <= predicted_class_index < len(shap_values): shap_values_instance = shap_values[predicted_class_index][0]
+        else: print(f"Warning: Unexpected SHAP format for risk.")
+        if shap_values_instance is None: return "*Could not process risk explanation format.*"
+        print(f"Risk Pred: Extracted SHAP values. Shape: {shap_values_instance.shape}.")
+        return format_shap_explanation_user_focused(shap_values_instance, preprocessor_feature_names, user_profile_dict, prediction_label, explanation_type='risk')
+    except Exception as shap_e: print(f"Risk Pred: SHAP calculation failed: {shap_e}"); traceback.print_exc(); return "*Error generating risk factors.*"
 
-    print(f"--- Finished Generating Investment Recs. Found {len(recommendations)} suitable. ---")
-    if not recommendations: return [{"investment": "None Suitable", "explanation": "*Based on the analysis, no standard investments were deemed suitable.*"}]
-    return recommendations
-# --- *** End of Modified Investment Function *** ---
 
-# --- Placeholder Function for RL Planning (Keep as is) ---
+# --- Planning: Allocation over the suitable investments ---
+PLAN_VOLATILITY_TOLERANCE = 0.005 # Within half a point, the plan is described as meeting the profile's target volatility
 def get_planning_recommendation(user_profile_dict, risk_profile, suitable_investments):
-    # ...(placeholder logic remains the same)...
-    print(f"--- Generating Planning Recommendation (Placeholder) ---")
-    plan_actions = [f"Suggested Monthly Savings: 15% of income (Placeholder)", f"Investment Allocation: 60% IndexFund, 40% LargeCapMF (Placeholder)"]
-    plan_explanation = f"This placeholder plan balances growth for your '{user_profile_dict.get('PrimaryGoal')}' goal with your '{risk_profile}' profile. (Reinforcement Learning agent integration pending)."
-    print("--- Planning Recommendation Placeholder Generated ---")
-    return {"actions": plan_actions, "explanation": plan_explanation}
-
-# At the top of prediction.py or in a separate config.py
-# These are ILLUSTRATIVE. Research appropriate long-term averages for Indian markets.
-INVESTMENT_RETURN_MAPPING = {
-    "Very Low": 0.04,  # 4%
-    "Low": 0.06,       # 6%
-    "Medium": 0.08,    # 8%
-    "High": 0.12,      # 12%
-    "Very High": 0.15  # 15%
-}
+    """
+    Savings guidance plus concrete weights over the suitable investments: the point on their precomputed
+    efficient frontier at the risk profile's target volatility (ai_integration/allocation.py).
+    """
+    print(f"--- Generating Planning Recommendation ---")
+    inv_types = [rec.get("investment") if isinstance(rec, dict) else rec for rec in suitable_investments]
+    plan_actions = [f"Suggested Monthly Savings: 15% of income (Placeholder)"]
+    try:
+        mu, cov = get_allocation_inputs()
+        result = allocation.allocate(mu, cov, risk_profile, inv_types)
+    except Exception as e: print(f"Allocation failed: {e}"); traceback.print_exc(); result = None
+    if not result:
+        plan_explanation = f"No allocation could be computed for your '{risk_profile}' profile from the suitable investments."
+        return {"actions": plan_actions, "explanation": plan_explanation, "allocation": {}}
+    percentages = allocation.rounded_percentages(result["weights"])
+    plan_actions.append("Investment Allocation: " + ", ".join(f"{pct}% {inv_type}" for inv_type, pct in percentages.items()))
+    plan_actions.append(f"Expected Return: ~{result['expected_return']:.1%} p.a. at ~{result['expected_volatility']:.1%} annual volatility")
+    basis = "assumed returns blended with NAV history, and historical volatilities" if get_market_estimates() else "assumed long-term returns and volatilities"
+    target, volatility = allocation.PROFILE_TARGET_VOLATILITY.get(risk_profile, allocation.PROFILE_TARGET_VOLATILITY['Moderate']), result["expected_volatility"]
+    if abs(volatility - target) <= PLAN_VOLATILITY_TOLERANCE: # allocate clamps to the frontier when the target is out of reach
+        risk_text = f"at the volatility targeted for your '{risk_profile}' profile ({target:.0%})"
+    elif volatility < target:
+        risk_text = (f"at ~{volatility:.1%} expected volatility, below the {target:.0%} targeted for your '{risk_profile}' profile, "
+                     f"because no mix of your suitable investments carries that much risk")
+    else:
+        risk_text = (f"at ~{volatility:.1%} expected volatility, above the {target:.0%} targeted for your '{risk_profile}' profile, "
+                     f"because that is the least volatile mix of your suitable investments")
+    plan_explanation = (f"This mix sits on the efficient frontier of your suitable investments {risk_text}, "
+                        f"using {basis}, towards your '{user_profile_dict.get('PrimaryGoal')}' goal.")
+    print("--- Planning Recommendation Generated ---")
+    return {"actions": plan_actions, "explanation": plan_explanation, "allocation": percentages,
+            "expected_return": result["expected_return"], "expected_volatility": result["expected_volatility"]}
 
 # streamlit_app/ai_integration/prediction.py
 # ... (Keep all existing imports, configurations, and functions) ...
@@ -221,7 +230,7 @@ INVESTMENT_RETURN_MAPPING = {
 
 def project_investment_growth(principal_amount, annual_return_rate, years, compounding_frequency='annually'):
     """
-    Calculates projected investment growth.
+    Calculates projected investment growth (scalar wrapper around projection.project_value_curves).
 
     Args:
         principal_amount (float): The initial amount invested.
@@ -234,76 +243,177 @@ def project_investment_growth(principal_amount, annual_return_rate, years, compo
     """
     if annual_return_rate is None: # Handle cases where mapping might fail
         return principal_amount, 0
-
-    if compounding_frequency == 'annually':
-        n = 1
-    elif compounding_frequency == 'semi-annually':
-        n = 2
-    elif compounding_frequency == 'quarterly':
-        n = 4
-    elif compounding_frequency == 'monthly':
-        n = 12
-    else: # Default to annually if invalid
-        n = 1
-
-    # Compound interest formula: A = P(1 + r/n)^(nt)
     try:
-        projected_value = principal_amount * (1 + (annual_return_rate / n))**(n * years)
+        projected_value = float(project_growth_curves(principal_amount, [annual_return_rate], years, compounding_frequency)[0, -1])
         total_growth = projected_value - principal_amount
         return round(projected_value, 2), round(total_growth, 2)
     except Exception as e:
         print(f"Error in projection calculation: {e}")
         return principal_amount, 0 # Return principal if calculation fails
 
+COMPOUNDING_PERIODS_PER_YEAR = projection.COMPOUNDING_PERIODS_PER_YEAR
+
+def project_growth_curves(principal_amount, annual_return_rates, years, compounding_frequency='annually'):
+    """
+    Vectorized projection step, independent of model inference: year-by-year values for every
+    instrument at once. Returns an array of shape (len(annual_return_rates), years + 1);
+    column 0 is the principal, column -1 the projected value. NaN rates give NaN rows.
+    """
+    periods_per_year = COMPOUNDING_PERIODS_PER_YEAR.get(compounding_frequency, 1) # Default to annually if invalid
+    rates = np.asarray(annual_return_rates, dtype=float).reshape(-1)
+    return projection.project_value_curves(principal_amount, rates, int(years), projection.CONTRIBUTION_LUMPSUM, periods_per_year)
+
+def _build_investment_input(user_profile_dict_full, user_risk_profile, inv_type):
+    details = AVAILABLE_INVESTMENTS[inv_type]
+    input_data = {
+        'RiskProfile': user_risk_profile,
+        'InvestmentKnowledge': user_profile_dict_full.get('InvestmentKnowledge'),
+        'LiquidityNeeds': user_profile_dict_full.get('LiquidityNeeds'),
+        'TimeHorizonYears': user_profile_dict_full.get('TimeHorizonYears'),
+        'InvestmentType': inv_type,
+        'InvestmentVolRange': details['Volatility'],
+        'InvestmentRetRange': details['Return'] # This is the key for projection
+    }
+    for key in INV_FEATURE_ORDER: input_data.setdefault(key, None)
+    return input_data
+
+def explain_investment(user_profile_dict_full, user_risk_profile, inv_type):
+    """Computes the SHAP rationale for one investment already predicted as Suitable."""
+    preprocessor = AI_COMPONENTS.get("inv_preprocessor")
+    if AI_COMPONENTS.get("load_error") or preprocessor is None: return "*Could not generate rationale.*"
+    try:
+        input_data = _build_investment_input(user_profile_dict_full, user_risk_profile, inv_type)
+        processed_input = preprocessor.transform(pd.DataFrame([input_data], columns=INV_FEATURE_ORDER))
+    except Exception as e: print(f"Inv Explain: Could not prepare input for {inv_type}: {e}"); return "*Could not generate rationale.*"
+    return _investment_shap_explanation(processed_input, input_data, inv_type)
+
+def _investment_shap_explanation(processed_input, input_data, inv_type):
+    explainer = AI_COMPONENTS.get("inv_explainer"); preprocessor_feature_names = AI_COMPONENTS.get("inv_feature_names")
+    if not explainer or preprocessor_feature_names is None: return "*Could not generate rationale.*"
+    try:
+        shap_values = explainer.shap_values(processed_input)
+        shap_values_instance = None
+        if isinstance(shap_values, np.ndarray) and shap_values.ndim >= 1:
+            shap_values_instance = shap_values[0]
+        if shap_values_instance is not None:
+            return format_shap_explanation_user_focused(
+                shap_values_instance, preprocessor_feature_names, input_data, "Suitable", explanation_type='investment'
+            )
+        print(f"Warning: Unexpected SHAP format for {inv_type}.")
+    except Exception as shap_e: print(f"Inv Rec: SHAP failed for {inv_type}: {shap_e}")
+    return "*Could not generate rationale.*"
+
+# --- Lazy Explanations ---
+# Predictions hand out small, hashable handles instead of SHAP text. The SHAP work only runs when
+# get_explanation() is called (e.g. the user opens a rationale) and its result is cached per process,
+# keyed by the handle, so identical profiles share explanations.
+INV_EXPLANATION_PROFILE_KEYS = ['InvestmentKnowledge', 'LiquidityNeeds', 'TimeHorizonYears']
+EXPLANATION_CACHE_SIZE = 4096
+CANDIDATE_EXPLANATION_TEXT = "*A detailed factor analysis is not available for this assessment.*" # Candidate models have no explainer
+
+class ExplanationHandle(NamedTuple):
+    kind: str            # 'risk' or 'investment'
+    profile_items: tuple # ((feature, value), ...) - only the features the model sees
+    label: str           # Predicted risk profile
+    investment: str = None
+
+def make_risk_explanation_handle(user_profile_dict, prediction_label):
+    return ExplanationHandle('risk', tuple((k, user_profile_dict.get(k)) for k in RISK_FEATURE_ORDER), prediction_label)
+
+def make_investment_explanation_handle(user_profile_dict_full, user_risk_profile, inv_type):
+    return ExplanationHandle('investment', tuple((k, user_profile_dict_full.get(k)) for k in INV_EXPLANATION_PROFILE_KEYS), user_risk_profile, inv_type)
+
+_explanation_cache = OrderedDict()
+_explanation_cache_lock = threading.Lock()
+
+def _as_handle(handle):
+    """Normalises handles that were round-tripped as plain tuples/lists (e.g. through JSON)."""
+    kind, profile_items, label, *rest = handle
+    return ExplanationHandle(kind, tuple(tuple(item) for item in profile_items), label, *rest)
+
+def _remember_explanation(handle, text):
+    with _explanation_cache_lock:
+        _explanation_cache[handle] = text
+        _explanation_cache.move_to_end(handle)
+        while len(_explanation_cache) > EXPLANATION_CACHE_SIZE: _explanation_cache.popitem(last=False)
+
+def export_explanation_cache():
+    """(handle, saved_at, text) for every cached explanation, least recently used first (services/warm_start_service.py)."""
+    with _explanation_cache_lock: return [(tuple(handle), None, text) for handle, text in _explanation_cache.items()] # Plain tuples; valid for the model version, however old
+
+def preload_explanation_cache(entries):
+    """Adds snapshot entries that are not cached yet, behind the live ones in LRU order. Returns how many were added."""
+    added = 0
+    with _explanation_cache_lock:
+        for handle, _, text in reversed(entries):
+            handle = _as_handle(handle)
+            if handle in _explanation_cache or text is None: continue
+            _explanation_cache[handle] = text; _explanation_cache.move_to_end(handle, last=False); added += 1
+        while len(_explanation_cache) > EXPLANATION_CACHE_SIZE: _explanation_cache.popitem(last=False)
+    return added
+
+def get_cached_explanation(handle):
+    """Returns the explanation text if it has already been computed, else None (never runs SHAP)."""
+    handle = _as_handle(handle)
+    with _explanation_cache_lock:
+        text = _explanation_cache.get(handle)
+        if text is not None: _explanation_cache.move_to_end(handle)
+    return text
+
+def get_explanation(handle):
+    """Computes (or returns the cached) user-focused SHAP explanation for a handle."""
+    handle = _as_handle(handle)
+    cached = get_cached_explanation(handle)
+    if cached is not None: return cached
+    profile = dict(handle.profile_items)
+    if handle.kind == 'risk': text = explain_risk_profile(profile, handle.label)
+    elif handle.kind == 'investment': text = explain_investment(profile, handle.label, handle.investment)
+    else: return "*Explanation unavailable.*"
+    _remember_explanation(handle, text)
+    return text
+
 # --- Modify get_investment_recommendations_and_explanation ---
 # It will now add projection data to each suitable investment
 def get_investment_recommendations_and_explanation(user_profile_dict_full, user_risk_profile: str,
-                                                   projection_principal=100000, projection_years=5): # Add default projection params
+                                                   projection_principal=100000, projection_years=5, # Add default projection params
+                                                   explain=True, processed_rows=None, components=None):
     """
     Predicts suitability, generates explanations, AND ADDS PROJECTED GROWTH.
+    With explain=False the per-investment SHAP step is skipped and 'explanation' is None;
+    each recommendation's 'explanation_handle' can be passed to get_explanation() later.
+    processed_rows are the already-encoded rows for user_risk_profile in AVAILABLE_INVESTMENTS order
+    (feature store); without them all rows are encoded in one transform. Either way they are scored in one
+    model call (per-row encoding is only the fallback when the batch cannot be encoded).
+    components replaces AI_COMPONENTS for the prediction (model_serving candidates); their recommendations
+    carry CANDIDATE_EXPLANATION_TEXT and no handle, as production's SHAP cannot explain them.
     """
     print(f"\n--- Running Investment Recommendations for Profile: {user_risk_profile} ---")
-    # ... (Keep existing component loading and error checks) ...
-    preprocessor=AI_COMPONENTS.get("inv_preprocessor"); model=AI_COMPONENTS.get("inv_model")
-    explainer=AI_COMPONENTS.get("inv_explainer"); preprocessor_feature_names=AI_COMPONENTS.get("inv_feature_names")
-    load_error=AI_COMPONENTS.get("load_error")
+    components = components or AI_COMPONENTS
+    preprocessor=components.get("inv_preprocessor"); model=components.get("inv_model")
+    load_error=components.get("load_error")
     if load_error or not all([preprocessor,model]): return [{"investment": "Error", "explanation": "AI components missing."}]
 
     recommendations = []
-    for inv_type, details in AVAILABLE_INVESTMENTS.items():
+    if processed_rows is None:
+        try: processed_rows = preprocessor.transform(_investment_rows_frame(pd.DataFrame([user_profile_dict_full]), [user_risk_profile]))
+        except Exception as e: print(f"Inv Rec: batch encoding failed, encoding per investment: {e}")
+    batch_codes = model.predict(processed_rows) if processed_rows is not None else None
+    for i, (inv_type, details) in enumerate(AVAILABLE_INVESTMENTS.items()):
         try:
-            input_data = {
-                'RiskProfile': user_risk_profile,
-                'InvestmentKnowledge': user_profile_dict_full.get('InvestmentKnowledge'),
-                'LiquidityNeeds': user_profile_dict_full.get('LiquidityNeeds'),
-                'TimeHorizonYears': user_profile_dict_full.get('TimeHorizonYears'),
-                'InvestmentType': inv_type,
-                'InvestmentVolRange': details['Volatility'],
-                'InvestmentRetRange': details['Return'] # This is the key for projection
-            }
-            for key in INV_FEATURE_ORDER: input_data.setdefault(key, None)
-            input_df = pd.DataFrame([input_data], columns=INV_FEATURE_ORDER)
-            processed_input = preprocessor.transform(input_df)
-            prediction_code = model.predict(processed_input)[0]
+            input_data = _build_investment_input(user_profile_dict_full, user_risk_profile, inv_type)
+            if batch_codes is not None: processed_input, prediction_code = processed_rows[i:i + 1], batch_codes[i]
+            else:
+                processed_input = preprocessor.transform(pd.DataFrame([input_data], columns=INV_FEATURE_ORDER))
+                prediction_code = model.predict(processed_input)[0]
             suitability = 'Suitable' if prediction_code == 1 else 'Not Suitable'
 
             if suitability == 'Suitable':
-                explanation_text = "*Could not generate rationale.*"
-                if explainer and preprocessor_feature_names is not None:
-                    try:
-                        shap_values = explainer.shap_values(processed_input)
-                        shap_values_instance = None
-                        if isinstance(shap_values, np.ndarray) and shap_values.ndim >= 1:
-                            shap_values_instance = shap_values[0]
-                        if shap_values_instance is not None:
-                            explanation_text = format_shap_explanation_user_focused(
-                                shap_values_instance, preprocessor_feature_names, input_data, "Suitable", explanation_type='investment'
-                            )
-                        else: print(f"Warning: Unexpected SHAP format for {inv_type}.")
-                    except Exception as shap_e: print(f"Inv Rec: SHAP failed for {inv_type}: {shap_e}")
+                explanation_handle = make_investment_explanation_handle(user_profile_dict_full, user_risk_profile, inv_type); explanation_text = None
+                if components is not AI_COMPONENTS: explanation_handle, explanation_text = None, CANDIDATE_EXPLANATION_TEXT
+                elif explain: explanation_text = _investment_shap_explanation(processed_input, input_data, inv_type); _remember_explanation(explanation_handle, explanation_text)
 
                 # --- *** ADD PROJECTION CALCULATION *** ---
-                avg_annual_return = INVESTMENT_RETURN_MAPPING.get(details['Return']) # Get rate from mapping
+                avg_annual_return = expected_annual_return(inv_type) # NAV store estimate, else the band's assumed rate
                 projected_value, total_growth = 0, 0 # Defaults
                 if avg_annual_return is not None:
                     projected_value, total_growth = project_investment_growth(
@@ -315,10 +425,12 @@ def get_investment_recommendations_and_explanation(user_profile_dict_full, user_
                     "investment": inv_type,
                     "suitability": suitability,
                     "explanation": explanation_text,
+                    "explanation_handle": explanation_handle,
                     # --- ADD PROJECTION RESULTS ---
                     "projected_value": projected_value,
                     "total_growth": total_growth,
-                    "avg_annual_return_used": avg_annual_return * 100 if avg_annual_return is not None else "N/A" # For display
+                    "avg_annual_return_used": avg_annual_return * 100 if avg_annual_return is not None else "N/A", # For display
+                    "return_basis": "history" if history_return(inv_type) is not None else "assumed"
                 })
         except Exception as e: print(f"Error processing investment {inv_type}: {e}"); traceback.print_exc()
 
@@ -326,4 +438,53 @@ def get_investment_recommendations_and_explanation(user_profile_dict_full, user_
     if not recommendations: return [{"investment": "None Suitable", "explanation": "*Based on the analysis, no standard investments were deemed suitable.*"}]
     return recommendations
 
-# ... (Keep get_risk_profile_and_explanation and get_planning_recommendation) ...
\ No newline at end of file
+# --- Batched Scoring (what-if exploration and other many-profile callers) ---
+def predict_risk_profiles_batch(profiles_df):
+    """Risk labels for many profiles (DataFrame with RISK_FEATURE_ORDER columns) in one model pass."""
+    preprocessor = AI_COMPONENTS.get("risk_preprocessor")
+    if AI_COMPONENTS.get("load_error") or preprocessor is None or AI_COMPONENTS.get("risk_model") is None: raise RuntimeError("AI components missing.")
+    return np.asarray(predict_risk_labels(preprocessor.transform(profiles_df[RISK_FEATURE_ORDER]))).astype(str)
+
+def predict_investment_suitability_batch(profiles_df, risk_labels):
+    """
+    Boolean matrix (n_profiles, len(AVAILABLE_INVESTMENTS)) of 'Suitable' predictions, columns in
+    AVAILABLE_INVESTMENTS order. Same inputs as _build_investment_input, scored in one model call.
+    """
+    preprocessor = AI_COMPONENTS.get("inv_preprocessor"); model = AI_COMPONENTS.get("inv_model")
+    if AI_COMPONENTS.get("load_error") or not all([preprocessor, model]): raise RuntimeError("AI components missing.")
+    return (np.asarray(model.predict(preprocessor.transform(_investment_rows_frame(profiles_df, risk_labels)))) == 1).reshape(len(profiles_df), len(AVAILABLE_INVESTMENTS))
+
+def _investment_rows_frame(profiles_df, risk_labels):
+    """INV_FEATURE_ORDER rows for every (profile, instrument) pair, profile-major, instruments in AVAILABLE_INVESTMENTS order."""
+    inv_types = list(AVAILABLE_INVESTMENTS); n_profiles, n_types = len(profiles_df), len(inv_types)
+    return pd.DataFrame({
+        'RiskProfile': np.repeat(np.asarray(risk_labels, dtype=object), n_types),
+        'InvestmentKnowledge': np.repeat(profiles_df['InvestmentKnowledge'].to_numpy(dtype=object), n_types),
+        'LiquidityNeeds': np.repeat(profiles_df['LiquidityNeeds'].to_numpy(dtype=object), n_types),
+        'TimeHorizonYears': np.repeat(profiles_df['TimeHorizonYears'].to_numpy(), n_types),
+        'InvestmentType': np.tile(np.asarray(inv_types, dtype=object), n_profiles),
+        'InvestmentVolRange': np.tile(np.asarray([AVAILABLE_INVESTMENTS[t]['Volatility'] for t in inv_types], dtype=object), n_profiles),
+        'InvestmentRetRange': np.tile(np.asarray([AVAILABLE_INVESTMENTS[t]['Return'] for t in inv_types], dtype=object), n_profiles),
+    }, columns=INV_FEATURE_ORDER)
+
+def predict_suitability_proba(rows_df):
+    """P('Suitable') for each row of a DataFrame with INV_FEATURE_ORDER columns, in one model call."""
+    preprocessor = AI_COMPONENTS.get("inv_preprocessor"); model = AI_COMPONENTS.get("inv_model")
+    if AI_COMPONENTS.get("load_error") or not all([preprocessor, model]): raise RuntimeError("AI components missing.")
+    suitable_column = list(model.classes_).index(1)
+    return model.predict_proba(preprocessor.transform(rows_df[INV_FEATURE_ORDER]))[:, suitable_column]
+
+# --- Encoded Features (services/feature_service.py stores them per profile) ---
+def encode_profiles_batch(profiles_df):
+    """
+    (risk rows (n, n_risk_features), risk labels (n,), investment rows (n, len(AVAILABLE_INVESTMENTS), n_inv_features))
+    for a DataFrame of profiles; the investment rows are encoded with each profile's predicted risk label.
+    """
+    risk_preprocessor = AI_COMPONENTS.get("risk_preprocessor"); inv_preprocessor = AI_COMPONENTS.get("inv_preprocessor")
+    if AI_COMPONENTS.get("load_error") or not all([risk_preprocessor, inv_preprocessor]) or AI_COMPONENTS.get("risk_model") is None: raise RuntimeError("AI components missing.")
+    risk_rows = np.asarray(risk_preprocessor.transform(profiles_df[RISK_FEATURE_ORDER]), dtype=np.float64)
+    risk_labels = np.asarray(predict_risk_labels(risk_rows)).astype(str)
+    investment_rows = np.asarray(inv_preprocessor.transform(_investment_rows_frame(profiles_df, risk_labels)), dtype=np.float64)
+    return risk_rows, risk_labels, investment_rows.reshape(len(profiles_df), len(AVAILABLE_INVESTMENTS), -1)
+
+# ... (Keep get_risk_profile_and_explanation and get_planning_recommendation) ...
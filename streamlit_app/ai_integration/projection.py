@@ -0,0 +1,113 @@
+# streamlit_app/ai_integration/projection.py
+# Vectorized projection engine shared by the advice projections and the Dashboard calculators.
+# Pure NumPy (no model imports), so pages can use it without loading the AI components.
+import numpy as np
+
+CONTRIBUTION_LUMPSUM = "lumpsum"          # amount invested once at year 0
+CONTRIBUTION_SIP = "sip"                  # amount invested at the end of every period
+CONTRIBUTION_STEP_UP_SIP = "step_up_sip"  # like SIP, but the per-period amount grows by step_up_rate each year
+CONTRIBUTION_SCHEDULES = (CONTRIBUTION_LUMPSUM, CONTRIBUTION_SIP, CONTRIBUTION_STEP_UP_SIP)
+
+COMPOUNDING_PERIODS_PER_YEAR = {'annually': 1, 'semi-annually': 2, 'quarterly': 4, 'monthly': 12}
+
+# Period rates at or below -100% would wipe the investment out; clamp just above so logs stay finite.
+_MIN_PERIOD_RATE = -1.0 + 1e-12
+
+
+def _exprel(x):
+    """expm1(x) / x with the x -> 0 limit of 1; the stable building block for every annuity below."""
+    x = np.asarray(x, dtype=float)
+    safe_x = np.where(x == 0, 1.0, x)
+    return np.where(x == 0, 1.0, np.expm1(safe_x) / safe_x)
+
+
+def _annuity_factor(periods, log_growth):
+    """Value after `periods` end-of-period contributions of 1: ((1+i)^k - 1) / i, stable at i = 0 and i < 0."""
+    return periods * _exprel(periods * log_growth) / _exprel(log_growth)
+
+
+def project_value_curves(amounts, annual_rates, years, contribution=CONTRIBUTION_LUMPSUM,
+                         periods_per_year=1, step_up_rates=0.0):
+    """
+    Year-by-year projected values for many scenarios in one broadcasted computation.
+
+    Args:
+        amounts: Lump sum, or contribution per period for SIP schedules. Array-like.
+        annual_rates: Nominal annual return rates (0.08 for 8%), compounded periods_per_year times. Array-like.
+        years: Horizon in whole years, scalar or array-like. Curves run to max(years); entries past a
+            scenario's own horizon are NaN.
+        contribution: One of CONTRIBUTION_SCHEDULES.
+        periods_per_year: Compounding (and SIP contribution) periods per year, e.g. 12 for monthly.
+        step_up_rates: Yearly growth of the SIP contribution (0.10 for 10%), only for CONTRIBUTION_STEP_UP_SIP.
+
+    Returns:
+        np.ndarray of shape broadcast(amounts, annual_rates, years, step_up_rates).shape + (max_years + 1,).
+        Column y is the value at the end of year y; column 0 is the lump sum (or 0 for SIPs).
+    """
+    if contribution not in CONTRIBUTION_SCHEDULES: raise ValueError(f"Unknown contribution schedule: {contribution}")
+    amounts, rates, horizons, step_ups = np.broadcast_arrays(
+        np.asarray(amounts, dtype=float), np.asarray(annual_rates, dtype=float),
+        np.asarray(years, dtype=float), np.asarray(step_up_rates, dtype=float))
+    m = float(periods_per_year)
+    max_years = int(np.nanmax(horizons)) if horizons.size else 0
+    year_grid = np.arange(max_years + 1, dtype=float)
+
+    # Trailing axis is time; everything else broadcasts.
+    amounts, step_ups, horizons = amounts[..., None], step_ups[..., None], horizons[..., None]
+    period_rates = np.maximum(rates[..., None] / m, _MIN_PERIOD_RATE)
+    log_growth = np.log1p(period_rates)
+    periods = m * year_grid
+
+    if contribution == CONTRIBUTION_LUMPSUM:
+        values = amounts * np.power(1 + period_rates, periods) # Same rounding as the scalar (1 + r/n)**(n*t)
+    elif contribution == CONTRIBUTION_SIP:
+        values = amounts * _annuity_factor(periods, log_growth)
+    else:
+        # Year y (0-based) contributes amount * (1+s)^y every period; its block is worth
+        # amount * (1+s)^y * annuity(m) at the end of year y and then compounds for the remaining years:
+        #   V_Y = amount * annuity(m) * G^(Y-1) * sum_{y<Y} ((1+s)/G)^y,  G = (1+i)^m
+        # The geometric sum is written with _exprel so q = 1 (step-up equal to growth) needs no special case.
+        log_year_growth = m * log_growth
+        log_ratio = np.log1p(np.maximum(step_ups, _MIN_PERIOD_RATE)) - log_year_growth
+        geometric_sum = year_grid * _exprel(year_grid * log_ratio) / _exprel(log_ratio)
+        values = amounts * _annuity_factor(m, log_growth) * np.exp((year_grid - 1) * log_year_growth) * geometric_sum
+        values = np.where(year_grid == 0, 0.0, values)
+    return np.where(year_grid <= horizons, values, np.nan)
+
+
+def value_after_periods(amounts, annual_rates, periods, contribution=CONTRIBUTION_LUMPSUM, periods_per_year=1, step_up_rates=0.0):
+    """
+    Value after a whole number of periods (which need not be whole years) for many scenarios at once;
+    same schedules and conventions as project_value_curves, which it matches at year boundaries.
+    Returns an array of shape broadcast(amounts, annual_rates, periods, step_up_rates).shape.
+    """
+    if contribution not in CONTRIBUTION_SCHEDULES: raise ValueError(f"Unknown contribution schedule: {contribution}")
+    amounts, rates, periods, step_ups = np.broadcast_arrays(
+        np.asarray(amounts, dtype=float), np.asarray(annual_rates, dtype=float),
+        np.asarray(periods, dtype=float), np.asarray(step_up_rates, dtype=float))
+    m = float(periods_per_year)
+    period_rates = np.maximum(rates / m, _MIN_PERIOD_RATE)
+    log_growth = np.log1p(period_rates)
+    if contribution == CONTRIBUTION_LUMPSUM: return amounts * np.power(1 + period_rates, periods)
+    if contribution == CONTRIBUTION_SIP: return amounts * _annuity_factor(periods, log_growth)
+    # Step-up: the full years as in project_value_curves, grown over the remaining periods, plus the
+    # remaining periods' contributions at that year's stepped-up amount.
+    years = np.floor(periods / m)
+    remaining = periods - years * m
+    log_year_growth = m * log_growth
+    log_step_up = np.log1p(np.maximum(step_ups, _MIN_PERIOD_RATE))
+    log_ratio = log_step_up - log_year_growth
+    geometric_sum = years * _exprel(years * log_ratio) / _exprel(log_ratio)
+    full_years = _annuity_factor(m, log_growth) * np.exp((years - 1) * log_year_growth) * geometric_sum
+    return amounts * (full_years * np.exp(remaining * log_growth) + np.exp(years * log_step_up) * _annuity_factor(remaining, log_growth))
+
+
+def invested_amount_curves(amounts, years, contribution=CONTRIBUTION_LUMPSUM, periods_per_year=1, step_up_rates=0.0):
+    """Cumulative amount put in by the end of each year, same shape conventions as project_value_curves."""
+    return project_value_curves(amounts, 0.0, years, contribution, periods_per_year, step_up_rates)
+
+
+def final_values(curves, years):
+    """Picks each scenario's value at its own horizon from project_value_curves output."""
+    years = np.broadcast_to(np.asarray(years, dtype=int), curves.shape[:-1])
+    return np.take_along_axis(curves, years[..., None], axis=-1)[..., 0]
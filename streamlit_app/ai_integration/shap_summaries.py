@@ -0,0 +1,45 @@
+# streamlit_app/ai_integration/shap_summaries.py
+# Read side of the offline global SHAP job (ml_scripts/explainability/global_shap.py). The job writes two
+# Parquet files, and the app reads them instead of running SHAP over whole datasets:
+# - global feature importance per model and predicted class,
+# - per-segment drivers, e.g. which features push 55+ users towards Conservative.
+# Files are cached per process and re-read when the job rewrites them. Each row carries the model_hash
+# (artifacts.artifact_hash) of the model it was computed for.
+import os
+from functools import lru_cache
+import pandas as pd
+
+PROJECT_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SUMMARY_DIR = os.environ.get("SHAP_SUMMARY_DIR", os.path.join(PROJECT_ROOT_DIR, 'data', 'explainability'))
+GLOBAL_IMPORTANCE_FILE = "global_importance.parquet"
+SEGMENT_SUMMARY_FILE = "segment_summary.parquet"
+
+
+@lru_cache(maxsize=4)
+def _read(path, mtime):
+    return pd.read_parquet(path)
+
+
+def _load(name):
+    path = os.path.join(SUMMARY_DIR, name)
+    if not os.path.exists(path): return None
+    return _read(path, os.path.getmtime(path)) # mtime in the key: a rerun of the job is picked up
+
+
+def load_global_importance():
+    """model, target, feature, mean_abs_shap, mean_shap, rank; None until the job has run."""
+    return _load(GLOBAL_IMPORTANCE_FILE)
+
+
+def load_segment_summary():
+    """model, segment_feature, segment_value, target, rows, target_share, feature, mean_shap, rank; None until the job has run."""
+    return _load(SEGMENT_SUMMARY_FILE)
+
+
+def segment_drivers(model, segment_feature, segment_value, target, top_n=3):
+    """Features that push rows in a segment towards target the most (highest mean SHAP first)."""
+    summary = load_segment_summary()
+    if summary is None: return None
+    rows = summary[(summary["model"] == model) & (summary["segment_feature"] == segment_feature)
+                   & (summary["segment_value"] == str(segment_value)) & (summary["target"] == target)]
+    return rows.sort_values("rank").head(top_n)
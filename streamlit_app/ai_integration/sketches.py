@@ -0,0 +1,191 @@
+# streamlit_app/ai_integration/sketches.py
+# Fixed-size streaming summaries for monitoring. There are three: a capped count table for categorical
+# values, a t-digest-style quantile sketch for numbers, and per-key hit/trial counters for rates. Updates
+# are O(1); the digest's cost is amortised, because it buffers values and compresses them in batches.
+# Memory does not grow with the number of observations. Every sketch merges with another of its kind and
+# round-trips through to_dict()/from_dict(), so snapshots from several processes can be combined.
+# scale() multiplies every count by a factor, which is how monitoring decays old observations.
+# Pure NumPy.
+import math
+import numpy as np
+
+OTHER = "__other__" # Bucket for categorical values past a table's max_keys
+
+
+class CountTable:
+    """Counts per categorical value; once max_keys distinct values are held, new ones count as OTHER."""
+    def __init__(self, max_keys=64, counts=None):
+        self.max_keys = max_keys
+        self.counts = dict(counts or {})
+
+    def add(self, value, weight=1):
+        key = str(value)
+        if key not in self.counts and len(self.counts) >= self.max_keys: key = OTHER
+        self.counts[key] = self.counts.get(key, 0) + weight
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def proportions(self):
+        total = self.total
+        return {key: count / total for key, count in self.counts.items()} if total else {}
+
+    def merge(self, other):
+        for key, count in other.counts.items(): self.add(key, count)
+        return self
+
+    def scale(self, factor):
+        self.counts = {key: count * factor for key, count in self.counts.items()}
+        return self
+
+    def to_dict(self):
+        return {"max_keys": self.max_keys, "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["max_keys"], data["counts"])
+
+
+class QuantileSketch:
+    """
+    t-digest-style quantile sketch: sorted weighted centroids, kept small near the tails by the k1 scale
+    function so extreme quantiles stay accurate, with roughly `compression` centroids at most. Values are
+    buffered and merged into the centroids buffer_size at a time.
+    """
+    def __init__(self, compression=100, buffer_size=256):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means, self.weights = np.empty(0), np.empty(0)
+        self.min, self.max = math.inf, -math.inf
+        self._buffer = []
+
+    def add(self, value):
+        value = float(value)
+        if math.isnan(value): return
+        self._buffer.append(value)
+        if value < self.min: self.min = value
+        if value > self.max: self.max = value
+        if len(self._buffer) >= self.buffer_size: self._compress()
+
+    def update(self, values):
+        """Adds many values at once (e.g. a reference column)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values): return
+        self.min, self.max = min(self.min, float(values.min())), max(self.max, float(values.max()))
+        self._compress(values, np.ones(len(values)))
+
+    @property
+    def count(self):
+        return float(self.weights.sum()) + len(self._buffer)
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self, means=None, weights=None):
+        means = np.concatenate([self.means, np.asarray(self._buffer, dtype=np.float64)] + ([means] if means is not None else []))
+        weights = np.concatenate([self.weights, np.ones(len(self._buffer))] + ([weights] if weights is not None else []))
+        self._buffer = []
+        if not len(means): return
+        order = np.argsort(means, kind="stable")
+        means, weights, total = means[order], weights[order], weights.sum()
+        # Greedy merge of neighbours while a centroid spans at most one unit of k(q).
+        new_means, new_weights = [float(means[0])], [float(weights[0])]
+        before, k_lower = 0.0, self._k(0.0)
+        for mean, weight in zip(means[1:].tolist(), weights[1:].tolist()):
+            merged = new_weights[-1] + weight
+            if self._k((before + merged) / total) - k_lower <= 1.0:
+                new_means[-1] += (mean - new_means[-1]) * weight / merged
+                new_weights[-1] = merged
+            else:
+                before += new_weights[-1]; k_lower = self._k(before / total)
+                new_means.append(mean); new_weights.append(weight)
+        self.means, self.weights = np.array(new_means), np.array(new_weights)
+
+    def _curve(self):
+        """(values, cumulative weights) through the min, each centroid's midpoint and the max."""
+        if self._buffer: self._compress()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return np.concatenate([[self.min], self.means, [self.max]]), np.concatenate([[0.0], centers, [self.weights.sum()]])
+
+    def quantile(self, q):
+        if not self.count: return math.nan
+        values, cumulative = self._curve()
+        return float(np.interp(q * cumulative[-1], cumulative, values))
+
+    def cdf(self, x):
+        if not self.count: return math.nan
+        values, cumulative = self._curve()
+        return float(np.interp(x, values, cumulative) / cumulative[-1])
+
+    def merge(self, other):
+        if other.count:
+            if other._buffer: other._compress()
+            self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+            self._compress(other.means, other.weights)
+        return self
+
+    def scale(self, factor):
+        """Scales the centroid weights; min and max keep the extremes ever seen."""
+        if self._buffer: self._compress()
+        self.weights = self.weights * factor
+        return self
+
+    def to_dict(self):
+        if self._buffer: self._compress()
+        return {"compression": self.compression, "means": self.means.tolist(), "weights": self.weights.tolist(),
+                "min": self.min if self.count else None, "max": self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["compression"])
+        sketch.means, sketch.weights = np.array(data["means"], dtype=np.float64), np.array(data["weights"], dtype=np.float64)
+        if data["min"] is not None: sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
+
+
+class RateCounters:
+    """Hits out of trials per key, e.g. 'Suitable' verdicts out of suitability checks per instrument."""
+    def __init__(self, counts=None):
+        self.counts = {key: list(hits_trials) for key, hits_trials in (counts or {}).items()}
+
+    def add(self, key, hit, trials=1):
+        entry = self.counts.setdefault(str(key), [0, 0])
+        entry[0] += hit; entry[1] += trials # hit is a bool for one trial, a count when merging
+
+    def rates(self):
+        return {key: hits / trials for key, (hits, trials) in self.counts.items() if trials}
+
+    def merge(self, other):
+        for key, (hits, trials) in other.counts.items(): self.add(key, hits, trials)
+        return self
+
+    def scale(self, factor):
+        self.counts = {key: [hits * factor, trials * factor] for key, (hits, trials) in self.counts.items()}
+        return self
+
+    def to_dict(self):
+        return {"counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["counts"])
+
+
+def population_stability_index(live, reference, epsilon=1e-4):
+    """PSI between two CountTables over the union of their values (empty shares floored at epsilon)."""
+    live_shares, reference_shares = live.proportions(), reference.proportions()
+    if not live_shares or not reference_shares: return math.nan
+    psi = 0.0
+    for key in set(live_shares) | set(reference_shares):
+        p, q = max(live_shares.get(key, 0.0), epsilon), max(reference_shares.get(key, 0.0), epsilon)
+        psi += (p - q) * math.log(p / q)
+    return psi
+
+
+def ks_distance(live, reference):
+    """Largest CDF gap between two QuantileSketches, checked at both sketches' centroids."""
+    if not live.count or not reference.count: return math.nan
+    points = np.unique(np.concatenate([live._curve()[0], reference._curve()[0]]))
+    return max(abs(live.cdf(x) - reference.cdf(x)) for x in points)
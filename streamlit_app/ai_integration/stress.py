@@ -0,0 +1,77 @@
+# streamlit_app/ai_integration/stress.py
+# Scenario stress tests over many portfolios at once. A scenario is a vector of instantaneous returns per
+# investment type; stacking the library gives a (scenarios, types) shock matrix, and every portfolio's
+# scenario return is one matrix product with the (portfolios, types) weight matrix. Loss distributions
+# are summarised per group (risk profile, goal) with optional row counts, so identical portfolios can be
+# evaluated once and weighted by how many users hold them. Pure NumPy/pandas.
+import numpy as np
+import pandas as pd
+from .instruments import AVAILABLE_INVESTMENTS
+
+INVESTMENT_TYPES = list(AVAILABLE_INVESTMENTS)
+LOSS_QUANTILES = (0.5, 0.95)
+LARGE_LOSS_THRESHOLD = 0.20 # Share of users losing more than this is reported per group
+
+# Illustrative peak-to-trough returns per investment type; types not listed are unaffected.
+SCENARIOS = {
+    "equity_crash_2008": {
+        "description": "Global financial crisis: broad equity crash, flight to safety in debt.",
+        "shocks": {"IndexFund": -0.52, "LargeCapMF": -0.50, "MidSmallCapMF": -0.68, "DirectEquity": -0.60, "BalancedMF": -0.30, "DebtMF": 0.02},
+    },
+    "covid_crash_2020": {
+        "description": "March 2020: sharp equity sell-off and credit stress in debt funds.",
+        "shocks": {"IndexFund": -0.38, "LargeCapMF": -0.36, "MidSmallCapMF": -0.42, "DirectEquity": -0.40, "BalancedMF": -0.22, "DebtMF": -0.04},
+    },
+    "rate_shock_200bp": {
+        "description": "Rates up 200 bp: duration losses in debt, equity de-rating.",
+        "shocks": {"DebtMF": -0.07, "BalancedMF": -0.09, "IndexFund": -0.10, "LargeCapMF": -0.10, "MidSmallCapMF": -0.15, "DirectEquity": -0.12},
+    },
+    "mid_small_cap_correction": {
+        "description": "Froth unwinds in mid and small caps; large caps mostly hold.",
+        "shocks": {"MidSmallCapMF": -0.30, "DirectEquity": -0.18, "LargeCapMF": -0.07, "IndexFund": -0.06, "BalancedMF": -0.05},
+    },
+}
+
+
+def shock_matrix(scenarios=None, inv_types=None):
+    """(scenario names, (n_scenarios, n_types) returns) over inv_types order (default INVESTMENT_TYPES)."""
+    scenarios = SCENARIOS if scenarios is None else scenarios
+    inv_types = INVESTMENT_TYPES if inv_types is None else inv_types
+    names = list(scenarios)
+    return names, np.array([[scenarios[name]["shocks"].get(t, 0.0) for t in inv_types] for name in names], dtype=np.float64)
+
+
+def scenario_losses(weights, shocks):
+    """(n_portfolios, n_scenarios) losses as fractions of portfolio value (gains are negative losses)."""
+    return 0.0 - np.asarray(weights, dtype=np.float64) @ np.asarray(shocks, dtype=np.float64).T # 0.0 - avoids -0.0 for unshocked portfolios
+
+
+def _weighted_quantiles(values, counts, quantiles):
+    order = np.argsort(values, kind='stable')
+    cumulative = np.cumsum(counts[order])
+    positions = np.searchsorted(cumulative, np.asarray(quantiles) * cumulative[-1], side='left')
+    return values[order][np.minimum(positions, len(values) - 1)]
+
+
+def loss_distribution(losses, scenario_names, groups, counts=None, quantiles=LOSS_QUANTILES, threshold=LARGE_LOSS_THRESHOLD):
+    """
+    Per scenario and group: users, mean loss, loss quantiles, worst loss and the share of users losing more
+    than threshold. losses is (n_rows, n_scenarios); groups a DataFrame of group keys with one row per loss
+    row; counts (default 1) the number of users each row stands for.
+    """
+    losses = np.asarray(losses, dtype=np.float64)
+    counts = np.ones(len(losses)) if counts is None else np.asarray(counts, dtype=np.float64)
+    keys = list(groups.columns)
+    records = []
+    for group, rows in groups.groupby(keys, sort=True, observed=True).indices.items():
+        group = group if isinstance(group, tuple) else (group,)
+        weight = counts[rows]
+        for j, scenario in enumerate(scenario_names):
+            values = losses[rows, j]
+            record = dict(zip(keys, group), scenario=scenario, users=int(weight.sum()),
+                          mean_loss=float(values @ weight / weight.sum()), worst_loss=float(values.max()),
+                          share_over_threshold=float(weight[values > threshold].sum() / weight.sum()))
+            record.update({f"p{round(q * 100)}_loss": float(v) for q, v in zip(quantiles, _weighted_quantiles(values, weight, quantiles))})
+            records.append(record)
+    columns = ["scenario"] + keys + ["users", "mean_loss"] + [f"p{round(q * 100)}_loss" for q in quantiles] + ["worst_loss", "share_over_threshold"]
+    return pd.DataFrame.from_records(records, columns=columns).sort_values(["scenario"] + keys, ignore_index=True)
@@ -1,21 +1,33 @@
 # streamlit_app/db_models.py
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, MetaData
+from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, ForeignKey, LargeBinary, MetaData
 from sqlalchemy.orm import declarative_base
 import os
+from functools import lru_cache
 
 DATABASE_URL = os.environ.get("DATABASE_URL_STREAMLIT", "sqlite:///../app_database.db")
-if DATABASE_URL and "@" in DATABASE_URL and ":" in DATABASE_URL.split("@")[0]:
-    user_pass, rest_of_url = DATABASE_URL.split("://")[1].split("@", 1)
-    user, _ = user_pass.split(":", 1)
-    safe_to_print_url = f"{DATABASE_URL.split('://')[0]}://{user}:********@{rest_of_url}"
-else:
-    safe_to_print_url = DATABASE_URL
-print(f"Database URL being used: {safe_to_print_url}")
-
-engine_args = {}
-if DATABASE_URL.startswith("postgresql"): pass
-elif DATABASE_URL.startswith("sqlite"): engine_args = {"connect_args": {"check_same_thread": False}}
-engine = create_engine(DATABASE_URL, **engine_args)
+
+def _safe_url(url):
+    """DATABASE_URL with the password masked, for logging."""
+    if url and "@" in url and ":" in url.split("@")[0]:
+        user_pass, rest_of_url = url.split("://")[1].split("@", 1)
+        user, _ = user_pass.split(":", 1)
+        return f"{url.split('://')[0]}://{user}:********@{rest_of_url}"
+    return url
+
+@lru_cache(maxsize=None)
+def get_engine():
+    """Creates the SQLAlchemy engine on first use (importing the models has no side effects)."""
+    print(f"Database URL being used: {_safe_url(DATABASE_URL)}")
+    engine_args = {}
+    if DATABASE_URL.startswith("postgresql"): pass
+    elif DATABASE_URL.startswith("sqlite"): engine_args = {"connect_args": {"check_same_thread": False}}
+    return create_engine(DATABASE_URL, **engine_args)
+
+def __getattr__(name):
+    # Keeps `from db_models import engine` working while deferring engine creation.
+    if name == "engine": return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 Base = declarative_base()
 metadata = MetaData()
 
@@ -43,7 +55,35 @@ class UserProfile(Base):
     LiquidityNeeds = Column(String, nullable=True)      # e.g., Low, Medium, High
     # --- END NEW COLUMNS ---
 
+class SchemaVersion(Base):
+    __tablename__ = "schema_version" # One row per applied migration, see services/schema_service.py
+    version = Column(Integer, primary_key=True)
+    description = Column(String, nullable=False)
+    applied_at = Column(DateTime, nullable=False)
+
+class AdviceAudit(Base):
+    __tablename__ = "advice_audit" # One row per advice decision or opened explanation, written in batches by services/audit_service.py
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    user_id = Column(Integer, nullable=True, index=True) # No FK: audit rows must outlive account deletion
+    model_version = Column(String, nullable=True)
+    service_tier = Column(String, nullable=True)
+    risk_profile = Column(String, nullable=True)
+    inputs = Column(Text, nullable=True)      # JSON: the profile the models saw
+    prediction = Column(Text, nullable=True)  # JSON: recommendations and planning
+    explanation = Column(Text, nullable=True) # JSON: the text shown, plus the SHAP explanation handles (an opened explanation's text and handle)
+
+class ProfileFeatures(Base):
+    __tablename__ = "profile_features" # Encoded model inputs per profile, written by services/feature_service.py
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    preprocessor_version = Column(String, nullable=False, index=True) # Rows of an older version are ignored until rebuilt
+    profile_hash = Column(String, nullable=False) # The profile values the vectors were encoded from
+    risk_label = Column(String, nullable=False)   # Predicted RiskProfile the investment rows were encoded with
+    risk_features = Column(LargeBinary, nullable=False)       # float64 bytes, one encoded risk row
+    investment_features = Column(LargeBinary, nullable=False) # float64 bytes, one encoded row per AVAILABLE_INVESTMENTS entry
+    updated_at = Column(DateTime, nullable=False)
+
 def create_db_tables_internal():
     print("Checking and creating database tables if necessary (from db_models)...")
-    try: Base.metadata.create_all(bind=engine); print("DB tables checked/created.")
+    try: Base.metadata.create_all(bind=get_engine()); print("DB tables checked/created.")
     except Exception as e: print(f"Error creating tables: {e}"); raise
\ No newline at end of file
@@ -19,7 +19,7 @@ st.markdown("---")
 if st.session_state.get('logged_in'):
     st.success(f"You are already logged in as {st.session_state.get('username')}.")
     if st.button("Logout", key="login_page_logout"):
-        st.session_state.logged_in = False; st.session_state.user_id = None; st.session_state.username = None
+        st.session_state.logged_in = False; st.session_state.user_id = None; st.session_state.username = None; st.session_state.profile_complete = None
         st.success("You have been logged out."); time.sleep(1); st.rerun() # Use st.rerun()
     st.stop()
 
@@ -39,11 +39,11 @@ with login_tab:
                 else:
                     user_auth_info = auth_service.authenticate_user(login_username, login_password)
                     if user_auth_info:
-                        st.session_state.logged_in = True; st.session_state.user_id = user_auth_info["id"]; st.session_state.username = user_auth_info["username"]
+                        st.session_state.logged_in = True; st.session_state.user_id = user_auth_info["id"]; st.session_state.username = user_auth_info["username"]; st.session_state.profile_complete = None
                         st.success("✅ Login Successful!"); time.sleep(1); st.rerun() # time.sleep is now valid
                     else:
                         st.error("❌ Invalid username or password.")
-                        st.session_state.logged_in = False; st.session_state.user_id = None; st.session_state.username = None
+                        st.session_state.logged_in = False; st.session_state.user_id = None; st.session_state.username = None; st.session_state.profile_complete = None
 
 with register_tab:
      # ... (Rest of registration code remains the same) ...
@@ -91,6 +91,10 @@ if submitted:
         }
         try:
             saved_profile = db_service.save_or_update_profile(user_id, profile_data)
-            if saved_profile: st.success("✅ Profile saved successfully!"); time.sleep(1.5); st.rerun()
+            if saved_profile:
+                st.session_state.pop('advice_result', None) # Cached advice was computed from the old profile
+                st.session_state.pop('whatif_result', None)
+                st.session_state.profile_complete = None # Re-checked once on the next Dashboard visit
+                st.success("✅ Profile saved successfully!"); time.sleep(1.5); st.rerun()
             else: st.error("❌ Failed to save profile. Please check logs.")
         except Exception as e: st.error(f"❌ Failed to save profile: Error occurred."); print(f"Error saving profile: {e}"); traceback.print_exc()
\ No newline at end of file
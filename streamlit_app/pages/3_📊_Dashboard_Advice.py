@@ -9,62 +9,70 @@ if project_root not in sys.path:
 
 import streamlit as st
 try:
-    from services import advice_service, db_service
+    from services import advice_service, catalog_service, db_service, whatif_service
+    from ai_integration import projection, goal_solver # Vectorized projection engine and its inverse (no model loading)
     from utils import load_css # Import CSS loader
 except ImportError as e:
     st.error(f"Failed to import modules: {e}. Ensure you run from project root and venv is active.")
     st.stop()
-import matplotlib.pyplot as plt # For pie charts
+import io
+from matplotlib.figure import Figure # Donut charts; pyplot-free figures are freed with their last reference
+from matplotlib.patches import Circle
 import pandas as pd
 import numpy as np # For pie chart data if returns are negative
 import time # For st.success message display timing
 
 # --- Load CSS ---
-load_css("style.css") # Make sure style.css is in streamlit_app/
+load_css("style.css") # Make sure style.css is in streamlit_app/ (read once per process)
+
+# --- Fragments ---
+# The header, advice section and each calculator are st.fragment functions: a widget inside one only reruns
+# that fragment, so moving a calculator slider no longer re-renders the advice cards and charts.
+@st.fragment
+def render_header():
+    st.header("📊 Dashboard & Financial Advice")
+    st.write("Your personalized financial snapshot and guidance.")
+    st.markdown("---")
 
-st.header("📊 Dashboard & Financial Advice")
-st.write("Your personalized financial snapshot and guidance.")
-st.markdown("---")
+render_header()
 
 # --- Calculator Functions (defined at the top for clarity) ---
-def calculate_sip_investment(monthly_investment, annual_return_rate, time_period_years):
+# Scalar views over the vectorized projection engine (ai_integration.projection); the *_curves
+# helpers give the full year-by-year value and invested-amount curves used by the charts.
+def sip_curves(monthly_investment, annual_return_rate, time_period_years, annual_step_up_rate=0.0):
+    schedule = projection.CONTRIBUTION_STEP_UP_SIP if annual_step_up_rate else projection.CONTRIBUTION_SIP
+    values = projection.project_value_curves(monthly_investment, annual_return_rate / 100, time_period_years, schedule, 12, annual_step_up_rate / 100)
+    invested = projection.invested_amount_curves(monthly_investment, time_period_years, schedule, 12, annual_step_up_rate / 100)
+    return np.maximum(np.nan_to_num(values), 0), invested # Cap at 0 for practicality
+
+
+def lumpsum_curves(principal_amount, annual_return_rate, time_period_years):
+    # Compound interest formula: A = P(1 + r)^t
+    values = projection.project_value_curves(principal_amount, annual_return_rate / 100, time_period_years)
+    return np.maximum(np.nan_to_num(values), 0), np.full(values.shape, float(principal_amount))
+
+
+def calculate_sip_investment(monthly_investment, annual_return_rate, time_period_years, annual_step_up_rate=0.0):
     if annual_return_rate < -99: annual_return_rate = -99 # Cap extreme negatives
     if time_period_years <= 0 or monthly_investment < 0: return 0, 0, 0 # monthly_investment can be 0
-    monthly_rate = (annual_return_rate / 100) / 12
-    number_of_months = time_period_years * 12
-    invested_amount = monthly_investment * number_of_months
-    future_value = invested_amount # Start with invested amount for 0% or negative adjusted rates
-    try:
-        if monthly_rate > (-1/number_of_months if number_of_months > 0 else 0): # Avoid issues with very negative rates
-            if monthly_rate == 0: # Handles 0% return rate
-                future_value = invested_amount
-            else:
-                future_value = monthly_investment * (((1 + monthly_rate)**number_of_months - 1) / monthly_rate)
-        else: # For very negative rates, FV can be less than 0, cap at 0 for practicality
-            future_value = 0
-        if future_value < 0: future_value = 0 # Final cap
-        estimated_returns = future_value - invested_amount
-        return round(invested_amount), round(estimated_returns), round(future_value)
-    except (OverflowError, ValueError): # Handle math errors
-        return invested_amount, -invested_amount if invested_amount > 0 else 0, 0
+    values, invested = sip_curves(monthly_investment, annual_return_rate, time_period_years, annual_step_up_rate)
+    invested_amount, future_value = invested[-1], values[-1]
+    estimated_returns = future_value - invested_amount
+    return round(invested_amount), round(estimated_returns), round(future_value)
 
 
 def calculate_lumpsum_investment(principal_amount, annual_return_rate, time_period_years):
     if annual_return_rate < -99: annual_return_rate = -99 # Cap extreme negatives
     if time_period_years <= 0 or principal_amount < 0: return principal_amount, 0, principal_amount # principal can be 0
-    invested_amount = principal_amount
-    future_value = invested_amount # Start with invested amount
-    try:
-        # Compound interest formula: A = P(1 + r)^t
-        if (1 + (annual_return_rate / 100)) >= 0: # Avoid issues with negative base in power
-            future_value = principal_amount * ((1 + (annual_return_rate / 100)) ** time_period_years)
-        else: # If rate implies losing more than 100% annually, cap future value at 0
-            future_value = 0
-        if future_value < 0: future_value = 0 # Final cap
-        estimated_returns = future_value - invested_amount
-        return round(invested_amount), round(estimated_returns), round(future_value)
-    except (OverflowError, ValueError):
-        return invested_amount, -invested_amount if invested_amount > 0 else 0, 0
+    invested_amount, future_value = principal_amount, lumpsum_curves(principal_amount, annual_return_rate, time_period_years)[0][-1]
+    estimated_returns = future_value - invested_amount
+    return round(invested_amount), round(estimated_returns), round(future_value)
+
+
+def growth_curve_frame(curves):
+    """Year-by-year chart data for a calculator from a (values, invested) pair of curves."""
+    values, invested = curves
+    return pd.DataFrame({"Projected Value": values, "Invested": invested}).rename_axis("Year")
 
 
 # --- Login & Profile Checks ---
@@ -75,8 +83,10 @@ user_id = st.session_state.get('user_id')
 if not user_id:
     st.error("Error: User ID not found in session. Please login again.")
     st.stop()
-profile_complete = db_service.is_profile_complete(user_id)
-if not profile_complete:
+# Only a positive result is kept in session state; Login/Logout and profile saves reset it.
+if not st.session_state.get('profile_complete'):
+    st.session_state.profile_complete = db_service.is_profile_complete(user_id)
+if not st.session_state.profile_complete:
     st.warning("Please complete your profile on the '👤 Profile' page to get advice.")
     st.stop()
 
@@ -87,26 +97,77 @@ st.sidebar.subheader("Investment Projection Settings")
 projection_amount_for_recs = st.sidebar.number_input(
     "Hypothetical Amount for Rec. Projections (₹)",
     min_value=1000, max_value=10000000, value=50000, step=1000, key="proj_amt_recs",
-    help="This amount will be used to show potential growth for suitable investments after you click 'Get My Financial Advice'."
+    help="This amount is used to show potential growth for suitable investments. Changes apply instantly once advice is generated."
 )
 projection_years_for_recs = st.sidebar.slider(
     "Projection Horizon for Recs. (Years)",
     min_value=1, max_value=30, value=5, step=1, key="proj_yrs_recs",
     help="How many years into the future to project growth for recommended investments."
 )
+projection_frequency_for_recs = st.sidebar.selectbox(
+    "Compounding Frequency", ["annually", "semi-annually", "quarterly", "monthly"], index=0, key="proj_freq_recs",
+    help="How often returns are compounded in the projections."
+)
 st.sidebar.markdown("---") # Divider in sidebar
 
-# --- "Get My Financial Advice" Section ---
-if st.button("🚀 Get My Financial Advice"):
-    st.markdown("---")
-    with st.spinner("⏳ Analyzing profile & generating advice..."):
-        advice_result = advice_service.generate_advice(
-            user_id,
-            projection_principal_ui=projection_amount_for_recs, # Pass sidebar values
-            projection_years_ui=projection_years_for_recs
-        )
+# --- Lazy AI Explanations ---
+# SHAP only runs when the user asks for a rationale; results are cached by advice_service/prediction.
+st.session_state.setdefault('opened_explanations', set())
+
+def render_explanation(handle, fallback_text, button_key):
+    if handle is None: st.markdown(fallback_text); return
+    if handle not in st.session_state.opened_explanations:
+        if not st.button("🔍 Run AI Analysis", key=button_key): return
+        st.session_state.opened_explanations.add(handle)
+    with st.spinner("⏳ Analysing factors..."):
+        explanation = advice_service.get_explanation(handle, st.session_state.get('user_id'))
+    st.markdown(explanation["explanation"])
+    if explanation["service_tier"] == advice_service.TIER_STATIC_EXPLANATIONS: st.caption("The system is busy; reopen this later for the full analysis.")
+
+# --- Fund Picks ---
+# Ranks schemes from the fund catalog for the assessed risk profile (catalog_service). Rendered inside the
+# advice section as its own fragment, so changing a filter only re-ranks the schemes.
+@st.fragment
+def render_fund_picks_section(user_id, risk_profile, suitable_investments):
+    categories = catalog_service.get_catalog_categories()
+    if not categories: return
+    st.subheader("🏦 Fund Picks")
+    pick_col1, pick_col2, pick_col3 = st.columns([3, 2, 1])
+    with pick_col1: selected = st.multiselect("Categories", categories, default=[c for c in suitable_investments if c in categories] or categories, key="fund_pick_categories")
+    with pick_col2: max_volatility = st.select_slider("Maximum Volatility", options=catalog_service.BANDS, value=catalog_service.BANDS[-1], key="fund_pick_max_vol")
+    with pick_col3: top_k = st.number_input("Show Top", min_value=1, max_value=50, value=catalog_service.DEFAULT_TOP_K, step=1, key="fund_pick_k")
+    if not selected: st.info("*Select at least one category.*"); return
+
+    picks = catalog_service.get_fund_picks(user_id, risk_profile, selected, max_volatility, None, int(top_k))
+    if "error" in picks: st.error(f"❌ {picks['error']}"); return
+    st.caption(f"Ranked {picks['candidates']:,} matching schemes in {picks['elapsed_ms']:.0f} ms for a **{risk_profile}** profile.")
+    if not picks["schemes"]: st.info("*No scheme in these categories is rated suitable for your profile.*"); return
+    st.dataframe(pd.DataFrame(picks["schemes"])[["SchemeName", "InvestmentType", "Plan", "Return5Y", "Volatility", "ExpenseRatio", "AUMCr", "suitability_score"]].rename(columns={
+        "SchemeName": "Scheme", "InvestmentType": "Category", "Return5Y": "5Y Return %", "Volatility": "Volatility %",
+        "ExpenseRatio": "Expense Ratio %", "AUMCr": "AUM (₹ Cr)", "suitability_score": "Suitability"}), hide_index=True, use_container_width=True)
 
+# --- "Get My Financial Advice" Section ---
+# Suitability results are cached per session and model version; the sidebar projection inputs are
+# applied afterwards by the pure-arithmetic projection step, so they update live without inference.
+@st.fragment
+def render_advice_section(user_id, projection_amount_for_recs, projection_years_for_recs, projection_frequency_for_recs):
+    advice_cache_key = (user_id, advice_service.get_model_version())
+    if st.button("🚀 Get My Financial Advice"):
+        with st.spinner("⏳ Analyzing profile & generating advice..."):
+            st.session_state.advice_result = advice_service.generate_advice(user_id)
+            st.session_state.advice_cache_key = advice_cache_key
+
+    advice_result = st.session_state.get('advice_result') if st.session_state.get('advice_cache_key') == advice_cache_key else None
+    if advice_result is not None:
+        st.markdown("---")
         if advice_result and "error" not in advice_result:
+            # --- Tell the user if the advice was served in degraded mode ---
+            service_tier = advice_result.get("service_tier", advice_service.TIER_FULL)
+            if service_tier == advice_service.TIER_CACHED:
+                st.info(f"ℹ️ The system is busy, showing your most recent advice (from {advice_result.get('cached_age_s', 0):.0f}s ago).")
+            elif service_tier == advice_service.TIER_PRECOMPUTED:
+                st.warning("⚠️ The AI models are busy, showing general guidance based on your stated risk comfort. Please try again shortly.")
+
             # --- Display Financial Assessment ---
             with st.container(): # Card-like container for assessment
                 st.subheader("📈 Your Financial Assessment")
@@ -114,8 +175,7 @@ if st.button("🚀 Get My Financial Advice"):
                 risk_profile = advice_result.get("risk_profile", "N/A")
                 with col1: st.metric(label="Predicted Risk Profile", value=risk_profile)
                 with col2:
-                     profile_info = db_service.get_profile(user_id)
-                     st.metric(label="Primary Goal", value=profile_info.get("PrimaryGoal", "N/A") if profile_info else "N/A")
+                     st.metric(label="Primary Goal", value=advice_result.get("primary_goal") or "N/A")
 
                 st.markdown("**Understanding Your Risk Profile:**")
                 # Display Static Explanation First
@@ -123,7 +183,8 @@ if st.button("🚀 Get My Financial Advice"):
                 st.markdown("---") # Separator
                 # Display Detailed SHAP Explanation in an Expander
                 with st.expander("View Detailed Factors (AI Analysis - Why this profile?)", expanded=False): # Default to collapsed
-                    st.markdown(advice_result.get("risk_explanation_detailed_shap", "*Detailed factor analysis unavailable.*"))
+                    render_explanation(advice_result.get("risk_explanation_handle"),
+                                       advice_result.get("risk_explanation_detailed_shap", "*Detailed factor analysis unavailable.*"), "explain_risk")
 
             st.markdown("<br>", unsafe_allow_html=True) # Add some vertical space
 
@@ -135,7 +196,9 @@ if st.button("🚀 Get My Financial Advice"):
                 elif investment_recs[0].get("investment") == "Error": st.warning(f"*Could not generate recommendations: {investment_recs[0].get('explanation')}*")
                 elif investment_recs[0].get("investment") == "None Suitable": st.info(investment_recs[0].get("explanation"))
                 else:
-                    st.write(f"**Based on your risk profile, these approaches might be suitable. Projections below are for an illustrative initial investment of ₹{projection_amount_for_recs:,.0f} over {projection_years_for_recs} years:**")
+                    investment_recs, projection_curves = advice_service.project_recommendations(
+                        investment_recs, projection_amount_for_recs, projection_years_for_recs, projection_frequency_for_recs)
+                    st.write(f"**Based on your risk profile, these approaches might be suitable. Projections below are for an illustrative initial investment of ₹{projection_amount_for_recs:,.0f} over {projection_years_for_recs} years (compounded {projection_frequency_for_recs}):**")
                     num_cols = 2; cols = st.columns(num_cols); col_idx = 0
                     for rec in investment_recs:
                         with cols[col_idx % num_cols]:
@@ -144,21 +207,31 @@ if st.button("🚀 Get My Financial Advice"):
                                 # Ensure avg_annual_return_used is float for formatting
                                 try: avg_return_display = f"{float(rec.get('avg_annual_return_used', 0.0)):.1f}"
                                 except ValueError: avg_return_display = "N/A"
-                                st.markdown(f"Est. Growth (avg. {avg_return_display}% p.a.):")
+                                return_basis = ", assumed rate blended with its trailing 3y median" if rec.get("return_basis") == "history" else ""
+                                st.markdown(f"Est. Growth (avg. {avg_return_display}% p.a.{return_basis}):")
                                 proj_col1, proj_col2 = st.columns(2)
                                 with proj_col1: st.metric(label="Projected Value", value=f"₹{rec.get('projected_value', 0):,.0f}")
                                 with proj_col2: st.metric(label="Total Growth", value=f"₹{rec.get('total_growth', 0):,.0f}")
                             else: st.caption("*Projection not shown.*")
                             with st.expander("View Rationale (AI Analysis)", expanded=False):
-                                st.markdown(rec.get('explanation', '*Detailed rationale unavailable.*'))
+                                render_explanation(rec.get('explanation_handle'), rec.get('explanation') or '*Detailed rationale unavailable.*',
+                                                   f"explain_inv_{rec.get('investment')}")
                         col_idx += 1
                         if col_idx % num_cols == 0 and col_idx < len(investment_recs): # Add divider between full rows
                             st.markdown("<hr style='margin-top:0.1em; margin-bottom:0.1em; border:0; border-top: 1px solid #eee;'/>", unsafe_allow_html=True)
+                    if not projection_curves.empty:
+                        st.markdown("**Projected Growth by Year (₹):**")
+                        st.line_chart(projection_curves)
             st.markdown("<br>", unsafe_allow_html=True)
 
+            # --- Display Fund Picks for the suitable categories ---
+            if risk_profile not in ("N/A", "Error") and advice_result.get("service_tier") == advice_service.TIER_FULL:
+                render_fund_picks_section(user_id, risk_profile, [rec.get("investment") for rec in investment_recs if rec.get("suitability") == "Suitable"])
+                st.markdown("<br>", unsafe_allow_html=True)
+
             # --- Display Personalized Planning Actions (Placeholder) ---
             with st.container(): # Card-like
-                st.subheader("🧭 Personalized Planning Actions (Placeholder)")
+                st.subheader("🧭 Personalized Planning Actions")
                 planning_rec = advice_result.get("planning_recommendation")
                 if planning_rec:
                      with st.expander("View Suggested Actions & Rationale", expanded=False):
@@ -169,17 +242,59 @@ if st.button("🚀 Get My Financial Advice"):
                                  if isinstance(item, str): st.markdown(f"- {item}")
                                  else: st.markdown(f"- *Could not display action: {str(item)}*")
                          else: st.markdown("*No specific actions suggested.*")
+                         if planning_rec.get("allocation"):
+                             st.markdown("\n**Suggested Allocation (%):**")
+                             st.bar_chart(pd.Series(planning_rec["allocation"], name="Allocation %"), horizontal=True)
                          st.markdown("\n**Rationale:**")
                          st.markdown(planning_rec.get("explanation", "*Explanation not available.*"))
                 else: st.info("*Planning recommendations are currently unavailable.*")
 
             st.markdown("---"); st.success("✅ Advice generated successfully!")
+        elif advice_result and advice_result.get("service_tier") == advice_service.TIER_BUSY: st.warning(f"⏳ {advice_result['error']}")
         elif advice_result and "error" in advice_result: st.error(f"❌ Could not generate advice: {advice_result['error']}")
         else: st.error("❌ An unexpected error occurred.")
-else: # This else corresponds to: if st.button("🚀 Get My Financial Advice")
-    st.markdown("Set projection inputs in the sidebar and click the '🚀 Get My Financial Advice' button above for your assessment.")
+    else: # No advice generated yet in this session
+        st.markdown("Set projection inputs in the sidebar and click the '🚀 Get My Financial Advice' button above for your assessment.")
+
+render_advice_section(user_id, projection_amount_for_recs, projection_years_for_recs, projection_frequency_for_recs)
 # --- END OF ADVICE GENERATION BLOCK ---
 
+st.markdown("---")
+
+# --- What-If Explorer ---
+# Scores every profile one or two answers away from the user's in one batched model pass (whatif_service).
+def format_changes(changes):
+    return ", ".join(f"**{c['label']}**: {c['from']} → {c['to']}" for c in changes)
+
+@st.fragment
+def render_what_if_section(user_id, cache_key):
+    st.subheader("🔀 What Could Change My Profile?")
+    st.write("See which answers, changed one or two at a time, would shift your risk profile or make other investments suitable.")
+    if st.button("🔎 Explore What-Ifs"):
+        with st.spinner("⏳ Scoring nearby profiles..."):
+            st.session_state.whatif_result = whatif_service.get_what_if(user_id)
+            st.session_state.whatif_cache_key = cache_key
+    whatif_result = st.session_state.get('whatif_result') if st.session_state.get('whatif_cache_key') == cache_key else None
+    if whatif_result is None: return
+    if "error" in whatif_result: st.error(f"❌ {whatif_result['error']}"); return
+
+    st.caption(f"Compared {whatif_result['neighbors_scored']} nearby profiles in {whatif_result['elapsed_ms']:.0f} ms. Current profile: **{whatif_result['risk_profile']}**.")
+    with st.expander("Changes that would shift your risk profile", expanded=True):
+        if not whatif_result["risk_flips"]: st.info("*No one- or two-answer change moves you to a different risk profile.*")
+        for flip in whatif_result["risk_flips"][:10]:
+            st.markdown(f"- {format_changes(flip['changes'])} ⇒ **{flip['risk_profile']}**")
+    with st.expander("Changes that would make more investments suitable", expanded=False):
+        if not whatif_result["unlocks"]: st.info("*No nearby profile unlocks additional investments.*")
+        by_investment = {}
+        for unlock in whatif_result["unlocks"]: by_investment.setdefault(unlock["investment"], []).append(unlock)
+        for investment, unlocks in by_investment.items():
+            st.markdown(f"**{investment}**")
+            for unlock in unlocks[:3]:
+                st.markdown(f"- {format_changes(unlock['changes'])} (risk profile: {unlock['risk_profile']})")
+            if len(unlocks) > 3: st.caption(f"...and {len(unlocks) - 3} other ways.")
+
+render_what_if_section(user_id, (user_id, advice_service.get_model_version()))
+
 st.markdown("---") # This divider should be at the base level
 
 # --- Investment Growth Calculators Section ---
@@ -190,18 +305,29 @@ st.write("Estimate the potential growth of your investments. These are illustrat
 if 'sip_monthly_inv_calc' not in st.session_state: st.session_state.sip_monthly_inv_calc = 10000
 if 'sip_return_calc' not in st.session_state: st.session_state.sip_return_calc = 12.0
 if 'sip_years_calc' not in st.session_state: st.session_state.sip_years_calc = 10
+if 'sip_step_up_calc' not in st.session_state: st.session_state.sip_step_up_calc = 0.0
 
 if 'lump_principal_calc' not in st.session_state: st.session_state.lump_principal_calc = 100000
 if 'lump_return_calc' not in st.session_state: st.session_state.lump_return_calc = 12.0
 if 'lump_years_calc' not in st.session_state: st.session_state.lump_years_calc = 10
 
+if 'goal_amount_calc' not in st.session_state: st.session_state.goal_amount_calc = 5000000
+if 'goal_years_calc' not in st.session_state: st.session_state.goal_years_calc = 15
+if 'goal_return_calc' not in st.session_state: st.session_state.goal_return_calc = 12.0
+if 'goal_step_up_calc' not in st.session_state: st.session_state.goal_step_up_calc = 0.0
+if 'goal_savings_calc' not in st.session_state: st.session_state.goal_savings_calc = 0
+if 'goal_sip_calc' not in st.session_state: st.session_state.goal_sip_calc = 10000
+
 
-def create_donut_chart(invested, returns, colors=['#3B82F6', '#A7C7E7']): # Blue shades
+@st.cache_data(max_entries=256, show_spinner=False)
+def create_donut_chart(invested, returns, colors=('#3B82F6', '#A7C7E7')): # Blue shades
+    """PNG bytes of the invested/returns donut, cached per input so slider moves reuse rendered charts."""
     if invested <= 0 and returns <= 0: # Avoid plotting empty chart
         return None
     labels = ['Invested', 'Est. Returns']
     # Handle negative returns for pie chart visualization (show as zero proportion if negative)
     sizes = [invested, max(0, returns)]
+    colors = list(colors)
     if invested <= 0 and returns > 0: # Only returns, no principal
         labels = ['Est. Returns']
         sizes = [returns]
@@ -211,43 +337,45 @@ def create_donut_chart(invested, returns, colors=['#3B82F6', '#A7C7E7']): # Blue
         sizes = [invested]
         colors = [colors[0]]
 
-
-    fig, ax = plt.subplots(figsize=(3.5, 3.5)) # Slightly larger for clarity
+    fig = Figure(figsize=(3.5, 3.5)) # Not registered with pyplot, so nothing stays open after rendering
+    ax = fig.subplots()
     ax.pie(sizes, labels=None, autopct=None, startangle=90, colors=colors,
            wedgeprops=dict(width=0.4, edgecolor='white')) # width creates the donut hole
-    centre_circle = plt.Circle((0,0),0.60,fc='white')
-    fig.gca().add_artist(centre_circle)
+    ax.add_artist(Circle((0,0),0.60,fc='white'))
     ax.axis('equal')
-    plt.tight_layout(pad=0.1)
-    return fig
+    fig.tight_layout(pad=0.1)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=200, bbox_inches="tight") # Same rendering settings as st.pyplot
+    return buffer.getvalue()
 
-
-calc_tab1, calc_tab2 = st.tabs(["**SIP Calculator**", "**Lumpsum Calculator**"])
-
-with calc_tab1:
+@st.fragment
+def render_sip_calculator():
     st.markdown("##### Systematic Investment Plan (SIP)")
     c1, c2 = st.columns([0.6, 0.4]) # Adjust column ratio
     with c1: # Inputs and Results
         st.session_state.sip_monthly_inv_calc = st.number_input("Monthly Investment (₹)", min_value=0, max_value=200000,value=st.session_state.sip_monthly_inv_calc, step=500, key="sip_m_num")
         st.session_state.sip_return_calc = st.slider("Expected Annual Return Rate (%)", 0.0, 30.0, st.session_state.sip_return_calc, 0.5, key="sip_r_slider", format="%.1f%%")
         st.session_state.sip_years_calc = st.slider("Investment Duration (Years)", 1, 40, st.session_state.sip_years_calc, 1, key="sip_y_slider")
+        st.session_state.sip_step_up_calc = st.slider("Annual Step-up (%)", 0.0, 25.0, st.session_state.sip_step_up_calc, 1.0, key="sip_s_slider", format="%.0f%%", help="Increase your monthly SIP by this percentage every year.")
 
-        sip_invested, sip_returns, sip_total_value = calculate_sip_investment(st.session_state.sip_monthly_inv_calc, st.session_state.sip_return_calc, st.session_state.sip_years_calc)
+        sip_invested, sip_returns, sip_total_value = calculate_sip_investment(st.session_state.sip_monthly_inv_calc, st.session_state.sip_return_calc, st.session_state.sip_years_calc, st.session_state.sip_step_up_calc)
 
         st.markdown("<hr style='margin:0.5em 0; border-top: 1px solid #eee;'/>", unsafe_allow_html=True)
         res_col1, res_col2 = st.columns(2)
         with res_col1: st.markdown(f"**Invested Amount:**<br>₹{sip_invested:,.0f}", unsafe_allow_html=True)
         with res_col2: st.markdown(f"**Est. Returns:**<br>₹{sip_returns:,.0f}", unsafe_allow_html=True)
         st.markdown(f"#### **Projected Value:** <span style='color:#0a3d62;'>₹{sip_total_value:,.0f}</span>", unsafe_allow_html=True)
+        st.line_chart(growth_curve_frame(sip_curves(st.session_state.sip_monthly_inv_calc, st.session_state.sip_return_calc, st.session_state.sip_years_calc, st.session_state.sip_step_up_calc)), height=220)
 
     with c2: # Chart
         st.markdown("<p style='text-align:center; font-weight:bold; margin-bottom:0px;'>Value Distribution</p>", unsafe_allow_html=True)
-        fig_sip = create_donut_chart(sip_invested, sip_returns)
-        if fig_sip: st.pyplot(fig_sip, use_container_width=True)
+        donut_sip = create_donut_chart(sip_invested, sip_returns)
+        if donut_sip: st.image(donut_sip, use_container_width=True)
         else: st.caption("Enter values to see chart.")
 
 
-with calc_tab2:
+@st.fragment
+def render_lumpsum_calculator():
     st.markdown("##### Lumpsum Investment")
     c1, c2 = st.columns([0.6, 0.4])
     with c1:
@@ -262,13 +390,41 @@ with calc_tab2:
         with res_col1: st.markdown(f"**Principal Amount:**<br>₹{lump_invested:,.0f}", unsafe_allow_html=True)
         with res_col2: st.markdown(f"**Est. Returns:**<br>₹{lump_returns:,.0f}", unsafe_allow_html=True)
         st.markdown(f"#### **Projected Value:** <span style='color:#0a3d62;'>₹{lump_total_value:,.0f}</span>", unsafe_allow_html=True)
+        st.line_chart(growth_curve_frame(lumpsum_curves(st.session_state.lump_principal_calc, st.session_state.lump_return_calc, st.session_state.lump_years_calc)), height=220)
 
     with c2: # Chart
         st.markdown("<p style='text-align:center; font-weight:bold; margin-bottom:0px;'>Value Distribution</p>", unsafe_allow_html=True)
-        fig_lump = create_donut_chart(lump_invested, lump_returns, colors=['#ff9966', '#ffcc66']) # Different colors
-        if fig_lump: st.pyplot(fig_lump, use_container_width=True)
+        donut_lump = create_donut_chart(lump_invested, lump_returns, colors=('#ff9966', '#ffcc66')) # Different colors
+        if donut_lump: st.image(donut_lump, use_container_width=True)
         else: st.caption("Enter values to see chart.")
 
+
+@st.fragment
+def render_goal_planner():
+    st.markdown("##### Goal Planner")
+    st.caption("Works backwards from a goal: the monthly SIP it needs, and when a given SIP gets there.")
+    c1, c2 = st.columns([0.6, 0.4])
+    with c1:
+        st.session_state.goal_amount_calc = st.number_input("Goal Amount (₹)", min_value=10000, max_value=1000000000, value=st.session_state.goal_amount_calc, step=100000, key="goal_a_num")
+        st.session_state.goal_savings_calc = st.number_input("Already Invested (₹)", min_value=0, max_value=1000000000, value=st.session_state.goal_savings_calc, step=10000, key="goal_c_num")
+        st.session_state.goal_years_calc = st.slider("Years to Goal", 1, 40, st.session_state.goal_years_calc, 1, key="goal_y_slider")
+        st.session_state.goal_return_calc = st.slider("Expected Annual Return Rate (%)", 0.0, 30.0, st.session_state.goal_return_calc, 0.5, key="goal_r_slider", format="%.1f%%")
+        st.session_state.goal_step_up_calc = st.slider("Annual Step-up (%)", 0.0, 25.0, st.session_state.goal_step_up_calc, 1.0, key="goal_s_slider", format="%.0f%%", help="Increase your monthly SIP by this percentage every year.")
+    rate, step_up = st.session_state.goal_return_calc / 100, st.session_state.goal_step_up_calc / 100
+    required = float(goal_solver.required_sip(st.session_state.goal_amount_calc, rate, st.session_state.goal_years_calc, step_up, st.session_state.goal_savings_calc))
+    with c2:
+        st.metric("Required Monthly SIP", f"₹{np.ceil(required):,.0f}", help="First-year instalment; it grows by the step-up every year.")
+        st.session_state.goal_sip_calc = st.number_input("Your Monthly SIP (₹)", min_value=0, max_value=2000000, value=st.session_state.goal_sip_calc, step=500, key="goal_m_num")
+        months = goal_solver.time_to_goal(st.session_state.goal_amount_calc, st.session_state.goal_sip_calc, rate, step_up, st.session_state.goal_savings_calc)
+        if np.isnan(months): st.metric("Time to Goal", f"Over {goal_solver.MAX_YEARS} years")
+        else: st.metric("Time to Goal", f"{int(months) // 12} yrs {int(months) % 12} mos")
+
+
+calc_tab1, calc_tab2, calc_tab3 = st.tabs(["**SIP Calculator**", "**Lumpsum Calculator**", "**Goal Planner**"])
+with calc_tab1: render_sip_calculator()
+with calc_tab2: render_lumpsum_calculator()
+with calc_tab3: render_goal_planner()
+
 st.caption("Note: These calculators provide estimations based on expected returns and do not guarantee actual returns. Market risks apply.")
 # --- End of Calculator Section ---
 
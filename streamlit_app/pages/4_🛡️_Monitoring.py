@@ -0,0 +1,87 @@
+# streamlit_app/pages/4_🛡️_Monitoring.py
+# Admin-only model monitoring: live profile mix, predicted risk profiles and suitability rates (merged across
+# worker processes by monitoring_service) against the training data, candidate model comparisons (model_serving)
+# and the offline global SHAP summaries.
+import sys, os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path: sys.path.insert(0, project_root)
+import streamlit as st, pandas as pd
+try: from services import auth_service, monitoring_service; from ai_integration import artifacts, model_serving, shap_summaries; from utils import load_css
+except ImportError as e: st.error(f"Failed to import modules: {e}."); st.stop()
+
+load_css("style.css")
+st.header("🛡️ Model Monitoring")
+st.write("Live input and prediction mix compared with the training data.")
+st.markdown("---")
+if not st.session_state.get('logged_in'): st.warning("Please login first..."); st.stop()
+if not auth_service.is_admin(st.session_state.get('username')): st.error("This page is only available to administrators."); st.stop()
+
+STATUS_ICONS = {"stable": "🟢", "shift": "🟠", "alert": "🔴", "warming up": "⏳", "no data": "⚪"}
+def with_icons(df): return df.assign(status=df["status"].map(lambda s: f"{STATUS_ICONS.get(s, '')} {s}"))
+
+st.button("🔄 Refresh", key="monitoring_refresh")
+report = monitoring_service.drift_report()
+statuses = pd.concat([report[key]["status"] for key in ("categorical", "numeric", "suitability") if not report[key].empty])
+col1, col2, col3 = st.columns(3)
+with col1: st.metric("Advice Requests (Decayed)", f"{report['requests']:,.0f}")
+with col2: st.metric("Workers Reporting", report["workers"])
+with col3: st.metric("Alerts", int((statuses == "alert").sum()))
+st.caption(f"Workers write snapshots at most every {monitoring_service.SNAPSHOT_INTERVAL_S:.0f} s; workers silent for {monitoring_service.STALE_AFTER_S:.0f} s are left out. "
+           f"Requests count with a half-life of {monitoring_service.HALF_LIFE_S / 3600:g} h; statuses need {monitoring_service.MIN_REQUESTS} requests. "
+           f"PSI above {monitoring_service.PSI_SHIFT} is a shift and above {monitoring_service.PSI_ALERT} an alert.")
+
+st.subheader("Profile Fields & Predicted Risk Profile")
+st.dataframe(with_icons(report["categorical"]), hide_index=True, use_container_width=True, column_config={"psi": st.column_config.NumberColumn("PSI", format="%.3f")})
+field = st.selectbox("Compare shares for", monitoring_service.CATEGORICAL_FIELDS, index=monitoring_service.CATEGORICAL_FIELDS.index("IncomeRange"), key="monitoring_field")
+shares = report["shares"]
+if not shares.empty:
+    st.bar_chart(shares[shares["field"] == field].set_index("value")[["reference_share", "live_share"]], stack=False)
+
+st.subheader("Time Horizon")
+st.dataframe(with_icons(report["numeric"]), hide_index=True, use_container_width=True, column_config={"ks": st.column_config.NumberColumn("KS", format="%.3f")})
+
+st.subheader("Suitability Rate per Instrument")
+st.dataframe(with_icons(report["suitability"]), hide_index=True, use_container_width=True, column_config={
+    "reference_rate": st.column_config.NumberColumn("Reference Rate", format="%.2f"),
+    "live_rate": st.column_config.NumberColumn("Live Rate", format="%.2f")})
+
+st.subheader("Candidate Models")
+serving = model_serving.get_report(); serving_config = serving["config"]
+if serving_config["candidate_version"] is None:
+    st.info("No candidate model configured. Set CANDIDATE_RISK_MODEL_PATH and/or CANDIDATE_INV_MODEL_PATH, with CANDIDATE_MODE=shadow or ab.")
+else:
+    split = f", {serving_config['traffic_percent']:.0f}% of users served by the candidate" if serving_config["mode"] == model_serving.MODE_AB else ""
+    scoring = f", scoring p95 {serving_config['shadow_ms_p95']:.1f} ms" if serving_config["shadow_ms_p95"] is not None else ""
+    st.caption(f"Candidate {serving_config['candidate_version']} in {serving_config['mode']} mode{split}. {serving_config['shadow_queued']:,} shadow comparisons, "
+               f"{serving_config['shadow_dropped']:,} dropped with a full backlog{scoring}. Counts cover this server process since it started.")
+    st.dataframe(serving["summary"], hide_index=True, use_container_width=True, column_config={
+        "disagreement_rate": st.column_config.NumberColumn("Disagreement Rate", format="%.3f"),
+        "row_disagreement_rate": st.column_config.NumberColumn("Per-Instrument Rate", format="%.3f")})
+    col1, col2 = st.columns(2)
+    with col1: st.caption("Risk profile: production (rows) vs candidate (columns)"); st.dataframe(serving["risk_confusion"], use_container_width=True)
+    with col2: st.caption("Suitability flips per instrument"); st.dataframe(serving["instruments"], hide_index=True, use_container_width=True)
+    if not serving["arms"].empty: st.caption("What each arm served"); st.dataframe(serving["arms"], hide_index=True, use_container_width=True)
+
+st.subheader("Global Feature Importance")
+importance = shap_summaries.load_global_importance()
+if importance is None: st.info("No SHAP summaries yet. Run: python ml_scripts/explainability/global_shap.py"); st.stop()
+col1, col2 = st.columns(2)
+with col1: shap_model = st.selectbox("Model", sorted(importance["model"].unique()), key="shap_model")
+with col2: shap_target = st.selectbox("Predicted class", sorted(importance.loc[importance["model"] == shap_model, "target"].unique()), key="shap_target")
+ranked = importance[(importance["model"] == shap_model) & (importance["target"] == shap_target)].sort_values("rank")
+st.bar_chart(ranked.set_index("feature")["mean_abs_shap"], horizontal=True)
+summary_hash, deployed_hash = ranked['model_hash'].iloc[0], artifacts.deployed_model_hash(shap_model)
+st.caption(f"Mean |SHAP| over the training data; model artifacts {summary_hash}.")
+if summary_hash != deployed_hash:
+    st.warning(f"These summaries were computed for model artifacts {summary_hash}, but the deployed {shap_model} model is {deployed_hash or 'missing'}. "
+               "Rerun: python ml_scripts/explainability/global_shap.py")
+segments = shap_summaries.load_segment_summary()
+model_segments = segments[segments["model"] == shap_model]
+col1, col2 = st.columns(2)
+with col1: segment_feature = st.selectbox("Segment by", sorted(model_segments["segment_feature"].unique()), key="shap_segment_feature")
+with col2: segment_value = st.selectbox("Segment", sorted(model_segments.loc[model_segments["segment_feature"] == segment_feature, "segment_value"].unique()), key="shap_segment_value")
+drivers = shap_summaries.segment_drivers(shap_model, segment_feature, segment_value, shap_target, top_n=len(ranked))
+if drivers.empty: st.caption(f"No rows with {segment_feature} = {segment_value} are predicted {shap_target}.")
+else:
+    st.caption(f"{drivers['target_share'].iloc[0]:.0%} of rows with {segment_feature} = {segment_value} are predicted **{shap_target}**; features ranked by mean SHAP towards it:")
+    st.dataframe(drivers[["feature", "mean_shap"]], hide_index=True, use_container_width=True, column_config={"mean_shap": st.column_config.NumberColumn("Mean SHAP", format="%+.3f")})
@@ -1,7 +1,14 @@
 # streamlit_app/services/advice_service.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as StageTimeoutError
+import numpy as np
+import pandas as pd
 try:
-    from . import db_service
-    from ai_integration import prediction
+    from . import audit_service, db_service, feature_service, monitoring_service, warm_start_service
+    from ai_integration import model_serving, prediction
 except ImportError as e:
     print(f"CRITICAL ERROR importing modules within advice_service: {e}.")
     raise
@@ -14,50 +21,346 @@ STATIC_RISK_EXPLANATIONS = { # Keep your static explanations
     "Default": "Your risk profile helps determine suitable investment strategies."
 }
 
+# --- Latency Budgets & Degradation Ladder ---
+# Each stage gets its own deadline (seconds). When a stage overruns, the response degrades
+# one rung instead of keeping the user on the spinner:
+#   full -> static_explanations (SHAP skipped, see get_explanation) -> cached / precomputed -> busy
+# A planning overrun only drops the plan (PLANNING_SKIPPED_TEXT); the predictions are still served.
+STAGE_DEADLINES_S = {
+    "profile": float(os.environ.get("ADVICE_DEADLINE_PROFILE_S", 2.0)),       # DB lookup
+    "prediction": float(os.environ.get("ADVICE_DEADLINE_PREDICTION_S", 3.0)), # RF + XGBoost, no SHAP
+    "explanation": float(os.environ.get("ADVICE_DEADLINE_EXPLANATION_S", 4.0)), # SHAP for one opened explanation
+    "planning": float(os.environ.get("ADVICE_DEADLINE_PLANNING_S", 2.0)),       # Frontier allocation; the plan falls back to N/A
+}
+MAX_INFLIGHT_ADVICE = int(os.environ.get("ADVICE_MAX_INFLIGHT", 4)) # Inference slots per process
+ADMISSION_WAIT_S = float(os.environ.get("ADVICE_ADMISSION_WAIT_S", 0.5)) # How long a request may queue for a slot
+ADVICE_CACHE_SIZE = 512
+
+TIER_FULL = "full"
+TIER_STATIC_EXPLANATIONS = "static_explanations"
+TIER_CACHED = "cached"
+TIER_PRECOMPUTED = "precomputed"
+TIER_BUSY = "busy"
+
+SHAP_SKIPPED_RISK_TEXT = "*Detailed factor analysis was skipped to keep response times low. Please try again shortly.*"
+SHAP_SKIPPED_INV_TEXT = "*Detailed rationale was skipped to keep response times low.*"
+PLANNING_SKIPPED_TEXT = "*The allocation plan took too long to compute and was skipped. Please ask for advice again shortly.*"
+
+# Volatility bands that the suitability rules treat as suitable for each profile by default.
+# Used only for the precomputed tier when the models cannot answer in time.
+PRECOMPUTED_VOLATILITY_BANDS = {
+    "Conservative": ["Very Low", "Low"],
+    "Moderate": ["Low", "Medium"],
+    "Aggressive": ["Medium", "High"],
+}
+TOLERANCE_TO_RISK_PROFILE = {"Low": "Conservative", "Medium": "Moderate", "High": "Aggressive"}
+
+
+class AdmissionController:
+    """
+    Bounds how many advice pipelines may hold inference resources at once.
+    A slot stays taken until the pipeline's last stage has actually finished, even if the
+    request already returned a degraded answer, so abandoned work still counts as load.
+    """
+    def __init__(self, max_inflight: int, wait_s: float):
+        self.max_inflight = max_inflight
+        self.wait_s = wait_s
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        if not self._slots.acquire(timeout=self.wait_s):
+            with self._lock: self.rejected += 1
+            return False
+        with self._lock: self._inflight += 1
+        return True
+
+    def release(self, *_):
+        with self._lock: self._inflight -= 1
+        self._slots.release()
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+
+_admission = AdmissionController(MAX_INFLIGHT_ADVICE, ADMISSION_WAIT_S)
+_stage_executor = ThreadPoolExecutor(max_workers=MAX_INFLIGHT_ADVICE, thread_name_prefix="advice-stage")
+_advice_cache = OrderedDict() # user_id -> (timestamp, advice dict, profile_hash of the profile it was computed from), LRU
+_advice_cache_lock = threading.Lock()
+_audited_explanations = OrderedDict() # (user_id, handle, tier) already audited by this process
+model_serving.set_busy_check(lambda: _admission.inflight > 0) # Shadow scoring uses idle time, plus a capped share while requests run
+
+
+def _run_stage(stage: str, budget_s: float, fn, *args, **kwargs):
+    """Runs fn on the stage executor. Returns (future, result, timed_out)."""
+    future = _stage_executor.submit(fn, *args, **kwargs)
+    try:
+        return future, future.result(timeout=max(budget_s, 0.0)), False
+    except StageTimeoutError:
+        print(f"Advice stage '{stage}' exceeded its {budget_s:.2f}s budget; degrading.")
+        return future, None, True
+
+
+def _remember_advice(user_id, advice, profile_for_ai):
+    with _advice_cache_lock:
+        _advice_cache[user_id] = (time.time(), advice, feature_service.profile_hash(profile_for_ai))
+        _advice_cache.move_to_end(user_id)
+        while len(_advice_cache) > ADVICE_CACHE_SIZE: _advice_cache.popitem(last=False)
+
+
+def forget_advice(user_id):
+    """Drops a user's cached advice; db_service.save_or_update_profile calls it once the new profile is committed."""
+    with _advice_cache_lock: _advice_cache.pop(user_id, None)
+
+
+def export_advice_cache():
+    """(user_id, cached_at, (advice, profile_hash)) for production-arm cached advice, least recently used first (warm_start_service)."""
+    with _advice_cache_lock:
+        return [(user_id, cached_at, (advice, cached_hash)) for user_id, (cached_at, advice, cached_hash) in _advice_cache.items() if "serving_arm" not in advice]
+
+
+def preload_advice_cache(entries):
+    """
+    Adds snapshot entries for users without cached advice, behind the live ones in LRU order. Entries whose
+    profile has been saved since (profile_features holds another profile hash) are skipped. Returns how many were added.
+    """
+    current = feature_service.get_profile_hashes([user_id for user_id, _, _ in entries])
+    added = 0
+    with _advice_cache_lock:
+        for user_id, cached_at, (advice, cached_hash) in reversed(entries):
+            if user_id in _advice_cache or current.get(user_id) != cached_hash: continue
+            _advice_cache[user_id] = (cached_at, advice, cached_hash); _advice_cache.move_to_end(user_id, last=False); added += 1
+        while len(_advice_cache) > ADVICE_CACHE_SIZE: _advice_cache.popitem(last=False)
+    return added
+
+
+def _cached_advice(user_id, current_hash):
+    """
+    The user's cached advice if it was computed from the profile whose profile_hash is current_hash. None
+    when current_hash is unknown: the cache may be a restored snapshot and the profile edited since.
+    """
+    with _advice_cache_lock:
+        entry = _advice_cache.get(user_id)
+    if not entry or current_hash is None: return None
+    cached_at, advice, cached_hash = entry
+    if cached_hash != current_hash:
+        forget_advice(user_id)
+        return None
+    return {**advice, "service_tier": TIER_CACHED, "cached_age_s": round(time.time() - cached_at, 1)}
+
+
+def _precomputed_advice(profile_for_ai):
+    """Rule-based advice that needs no model call; the last rung before 'busy'."""
+    risk_profile = TOLERANCE_TO_RISK_PROFILE.get(profile_for_ai.get("SelfReportedTolerance"), "Moderate")
+    bands = PRECOMPUTED_VOLATILITY_BANDS[risk_profile]
+    recommendations = []
+    for inv_type, details in prediction.AVAILABLE_INVESTMENTS.items():
+        if details["Volatility"] not in bands: continue
+        recommendations.append({
+            "investment": inv_type, "suitability": "Suitable", "projected_value": 0, "total_growth": 0, "avg_annual_return_used": "N/A",
+            "explanation": f"*General guidance for a '{risk_profile}' investor; a personalised analysis was not available right now.*"
+        })
+    return {
+        "risk_profile": risk_profile,
+        "primary_goal": profile_for_ai.get("PrimaryGoal"),
+        "risk_explanation_simple": STATIC_RISK_EXPLANATIONS.get(risk_profile, STATIC_RISK_EXPLANATIONS["Default"]),
+        "risk_explanation_detailed_shap": "*Estimated from your stated risk comfort while the AI models are busy.*",
+        "investment_recommendations": recommendations,
+        "planning_recommendation": {"actions": ["N/A"], "explanation": "Planning requires an AI-assessed risk profile. Please try again shortly."},
+        "service_tier": TIER_PRECOMPUTED,
+    }
+
+
+def _audited(user_id, profile_for_ai, advice):
+    """Queues the advice decision for the audit log (write-behind, microseconds) and returns it."""
+    try: audit_service.record_advice(user_id, profile_for_ai, advice, advice.get("model_version") or get_model_version())
+    except Exception as e: print(f"Warning: advice audit failed: {e}")
+    return advice
+
+
+def _degraded_advice(user_id, reason, profile_for_ai=None, current_hash=None):
+    """
+    Walks the lower rungs of the ladder: cached -> precomputed -> busy. Cached advice needs the current
+    profile's hash: from profile_for_ai, else current_hash (the stored one, see feature_service.get_profile_hashes).
+    """
+    if profile_for_ai is not None: current_hash = feature_service.profile_hash(profile_for_ai)
+    cached = _cached_advice(user_id, current_hash)
+    if cached: return _audited(user_id, profile_for_ai, {**cached, "degradation_reason": reason})
+    if profile_for_ai: return _audited(user_id, profile_for_ai, {**_precomputed_advice(profile_for_ai), "degradation_reason": reason})
+    return {"error": "The advisor is busy right now. Please try again in a few seconds.", "service_tier": TIER_BUSY, "degradation_reason": reason}
+
+
+def _predict(profile_for_ai, projection_principal, projection_years, user_id=None, arm=model_serving.ARM_PRODUCTION):
+    """
+    Model predictions only (no SHAP). Returns (risk_result, investment_recommendations).
+    Uses the profile's stored encoded features (feature_service) when they are current. arm selects
+    production or the A/B candidate (model_serving); production answers are queued for shadow scoring.
+    """
+    components = model_serving.components_for(arm)
+    use_stored = user_id is not None and model_serving.uses_production_preprocessors(arm)
+    stored = feature_service.load_features(user_id, profile_for_ai) if use_stored else None
+    risk_row, stored_risk_label, investment_rows = stored or (None, None, None)
+    risk_result_ai = prediction.get_risk_profile_and_explanation(profile_for_ai, explain=False, processed_input=risk_row, components=components)
+    if not risk_result_ai: return None, []
+    predicted_risk_profile = risk_result_ai.get('prediction', 'Error')
+    if not predicted_risk_profile or predicted_risk_profile == 'Error': return risk_result_ai, []
+    if predicted_risk_profile != stored_risk_label: investment_rows = None # The rows encode the label; a retrained risk model may predict another
+    investment_recommendations = prediction.get_investment_recommendations_and_explanation(
+        user_profile_dict_full=profile_for_ai,
+        user_risk_profile=predicted_risk_profile,
+        projection_principal=projection_principal,
+        projection_years=projection_years,
+        explain=False,
+        processed_rows=investment_rows,
+        components=components
+    )
+    model_serving.after_prediction(user_id, arm, profile_for_ai, predicted_risk_profile, investment_recommendations, risk_row, investment_rows)
+    return risk_result_ai, investment_recommendations
+
+
+def get_explanation(handle, user_id=None):
+    """
+    Lazily fetches the SHAP explanation behind an 'explanation_handle' from generate_advice.
+    Runs under the 'explanation' deadline; when it overruns (or the box is saturated) the user
+    gets the static fallback text and the SHAP result still lands in the cache for next time.
+    The text returned is audited once per user, handle and tier (the dashboard re-reads it on every rerun).
+    Returns {'explanation': str, 'service_tier': TIER_FULL or TIER_STATIC_EXPLANATIONS}.
+    """
+    result = _resolve_explanation(handle)
+    _audit_explanation(user_id, handle, result)
+    return result
+
+
+def _resolve_explanation(handle):
+    fallback = {"explanation": SHAP_SKIPPED_RISK_TEXT if handle[0] == 'risk' else SHAP_SKIPPED_INV_TEXT,
+                "service_tier": TIER_STATIC_EXPLANATIONS}
+    cached = prediction.get_cached_explanation(handle)
+    if cached is not None: return {"explanation": cached, "service_tier": TIER_FULL}
+    if not _admission.try_acquire(): return fallback
+    future, text, timed_out = _run_stage("explanation", STAGE_DEADLINES_S["explanation"], prediction.get_explanation, handle)
+    future.add_done_callback(_admission.release)
+    return fallback if timed_out else {"explanation": text, "service_tier": TIER_FULL}
+
+
+def _audit_explanation(user_id, handle, result):
+    key = (user_id, str(tuple(handle)), result["service_tier"])
+    with _advice_cache_lock:
+        if key in _audited_explanations: return
+        _audited_explanations[key] = True
+        while len(_audited_explanations) > prediction.EXPLANATION_CACHE_SIZE: _audited_explanations.popitem(last=False)
+    try: audit_service.record_explanation(user_id, handle, result["explanation"], result["service_tier"], get_model_version())
+    except Exception as e: print(f"Warning: explanation audit failed: {e}")
+
+
+def get_model_version():
+    """Fingerprint of the loaded model artifacts; callers key cached advice on it."""
+    return prediction.AI_COMPONENTS.get("model_version")
+
+
+def project_recommendations(investment_recommendations, principal, years, compounding_frequency='annually'):
+    """
+    Projection step, kept separate from generate_advice so projection inputs can change
+    without touching the models. Computes every instrument's curve in one vectorized call.
+    Returns (recommendations with projected_value / total_growth, DataFrame of yearly values
+    indexed by year with one column per instrument that has a known return).
+    """
+    names, rates = [], []
+    for rec in investment_recommendations:
+        try: rate = float(rec.get("avg_annual_return_used")) / 100
+        except (TypeError, ValueError): rate = np.nan
+        names.append(rec.get("investment")); rates.append(rate)
+    curves = prediction.project_growth_curves(principal, rates, years, compounding_frequency)
+    projected = []
+    for rec, curve in zip(investment_recommendations, curves):
+        rec = dict(rec)
+        if np.isfinite(curve[-1]):
+            rec["projected_value"] = round(float(curve[-1]), 2); rec["total_growth"] = round(float(curve[-1] - principal), 2)
+        else: rec["projected_value"], rec["total_growth"] = 0, 0
+        projected.append(rec)
+    curves_df = pd.DataFrame(curves.T, columns=names).dropna(axis=1, how="all")
+    curves_df.index.name = "Year"
+    return projected, curves_df
+
+
 # *** MODIFIED function signature to accept projection parameters ***
 def generate_advice(user_id: int, projection_principal_ui=100000, projection_years_ui=5):
+    """
+    Builds the advice for a user within STAGE_DEADLINES_S. The returned dict always carries
+    'service_tier' (see TIER_* constants) so the UI can tell the user how it was served.
+    SHAP explanations are not computed here: the risk profile and each suitable investment carry
+    an explanation handle that the UI resolves with get_explanation() when the user opens it.
+    """
     print(f"Generating advice for user_id: {user_id} with projection: P={projection_principal_ui}, Y={projection_years_ui}")
-    profile_dict = db_service.get_profile(user_id)
-    if not profile_dict: return {"error": "User profile not found."}
+    if not _admission.try_acquire():
+        print(f"Advice admission rejected for user_id {user_id}: {_admission.inflight} pipelines in flight.")
+        # One indexed read of the stored profile hash, so a profile edited in another worker is not served stale advice
+        return _degraded_advice(user_id, "Too many advice requests in progress.", current_hash=feature_service.get_profile_hashes([user_id]).get(user_id))
+    pending_future = None # Last stage future, if abandoned past its deadline
+    try:
+        pending_future, profile_dict, timed_out = _run_stage("profile", STAGE_DEADLINES_S["profile"], db_service.get_profile, user_id)
+        if timed_out: return _degraded_advice(user_id, "Profile lookup took too long.") # The database is slow: no hash, so no cached advice
+        pending_future = None
+        if not profile_dict: return {"error": "User profile not found."}
 
-    profile_for_ai = profile_dict.copy()
-    profile_for_ai.pop('id', None); profile_for_ai.pop('user_id', None)
-    try: expected_risk_keys = prediction.RISK_FEATURE_ORDER
-    except AttributeError: return {"error": "AI prediction component config error."}
-    for key in expected_risk_keys: profile_for_ai.setdefault(key, None)
+        profile_for_ai = profile_dict.copy()
+        profile_for_ai.pop('id', None); profile_for_ai.pop('user_id', None)
+        try: expected_risk_keys = prediction.RISK_FEATURE_ORDER
+        except AttributeError: return {"error": "AI prediction component config error."}
+        for key in expected_risk_keys: profile_for_ai.setdefault(key, None)
 
-    risk_result_ai = prediction.get_risk_profile_and_explanation(profile_for_ai)
-    if not risk_result_ai:
-        ai_load_error = prediction.AI_COMPONENTS.get("load_error")
-        error_msg = f"Could not generate risk assessment. {'AI components failed to load.' if ai_load_error else 'AI model error.'}"
-        return {"error": error_msg}
+        arm = model_serving.arm_for(user_id)
+        pending_future, predicted, timed_out = _run_stage("prediction", STAGE_DEADLINES_S["prediction"], _predict,
+                                                          profile_for_ai, projection_principal_ui, projection_years_ui, user_id, arm)
+        if timed_out: return _degraded_advice(user_id, "AI models took too long to respond.", profile_for_ai)
+        pending_future = None
+        risk_result_ai, investment_recommendations = predicted
+        if not risk_result_ai:
+            ai_load_error = prediction.AI_COMPONENTS.get("load_error")
+            error_msg = f"Could not generate risk assessment. {'AI components failed to load.' if ai_load_error else 'AI model error.'}"
+            return {"error": error_msg}
 
-    predicted_risk_profile = risk_result_ai.get('prediction', 'Error')
-    risk_explanation_static = STATIC_RISK_EXPLANATIONS.get(predicted_risk_profile, STATIC_RISK_EXPLANATIONS["Default"])
-    risk_explanation_detailed_shap = risk_result_ai.get('explanation', '*Detailed factor analysis unavailable.*')
-
-    investment_recommendations = []
-    planning_recommendation = {"actions": ["N/A"], "explanation": "Planning requires valid risk profile."}
-
-    if predicted_risk_profile and predicted_risk_profile != 'Error':
-        # *** PASS THE PROJECTION PARAMETERS FROM UI TO PREDICTION FUNCTION ***
-        investment_recommendations = prediction.get_investment_recommendations_and_explanation(
-            user_profile_dict_full=profile_for_ai,
-            user_risk_profile=predicted_risk_profile,
-            projection_principal=projection_principal_ui, # Pass UI value
-            projection_years=projection_years_ui         # Pass UI value
-        )
-        suitable_investments_list = [rec for rec in investment_recommendations if rec.get('suitability') == 'Suitable']
-        planning_recommendation = prediction.get_planning_recommendation(profile_for_ai, predicted_risk_profile, suitable_investments_list)
-    else:
-        investment_recommendations = [{"investment": "N/A", "explanation": "Cannot generate without valid risk profile."}]
-
-    final_advice = {
-        "risk_profile": predicted_risk_profile,
-        "risk_explanation_simple": risk_explanation_static,
-        "risk_explanation_detailed_shap": risk_explanation_detailed_shap,
-        "investment_recommendations": investment_recommendations,
-        "planning_recommendation": planning_recommendation
-    }
-    print(f"Advice generated successfully for user_id: {user_id}")
-    return final_advice
\ No newline at end of file
+        predicted_risk_profile = risk_result_ai.get('prediction', 'Error')
+        risk_explanation_static = STATIC_RISK_EXPLANATIONS.get(predicted_risk_profile, STATIC_RISK_EXPLANATIONS["Default"])
+        planning_recommendation = {"actions": ["N/A"], "explanation": "Planning requires valid risk profile."}
+        planning_timed_out = False
+
+        if predicted_risk_profile and predicted_risk_profile != 'Error':
+            suitable_investments_list = [rec for rec in investment_recommendations if rec.get('suitability') == 'Suitable']
+            pending_future, planned, planning_timed_out = _run_stage("planning", STAGE_DEADLINES_S["planning"], prediction.get_planning_recommendation,
+                                                                      profile_for_ai, predicted_risk_profile, suitable_investments_list)
+            if planning_timed_out: planning_recommendation = {"actions": ["N/A"], "explanation": PLANNING_SKIPPED_TEXT}
+            else: pending_future, planning_recommendation = None, planned
+        else:
+            investment_recommendations = [{"investment": "N/A", "explanation": "Cannot generate without valid risk profile."}]
+
+        final_advice = {
+            "risk_profile": predicted_risk_profile,
+            "primary_goal": profile_for_ai.get("PrimaryGoal"), # Shown next to the risk profile without another DB read
+            "risk_explanation_simple": risk_explanation_static,
+            "risk_explanation_handle": risk_result_ai.get('explanation_handle'), # Resolve with get_explanation()
+            "investment_recommendations": investment_recommendations,
+            "planning_recommendation": planning_recommendation,
+            "service_tier": TIER_FULL
+        }
+        if arm == model_serving.ARM_CANDIDATE: # No SHAP handle: production's explainer cannot explain the candidate's answer
+            final_advice.update(serving_arm=arm, model_version=model_serving.candidate_version(), risk_explanation_detailed_shap=risk_result_ai.get('explanation'))
+        if planning_timed_out: final_advice["degradation_reason"] = "Planning took too long." # Not cached: the last complete advice stays the fallback
+        else: _remember_advice(user_id, final_advice, profile_for_ai)
+        try: monitoring_service.record_advice(profile_for_ai, final_advice) # Drift sketches; must never fail the request
+        except Exception as e: print(f"Warning: monitoring update failed: {e}")
+        print(f"Advice generated successfully for user_id: {user_id}")
+        return _audited(user_id, profile_for_ai, final_advice)
+    finally:
+        # Abandoned stages keep their slot until they really finish, so overload is not hidden.
+        if pending_future is not None: pending_future.add_done_callback(_admission.release)
+        else: _admission.release()
+
+
+# --- Warm Start ---
+# Restarted workers preload the explanations and advice cached before the restart (same model version only).
+warm_start_service.register("explanations", prediction.export_explanation_cache, prediction.preload_explanation_cache)
+warm_start_service.register("advice", export_advice_cache, preload_advice_cache)
+warm_start_service.start(get_model_version())
@@ -0,0 +1,236 @@
+# streamlit_app/services/audit_service.py
+# Write-behind audit log of advice decisions: inputs, model version, prediction and the explanation shown.
+# The request path only puts a tuple on a bounded in-memory queue, which takes microseconds. A background
+# writer thread serialises the entries and writes them in batches, using one of two sinks:
+# - the database: a single executemany INSERT into advice_audit (SQLite or Postgres);
+# - Parquet files: AUDIT_SINK=parquet appends one row group per batch.
+# A batch is written once AUDIT_BATCH_SIZE entries are waiting, or AUDIT_FLUSH_INTERVAL_S after its first
+# entry. When the queue is full, a request blocks for up to AUDIT_BACKPRESSURE_S. After that it writes its
+# own entry synchronously rather than drop it. The queue is drained and the sink closed at interpreter exit.
+# A failed write marks the sink down. The batch gets AUDIT_WRITE_ATTEMPTS attempts in all; after that the
+# writer tries one batch every SINK_PROBE_INTERVAL_S, so the queue holds entries for the outage. Requests never
+# block while the sink is down; an entry that finds the queue full is dropped and counted.
+# Opening an explanation adds a row of its own (record_explanation), tied to the decision by user_id and handle.
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+try:
+    from . import schema_service
+    try: from ..db_models import AdviceAudit, get_engine
+    except ImportError: from db_models import AdviceAudit, get_engine
+except ImportError as e:
+    print(f"CRITICAL ERROR importing modules within audit_service: {e}.")
+    raise
+
+PROJECT_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+AUDIT_SINK = os.environ.get("AUDIT_SINK", "db") # 'db', 'parquet' or 'off'
+AUDIT_PARQUET_DIR = os.environ.get("AUDIT_PARQUET_DIR", os.path.join(PROJECT_ROOT_DIR, 'data', 'audit'))
+AUDIT_PARQUET_ROWS_PER_FILE = 100_000
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", 10_000))
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", 500))
+AUDIT_FLUSH_INTERVAL_S = float(os.environ.get("AUDIT_FLUSH_INTERVAL_S", 1.0))
+AUDIT_BACKPRESSURE_S = float(os.environ.get("AUDIT_BACKPRESSURE_S", 2.0))
+AUDIT_WRITE_ATTEMPTS = int(os.environ.get("AUDIT_WRITE_ATTEMPTS", 4)) # Per batch while the sink is up; one while it is down
+RETRY_DELAYS_S = (0.5, 4.0) # Failed batch writes are retried with doubling delays between these bounds
+SINK_PROBE_INTERVAL_S = 30.0
+EXPLANATION_EVENT = "explanation" # service_tier of rows that record an opened explanation
+SHUTDOWN_TIMEOUT_S = 10.0
+AUDIT_COLUMNS = ["created_at", "user_id", "model_version", "service_tier", "risk_profile", "inputs", "prediction", "explanation"]
+_STOP = object()
+
+
+def to_row(entry):
+    """advice_audit row for a queued (timestamp, user_id, profile, advice, model_version) entry."""
+    created, user_id, profile, advice, model_version = entry
+    if advice.get("service_tier") == EXPLANATION_EVENT: return _explanation_row(entry)
+    recommendations = advice.get("investment_recommendations") or []
+    planning = advice.get("planning_recommendation") or {}
+    prediction = {"recommendations": [{key: rec.get(key) for key in ("investment", "suitability", "avg_annual_return_used")} for rec in recommendations],
+                  "planning": {key: planning[key] for key in ("actions", "allocation", "expected_return", "expected_volatility") if key in planning}}
+    explanation = {"risk": advice.get("risk_explanation_simple"), "risk_detail": advice.get("risk_explanation_detailed_shap"),
+                   "planning": planning.get("explanation"), "degradation_reason": advice.get("degradation_reason"),
+                   # Handles reproduce the SHAP text on demand for the same model_version (prediction.get_explanation)
+                   "handles": [advice.get("risk_explanation_handle")] + [rec.get("explanation_handle") for rec in recommendations]}
+    return {"created_at": datetime.fromtimestamp(created, timezone.utc), "user_id": user_id, "model_version": model_version,
+            "service_tier": advice.get("service_tier"), "risk_profile": advice.get("risk_profile"),
+            "inputs": json.dumps(profile, default=str) if profile is not None else None,
+            "prediction": json.dumps(prediction, default=str), "explanation": json.dumps(explanation, default=str)}
+
+
+def _explanation_row(entry):
+    """Row for an explanation the user opened: the text shown, and the handle that links it to the decision row."""
+    created, user_id, _, event, model_version = entry
+    return {"created_at": datetime.fromtimestamp(created, timezone.utc), "user_id": user_id, "model_version": model_version,
+            "service_tier": EXPLANATION_EVENT, "risk_profile": event.get("risk_profile"), "inputs": None, "prediction": None,
+            "explanation": json.dumps({"handle": event["handle"], "text": event["text"], "tier": event["tier"]}, default=str)}
+
+
+# --- Sinks ---
+class DatabaseSink:
+    """Batches go to the advice_audit table as one executemany INSERT per transaction."""
+    def write(self, rows):
+        schema_service.ensure_schema()
+        with get_engine().begin() as connection: connection.execute(AdviceAudit.__table__.insert(), rows)
+
+    def close(self): pass
+
+
+class ParquetSink:
+    """
+    Each batch is appended as a row group to a Parquet file in directory. The sink moves to a new file
+    every AUDIT_PARQUET_ROWS_PER_FILE rows. A file becomes readable once it is closed, on roll-over or
+    at shutdown.
+    """
+    def __init__(self, directory=AUDIT_PARQUET_DIR, rows_per_file=AUDIT_PARQUET_ROWS_PER_FILE):
+        import pyarrow as pa, pyarrow.parquet as pq # Only needed for this sink
+        self._pa, self._pq = pa, pq
+        self.schema = pa.schema([("created_at", pa.timestamp("us", tz="UTC")), ("user_id", pa.int64())]
+                                + [(name, pa.string()) for name in AUDIT_COLUMNS[2:]])
+        self.directory, self.rows_per_file = directory, rows_per_file
+        self._writer, self._rows, self.paths = None, 0, []
+
+    def write(self, rows):
+        if self._writer is None or self._rows >= self.rows_per_file: self._roll()
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self.schema))
+        self._rows += len(rows)
+
+    def _roll(self):
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"advice_audit-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{len(self.paths)}.parquet")
+        self._writer, self._rows = self._pq.ParquetWriter(path, self.schema), 0
+        self.paths.append(path)
+
+    def close(self):
+        if self._writer is not None: self._writer.close(); self._writer = None
+
+
+# --- Queue and writer ---
+class AuditLog:
+    """Bounded queue of audit entries and the thread that writes them in batches to sink_factory()."""
+    def __init__(self, sink_factory, maxsize=AUDIT_QUEUE_SIZE, batch_size=AUDIT_BATCH_SIZE,
+                 flush_interval_s=AUDIT_FLUSH_INTERVAL_S, backpressure_s=AUDIT_BACKPRESSURE_S):
+        self.sink_factory, self.batch_size = sink_factory, batch_size
+        self.flush_interval_s, self.backpressure_s = flush_interval_s, backpressure_s
+        self._queue = queue.Queue(maxsize)
+        self._sink, self._sink_lock = None, threading.Lock() # The writer and synchronous fallbacks share the sink
+        self._thread, self._start_lock = None, threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed, self._closing = False, threading.Event()
+        self.sink_down_since = None # time.time() of the failure that marked the sink down; None while it is up
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "sync_writes": 0, "failed": 0, "dropped": 0}
+
+    def _count(self, key, n=1):
+        with self._stats_lock: self.stats[key] += n
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is not None: return
+            self._sink = self.sink_factory()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def record(self, entry):
+        """Queues an entry; only blocks (up to backpressure_s, then writes it synchronously) when the queue is full."""
+        if self._thread is None: self._ensure_started()
+        if self._closed: return self._write([entry])
+        if self.sink_down_since is not None: # Known outage: queue if there is room, never block the request
+            try: self._queue.put_nowait(entry); self._count("queued")
+            except queue.Full: self._count("dropped")
+            return
+        try:
+            self._queue.put(entry, timeout=self.backpressure_s)
+            self._count("queued")
+        except queue.Full:
+            self._count("sync_writes")
+            self._write([entry])
+
+    def _write(self, entries, attempts=1):
+        """Writes entries with up to attempts tries; any failure marks the sink down. Returns False (entries counted as failed) if all fail."""
+        rows = [to_row(entry) for entry in entries]
+        delay = RETRY_DELAYS_S[0]
+        for attempt in range(1, attempts + 1):
+            try:
+                with self._sink_lock: self._sink.write(rows)
+            except Exception as e:
+                if self.sink_down_since is None: # From the first failure on, requests stop waiting for the queue
+                    self.sink_down_since = time.time()
+                    print(f"Warning: audit sink marked down; probing every {SINK_PROBE_INTERVAL_S:.0f}s, requests will not wait for it.")
+                if attempt < attempts and not self._closed:
+                    print(f"Audit log write of {len(rows)} entries failed, retrying in {delay:.1f}s: {e}")
+                    self._closing.wait(delay); delay = min(delay * 2, RETRY_DELAYS_S[1])
+                    continue
+                print(f"Error: audit log lost {len(rows)} entries: {e}")
+                self._count("failed", len(rows))
+                return False
+            self._count("written", len(rows)); self._count("batches")
+            if self.sink_down_since is not None:
+                print(f"Audit sink recovered after {time.time() - self.sink_down_since:.0f}s.")
+                self.sink_down_since = None
+            return True
+
+    def _run(self):
+        stopping = False
+        while not stopping or not self._queue.empty(): # After _STOP, drain what is left without waiting
+            batch, stops, deadline = [], 0, time.monotonic() + self.flush_interval_s
+            try:
+                item = self._queue.get_nowait() if stopping else self._queue.get()
+                while True:
+                    if item is _STOP: stopping, stops = True, stops + 1
+                    else: batch.append(item)
+                    if len(batch) >= self.batch_size: break
+                    item = self._queue.get_nowait() if stopping else self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty: pass
+            if batch and self.sink_down_since is not None and not stopping: # One probe per interval while down
+                self._closing.wait(max(self.sink_down_since + SINK_PROBE_INTERVAL_S - time.time(), 0))
+            if batch: self._write(batch, attempts=1 if self.sink_down_since is not None else AUDIT_WRITE_ATTEMPTS)
+            for _ in range(len(batch) + stops): self._queue.task_done()
+        with self._sink_lock: self._sink.close()
+
+    def flush(self, timeout=None):
+        """Waits until every queued entry has been written (or timeout s). Returns True if the queue drained."""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: self._queue.unfinished_tasks == 0, timeout)
+
+    def close(self, timeout=SHUTDOWN_TIMEOUT_S):
+        """Writes what is queued, closes the sink and stops the writer; later records are written synchronously."""
+        if self._thread is None or self._closed: return
+        self._closed = True # New records are written synchronously from here on
+        self._closing.set() # Cuts short retry and probe waits
+        try: self._queue.put(_STOP, timeout=timeout)
+        except queue.Full: print("Warning: audit queue still full at shutdown; some entries may not be written.")
+        self._thread.join(timeout)
+        if self._thread.is_alive(): print("Warning: audit writer did not finish within the shutdown timeout.")
+
+
+def _make_sink():
+    return ParquetSink() if AUDIT_SINK == "parquet" else DatabaseSink()
+
+_audit_log = AuditLog(_make_sink) if AUDIT_SINK != "off" else None
+if _audit_log is not None: atexit.register(_audit_log.close)
+
+
+def record_advice(user_id, profile, advice, model_version):
+    """Audits one advice decision; returns in microseconds unless the queue is full."""
+    if _audit_log is None: return
+    _audit_log.record((time.time(), user_id, profile, advice, model_version))
+
+
+def record_explanation(user_id, handle, text, service_tier, model_version):
+    """Audits an explanation the user opened (the text they saw), tied to the decision by user_id and handle."""
+    if _audit_log is None: return
+    event = {"service_tier": EXPLANATION_EVENT, "risk_profile": handle[2],
+             "handle": list(handle), "text": text, "tier": service_tier}
+    _audit_log.record((time.time(), user_id, None, event, model_version))
+
+
+def flush(timeout=None):
+    return _audit_log.flush(timeout) if _audit_log is not None else True
+
+
+def get_stats():
+    return dict(_audit_log.stats, queue_depth=_audit_log._queue.qsize(), sink_down_since=_audit_log.sink_down_since) if _audit_log is not None else {}
@@ -1,3 +1,4 @@
+import os
 from passlib.context import CryptContext
 # Use RELATIVE import for modules within the same package
 try:
@@ -10,6 +11,8 @@ except ImportError:
 
 # Setup password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Usernames allowed on admin pages (comma-separated); nobody is an admin by default
+ADMIN_USERNAMES = {name.strip() for name in os.environ.get("ADMIN_USERNAMES", "").split(",") if name.strip()}
 
 # --- Function Definitions ---
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -42,4 +45,8 @@ def authenticate_user(username: str, password: str):
 
     print(f"Auth successful for user '{username}'.")
     # Return only the necessary info for session state (also a dictionary)
-    return {"id": user_data["id"], "username": user_data["username"]}
\ No newline at end of file
+    return {"id": user_data["id"], "username": user_data["username"]}
+
+def is_admin(username) -> bool:
+    """True if username is listed in ADMIN_USERNAMES."""
+    return bool(username) and username in ADMIN_USERNAMES
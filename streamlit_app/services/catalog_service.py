@@ -0,0 +1,36 @@
+# streamlit_app/services/catalog_service.py
+# Fund picks for the Dashboard: ranks catalog schemes for a user's stored profile (ai_integration/catalog.py).
+import time
+try:
+    from . import db_service
+    from ai_integration import catalog, prediction
+except ImportError as e:
+    print(f"CRITICAL ERROR importing modules within catalog_service: {e}.")
+    raise
+
+DEFAULT_TOP_K = 10
+BANDS = catalog.BANDS # Volatility/return bands, lowest first
+
+
+def get_catalog_categories():
+    """InvestmentTypes present in the catalog, in AVAILABLE_INVESTMENTS order; empty if there is no catalog."""
+    try: fund_catalog = catalog.get_catalog()
+    except FileNotFoundError: return []
+    return [inv_type for inv_type in prediction.AVAILABLE_INVESTMENTS if inv_type in fund_catalog.by_category]
+
+
+def get_fund_picks(user_id: int, risk_profile: str, categories=None, max_volatility=None, min_return=None, k=DEFAULT_TOP_K):
+    """
+    Top-k catalog schemes for a user with an assessed risk profile. Returns {'schemes', 'candidates',
+    'elapsed_ms'}, or {'error': ...} when picks cannot be computed.
+    """
+    if prediction.AI_COMPONENTS.get("load_error"): return {"error": "AI components missing."}
+    profile = db_service.get_profile(user_id)
+    if not profile: return {"error": "User profile not found."}
+    start = time.perf_counter()
+    try: picks = catalog.recommend_schemes(profile, risk_profile, categories, max_volatility, min_return, k)
+    except FileNotFoundError: return {"error": "Fund catalog not found. Generate it with ml_scripts/data_generation/generate_fund_catalog.py."}
+    except Exception as e:
+        print(f"Error ranking catalog schemes for user_id {user_id}: {e}")
+        return {"error": f"Fund ranking failed: {e}"}
+    return {**picks, "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}
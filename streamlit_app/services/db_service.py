@@ -1,43 +1,42 @@
+import sys
+from sqlalchemy import select
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
+import pandas as pd
 
 # Import models AFTER Base is defined in db_models
 # Ensure db_models is importable from the current path
 try:
     # Assuming db_models.py is in the parent directory (streamlit_app/)
     # when services is a package.
-    from ..db_models import User, UserProfile, Base, engine # Use relative import
+    from ..db_models import User, UserProfile, Base, get_engine # Use relative import
 except ImportError:
     # Fallback for direct script execution (less common for structured apps)
     # or if db_models is in the same directory as db_service (not the planned structure)
     print("Warning: Relative import of db_models failed, trying direct import (db_service.py).")
-    from db_models import User, UserProfile, Base, engine
+    from db_models import User, UserProfile, Base, get_engine
+from . import schema_service
 
 
 # --- Create session factory (Define ONCE) ---
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False) # Bound per session, so the engine is only created on first use
 
-# --- Ensure tables are created (idempotent call - Define ONCE) ---
+# --- Bring the schema up to date (scripts and tests; app pages use schema_service.ensure_schema) ---
 def init_db():
-    """Initializes the database and creates tables if they don't exist."""
-    # Use the print message appropriate for your target (cloud or local)
-    # If DATABASE_URL in db_models.py points to cloud, this will act on it.
-    print("Initializing database and creating tables (will act on configured DB)...")
+    """Applies any pending schema migrations to the configured database."""
+    print("Initializing database schema (will act on configured DB)...")
     try:
-        Base.metadata.create_all(bind=engine)
-        print("Database schema initialization complete.")
+        version = schema_service.upgrade()
+        print(f"Database schema initialization complete (version {version}).")
     except Exception as e:
         print(f"Error during DB schema initialization: {e}")
         raise # Re-raise the error to make it visible
 
-# Call init_db() from your main app script (e.g., Home.py) on startup, not here.
-# init_db()
-
 
 @contextmanager
 def get_db_session():
     """Provides a transactional scope around a series of operations."""
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
         db.commit()
@@ -119,6 +118,18 @@ def save_or_update_profile(user_id: int, profile_data: dict):
         if db_profile: # Check if db_profile was successfully created/found
             returned_profile_dict = {c.name: getattr(db_profile, c.name) for c in db_profile.__table__.columns}
 
+    # Encode the committed profile once for the advice path; an optimisation, so it must never fail the save
+    if returned_profile_dict:
+        try:
+            from . import feature_service # Imported here: it loads the models, which plain DB callers do not need
+            feature_service.save_features(user_id, returned_profile_dict)
+        except Exception as e: print(f"Warning: could not store encoded features for user_id {user_id}: {e}")
+        # Cached advice was computed from the old profile. Only a process that serves advice has any, and importing
+        # advice_service here would load the models and start its threads in scripts that only save profiles.
+        advice_service = sys.modules.get(f"{__package__}.advice_service")
+        if advice_service is not None:
+            try: advice_service.forget_advice(user_id)
+            except Exception as e: print(f"Warning: could not drop cached advice for user_id {user_id}: {e}")
     return returned_profile_dict # Return the dictionary
 
 
@@ -139,4 +150,10 @@ def is_profile_complete(user_id: int) -> bool:
         user = db.query(User).filter(User.id == user_id).first()
         if user:
             profile_complete_status = user.profile_complete # Access attribute within session
-    return profile_complete_status # Return the boolean value
\ No newline at end of file
+    return profile_complete_status # Return the boolean value
+
+def get_complete_profiles_frame():
+    """All complete user profiles as one DataFrame (user_id plus the profile columns), for batch jobs."""
+    query = select(UserProfile).join(User, User.id == UserProfile.user_id).where(User.profile_complete.is_(True))
+    with get_engine().connect() as connection:
+        return pd.read_sql(query, connection).drop(columns=["id"])
@@ -0,0 +1,175 @@
+# streamlit_app/services/feature_service.py
+# Feature store for the models' encoded inputs. A profile only changes when it is saved, so
+# db_service.save_or_update_profile encodes it once. The encoded values are the risk row, the predicted
+# risk label, and one investment row per AVAILABLE_INVESTMENTS entry. They are stored as float64 bytes
+# in profile_features (schema migration 4), under the preprocessor version (prediction's
+# preprocessor_version). generate_advice reads them back instead of running the preprocessors. Rows are
+# only used when both the version and the profile hash still match. The stored investment rows are only
+# used when the risk model still predicts the label they were encoded with.
+# After deploying new preprocessors, re-encode every profile in bulk:
+#
+#   cd streamlit_app && python -m services.feature_service rebuild
+#   cd streamlit_app && python -m services.feature_service status
+import argparse
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+try:
+    from . import db_service, schema_service
+    from ai_integration import prediction
+    try: from ..db_models import ProfileFeatures, get_engine
+    except ImportError: from db_models import ProfileFeatures, get_engine
+except ImportError as e:
+    print(f"CRITICAL ERROR importing modules within feature_service: {e}.")
+    raise
+
+MODEL_INPUT_KEYS = prediction.RISK_FEATURE_ORDER + ['InvestmentKnowledge', 'LiquidityNeeds'] # Everything the encoders read
+REBUILD_BATCH_SIZE = 1000
+
+
+def preprocessor_version():
+    return prediction.AI_COMPONENTS.get("preprocessor_version")
+
+
+def profile_hash(profile):
+    """Hash of the profile values the encoders read (other profile fields do not invalidate the vectors)."""
+    values = []
+    for key in MODEL_INPUT_KEYS:
+        value = profile.get(key)
+        if value is None or (isinstance(value, float) and np.isnan(value)): value = None
+        elif key == 'TimeHorizonYears': value = int(value)
+        else: value = str(value)
+        values.append(value)
+    return hashlib.sha256(json.dumps(values).encode()).hexdigest()[:16]
+
+
+def _complete(profile):
+    return all(profile.get(key) is not None and not pd.isna(profile.get(key)) for key in MODEL_INPUT_KEYS)
+
+
+def _rows(user_ids, profiles_df, version):
+    """profile_features rows for the profiles in profiles_df (MODEL_INPUT_KEYS columns), encoded in one pass."""
+    risk_rows, risk_labels, investment_rows = prediction.encode_profiles_batch(profiles_df)
+    updated_at = datetime.now(timezone.utc)
+    return [{"user_id": int(user_id), "preprocessor_version": version, "profile_hash": profile_hash(profile),
+             "risk_label": str(label), "risk_features": risk.tobytes(), "investment_features": investment.tobytes(), "updated_at": updated_at}
+            for user_id, profile, risk, label, investment in zip(user_ids, profiles_df.to_dict(orient="records"), risk_rows, risk_labels, investment_rows)]
+
+
+def _replace(rows):
+    """Upsert (delete + insert) that works the same on SQLite and Postgres."""
+    table = ProfileFeatures.__table__
+    with get_engine().begin() as connection:
+        connection.execute(table.delete().where(table.c.user_id.in_([row["user_id"] for row in rows])))
+        connection.execute(table.insert(), rows)
+
+
+# --- Write path ---
+def save_features(user_id, profile):
+    """Encodes and stores one saved profile. Returns False when there is nothing to store (models or fields missing)."""
+    version = preprocessor_version()
+    if version is None or not _complete(profile): return False
+    schema_service.ensure_schema()
+    _replace(_rows([user_id], pd.DataFrame([profile], columns=MODEL_INPUT_KEYS), version))
+    return True
+
+
+def rebuild(rebuild_all=False, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Re-encodes every complete profile whose stored features are missing, from another preprocessor version
+    or from older profile values (every profile with rebuild_all). Returns counts.
+    """
+    version = preprocessor_version()
+    if version is None: raise RuntimeError(f"AI components missing: {prediction.AI_COMPONENTS.get('load_error')}")
+    schema_service.ensure_schema()
+    profiles = db_service.get_complete_profiles_frame()
+    stats = {"profiles": len(profiles), "encoded": 0, "current": 0, "incomplete": 0, "seconds": 0.0}
+    start = time.perf_counter()
+    if profiles.empty: return stats
+    complete = profiles[MODEL_INPUT_KEYS].notna().all(axis=1)
+    stats["incomplete"] = int((~complete).sum())
+    profiles = profiles[complete]
+    if not rebuild_all:
+        table = ProfileFeatures.__table__
+        with get_engine().connect() as connection:
+            stored = dict(connection.execute(select(table.c.user_id, table.c.profile_hash).where(table.c.preprocessor_version == version)).all())
+        current = np.array([stored.get(user_id) == profile_hash(profile) for user_id, profile in zip(profiles["user_id"], profiles.to_dict(orient="records"))], dtype=bool)
+        stats["current"] = int(current.sum())
+        profiles = profiles[~current]
+    for offset in range(0, len(profiles), batch_size):
+        batch = profiles.iloc[offset:offset + batch_size]
+        _replace(_rows(batch["user_id"].tolist(), batch[MODEL_INPUT_KEYS].reset_index(drop=True), version))
+        stats["encoded"] += len(batch)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+# --- Read path ---
+def load_features(user_id, profile):
+    """
+    (risk row (1, n), risk label, investment rows (len(AVAILABLE_INVESTMENTS), m)) stored for this profile,
+    or None when missing or stale. Never raises: callers fall back to encoding the profile themselves.
+    """
+    version = preprocessor_version()
+    if version is None: return None
+    try:
+        schema_service.ensure_schema()
+        table = ProfileFeatures.__table__
+        with get_engine().connect() as connection:
+            row = connection.execute(select(table).where(table.c.user_id == user_id)).first()
+        if row is None or row.preprocessor_version != version or row.profile_hash != profile_hash(profile): return None
+        risk = np.frombuffer(row.risk_features, dtype=np.float64).reshape(1, -1)
+        investment = np.frombuffer(row.investment_features, dtype=np.float64).reshape(len(prediction.AVAILABLE_INVESTMENTS), -1)
+        return risk, row.risk_label, investment
+    except Exception as e:
+        print(f"Warning: could not read stored features for user_id {user_id}: {e}")
+        return None
+
+
+def get_profile_hashes(user_ids):
+    """{user_id: profile_hash} stored for user_ids, whatever the preprocessor version. Empty (and a warning) if the read fails."""
+    if not user_ids: return {}
+    try:
+        schema_service.ensure_schema()
+        table = ProfileFeatures.__table__
+        with get_engine().connect() as connection:
+            return dict(connection.execute(select(table.c.user_id, table.c.profile_hash).where(table.c.user_id.in_(list(user_ids)))).all())
+    except Exception as e:
+        print(f"Warning: could not read stored profile hashes: {e}")
+        return {}
+
+
+def get_status():
+    """DataFrame of stored rows per preprocessor version, with a 'current' flag."""
+    schema_service.ensure_schema()
+    table = ProfileFeatures.__table__
+    with get_engine().connect() as connection:
+        counts = connection.execute(select(table.c.preprocessor_version, func.count()).group_by(table.c.preprocessor_version)).all()
+    status = pd.DataFrame(counts, columns=["preprocessor_version", "rows"])
+    status["current"] = status["preprocessor_version"] == preprocessor_version()
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoded profile feature store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = commands.add_parser("rebuild", help="Re-encode profiles with the deployed preprocessors.")
+    rebuild_parser.add_argument("--all", action="store_true", help="Re-encode every profile, even current ones.")
+    rebuild_parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+    commands.add_parser("status", help="Stored rows per preprocessor version.")
+    args = parser.parse_args()
+
+    print(f"Deployed preprocessor version: {preprocessor_version()}")
+    if args.command == "rebuild":
+        stats = rebuild(args.all, args.batch_size)
+        print(f"Encoded {stats['encoded']:,} of {stats['profiles']:,} complete profiles in {stats['seconds']:.2f} s "
+              f"({stats['current']:,} already current, {stats['incomplete']:,} with missing fields).")
+    else: print(get_status().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# streamlit_app/services/monitoring_service.py
+# Live drift monitoring of advice inputs and predictions, in constant memory. generate_advice feeds every
+# full-tier answer to record_advice, which updates this process's sketches (ai_integration.sketches):
+# - count tables for the categorical profile fields and the predicted RiskProfile,
+# - a quantile sketch for TimeHorizonYears,
+# - suitability counters per instrument.
+# Each worker process writes a JSON snapshot of its sketches to MONITORING_DIR at most every
+# SNAPSHOT_INTERVAL_S. drift_report merges the snapshots and compares the result with reference sketches
+# built once per process from data/*.csv.
+# - Observations decay with a half-life of HALF_LIFE_S, so the report follows recent traffic.
+# - Snapshots not rewritten for STALE_AFTER_S (idle or dead workers) are left out of the report.
+# - Snapshots older than RETENTION_S are deleted.
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+import time
+from functools import lru_cache
+import pandas as pd
+try:
+    from ai_integration import sketches
+    from ai_integration.instruments import AVAILABLE_INVESTMENTS
+except ImportError as e:
+    print(f"CRITICAL ERROR importing modules within monitoring_service: {e}.")
+    raise
+
+PROJECT_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+PROFILE_DATA_FILE = os.path.join(PROJECT_ROOT_DIR, 'data', 'user_profile_data_india.csv')
+SUITABILITY_DATA_FILE = os.path.join(PROJECT_ROOT_DIR, 'data', 'investment_suitability_data_india.csv')
+MONITORING_DIR = os.environ.get("MONITORING_DIR", os.path.join(PROJECT_ROOT_DIR, 'data', 'monitoring'))
+SNAPSHOT_INTERVAL_S = float(os.environ.get("MONITORING_SNAPSHOT_INTERVAL_S", 60))
+HALF_LIFE_S = float(os.environ.get("MONITORING_HALF_LIFE_S", 6 * 3600)) # 0 keeps every observation at full weight
+STALE_AFTER_S = float(os.environ.get("MONITORING_STALE_AFTER_S", max(3 * SNAPSHOT_INTERVAL_S, 300)))
+RETENTION_S = 24 * 3600
+
+CATEGORICAL_FIELDS = ['AgeRange', 'IncomeRange', 'SavingsLevel', 'DebtLevel', 'HasDependents', 'PrimaryGoal',
+                      'SelfReportedTolerance', 'InvestmentKnowledge', 'LiquidityNeeds', 'RiskProfile'] # RiskProfile is the prediction
+NUMERIC_FIELDS = ['TimeHorizonYears']
+REPORT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+PSI_SHIFT, PSI_ALERT = 0.1, 0.25 # Usual PSI reading: below 0.1 stable, 0.1-0.25 moderate shift, above 0.25 major shift
+KS_SHIFT, KS_ALERT = 0.1, 0.2
+RATE_SHIFT, RATE_ALERT = 0.1, 0.2 # Absolute change in an instrument's suitability rate
+MIN_REQUESTS = 30 # Below this many live requests every status reads 'warming up'
+
+
+class Monitor:
+    """One set of monitoring sketches; mergeable and JSON round-trippable."""
+    def __init__(self):
+        self.requests = 0
+        self.categoricals = {field: sketches.CountTable() for field in CATEGORICAL_FIELDS}
+        self.numerics = {field: sketches.QuantileSketch() for field in NUMERIC_FIELDS}
+        self.suitability = sketches.RateCounters()
+
+    def observe(self, profile, risk_profile, recommendations):
+        self.requests += 1
+        values = {**profile, 'RiskProfile': risk_profile}
+        for field, table in self.categoricals.items():
+            if values.get(field) is not None: table.add(values[field])
+        for field, sketch in self.numerics.items():
+            if values.get(field) is not None: sketch.add(values[field])
+        if risk_profile and risk_profile != 'Error': # Every instrument is checked; only the suitable ones are returned
+            suitable = {rec.get('investment') for rec in recommendations if rec.get('suitability') == 'Suitable'}
+            for inv_type in AVAILABLE_INVESTMENTS: self.suitability.add(inv_type, inv_type in suitable)
+
+    def merge(self, other):
+        self.requests += other.requests
+        for field, table in self.categoricals.items(): table.merge(other.categoricals[field])
+        for field, sketch in self.numerics.items(): sketch.merge(other.numerics[field])
+        self.suitability.merge(other.suitability)
+        return self
+
+    def scale(self, factor):
+        self.requests *= factor
+        for table in self.categoricals.values(): table.scale(factor)
+        for sketch in self.numerics.values(): sketch.scale(factor)
+        self.suitability.scale(factor)
+        return self
+
+    def to_dict(self):
+        return {"requests": self.requests, "categoricals": {f: t.to_dict() for f, t in self.categoricals.items()},
+                "numerics": {f: s.to_dict() for f, s in self.numerics.items()}, "suitability": self.suitability.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        monitor = cls()
+        monitor.requests = data["requests"]
+        for field, table in data["categoricals"].items():
+            if field in monitor.categoricals: monitor.categoricals[field] = sketches.CountTable.from_dict(table)
+        for field, sketch in data["numerics"].items():
+            if field in monitor.numerics: monitor.numerics[field] = sketches.QuantileSketch.from_dict(sketch)
+        monitor.suitability = sketches.RateCounters.from_dict(data["suitability"])
+        return monitor
+
+
+# --- This process's monitor ---
+_monitor = Monitor()
+_monitor_lock = threading.Lock()
+_snapshot_path = os.path.join(MONITORING_DIR, f"worker-{os.getpid()}-{int(time.time())}.json")
+_last_snapshot = _decayed_at = time.monotonic()
+
+
+def record_advice(profile, advice):
+    """Adds one served advice to the live sketches; writes this worker's snapshot when it is due."""
+    global _last_snapshot
+    with _monitor_lock:
+        _monitor.observe(profile, advice.get('risk_profile'), advice.get('investment_recommendations') or [])
+        due = time.monotonic() - _last_snapshot >= SNAPSHOT_INTERVAL_S
+        if due: _last_snapshot = time.monotonic()
+    if due: write_snapshot()
+
+
+def _decay():
+    """Ages this process's sketches to now (caller holds _monitor_lock)."""
+    global _decayed_at
+    now = time.monotonic()
+    if HALF_LIFE_S > 0: _monitor.scale(0.5 ** ((now - _decayed_at) / HALF_LIFE_S))
+    _decayed_at = now
+
+
+def write_snapshot():
+    with _monitor_lock: _decay(); data = json.dumps(_monitor.to_dict())
+    try:
+        os.makedirs(MONITORING_DIR, exist_ok=True)
+        tmp_path = f"{_snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f: f.write(data)
+        os.replace(tmp_path, _snapshot_path) # Readers never see a half-written snapshot
+    except OSError as e:
+        print(f"Warning: could not write monitoring snapshot: {e}")
+
+atexit.register(lambda: _monitor.requests and write_snapshot())
+
+
+def merged_monitor():
+    """(Monitor over recent workers' snapshots plus this process's live sketches, number of workers)."""
+    merged, workers, now = Monitor(), 1, time.time()
+    for path in glob.glob(os.path.join(MONITORING_DIR, "worker-*.json")):
+        if os.path.abspath(path) == os.path.abspath(_snapshot_path): continue # Live copy below is fresher
+        try:
+            age = now - os.path.getmtime(path)
+            if age > RETENTION_S: os.remove(path); continue # Workers of past deploys
+            if age > STALE_AFTER_S: continue
+            with open(path, encoding="utf-8") as f: snapshot = Monitor.from_dict(json.load(f))
+            if HALF_LIFE_S > 0: snapshot.scale(0.5 ** (age / HALF_LIFE_S)) # Aged from its write to now
+            merged.merge(snapshot)
+            workers += 1
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: skipping monitoring snapshot {path}: {e}")
+    with _monitor_lock: _decay(); merged.merge(Monitor.from_dict(_monitor.to_dict()))
+    return merged, workers
+
+
+@lru_cache(maxsize=1)
+def reference_monitor():
+    """Sketches of the training data: profile fields and RiskProfile labels, suitability rates per instrument."""
+    profiles = pd.read_csv(PROFILE_DATA_FILE)
+    reference = Monitor()
+    reference.requests = len(profiles)
+    for field, table in reference.categoricals.items():
+        for value, count in profiles[field].astype(str).value_counts().items(): table.add(value, int(count))
+    for field, sketch in reference.numerics.items(): sketch.update(profiles[field].to_numpy())
+    suitability = pd.read_csv(SUITABILITY_DATA_FILE)
+    for inv_type, verdicts in suitability.groupby('InvestmentType')['Suitability']:
+        reference.suitability.add(inv_type, int((verdicts == 'Suitable').sum()), len(verdicts))
+    return reference
+
+
+def _status(value, shift, alert, requests):
+    if requests < MIN_REQUESTS: return "warming up"
+    if value is None or math.isnan(value): return "no data"
+    return "alert" if value > alert else "shift" if value > shift else "stable"
+
+
+def drift_report(live=None, reference=None):
+    """
+    Live vs reference distributions as DataFrames: 'categorical' (PSI per field), 'shares' (per value),
+    'numeric' (quantiles and KS distance) and 'suitability' (rate per instrument); plus request/worker counts.
+    """
+    workers = None
+    if live is None: live, workers = merged_monitor()
+    reference = reference if reference is not None else reference_monitor()
+    categorical, shares = [], []
+    for field in CATEGORICAL_FIELDS:
+        live_table, reference_table = live.categoricals[field], reference.categoricals[field]
+        psi = sketches.population_stability_index(live_table, reference_table)
+        categorical.append({"field": field, "psi": psi, "status": _status(psi, PSI_SHIFT, PSI_ALERT, live.requests)})
+        live_shares, reference_shares = live_table.proportions(), reference_table.proportions()
+        for value in sorted(set(live_shares) | set(reference_shares)):
+            shares.append({"field": field, "value": value, "reference_share": reference_shares.get(value, 0.0), "live_share": live_shares.get(value, 0.0)})
+    numeric = []
+    for field in NUMERIC_FIELDS:
+        live_sketch, reference_sketch = live.numerics[field], reference.numerics[field]
+        ks = sketches.ks_distance(live_sketch, reference_sketch)
+        row = {"field": field, "ks": ks, "status": _status(ks, KS_SHIFT, KS_ALERT, live.requests)}
+        for q in REPORT_QUANTILES:
+            row[f"reference_p{round(q * 100)}"], row[f"live_p{round(q * 100)}"] = reference_sketch.quantile(q), live_sketch.quantile(q)
+        numeric.append(row)
+    suitability = []
+    live_rates, reference_rates = live.suitability.rates(), reference.suitability.rates()
+    for inv_type in sorted(set(live_rates) | set(reference_rates)):
+        live_rate, reference_rate = live_rates.get(inv_type, math.nan), reference_rates.get(inv_type, math.nan)
+        change = abs(live_rate - reference_rate)
+        suitability.append({"investment": inv_type, "checks": round(live.suitability.counts.get(inv_type, [0, 0])[1]), # Decayed, so fractional
+                            "reference_rate": reference_rate, "live_rate": live_rate,
+                            "status": _status(change, RATE_SHIFT, RATE_ALERT, live.requests)})
+    return {"requests": live.requests, "workers": workers, "categorical": pd.DataFrame(categorical), "shares": pd.DataFrame(shares),
+            "numeric": pd.DataFrame(numeric), "suitability": pd.DataFrame(suitability)}
@@ -0,0 +1,125 @@
+# streamlit_app/services/schema_service.py
+# Schema bootstrap and migrations. Each applied migration is recorded in the schema_version table,
+# so a deployment migrates once (via the CLI or the first app process) and app pages only need
+# ensure_schema(), which reads the version once per process.
+#
+#   cd streamlit_app && python -m services.schema_service upgrade
+#   cd streamlit_app && python -m services.schema_service current
+import argparse
+import os
+import threading
+from datetime import datetime, timezone
+from sqlalchemy import String, func, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+
+try:
+    from ..db_models import Base, User, UserProfile, SchemaVersion, AdviceAudit, ProfileFeatures, get_engine
+except ImportError:
+    from db_models import Base, User, UserProfile, SchemaVersion, AdviceAudit, ProfileFeatures, get_engine
+
+# Set DB_SCHEMA_AUTO_MIGRATE=0 when migrations are run by the deploy step; app processes then refuse
+# to start on an outdated schema instead of migrating it themselves.
+AUTO_MIGRATE = os.environ.get("DB_SCHEMA_AUTO_MIGRATE", "1") != "0"
+PG_ADVISORY_LOCK_KEY = 7_203_151 # Arbitrary; shared by every process that migrates this database
+
+
+# --- Migrations ---
+# (version, description, fn(connection)). Append only; never edit a migration that has shipped.
+def _create_initial_tables(connection):
+    # checkfirst makes this a no-op on databases created by the old create_all() bootstrap.
+    Base.metadata.create_all(bind=connection, tables=[User.__table__, UserProfile.__table__])
+
+
+def _add_profile_knowledge_liquidity(connection):
+    # Databases created before these columns were added to UserProfile are missing them.
+    existing = {c["name"] for c in inspect(connection).get_columns(UserProfile.__tablename__)}
+    for name in ("InvestmentKnowledge", "LiquidityNeeds"):
+        if name in existing: continue
+        column_type = String().compile(dialect=connection.dialect)
+        connection.execute(text(f'ALTER TABLE {UserProfile.__tablename__} ADD COLUMN "{name}" {column_type}'))
+
+
+def _create_advice_audit(connection):
+    Base.metadata.create_all(bind=connection, tables=[AdviceAudit.__table__])
+
+
+def _create_profile_features(connection):
+    Base.metadata.create_all(bind=connection, tables=[ProfileFeatures.__table__])
+
+
+MIGRATIONS = [
+    (1, "Create users and user_profiles tables", _create_initial_tables),
+    (2, "Add InvestmentKnowledge and LiquidityNeeds to user_profiles", _add_profile_knowledge_liquidity),
+    (3, "Create advice_audit table", _create_advice_audit),
+    (4, "Create profile_features table", _create_profile_features),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+_lock = threading.RLock()
+_checked_version = None # Set by ensure_schema() once the database is known to be current
+
+
+def get_current_version(connection):
+    """Highest applied migration, or 0 for a database that has never been bootstrapped."""
+    if not inspect(connection).has_table(SchemaVersion.__tablename__): return 0
+    return connection.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+
+
+def upgrade(target_version=None):
+    """Applies pending migrations up to target_version (default: latest) in one transaction. Returns the new version."""
+    target_version = LATEST_VERSION if target_version is None else target_version
+    engine = get_engine()
+    with _lock:
+        try:
+            with engine.begin() as connection:
+                if connection.dialect.name == "postgresql": # Serialises concurrent deployers/workers
+                    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PG_ADVISORY_LOCK_KEY})
+                SchemaVersion.__table__.create(bind=connection, checkfirst=True)
+                version = get_current_version(connection)
+                for migration_version, description, migrate in MIGRATIONS:
+                    if not version < migration_version <= target_version: continue
+                    print(f"Applying schema migration {migration_version}: {description}")
+                    migrate(connection)
+                    connection.execute(SchemaVersion.__table__.insert().values(
+                        version=migration_version, description=description, applied_at=datetime.now(timezone.utc)))
+                    version = migration_version
+        except IntegrityError:
+            # Another process recorded the same migration first (no advisory locks on SQLite); use its result.
+            with engine.connect() as connection: version = get_current_version(connection)
+            if version < target_version: raise
+    print(f"Database schema is at version {version}.")
+    return version
+
+
+def ensure_schema():
+    """Cheap per-rerun check for app pages: reads the schema version once per process, migrating if allowed."""
+    global _checked_version
+    if _checked_version is not None: return _checked_version
+    with _lock:
+        if _checked_version is None:
+            with get_engine().connect() as connection: version = get_current_version(connection)
+            if version < LATEST_VERSION:
+                if not AUTO_MIGRATE:
+                    raise RuntimeError(f"Database schema is at version {version}, the app needs {LATEST_VERSION}. "
+                                       "Run: python -m services.schema_service upgrade")
+                version = upgrade()
+            _checked_version = version
+    return _checked_version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database schema bootstrap and migrations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="Apply pending migrations.")
+    upgrade_parser.add_argument("--to", type=int, default=None, help="Stop at this version (default: latest).")
+    commands.add_parser("current", help="Print the applied schema version.")
+    args = parser.parse_args()
+
+    if args.command == "upgrade": upgrade(args.to)
+    else:
+        with get_engine().connect() as connection:
+            print(f"Schema version: {get_current_version(connection)} (latest available: {LATEST_VERSION})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# streamlit_app/services/stress_service.py
+# Stress tests of every user's recommended portfolio. Users' current recommendations are rebuilt by batch
+# scoring, with every stage run on its own distinct inputs only (many users share them): the risk model per
+# distinct risk-feature row, the suitability model per distinct (risk profile, knowledge, liquidity,
+# horizon), the allocator per distinct (risk profile, suitable set). The scenario library is then applied to
+# the distinct portfolios in one matrix product and loss distributions are weighted by how many users hold each.
+#
+#   cd streamlit_app && python -m services.stress_service
+import time
+import numpy as np
+import pandas as pd
+try:
+    from . import db_service
+    from ai_integration import allocation, prediction, stress
+except ImportError as e:
+    print(f"CRITICAL ERROR importing modules within stress_service: {e}.")
+    raise
+
+PORTFOLIO_FIELDS = prediction.RISK_FEATURE_ORDER + ['InvestmentKnowledge', 'LiquidityNeeds'] # Inputs that determine a recommendation
+DEFAULT_GROUP_BY = ("RiskProfile", "PrimaryGoal")
+
+
+def _factorize_rows(frame):
+    """(codes, index of each distinct row's first occurrence) over all columns of frame; factorizes column by column, then one integer key."""
+    key = np.zeros(len(frame), dtype=np.int64)
+    for column in frame.columns:
+        codes, uniques = pd.factorize(frame[column])
+        key = key * len(uniques) + codes
+    codes, _ = pd.factorize(key)
+    return codes, np.unique(codes, return_index=True)[1]
+
+
+def allocation_weights(risk_labels, suitable):
+    """(codes, weights) for rows of (risk label, suitable mask): one allocation per distinct pair, zero weights where nothing is suitable."""
+    mu, cov = prediction.get_allocation_inputs()
+    inv_types = stress.INVESTMENT_TYPES
+    masks = suitable.astype(np.int64) @ (1 << np.arange(len(inv_types)))
+    codes, first = _factorize_rows(pd.DataFrame({"RiskProfile": risk_labels, "Mask": masks}))
+    weights = np.zeros((len(first), len(inv_types)))
+    for i, row in enumerate(first):
+        mask = masks[row]
+        result = allocation.allocate(mu, cov, risk_labels[row], [t for b, t in enumerate(inv_types) if mask >> b & 1]) if mask else None
+        if result: weights[i] = [result["weights"].get(t, 0.0) for t in inv_types]
+    return codes, weights
+
+
+def score_portfolios(profiles_df):
+    """
+    Recommended portfolio of every row of profiles_df, scoring each model on its own distinct inputs only:
+    the risk model per distinct RISK_FEATURE_ORDER row, the suitability model per distinct (risk profile,
+    knowledge, liquidity, horizon). Returns (risk labels (n,), portfolio codes (n,), weights (portfolios, types)).
+    """
+    risk_codes, risk_first = _factorize_rows(profiles_df[prediction.RISK_FEATURE_ORDER])
+    risk_inputs = profiles_df.iloc[risk_first][prediction.RISK_FEATURE_ORDER].astype(object).astype({"TimeHorizonYears": int})
+    label_codes, labels = pd.factorize(prediction.predict_risk_profiles_batch(risk_inputs))
+    risk_labels = pd.Categorical.from_codes(label_codes[risk_codes], labels)
+    suitability_keys = profiles_df[['InvestmentKnowledge', 'LiquidityNeeds', 'TimeHorizonYears']].assign(RiskProfile=risk_labels)
+    suitability_codes, suitability_first = _factorize_rows(suitability_keys)
+    suitable = prediction.predict_investment_suitability_batch(
+        suitability_keys.iloc[suitability_first].astype(object).astype({"TimeHorizonYears": int}), risk_labels[suitability_first])
+    pair_codes, weights = allocation_weights(risk_labels[suitability_first], suitable)
+    return risk_labels, pair_codes[suitability_codes], weights
+
+
+def run_stress_test(profiles_df=None, scenarios=None, group_by=DEFAULT_GROUP_BY):
+    """
+    Scenario loss distributions of the recommended portfolios of every user in profiles_df (default: all
+    complete profiles in the database), per scenario and group_by columns (profile columns or RiskProfile).
+    Returns {'summary', 'users', 'portfolios', 'unallocated_users', 'elapsed_ms'} or {'error': ...}.
+    """
+    if prediction.AI_COMPONENTS.get("load_error"): return {"error": "AI components missing."}
+    start = time.perf_counter()
+    if profiles_df is None: profiles_df = db_service.get_complete_profiles_frame()
+    profiles_df = profiles_df.astype({field: "category" for field in PORTFOLIO_FIELDS}).dropna(subset=PORTFOLIO_FIELDS) # Codes make the row factorizing cheap
+    if profiles_df.empty: return {"error": "No complete profiles to stress test."}
+    risk_labels, portfolio_codes, weights = score_portfolios(profiles_df)
+    # Users with the same portfolio in the same group share every loss: evaluate each such cell once.
+    cells = profiles_df.assign(RiskProfile=risk_labels, Portfolio=portfolio_codes)[list(group_by) + ["Portfolio"]]
+    cell_codes, cell_first = _factorize_rows(cells)
+    cells = cells.iloc[cell_first].reset_index(drop=True)
+    cells["Users"] = np.bincount(cell_codes, minlength=len(cells))
+    allocated = weights.sum(axis=1)[cells["Portfolio"]] > 0
+    names, shocks = stress.shock_matrix(scenarios)
+    losses = stress.scenario_losses(weights, shocks)[cells.loc[allocated, "Portfolio"]] # One matrix product over distinct portfolios
+    summary = stress.loss_distribution(losses, names, cells.loc[allocated, list(group_by)].reset_index(drop=True),
+                                       counts=cells.loc[allocated, "Users"].to_numpy())
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"-> Stress test: {len(profiles_df)} users, {len(weights)} distinct portfolios, {len(names)} scenarios in {elapsed_ms:.0f} ms.")
+    return {"summary": summary, "users": len(profiles_df), "portfolios": len(weights),
+            "unallocated_users": int(cells.loc[~allocated, "Users"].sum()), "elapsed_ms": round(elapsed_ms, 1)}
+
+
+if __name__ == "__main__":
+    result = run_stress_test()
+    if "error" in result: print(result["error"])
+    else:
+        with pd.option_context("display.float_format", "{:.3f}".format, "display.width", 160, "display.max_rows", 500):
+            print(result["summary"].to_string(index=False))
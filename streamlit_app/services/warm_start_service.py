@@ -0,0 +1,140 @@
+# streamlit_app/services/warm_start_service.py
+# Warm start for in-process caches across restarts and deploys. Caches register an export and a preload
+# function (advice_service registers the SHAP explanations and the advice results). Their contents are
+# written to a snapshot file in WARM_CACHE_DIR every WARM_CACHE_SNAPSHOT_INTERVAL_S and at interpreter
+# exit. A new worker preloads the file in a background thread.
+# - There is one file per database, so user ids never leak between databases.
+# - Workers merge their entries into the file. The copy saved last wins; a live entry wins ties.
+# - A file with another SNAPSHOT_FORMAT or model version is discarded whole.
+# - Timestamped entries older than WARM_CACHE_MAX_AGE_S are dropped.
+# - Preloading never replaces an entry the worker has already computed.
+# Encoded profiles need no snapshot: they persist in profile_features (feature_service).
+# The snapshot is a pickle written by the app itself; the directory must only be writable by the app.
+import atexit
+import hashlib
+import os
+import pickle
+import threading
+import time
+try:
+    try: from ..db_models import DATABASE_URL
+    except ImportError: from db_models import DATABASE_URL
+except ImportError as e:
+    print(f"CRITICAL ERROR importing modules within warm_start_service: {e}.")
+    raise
+
+PROJECT_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+WARM_CACHE = os.environ.get("WARM_CACHE", "on") # 'off' disables snapshots and preloading
+WARM_CACHE_DIR = os.environ.get("WARM_CACHE_DIR", os.path.join(PROJECT_ROOT_DIR, 'data', 'warm_cache'))
+WARM_CACHE_SNAPSHOT_INTERVAL_S = float(os.environ.get("WARM_CACHE_SNAPSHOT_INTERVAL_S", 300))
+WARM_CACHE_MAX_AGE_S = float(os.environ.get("WARM_CACHE_MAX_AGE_S", 24 * 3600))
+WARM_CACHE_MAX_ENTRIES = 4096 # Per cache, most recently used kept
+SNAPSHOT_FORMAT = 2 # Bump when the layout of the snapshot or of any cached value changes
+
+_caches = {} # name -> (export() -> [(key, saved_at or None, value)] oldest first, preload(entries) -> count added)
+_model_version = None
+_file_lock = threading.Lock() # Serialises snapshot writes within the process
+_restored = threading.Event()
+_started = False
+stats = {"restored": {}, "discarded": None, "restore_ms": None, "snapshots": 0, "last_snapshot": None}
+
+
+def snapshot_path():
+    return os.path.join(WARM_CACHE_DIR, f"cache-{hashlib.sha256(DATABASE_URL.encode()).hexdigest()[:12]}.pkl")
+
+
+def register(name, export, preload):
+    _caches[name] = (export, preload)
+
+
+def _read_snapshot(model_version):
+    """The snapshot's caches when it matches SNAPSHOT_FORMAT and model_version, else None (with the reason)."""
+    try:
+        with open(snapshot_path(), 'rb') as f: snapshot = pickle.load(f)
+    except FileNotFoundError: return None, "no snapshot"
+    except Exception as e: return None, f"unreadable snapshot ({e})"
+    if snapshot.get("format") != SNAPSHOT_FORMAT: return None, f"snapshot format {snapshot.get('format')}, expected {SNAPSHOT_FORMAT}"
+    if snapshot.get("model_version") != model_version: return None, f"snapshot from model version {snapshot.get('model_version')}"
+    return snapshot["caches"], None
+
+
+def _fresh(entries, now):
+    return [entry for entry in entries if entry[1] is None or now - entry[1] <= WARM_CACHE_MAX_AGE_S]
+
+
+def _newer(stored, live):
+    """True when the file's entry was saved after the live one; live wins ties and untimestamped entries."""
+    return stored is not None and stored[1] is not None and live[1] is not None and stored[1] > live[1]
+
+
+def write_snapshot():
+    """Merges this worker's caches into the snapshot file (atomic replace). Returns the number of entries written."""
+    if WARM_CACHE == "off" or _model_version is None: return 0
+    live = {name: export() for name, (export, _) in _caches.items()}
+    if not any(live.values()): return 0
+    with _file_lock:
+        stored, _ = _read_snapshot(_model_version)
+        now, caches = time.time(), {}
+        for name, entries in live.items():
+            merged = {entry[0]: entry for entry in (stored or {}).get(name, [])} # Insertion order = LRU order
+            for entry in entries:
+                if _newer(merged.get(entry[0]), entry): continue # Another worker wrote a newer copy
+                merged.pop(entry[0], None); merged[entry[0]] = entry
+            caches[name] = _fresh(list(merged.values()), now)[-WARM_CACHE_MAX_ENTRIES:]
+        try:
+            os.makedirs(WARM_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{snapshot_path()}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({"format": SNAPSHOT_FORMAT, "model_version": _model_version, "written_at": now, "caches": caches}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, snapshot_path()) # Readers never see a half-written snapshot
+        except OSError as e:
+            print(f"Warning: could not write cache snapshot: {e}")
+            return 0
+    stats["snapshots"] += 1; stats["last_snapshot"] = now
+    return sum(len(entries) for entries in caches.values())
+
+
+def restore():
+    """Preloads the snapshot into the registered caches. Returns {cache name: entries added}."""
+    start = time.perf_counter()
+    try:
+        stored, reason = _read_snapshot(_model_version)
+        if stored is None:
+            stats["discarded"] = reason
+            if reason != "no snapshot": print(f"Warm start: discarded cache snapshot: {reason}.")
+            return {}
+        now, restored = time.time(), {}
+        for name, (_, preload) in _caches.items():
+            entries = stored.get(name, [])
+            fresh = _fresh(entries, now)
+            restored[name] = preload(fresh)
+            if len(fresh) < len(entries): stats["discarded"] = f"{len(entries) - len(fresh)} {name} entries older than {WARM_CACHE_MAX_AGE_S:.0f} s"
+        stats["restored"], stats["restore_ms"] = restored, (time.perf_counter() - start) * 1e3
+        print(f"Warm start: preloaded {', '.join(f'{n} {name}' for name, n in restored.items())} in {stats['restore_ms']:.0f} ms.")
+        return restored
+    except Exception as e:
+        print(f"Warning: cache warm start failed: {e}")
+        return {}
+    finally: _restored.set()
+
+
+def _snapshot_loop():
+    while True:
+        time.sleep(WARM_CACHE_SNAPSHOT_INTERVAL_S)
+        try: write_snapshot()
+        except Exception as e: print(f"Warning: cache snapshot failed: {e}")
+
+
+def start(model_version):
+    """Once per process: preloads the snapshot in the background, then snapshots periodically and at exit."""
+    global _started, _model_version
+    if _started or WARM_CACHE == "off" or model_version is None: _restored.set(); return
+    _started, _model_version = True, model_version
+    threading.Thread(target=restore, name="warm-start-restore", daemon=True).start()
+    threading.Thread(target=_snapshot_loop, name="warm-start-snapshot", daemon=True).start()
+    atexit.register(write_snapshot)
+
+
+def wait_restored(timeout=None):
+    """True once the startup preload has finished (or there was nothing to preload)."""
+    return _restored.wait(timeout)
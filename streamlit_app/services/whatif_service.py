@@ -0,0 +1,111 @@
+# streamlit_app/services/whatif_service.py
+# What-if explorer: scores every neighbor of a user's profile (one or two fields changed) in a
+# single batched pass through the risk and investment models, and reports the smallest changes
+# that move the user to another risk profile or make another investment suitable.
+import itertools
+import os
+import time
+from functools import lru_cache
+import pandas as pd
+try:
+    from . import db_service
+    from ai_integration import prediction
+except ImportError as e:
+    print(f"CRITICAL ERROR importing modules within whatif_service: {e}.")
+    raise
+
+WHATIF_FIELDS = prediction.RISK_FEATURE_ORDER + ['InvestmentKnowledge', 'LiquidityNeeds']
+WHATIF_FIELD_LABELS = {
+    'AgeRange': "Age Range", 'IncomeRange': "Income", 'SavingsLevel': "Savings Level", 'DebtLevel': "Debt Level",
+    'HasDependents': "Dependents", 'PrimaryGoal': "Primary Goal", 'TimeHorizonYears': "Time Horizon (years)",
+    'SelfReportedTolerance': "Risk Comfort", 'InvestmentKnowledge': "Investment Knowledge", 'LiquidityNeeds': "Liquidity Needs",
+}
+TIME_HORIZON_OPTIONS = (3, 7, 13, 18, 25) # Same buckets the Profile form stores
+MAX_CHANGES = 2
+WHATIF_BUDGET_S = float(os.environ.get("WHATIF_BUDGET_S", 1.0)) # Interactive budget; overruns are logged
+
+
+@lru_cache(maxsize=4)
+def _field_options(model_version):
+    """Values each what-if field can take, read from the fitted encoders so every neighbor is in-vocabulary."""
+    options = {'TimeHorizonYears': list(TIME_HORIZON_OPTIONS)}
+    for key in ("risk_preprocessor", "inv_preprocessor"):
+        for name, transformer, columns in prediction.AI_COMPONENTS[key].transformers_:
+            for column, categories in zip(columns, getattr(transformer, "categories_", [])):
+                if column in WHATIF_FIELDS: options.setdefault(column, [str(c) for c in categories])
+    return options
+
+
+def _neighbor_changes(profile, options, max_changes):
+    """Every combination of up to max_changes single-field edits, each as a tuple of (field, new_value)."""
+    edits = [(field, value) for field in WHATIF_FIELDS for value in options.get(field, []) if value != profile.get(field)]
+    changes = [(edit,) for edit in edits]
+    for size in range(2, max_changes + 1):
+        changes += [combo for combo in itertools.combinations(edits, size) if len({field for field, _ in combo}) == size]
+    return changes
+
+
+def _minimal(changes, outcomes):
+    """
+    Indices of the changes that produce an outcome no smaller change (a subset of their edits)
+    produces. outcomes[i] is None when changes[i] has no effect.
+    """
+    achieved = {} # outcome -> set of edit tuples that achieve it
+    minimal = []
+    for i in sorted(range(len(changes)), key=lambda i: len(changes[i])):
+        change, outcome = changes[i], outcomes[i]
+        if outcome is None: continue
+        smaller = achieved.setdefault(outcome, set())
+        if any(subset in smaller for size in range(1, len(change)) for subset in itertools.combinations(change, size)): continue
+        smaller.add(change); minimal.append(i)
+    return minimal
+
+
+def _describe(change, profile):
+    return [{"field": field, "label": WHATIF_FIELD_LABELS.get(field, field), "from": profile.get(field), "to": value} for field, value in change]
+
+
+def explore_profile(profile, max_changes=MAX_CHANGES):
+    """
+    What-if analysis for one profile dict (RISK_FEATURE_ORDER + InvestmentKnowledge/LiquidityNeeds).
+    Returns the current risk profile and suitable investments, the minimal 'risk_flips' and
+    per-investment 'unlocks', how many neighbors were scored and the elapsed time.
+    """
+    start = time.perf_counter()
+    profile = {field: profile.get(field) for field in WHATIF_FIELDS}
+    changes = _neighbor_changes(profile, _field_options(prediction.AI_COMPONENTS.get("model_version")), max_changes)
+    frame = pd.DataFrame([profile] + [{**profile, **dict(change)} for change in changes], columns=WHATIF_FIELDS)
+    risk_labels = prediction.predict_risk_profiles_batch(frame)
+    suitable = prediction.predict_investment_suitability_batch(frame, risk_labels)
+    base_risk, inv_types = str(risk_labels[0]), list(prediction.AVAILABLE_INVESTMENTS)
+
+    neighbor_risk = [str(label) for label in risk_labels[1:]]
+    risk_flips = [{"changes": _describe(changes[i], profile), "risk_profile": neighbor_risk[i]}
+                  for i in _minimal(changes, [label if label != base_risk else None for label in neighbor_risk])]
+    unlocks = []
+    for column, inv_type in enumerate(inv_types):
+        if suitable[0, column]: continue
+        unlocks += [{"investment": inv_type, "changes": _describe(changes[i], profile), "risk_profile": neighbor_risk[i]}
+                    for i in _minimal(changes, [True if now else None for now in suitable[1:, column]])]
+
+    elapsed_s = time.perf_counter() - start
+    if elapsed_s > WHATIF_BUDGET_S: print(f"Warning: what-if exploration took {elapsed_s:.2f}s (budget {WHATIF_BUDGET_S:.2f}s) for {len(changes)} neighbors.")
+    return {
+        "risk_profile": base_risk,
+        "suitable_investments": [inv_type for column, inv_type in enumerate(inv_types) if suitable[0, column]],
+        "risk_flips": risk_flips,
+        "unlocks": unlocks,
+        "neighbors_scored": len(changes),
+        "elapsed_ms": round(elapsed_s * 1000, 1),
+    }
+
+
+def get_what_if(user_id: int, max_changes=MAX_CHANGES):
+    """What-if analysis for a stored user profile; returns {'error': ...} when it cannot be computed."""
+    if prediction.AI_COMPONENTS.get("load_error"): return {"error": "AI components missing."}
+    profile = db_service.get_profile(user_id)
+    if not profile: return {"error": "User profile not found."}
+    try: return explore_profile(profile, max_changes)
+    except Exception as e:
+        print(f"Error during what-if exploration for user_id {user_id}: {e}")
+        return {"error": f"What-if analysis failed: {e}"}
@@ -1,15 +1,24 @@
 # streamlit_app/utils.py
 import streamlit as st
 import os
+from functools import lru_cache
 
-def load_css(file_name):
-    """Loads a CSS file and injects it into the Streamlit app."""
-    css_path = os.path.join(os.path.dirname(__file__), file_name)
+@lru_cache(maxsize=None)
+def _read_css(css_path):
+    """Reads a CSS file once per process; returns None if it cannot be read."""
     try:
         with open(css_path) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-        print(f"CSS loaded successfully from {file_name}")
+            css = f.read()
+        print(f"CSS loaded successfully from {css_path}")
+        return css
     except FileNotFoundError:
         print(f"Warning: CSS file not found at {css_path}")
     except Exception as e:
-        print(f"Error loading CSS: {e}")
\ No newline at end of file
+        print(f"Error loading CSS: {e}")
+    return None
+
+def load_css(file_name):
+    """Injects a CSS file into the Streamlit app (the file is only read from disk on first use)."""
+    css = _read_css(os.path.join(os.path.dirname(__file__), file_name))
+    if css is not None:
+        st.markdown(f'<style>{css}</style>', unsafe_allow_html=True)
@@ -0,0 +1,16 @@
+# tests/conftest.py
+# The app's modules import each other from streamlit_app/ (its runtime root). Tests run against a throwaway
+# SQLite database and leave no audit log, monitoring snapshot or warm-cache snapshot behind.
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_app')
+if APP_DIR not in sys.path: sys.path.insert(0, APP_DIR)
+
+_work_dir = tempfile.mkdtemp(prefix="ai_advisor_tests_")
+os.environ.setdefault("DATABASE_URL_STREAMLIT", f"sqlite:///{os.path.join(_work_dir, 'test.db')}")
+os.environ.setdefault("MONITORING_DIR", os.path.join(_work_dir, "monitoring"))
+os.environ["AUDIT_SINK"] = "off"
+os.environ["WARM_CACHE"] = "off"
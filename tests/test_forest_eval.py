@@ -0,0 +1,26 @@
+# tests/test_forest_eval.py
+# The array-backed forest kernel must return exactly sklearn's predict_proba for the risk model, on the
+# single-threaded and the parallel path (the check benchmarks/bench_forest_eval.py prints per batch size).
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from ai_integration import forest_eval, prediction
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture(scope="module")
+def model_and_rows():
+    model = joblib.load(prediction.RISK_MODEL_PATH)
+    encoded = joblib.load(prediction.RISK_PREPROCESSOR_PATH).transform(
+        pd.read_csv(os.path.join(PROJECT_ROOT, 'data', 'user_profile_data_india.csv'))[prediction.RISK_FEATURE_ORDER])
+    return model, encoded.toarray() if hasattr(encoded, "toarray") else encoded
+
+
+@pytest.mark.parametrize("batch_size", [1, 100, 4 * forest_eval.PARALLEL_MIN_ROWS])
+def test_forest_eval_matches_sklearn_exactly(model_and_rows, batch_size):
+    model, encoded = model_and_rows
+    X = encoded[np.random.default_rng(42).integers(0, len(encoded), size=batch_size)]
+    assert np.array_equal(forest_eval.predict_proba(forest_eval.flatten_forest(model), X), model.predict_proba(X))
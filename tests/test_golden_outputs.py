@@ -0,0 +1,23 @@
+# tests/test_golden_outputs.py
+# The advice outputs for the stored sample must match benchmarks/golden/advice_corpus.json exactly; see
+# benchmarks/golden_outputs.py (whose --update rewrites the corpus after an intended change).
+import contextlib
+import io
+import json
+import os
+import sys
+import pandas as pd
+from ai_integration import market_inputs, prediction
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'benchmarks')) # benchmarks/ is scripts, not a package
+import golden_outputs
+
+
+def test_advice_matches_golden_corpus(monkeypatch, tmp_path):
+    monkeypatch.setattr(market_inputs, "NAV_STORE_DIR", str(tmp_path / "no_nav_store")) # Assumed returns, as in the corpus
+    with open(golden_outputs.CORPUS_FILE, encoding="utf-8") as f: expected = json.load(f)
+    profiles = pd.read_csv(golden_outputs.PROFILE_DATA_FILE).set_index('UserID', drop=False).loc[[entry["user_id"] for entry in expected]]
+    with contextlib.redirect_stdout(io.StringIO()):
+        actual = json.loads(json.dumps(golden_outputs.build_corpus(prediction, profiles)))
+    assert golden_outputs.differences(expected, actual) == []
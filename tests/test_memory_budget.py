@@ -0,0 +1,14 @@
+# tests/test_memory_budget.py
+# The AI stack's footprint (import costs in a fresh interpreter plus the loaded components) must stay within
+# MEMORY_BUDGET_MIB (AI_MEMORY_BUDGET_MIB in the environment): the same sum the app warns about at startup
+# and that `python -m ai_integration.memory_report` checks.
+from ai_integration import memory_report, prediction
+
+
+def test_ai_footprint_within_budget():
+    components = prediction.AI_COMPONENTS["memory"]
+    assert prediction.AI_COMPONENTS["load_error"] is None, prediction.AI_COMPONENTS["load_error"]
+    imports = memory_report.import_costs()
+    footprint = memory_report.footprint_mib(components, imports)
+    report = memory_report.format_report({"Imports (fresh interpreter)": imports, "AI components": components})
+    assert footprint <= memory_report.MEMORY_BUDGET_MIB, report